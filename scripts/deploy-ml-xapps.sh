@@ -85,18 +85,18 @@ build_images() {
     # Build QoE Predictor
     log_info "Building QoE Predictor image..."
     if [ -f "${PROJECT_ROOT}/xapps/qoe-predictor/Dockerfile.optimized" ]; then
-        docker build -f "${PROJECT_ROOT}/xapps/qoe-predictor/Dockerfile.optimized" -t ${QOE_IMAGE} "${PROJECT_ROOT}/xapps/qoe-predictor"
+        docker build -f "${PROJECT_ROOT}/xapps/qoe-predictor/Dockerfile.optimized" -t ${QOE_IMAGE} "${PROJECT_ROOT}/xapps"
     else
-        docker build -t ${QOE_IMAGE} "${PROJECT_ROOT}/xapps/qoe-predictor"
+        docker build -f "${PROJECT_ROOT}/xapps/qoe-predictor/Dockerfile" -t ${QOE_IMAGE} "${PROJECT_ROOT}/xapps"
     fi
     docker push ${QOE_IMAGE}
 
     # Build Federated Learning
     log_info "Building Federated Learning image..."
     if [ -f "${PROJECT_ROOT}/xapps/federated-learning/Dockerfile.optimized" ]; then
-        docker build -f "${PROJECT_ROOT}/xapps/federated-learning/Dockerfile.optimized" -t ${FL_IMAGE} "${PROJECT_ROOT}/xapps/federated-learning"
+        docker build -f "${PROJECT_ROOT}/xapps/federated-learning/Dockerfile.optimized" -t ${FL_IMAGE} "${PROJECT_ROOT}/xapps"
     else
-        docker build -t ${FL_IMAGE} "${PROJECT_ROOT}/xapps/federated-learning"
+        docker build -f "${PROJECT_ROOT}/xapps/federated-learning/Dockerfile" -t ${FL_IMAGE} "${PROJECT_ROOT}/xapps"
     fi
     docker push ${FL_IMAGE}
 
@@ -61,9 +61,13 @@ build_and_push() {
 
     cd "$PROJECT_ROOT/xapps/$xapp_dir"
 
-    # 構建映像
+    # 構建映像（使用 xapps/common 的 Dockerfile 以 xapps/ 為 build context）
+    local context="."
+    if grep -q '^COPY common/' Dockerfile; then
+        context=".."
+    fi
     log_info "構建 Docker 映像..."
-    if docker build -t $REGISTRY/xapp-$image_name:1.0.0 -t $REGISTRY/xapp-$image_name:latest -f Dockerfile . 2>&1 | tail -20; then
+    if docker build -t $REGISTRY/xapp-$image_name:1.0.0 -t $REGISTRY/xapp-$image_name:latest -f Dockerfile $context 2>&1 | tail -20; then
         log_info "✓ Docker 映像構建成功"
     else
         log_error "✗ Docker 映像構建失敗"
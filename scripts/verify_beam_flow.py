@@ -93,7 +93,8 @@ def demonstrate_beam_generation():
 
     print("  Redis Keys:")
     print(f"    kpi:{cell_id}:L1-RSRP.beam:beam_{beam_id}")
-    print(f"    kpi:timeline:{cell_id}:beam_{beam_id}")
+    print(f"    kpi:timeline:{cell_id}:beam_{beam_id}:L1-RSRP.beam")
+    print(f"    kpi:idx:cell:{cell_id}:beams (beam index)")
     print()
 
     print("  InfluxDB Tags:")
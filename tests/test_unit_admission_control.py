@@ -0,0 +1,131 @@
+"""
+Unit Tests for HTTP admission control
+Tests bounded concurrency, queue limits, shedding and control-plane priority
+"""
+
+import os
+import sys
+import time
+import threading
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../xapps/common'))
+
+from admission_control import AdmissionController, LoadShed, Priority, message_priority
+
+
+def hold(controller, priority, started, release, results, name):
+    """Acquire a slot, record the outcome, keep the slot until released"""
+    try:
+        with controller.admit(priority):
+            results.append(name)
+            started.set()
+            release.wait(5)
+    except LoadShed as e:
+        results.append((name, e.status_code))
+        started.set()
+
+
+def wait_queued(controller, count):
+    deadline = time.monotonic() + 2
+    while controller.get_stats()['queued'] < count and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+class TestMessagePriority:
+    """Test suite for message_priority"""
+
+    @pytest.mark.parametrize('msg_type,priority', [
+        (12011, Priority.CONTROL), ('12041', Priority.CONTROL), ('20010', Priority.CONTROL),
+        (12050, Priority.REPORT), (None, Priority.REPORT), ('bogus', Priority.REPORT),
+    ])
+    def test_classification(self, msg_type, priority):
+        """Control-plane message types are prioritized, anything else is a report"""
+        assert message_priority(msg_type) == priority
+
+
+class TestAdmissionController:
+    """Test suite for AdmissionController"""
+
+    def test_admits_within_limit(self):
+        """Requests within max_concurrent run immediately and release their slot"""
+        controller = AdmissionController(max_concurrent=2, max_queue=0)
+        with controller.admit():
+            with controller.admit():
+                assert controller.get_stats()['in_flight'] == 2
+        assert controller.get_stats()['in_flight'] == 0
+        assert controller.get_stats()['admitted'] == 2
+
+    def test_queue_full_returns_429(self):
+        """With every slot busy and no queue, requests are shed with 429"""
+        controller = AdmissionController(max_concurrent=1, max_queue=0, retry_after_s=2)
+        with controller.admit():
+            with pytest.raises(LoadShed) as shed:
+                controller.acquire()
+        assert shed.value.status_code == 429
+        assert shed.value.headers == {'Retry-After': '2'}
+        assert controller.get_stats()['shed_queue_full'] == 1
+
+    def test_queue_timeout_returns_503(self):
+        """A queued request that gets no slot in time is shed with 503"""
+        controller = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout_s=0.05)
+        with controller.admit():
+            with pytest.raises(LoadShed) as shed:
+                controller.acquire()
+        assert shed.value.status_code == 503
+        stats = controller.get_stats()
+        assert stats['shed_timeout'] == 1 and stats['queued'] == 0
+
+    def test_queued_request_runs_when_slot_frees(self):
+        """Waiting requests are admitted as soon as a slot is released"""
+        controller = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout_s=2)
+        results = []
+        release = threading.Event()
+        controller.acquire()
+        worker = threading.Thread(target=hold, args=(controller, Priority.REPORT,
+                                                     threading.Event(), release, results, 'r1'))
+        worker.start()
+        wait_queued(controller, 1)
+        controller.release()
+        release.set()
+        worker.join(2)
+        assert results == ['r1']
+
+    def test_control_served_before_reports(self):
+        """Queued control-plane messages are admitted ahead of earlier reports"""
+        controller = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout_s=2,
+                                         control_reserve=0)
+        results = []
+        release = threading.Event()
+        controller.acquire()
+
+        threads = []
+        for name, priority in [('report', Priority.REPORT), ('control', Priority.CONTROL)]:
+            thread = threading.Thread(target=hold, args=(controller, priority, threading.Event(),
+                                                         release, results, name))
+            thread.start()
+            threads.append(thread)
+            wait_queued(controller, len(threads))
+
+        controller.release()
+        release.set()
+        for thread in threads:
+            thread.join(2)
+        assert results == ['control', 'report']
+
+    def test_control_reserve(self):
+        """Control messages use reserved slots and queue places reports cannot"""
+        controller = AdmissionController(max_concurrent=1, max_queue=0, control_reserve=1)
+        controller.acquire(Priority.REPORT)
+        with pytest.raises(LoadShed):
+            controller.acquire(Priority.REPORT)
+        controller.acquire(Priority.CONTROL)
+        assert controller.get_stats()['in_flight'] == 2
+
+    def test_from_config(self):
+        """Config section maps onto the controller bounds"""
+        controller = AdmissionController.from_config({'max_concurrent': 3, 'max_queue': 5,
+                                                      'retry_after_s': 0.2})
+        assert controller.max_concurrent == 3
+        assert controller.max_queue == 5
+        assert controller.retry_after == 1
@@ -0,0 +1,107 @@
+"""
+Unit Tests for KPIMON deduplicating alarm sink
+Tests dedup windows, counters, list trimming and pipelined writes
+"""
+
+import os
+import sys
+import json
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../xapps/kpimon-go-xapp/src'))
+
+from alarm_sink import AlarmSink
+
+RSRP_LOW = {'kpi': 'UE.RSRP', 'value': -115.0, 'threshold': -110.0, 'type': 'below_threshold'}
+
+
+def submitted(writer):
+    """All commands submitted to a mocked RedisBatchWriter"""
+    return [cmd for call in writer.submit.call_args_list for cmd in call.args[0]]
+
+
+class TestAlarmSink:
+    """Test suite for AlarmSink"""
+
+    def test_first_alarm_written_with_trim(self):
+        """A new alarm is pushed, trimmed and expired in one pipeline"""
+        writer = MagicMock()
+        sink = AlarmSink(writer, max_list_length=100, ttl=3600)
+
+        alarm = sink.raise_alarm('cell_001', [dict(RSRP_LOW, beam_id=2)], beam_id=2, now=1000.0)
+        sink.flush(now=1000.0)
+
+        writer.submit.assert_called_once()
+        commands = submitted(writer)
+        methods = [(method, args[0]) for method, args in commands]
+        assert ('rpush', 'alarms:cell_001') in methods
+        assert ('ltrim', 'alarms:cell_001') in methods
+        assert ('rpush', 'alarms:cell_001:beam_2') in methods
+        assert ('ltrim', 'alarms:cell_001', -100, -1) in [(m, *a) for m, a in commands]
+
+        stored = json.loads(commands[0][1][1])
+        assert stored['anomalies'][0]['count'] == 1
+        assert stored == alarm
+
+    def test_timestamps_are_utc(self):
+        """Alarm times carry an explicit UTC offset, independent of the host zone"""
+        sink = AlarmSink(MagicMock())
+        alarm = sink.raise_alarm('cell_001', [RSRP_LOW], now=1763546400.0)
+        assert alarm['timestamp'] == '2025-11-19T10:00:00+00:00'
+        assert alarm['anomalies'][0]['first_seen'] == '2025-11-19T10:00:00+00:00'
+
+    def test_repeats_suppressed_within_window(self):
+        """Repeated anomalies only bump counters until the window elapses"""
+        writer = MagicMock()
+        sink = AlarmSink(writer, dedup_window_s=60, summary_interval_s=1000)
+
+        assert sink.raise_alarm('cell_001', [RSRP_LOW], now=1000.0) is not None
+        for t in range(1, 50):
+            assert sink.raise_alarm('cell_001', [RSRP_LOW], now=1000.0 + t) is None
+
+        again = sink.raise_alarm('cell_001', [RSRP_LOW], now=1060.0)
+        assert again['anomalies'][0]['count'] == 51
+        assert sink.total_emitted == 2
+        assert sink.total_suppressed == 49
+
+    def test_dedup_key_includes_beam_and_type(self):
+        """Different beams, KPIs or anomaly types are separate alarms"""
+        sink = AlarmSink(MagicMock())
+        sink.raise_alarm('cell_001', [RSRP_LOW], beam_id=1, now=1000.0)
+        assert sink.raise_alarm('cell_001', [RSRP_LOW], beam_id=2, now=1000.0) is not None
+        assert sink.raise_alarm('cell_001', [dict(RSRP_LOW, type='below_expected')],
+                                beam_id=1, now=1000.0) is not None
+        assert sink.raise_alarm('cell_002', [RSRP_LOW], beam_id=1, now=1000.0) is not None
+
+    def test_mixed_anomalies_only_emit_new_ones(self):
+        """An alarm carries only the anomalies that were not suppressed"""
+        sink = AlarmSink(MagicMock())
+        sink.raise_alarm('cell_001', [RSRP_LOW], now=1000.0)
+        loss = {'kpi': 'DRB.PacketLossDl', 'value': 9.0, 'threshold': 5.0, 'type': 'above_threshold'}
+
+        alarm = sink.raise_alarm('cell_001', [RSRP_LOW, loss], now=1001.0)
+        assert [a['kpi'] for a in alarm['anomalies']] == ['DRB.PacketLossDl']
+
+    def test_summaries_written_and_expired(self):
+        """Summaries carry counters; alarms quiet for a window are forgotten"""
+        writer = MagicMock()
+        sink = AlarmSink(writer, dedup_window_s=60, summary_interval_s=10)
+        for t in range(5):
+            sink.raise_alarm('cell_001', [RSRP_LOW], beam_id=3, now=1000.0 + t)
+        sink.flush(now=1010.0)
+
+        hset = [args for method, args in submitted(writer) if method == 'hset']
+        assert hset[0][0] == 'alarms:summary:cell_001'
+        summary = json.loads(hset[0][3]['3|UE.RSRP|below_threshold'])
+        assert summary['count'] == 5
+        assert summary['last_value'] == -115.0
+
+        sink.flush(now=1100.0)
+        assert sink.get_stats()['active_alarms'] == 0
+
+    def test_active_alarms_bounded(self):
+        """Alarms beyond max_active are written without being tracked"""
+        sink = AlarmSink(MagicMock(), max_active=2)
+        for i in range(5):
+            assert sink.raise_alarm(f'cell_{i}', [RSRP_LOW], now=1000.0) is not None
+        assert sink.get_stats()['active_alarms'] == 2
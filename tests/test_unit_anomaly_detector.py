@@ -0,0 +1,122 @@
+"""
+Unit Tests for KPIMON vectorized anomaly detector
+Tests batch threshold evaluation, overrides and rolling z-score detection
+"""
+
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../xapps/kpimon-go-xapp/src'))
+
+from anomaly_detector import AnomalyDetector
+from influx_writer import KPIPoint
+from kpi_catalog import KPI_DEFINITIONS, KPICatalog
+
+
+def point(kpi_name, value, cell_id='cell_001', beam_id='n/a'):
+    kpi_def = KPI_DEFINITIONS[kpi_name]
+    return KPIPoint('2025-11-19T10:00:00', cell_id, 'ue_001', beam_id, kpi_name,
+                    kpi_def['type'], value, kpi_def.get('beam_specific', False))
+
+
+@pytest.fixture
+def catalog():
+    return KPICatalog()
+
+
+class TestThresholds:
+    """Test suite for batch threshold evaluation"""
+
+    def test_matches_legacy_rules(self, catalog):
+        """Default thresholds and directions reproduce the former rules"""
+        detector = AnomalyDetector(catalog)
+        alarms = detector.detect([
+            point('DRB.PacketLossDl', 7.5),     # above 5%
+            point('DRB.PacketLossDl', 1.0),
+            point('UE.RSRP', -115.0),           # below -110 dBm
+            point('UE.RSRP', -90.0),
+            point('RRC.ConnEstabSucc', 90.0),   # below 95%
+            point('DRB.UEThpDl', 1e9),          # no threshold
+            point('L1-SINR.beam', 5.0, beam_id=2),
+        ])
+
+        cell_alarms = alarms[('cell_001', 'n/a')]
+        assert [a['kpi'] for a in cell_alarms] == ['DRB.PacketLossDl', 'UE.RSRP', 'RRC.ConnEstabSucc']
+        assert cell_alarms[0]['type'] == 'above_threshold'
+        assert cell_alarms[1] == {'kpi': 'UE.RSRP', 'value': -115.0, 'threshold': -110.0,
+                                  'type': 'below_threshold', 'beam_id': 'n/a'}
+        assert alarms[('cell_001', 2)][0]['threshold'] == 10.0
+
+    def test_invalid_values_ignored(self, catalog):
+        """Missing, non-numeric and unknown measurements never alarm"""
+        detector = AnomalyDetector(catalog)
+        records = [point('UE.RSRP', None), point('UE.RSRP', 'bad'), point('UE.RSRP', float('nan'))]
+        records.append(KPIPoint('t', 'cell_001', None, 1, 'Unknown.KPI', 'x', -1e9, False))
+        assert detector.detect(records) == {}
+        assert detector.detect([]) == {}
+
+    def test_cell_and_beam_overrides(self, catalog):
+        """Beam overrides take precedence over cell overrides and defaults"""
+        detector = AnomalyDetector(catalog, overrides=[
+            {'cell_id': 'cell_001', 'kpi': 'UE.RSRP', 'threshold': -100.0},
+            {'cell_id': 'cell_001', 'beam_id': 3, 'kpi': 'UE.RSRP', 'threshold': -120.0},
+        ])
+        alarms = detector.detect([
+            point('UE.RSRP', -105.0),                      # cell override flags
+            point('UE.RSRP', -105.0, beam_id=3),           # beam override does not
+            point('UE.RSRP', -105.0, cell_id='cell_002'),  # default does not
+        ])
+        assert list(alarms) == [('cell_001', 'n/a')]
+        assert alarms[('cell_001', 'n/a')][0]['threshold'] == -100.0
+
+    def test_invalid_override_rejected(self, catalog):
+        """Overrides for unknown KPIs or directions fail fast"""
+        with pytest.raises(ValueError):
+            AnomalyDetector(catalog, overrides=[{'cell_id': 'c', 'kpi': 'X', 'threshold': 1}])
+        with pytest.raises(ValueError):
+            AnomalyDetector(catalog).add_override('c', 'UE.RSRP', 1, direction='sideways')
+
+
+class TestZScore:
+    """Test suite for rolling EWMA z-score detection"""
+
+    def test_spike_detected_after_warmup(self, catalog):
+        """A spike far outside the series EWMA is flagged once warmed up"""
+        detector = AnomalyDetector(catalog, zscore_enabled=True, ewma_alpha=0.2,
+                                   zscore_threshold=4.0, min_samples=10)
+        baseline = [point('DRB.UEThpDl', 50.0 + (i % 3)) for i in range(30)]
+        assert detector.detect(baseline) == {}
+
+        alarms = detector.detect([point('DRB.UEThpDl', 500.0)])
+        anomaly = alarms[('cell_001', 'n/a')][0]
+        assert anomaly['type'] == 'above_expected'
+        assert anomaly['zscore'] > 4.0
+
+    def test_no_scores_before_min_samples(self, catalog):
+        """Series with too few samples are not scored"""
+        detector = AnomalyDetector(catalog, zscore_enabled=True, min_samples=50)
+        records = [point('DRB.UEThpDl', 50.0 + (i % 2)) for i in range(20)]
+        records.append(point('DRB.UEThpDl', 500.0))
+        assert detector.detect(records) == {}
+
+    def test_batch_matches_sequential_updates(self, catalog):
+        """Updating within one batch equals feeding points one at a time"""
+        values = [10.0, 12.0, 11.0, 13.0, 9.0, 30.0]
+        batched = AnomalyDetector(catalog, zscore_enabled=True, min_samples=1)
+        sequential = AnomalyDetector(catalog, zscore_enabled=True, min_samples=1)
+
+        batched.detect([point('DRB.UEThpDl', v, cell_id=c) for v in values for c in ('a', 'b')])
+        for v in values:
+            for c in ('a', 'b'):
+                sequential.detect([point('DRB.UEThpDl', v, cell_id=c)])
+
+        assert batched._mean[:2].tolist() == pytest.approx(sequential._mean[:2].tolist())
+        assert batched._var[:2].tolist() == pytest.approx(sequential._var[:2].tolist())
+
+    def test_series_state_bounded(self, catalog):
+        """Series state is reset instead of growing past max_series"""
+        detector = AnomalyDetector(catalog, zscore_enabled=True, max_series=5)
+        for i in range(20):
+            detector.detect([point('DRB.UEThpDl', 1.0, cell_id=f'cell_{i}')])
+        assert detector.get_stats()['tracked_series'] <= 5
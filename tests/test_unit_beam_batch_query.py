@@ -0,0 +1,113 @@
+"""
+Unit Tests for KPIMON multi-beam historical queries
+Tests the grouped Flux query, per-beam response layout and /api/beam/kpi/batch
+"""
+
+import os
+import sys
+import pytest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../xapps/kpimon-go-xapp/src'))
+
+import beam_query_api
+from beam_query_api import BeamQueryService
+
+STOP = datetime(2025, 11, 19, 10, 0, tzinfo=timezone.utc)
+
+
+def table(beam_id, kpi_name, value):
+    """Flux table of one aggregated (beam, KPI) series (no _time column)"""
+    record = SimpleNamespace(values={'beam_id': str(beam_id), 'kpi_name': kpi_name,
+                                     '_value': value, '_stop': STOP})
+    return SimpleNamespace(records=[record])
+
+
+@pytest.fixture
+def service():
+    influx = MagicMock()
+    influx.query_api.return_value.query.return_value = [
+        table(1, 'UE.RSRP', -90.0),
+        table(1, 'UE.SINR', 15.0),
+        table(2, 'UE.RSRP', -101.0),
+        table('n/a', 'UE.RSRP', -80.0),
+    ]
+    return BeamQueryService(MagicMock(), influx, 'oran', 'kpimon')
+
+
+class TestHistoricalBeamsKPI:
+    """Test suite for BeamQueryService.get_historical_beams_kpi"""
+
+    def test_single_grouped_query(self, service):
+        """All beams are fetched with one Flux query grouped by beam and KPI"""
+        beams = service.get_historical_beams_kpi([1, 2, 3], ['rsrp', 'sinr'], ['cell_001'],
+                                                 'last_1h', 'mean')
+        service.query_api.query.assert_called_once()
+        flux = service.query_api.query.call_args.args[0]
+        assert 'range(start: -1h)' in flux
+        assert 'r.beam_id =~ /^(1|2|3)$/' in flux
+        assert r'r.kpi_name =~ /^(UE\.RSRP|UE\.SINR)$/' in flux
+        assert 'r.cell_id =~ /^(cell_001)$/' in flux
+        assert 'group(columns: ["beam_id", "kpi_name"])' in flux
+        assert '|> mean()' in flux
+
+        assert sorted(beams) == [1, 2]
+        assert beams[1]['signal_quality']['rsrp'] == {
+            'value': -90.0, 'timestamp': STOP.isoformat(), 'sample_count': 1,
+            'unit': 'dBm', 'quality': 'good'
+        }
+        assert beams[1]['signal_quality']['sinr']['quality'] == 'good'
+        assert beams[2]['signal_quality']['rsrp']['quality'] == 'fair'
+
+    def test_all_beams_and_kpis(self, service):
+        """Without beam or cell filters the query only restricts the KPI set"""
+        service.get_historical_beams_kpi(None, ['all'], time_range='last_5m', aggregation='raw')
+        flux = service.query_api.query.call_args.args[0]
+        assert 'r.beam_id' not in flux and 'r.cell_id' not in flux
+        assert 'DRB\\.UEThpUl' in flux
+        assert '|> mean()' not in flux
+
+    def test_unknown_kpi_type(self, service):
+        """Unknown KPI types are rejected before querying"""
+        with pytest.raises(ValueError):
+            service.get_historical_beams_kpi([1], ['rsrp', 'bogus'])
+        service.query_api.query.assert_not_called()
+
+    def test_single_beam_aggregate_timestamp(self, service):
+        """Aggregated single-beam results use the window stop as timestamp"""
+        service.query_api.query.return_value = [table(1, 'UE.RSRP', -90.0)]
+        data = service.get_historical_beam_kpi(1, ['all'], 'last_15m', 'mean')
+        assert data['signal_quality']['rsrp']['timestamp'] == STOP.isoformat()
+
+
+class TestBatchRoute:
+    """Test suite for GET /api/beam/kpi/batch"""
+
+    @pytest.fixture
+    def client(self, service, monkeypatch):
+        monkeypatch.setattr(beam_query_api, 'beam_service', service)
+        app = Flask('test_beam_batch')
+        app.register_blueprint(beam_query_api.beam_api)
+        return app.test_client()
+
+    def test_batch_response(self, client):
+        """Beams come back in one response, beams without data listed as missing"""
+        response = client.get('/api/beam/kpi/batch?beam_id=1,2,3&kpi_type=rsrp,sinr')
+        assert response.status_code == 200
+        body = response.get_json()
+        assert [b['beam_id'] for b in body['beams']] == [1, 2]
+        assert body['count'] == 2
+        assert body['missing'] == [3]
+        assert body['query_params']['time_range'] == 'last_15m'
+
+    @pytest.mark.parametrize('query', [
+        'beam_id=0', 'beam_id=1,x', 'kpi_type=bogus', 'time_range=current',
+    ])
+    def test_invalid_parameters(self, client, query):
+        """Invalid beams, KPI types and the current range are rejected"""
+        response = client.get(f'/api/beam/kpi/batch?{query}')
+        assert response.status_code == 400
+        assert response.get_json()['error_code'] == 'INVALID_PARAMETER'
@@ -0,0 +1,151 @@
+"""
+Unit Tests for KPIMON beam/cell secondary indexes
+Tests index maintenance commands and index-based beam queries
+"""
+
+import os
+import sys
+import json
+import pytest
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../xapps/kpimon-go-xapp/src'))
+
+from beam_index import BeamIndex, beam_kpi_key, cell_beams_key, beam_cells_key, beam_ues_key
+from beam_query_api import BeamQueryService
+
+
+def kpi_record(cell_id, beam_id, kpi_name, value):
+    """KPI record as stored by KPIMON"""
+    return json.dumps({
+        'timestamp': '2025-11-19T10:00:00',
+        'cell_id': cell_id,
+        'beam_id': beam_id,
+        'kpi_name': kpi_name,
+        'kpi_value': value
+    })
+
+
+class TestBeamIndex:
+    """Test suite for BeamIndex write commands"""
+
+    def test_index_commands_cover_all_indexes(self):
+        """One indication updates beam, cell and UE indexes"""
+        index = BeamIndex(ttl=300)
+        commands = index.index_commands('cell_001', {1, 2}, ue_id='ue_001', now=1000.0)
+        written = {(method, args[0]) for method, args in commands}
+
+        assert ('sadd', 'kpi:idx:beams') in written
+        assert ('sadd', 'kpi:idx:cells') in written
+        assert ('sadd', cell_beams_key('cell_001')) in written
+        assert ('sadd', beam_cells_key(1)) in written
+        assert ('sadd', beam_cells_key(2)) in written
+        assert ('zadd', beam_ues_key(1, 'cell_001')) in written
+        assert ('zremrangebyscore', beam_ues_key(2, 'cell_001')) in written
+
+        # Every index key gets its TTL refreshed
+        expired = {args[0] for method, args in commands if method == 'expire'}
+        indexed = {args[0] for method, args in commands if method in ('sadd', 'zadd')}
+        assert indexed <= expired
+
+    def test_no_beam_is_not_indexed(self):
+        """Indications without beam information leave the indexes untouched"""
+        index = BeamIndex()
+        assert index.index_commands('cell_001', {'n/a'}, ue_id='ue_001') == []
+        assert index.index_commands('cell_001', set()) == []
+
+    def test_ue_entries_expire_by_score(self):
+        """Stale UE associations are trimmed by last-seen score"""
+        index = BeamIndex(ttl=300)
+        commands = index.index_commands('cell_001', {3}, ue_id='ue_009', now=1000.0)
+        trims = [args for method, args in commands if method == 'zremrangebyscore']
+        assert trims == [(beam_ues_key(3, 'cell_001'), '-inf', 700.0)]
+
+    def test_list_beams_skips_malformed_members(self):
+        """Index members that are not beam ids are ignored"""
+        redis_client = MagicMock()
+        redis_client.smembers.return_value = {'1', '7', 'n/a'}
+        assert BeamIndex().list_beams(redis_client, 'cell_001') == {1, 7}
+        redis_client.smembers.assert_called_once_with(cell_beams_key('cell_001'))
+
+
+class TestBeamQueryServiceIndexedReads:
+    """Test suite for index-based current KPI queries"""
+
+    @pytest.fixture
+    def redis_client(self):
+        client = MagicMock()
+        client.smembers.return_value = {'cell_001'}
+        client.zcount.return_value = 4
+
+        def mget(keys):
+            records = {
+                beam_kpi_key(1, 'cell_001', 'UE.RSRP'): kpi_record('cell_001', 1, 'UE.RSRP', -90.0),
+                beam_kpi_key(1, 'cell_001', 'UE.SINR'): kpi_record('cell_001', 1, 'UE.SINR', 15.0),
+            }
+            return [records.get(key) for key in keys]
+
+        client.mget.side_effect = mget
+        return client
+
+    def test_current_beam_kpi_uses_index_and_mget(self, redis_client):
+        """Current KPIs are resolved without KEYS or per-key GET"""
+        service = BeamQueryService(redis_client, None, 'oran', 'kpimon')
+        data = service.get_current_beam_kpi(1, ['all'])
+
+        redis_client.keys.assert_not_called()
+        redis_client.get.assert_not_called()
+        redis_client.mget.assert_called_once()
+
+        assert data['signal_quality']['rsrp']['value'] == -90.0
+        assert data['signal_quality']['rsrp']['quality'] == 'good'
+        assert data['signal_quality']['sinr']['quality'] == 'good'
+        assert data['metadata'] == {'cell_id': 'cell_001', 'beam_id': 1, 'ue_count': 4}
+
+    def test_unknown_beam_returns_none(self, redis_client):
+        """A beam absent from the index has no current data"""
+        redis_client.smembers.return_value = set()
+        service = BeamQueryService(redis_client, None, 'oran', 'kpimon')
+        assert service.get_current_beam_kpi(9, ['all']) is None
+        redis_client.mget.assert_not_called()
+
+
+class TestBeamListSummaries:
+    """Test suite for the batched /api/beam/list summary path"""
+
+    @pytest.fixture
+    def redis_client(self):
+        client = MagicMock()
+        client.smembers.return_value = {'1', '2', '3'}
+        records = {
+            beam_kpi_key(1, 'cell_001', 'UE.RSRP'): kpi_record('cell_001', 1, 'UE.RSRP', -90.0),
+            beam_kpi_key(1, 'cell_001', 'UE.SINR'): kpi_record('cell_001', 1, 'UE.SINR', 18.0),
+            beam_kpi_key(2, 'cell_001', 'UE.RSRP'): kpi_record('cell_001', 2, 'UE.RSRP', -108.0),
+        }
+        pipe = MagicMock()
+        queued = []
+        pipe.mget.side_effect = lambda keys: queued.append([records.get(k) for k in keys])
+        pipe.zcount.side_effect = lambda *args: queued.append(2)
+        pipe.execute.side_effect = lambda: list(queued)
+        client.pipeline.return_value = pipe
+        return client
+
+    def test_single_batched_round(self, redis_client):
+        """All beams of a cell are summarized from one pipeline"""
+        service = BeamQueryService(redis_client, None, 'oran', 'kpimon')
+        beams = service.list_active_beams('cell_001')
+
+        redis_client.pipeline.assert_called_once()
+        redis_client.get.assert_not_called()
+        redis_client.mget.assert_not_called()
+
+        # Beam 3 is indexed but its records have expired
+        assert [b['beam_id'] for b in beams] == [1, 2]
+        assert beams[0]['summary'] == {'rsrp_avg': -90.0, 'sinr_avg': 18.0, 'ue_count': 2}
+        assert beams[0]['cell_id'] == 'cell_001'
+
+    def test_min_rsrp_filter(self, redis_client):
+        """Beams below the RSRP threshold are filtered server-side"""
+        service = BeamQueryService(redis_client, None, 'oran', 'kpimon')
+        beams = service.list_active_beams('cell_001', min_rsrp=-100.0)
+        assert [b['beam_id'] for b in beams] == [1]
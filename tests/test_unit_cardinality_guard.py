@@ -0,0 +1,142 @@
+"""
+Unit Tests for KPIMON Prometheus cardinality guard
+Tests series caps, LRU/stale eviction and beam bucketing
+"""
+
+import os
+import sys
+import subprocess
+import textwrap
+import pytest
+from prometheus_client import CollectorRegistry, Gauge
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../xapps/kpimon-go-xapp/src'))
+
+from cardinality_guard import CardinalityGuard
+
+
+def make_gauge():
+    registry = CollectorRegistry()
+    gauge = Gauge('kpimon_kpi_value', 'Current KPI values',
+                  ['kpi_type', 'cell_id', 'beam_id'], registry=registry)
+    return gauge, registry
+
+
+def exported(registry):
+    """Label sets exported by the registry"""
+    return {
+        (s.labels['kpi_type'], s.labels['cell_id'], s.labels['beam_id']): s.value
+        for metric in registry.collect() for s in metric.samples
+    }
+
+
+class TestCardinalityGuard:
+    """Test suite for CardinalityGuard"""
+
+    def test_sets_values(self):
+        """Values are exported under their labels"""
+        gauge, registry = make_gauge()
+        guard = CardinalityGuard(gauge)
+        guard.set('UE.RSRP', 'cell_001', '1', -95.0)
+        guard.set('UE.RSRP', 'cell_001', '1', -96.0)
+        assert exported(registry) == {('UE.RSRP', 'cell_001', '1'): -96.0}
+
+    def test_capacity_evicts_least_recently_updated(self):
+        """The series updated longest ago is removed when the cap is hit"""
+        gauge, registry = make_gauge()
+        guard = CardinalityGuard(gauge, max_series=2)
+        guard.set('k', 'cell_a', '1', 1.0, now=1.0)
+        guard.set('k', 'cell_b', '1', 2.0, now=2.0)
+        guard.set('k', 'cell_a', '1', 3.0, now=3.0)   # refresh cell_a
+        guard.set('k', 'cell_c', '1', 4.0, now=4.0)   # evicts cell_b
+
+        assert set(exported(registry)) == {('k', 'cell_a', '1'), ('k', 'cell_c', '1')}
+        assert guard.evicted_capacity == 1
+
+    def test_stale_series_evicted(self):
+        """Series not updated within stale_after_s are removed"""
+        gauge, registry = make_gauge()
+        guard = CardinalityGuard(gauge, stale_after_s=60)
+        guard.set('k', 'cell_a', '1', 1.0, now=0.0)
+        guard.set('k', 'cell_b', '1', 1.0, now=50.0)
+
+        assert guard.evict_stale(now=100.0) == 1
+        assert set(exported(registry)) == {('k', 'cell_b', '1')}
+        assert guard.get_stats()['evicted_stale'] == 1
+
+    @pytest.mark.parametrize('mode,beam,expected', [
+        ('bucket', '0', '0-7'),
+        ('bucket', '13', '8-15'),
+        ('bucket', 'n/a', 'n/a'),
+        ('none', '13', 'all'),
+        ('per_beam', '13', '13'),
+    ])
+    def test_beam_modes(self, mode, beam, expected):
+        """Beam labels are kept, bucketed or dropped"""
+        gauge, registry = make_gauge()
+        guard = CardinalityGuard(gauge, beam_mode=mode, beam_bucket_size=8)
+        guard.set('k', 'cell_a', beam, 1.0)
+        assert set(exported(registry)) == {('k', 'cell_a', expected)}
+
+    def test_bucket_mode_bounds_series(self):
+        """Bucketing folds 64 beams into 8 series"""
+        gauge, _ = make_gauge()
+        guard = CardinalityGuard(gauge, beam_mode='bucket', beam_bucket_size=8)
+        for beam in range(64):
+            guard.set('L1-RSRP.beam', 'cell_a', str(beam), -90.0)
+        assert len(guard) == 8
+
+    def test_invalid_mode_rejected(self):
+        """Unknown beam modes fail fast"""
+        with pytest.raises(ValueError):
+            CardinalityGuard(make_gauge()[0], beam_mode='hash')
+
+
+MULTIPROCESS_SCRIPT = textwrap.dedent("""
+    import sys
+    from prometheus_client import CollectorRegistry, Gauge, multiprocess
+    from cardinality_guard import CardinalityGuard
+
+    gauge = Gauge('kpimon_kpi_value', 'Current KPI values', ['kpi_type', 'cell_id', 'beam_id'],
+                  multiprocess_mode='liveall')
+    guard = CardinalityGuard(gauge, max_series=2, multiprocess=sys.argv[1] == 'guarded')
+    for cell in ('a', 'b', 'c'):
+        guard.set('k', cell, '1', 1.0)
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    print(sum(len(metric.samples) for metric in registry.collect() if metric.name == 'kpimon_kpi_value'))
+""")
+
+
+class TestMultiprocessGuard:
+    """Test suite for the guard with prometheus_client multiprocess (mmap) values"""
+
+    def exported_series(self, tmp_path, mode):
+        directory = tmp_path / mode
+        directory.mkdir()
+        env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(directory),
+                   PYTHONPATH=os.path.join(os.path.dirname(__file__), '../xapps/kpimon-go-xapp/src'))
+        result = subprocess.run([sys.executable, '-c', MULTIPROCESS_SCRIPT, mode], env=env,
+                                capture_output=True, text=True, timeout=60, check=True)
+        return int(result.stdout.strip())
+
+    def test_removal_does_not_shrink_merged_output(self, tmp_path):
+        """Evicted series stay in the mmap files, so LRU eviction cannot cap the output"""
+        assert self.exported_series(tmp_path, 'evicting') == 3
+
+    def test_hard_cap(self, tmp_path):
+        """A multiprocess guard stops writing new series at max_series"""
+        assert self.exported_series(tmp_path, 'guarded') == 2
+
+    def test_no_eviction_and_bucketed_beams(self):
+        """Multiprocess guards reject instead of evicting and never export per-beam series"""
+        gauge, registry = make_gauge()
+        guard = CardinalityGuard(gauge, max_series=2, stale_after_s=60, multiprocess=True)
+        assert guard.beam_mode == 'bucket'
+        for cell in ('a', 'b', 'c'):
+            guard.set('k', cell, '13', 1.0, now=0.0)
+
+        assert set(exported(registry)) == {('k', 'a', '8-15'), ('k', 'b', '8-15')}
+        assert guard.evict_stale(now=1000.0) == 0
+        assert guard.get_stats()['rejected'] == 1 and guard.evicted_capacity == 0
@@ -0,0 +1,137 @@
+"""
+Unit Tests for KPIMON time-series downsampling
+Tests LTTB and min/max envelope selection, window auto-selection and the
+max_points parameter of /api/beam/<beam_id>/kpi/timeseries
+"""
+
+import os
+import sys
+import numpy as np
+import pytest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../xapps/kpimon-go-xapp/src'))
+
+import beam_query_api
+from beam_query_api import BeamQueryService
+from downsample import auto_interval, downsample, lttb, minmax
+
+
+def series(n=1000, spike_at=None):
+    x = np.arange(n, dtype=np.float64)
+    y = np.sin(x / 50.0)
+    if spike_at is not None:
+        y[spike_at] = 25.0
+    return x, y
+
+
+class TestLTTB:
+    """Test suite for LTTB selection"""
+
+    def test_keeps_endpoints_and_count(self):
+        """Exactly max_points indices, ascending, including first and last"""
+        x, y = series()
+        keep = lttb(x, y, 100)
+        assert len(keep) == 100
+        assert keep[0] == 0 and keep[-1] == 999
+        assert np.all(np.diff(keep) > 0)
+
+    def test_keeps_spike(self):
+        """A single-point spike survives heavy reduction"""
+        x, y = series(spike_at=437)
+        assert 437 in lttb(x, y, 20)
+
+    def test_short_series_untouched(self):
+        """Series not longer than max_points are returned whole"""
+        x, y = series(50)
+        assert np.array_equal(lttb(x, y, 50), np.arange(50))
+
+
+class TestMinMax:
+    """Test suite for min/max envelope selection"""
+
+    def test_bucket_extremes(self):
+        """Each bucket contributes its minimum and maximum"""
+        y = np.array([3.0, 1.0, 2.0, 9.0, 5.0, 4.0, 0.0, 6.0])
+        assert list(minmax(y, 4)) == [1, 3, 6, 7]
+
+    def test_envelope_bounds(self):
+        """The kept points span the global minimum and maximum"""
+        _, y = series(spike_at=10)
+        keep = minmax(y, 40)
+        assert len(keep) <= 40
+        assert y[keep].max() == y.max() and y[keep].min() == y.min()
+
+
+class TestDownsample:
+    """Test suite for downsample()"""
+
+    @pytest.mark.parametrize('method', ['lttb', 'minmax'])
+    def test_skips_non_finite(self, method):
+        """NaN values are never selected and indices refer to the original series"""
+        x, y = series(200)
+        y[::7] = np.nan
+        keep = downsample(x, y, 20, method)
+        assert np.all(np.isfinite(y[keep]))
+        assert len(keep) <= 20
+
+    def test_unknown_method(self):
+        """Unknown methods are rejected"""
+        x, y = series(10)
+        with pytest.raises(ValueError):
+            downsample(x, y, 5, 'average')
+
+    @pytest.mark.parametrize('range_s,max_points,interval', [
+        (3600, 1000, '1s'), (86400, 1000, '30s'), (86400, 100, '5m'), (30 * 86400, 500, '30m'),
+        (365 * 86400, 10, '10d'),
+    ])
+    def test_auto_interval(self, range_s, max_points, interval):
+        """The smallest nice window giving at most 4 windows per kept point"""
+        assert auto_interval(range_s, max_points) == interval
+
+
+class TestDownsampledTimeseries:
+    """Test suite for max_points on the time-series endpoint"""
+
+    T0 = datetime(2025, 11, 19, tzinfo=timezone.utc)
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        influx = MagicMock()
+        influx.query_api.return_value.query_stream.side_effect = lambda *a, **k: iter([
+            SimpleNamespace(values={'_time': self.T0 + timedelta(seconds=30 * i),
+                                    '_value': -95.0 + 10 * np.sin(i / 40.0)})
+            for i in range(2880)
+        ])
+        service = BeamQueryService(MagicMock(), influx, 'oran', 'kpimon')
+        monkeypatch.setattr(beam_query_api, 'beam_service', service)
+        app = Flask('test_downsample')
+        app.register_blueprint(beam_query_api.beam_api)
+        return app.test_client(), service
+
+    def test_max_points(self, client):
+        """The window is chosen from the range and the series reduced to max_points"""
+        test_client, service = client
+        body = test_client.get('/api/beam/1/kpi/timeseries?kpi_type=rsrp&max_points=200'
+                               '&start_time=2025-11-19T00:00:00Z&end_time=2025-11-20T00:00:00Z').get_json()
+        assert body['interval'] == '2m'
+        assert 'aggregateWindow(every: 2m' in service.query_api.query_stream.call_args.args[0]
+        assert body['count'] == 200 and body['max_points'] == 200 and body['downsample'] == 'lttb'
+        timestamps = [p['timestamp'] for p in body['datapoints']]
+        assert timestamps == sorted(timestamps)
+
+    def test_streamed_minmax(self, client):
+        """Streaming formats honour max_points too"""
+        test_client, _ = client
+        response = test_client.get('/api/beam/1/kpi/timeseries?kpi_type=rsrp&max_points=100'
+                                   '&downsample=minmax&format=ndjson&interval=30s')
+        assert len(response.data.decode().splitlines()) <= 100
+
+    @pytest.mark.parametrize('query', ['max_points=2', 'max_points=x', 'max_points=100&downsample=avg'])
+    def test_invalid_parameters(self, client, query):
+        """Out-of-range max_points and unknown methods are rejected"""
+        test_client, _ = client
+        assert test_client.get(f'/api/beam/1/kpi/timeseries?kpi_type=rsrp&{query}').status_code == 400
@@ -0,0 +1,160 @@
+"""
+Unit Tests for the shared xApp HTTP server launcher
+Tests serving, keep-alive, graceful shutdown, backend selection and the
+thread budget that keeps probes answered at admission saturation
+"""
+
+import os
+import sys
+import time
+import threading
+import pytest
+import requests
+from flask import Flask, jsonify, request
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../xapps/common'))
+
+import http_server
+from http_server import XappHTTPServer
+from admission_control import AdmissionController, LoadShed, message_priority
+
+
+@pytest.fixture
+def app():
+    app = Flask('test_http_server')
+
+    @app.route('/ping')
+    def ping():
+        return 'pong'
+
+    @app.route('/slow')
+    def slow():
+        time.sleep(0.3)
+        return 'done'
+
+    return app
+
+
+@pytest.mark.parametrize('server', ['waitress', 'werkzeug'])
+class TestXappHTTPServer:
+    """Test suite for XappHTTPServer"""
+
+    def test_serves_and_stops(self, app, server):
+        """Requests are served until stop(), then the port refuses connections"""
+        srv = XappHTTPServer(app, host='127.0.0.1', port=0, server=server, threads=2)
+        thread = srv.start()
+        port = srv.bound_port
+        with requests.Session() as session:
+            # Keep-alive: both requests over one pooled connection
+            assert session.get(f'http://127.0.0.1:{port}/ping', timeout=2).text == 'pong'
+            assert session.get(f'http://127.0.0.1:{port}/ping', timeout=2).text == 'pong'
+
+        srv.stop()
+        assert not thread.is_alive()
+        with pytest.raises(requests.ConnectionError):
+            requests.get(f'http://127.0.0.1:{port}/ping', timeout=1)
+
+    def test_graceful_shutdown(self, app, server):
+        """An in-flight request completes while the server stops"""
+        srv = XappHTTPServer(app, host='127.0.0.1', port=0, server=server, threads=2)
+        srv.start()
+        url = f'http://127.0.0.1:{srv.bound_port}/slow'
+        results = []
+        client = threading.Thread(target=lambda: results.append(requests.get(url, timeout=5).text))
+        client.start()
+        time.sleep(0.1)
+
+        srv.stop()
+        client.join(5)
+        assert results == ['done']
+
+
+class TestServerSelection:
+    """Test suite for backend selection"""
+
+    def test_from_config(self, app):
+        """Config section maps onto the server options"""
+        srv = XappHTTPServer.from_config(app, {'threads': 16, 'keepalive_timeout_s': 10},
+                                         port=8081, name='kpimon')
+        assert (srv.server, srv.threads, srv.keepalive_timeout, srv.port) == ('waitress', 16, 10, 8081)
+        assert srv.bound_port is None
+
+    def test_thread_budget(self, app):
+        """Threads are raised to cover busy routes plus probe threads"""
+        srv = XappHTTPServer.from_config(app, {'threads': 8}, busy_threads=30)
+        assert srv.threads == 32
+        srv = XappHTTPServer.from_config(app, {'threads': 40, 'probe_threads': 4}, busy_threads=30)
+        assert srv.threads == 40
+
+    def test_falls_back_without_waitress(self, app, monkeypatch):
+        """Without waitress installed the Werkzeug server is used"""
+        monkeypatch.setattr(http_server, '_waitress', None)
+        assert XappHTTPServer(app).server == 'werkzeug'
+
+    def test_unknown_server(self, app):
+        """Unknown server names are rejected"""
+        with pytest.raises(ValueError):
+            XappHTTPServer(app, server='gunicorn')
+
+
+class TestProbesAtSaturation:
+    """Test suite for health probes while admission control is saturated"""
+
+    def test_health_responds(self):
+        """With every slot and queue place held, excess work is shed and /health still answers"""
+        admission = AdmissionController(max_concurrent=2, max_queue=2, queue_timeout_s=10,
+                                        control_reserve=1)
+        release = threading.Event()
+        app = Flask('test_saturation')
+
+        @app.route('/e2/indication', methods=['POST'])
+        def indication():
+            try:
+                with admission.admit(message_priority(request.headers.get('X-Message-Type'))):
+                    release.wait(10)
+                return jsonify({'status': 'success'}), 200
+            except LoadShed as e:
+                return jsonify({'error': str(e)}), e.status_code, e.headers
+
+        @app.route('/health/alive')
+        def alive():
+            return jsonify({'status': 'alive'}), 200
+
+        srv = XappHTTPServer.from_config(app, {'threads': 2}, host='127.0.0.1', port=0,
+                                         busy_threads=admission.max_threads)
+        srv.start()
+        base = f'http://127.0.0.1:{srv.bound_port}'
+        results = []
+
+        def post(msg_type='12050'):
+            results.append(requests.post(f'{base}/e2/indication', data=b'{}', timeout=15,
+                                         headers={'X-Message-Type': msg_type}).status_code)
+
+        def wait_for(in_flight, queued):
+            deadline = time.monotonic() + 5
+            while (admission.get_stats()['in_flight'], admission.get_stats()['queued']) != (in_flight, queued) \
+                    and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert (admission.get_stats()['in_flight'], admission.get_stats()['queued']) == (in_flight, queued)
+
+        reports = [threading.Thread(target=post) for _ in range(4)]
+        controls = [threading.Thread(target=post, args=('12011',)) for _ in range(2)]
+        clients = reports + controls
+        try:
+            # Reports first so they hold the regular slots, then controls take the reserve
+            for client in reports:
+                client.start()
+            wait_for(2, 2)
+            for client in controls:
+                client.start()
+            wait_for(3, 3)
+
+            # The queue fills (not the thread pool): more reports are shed at once
+            assert requests.post(f'{base}/e2/indication', data=b'{}', timeout=2).status_code == 429
+            assert requests.get(f'{base}/health/alive', timeout=2).status_code == 200
+        finally:
+            release.set()
+            for client in clients:
+                client.join(15)
+            srv.stop()
+        assert results == [200] * 6
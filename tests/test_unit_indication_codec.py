@@ -0,0 +1,231 @@
+"""
+Unit Tests for the shared E2 indication codec
+Tests decoding from bytes/memoryview, structure validation, backend fallback,
+batches and the compact binary format
+"""
+
+import os
+import sys
+import json
+import gzip
+import importlib.util
+import pytest
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../xapps/common'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../xapps/kpimon-go-xapp/src'))
+
+import indication_codec
+from indication_codec import (
+    KPM_KPI_IDS, IndicationDecodeError, IndicationEncodeError, PackedMeasurements,
+    binary_cell_id, decode_indication, decode_indication_batch, dumps,
+    encode_binary_indication, encode_indication_batch, handle_indication_batch, is_binary, loads
+)
+from kpi_catalog import KPI_DEFINITIONS
+
+
+INDICATION = {
+    'timestamp': '2025-11-19T10:00:00',
+    'cell_id': 'cell_001',
+    'ue_id': 'ue_001',
+    'beam_id': 3,
+    'measurements': [{'name': 'UE.RSRP', 'value': -95.5}],
+    'indication_type': 'periodic'
+}
+
+
+class TestDecodeIndication:
+    """Test suite for decode_indication"""
+
+    @pytest.mark.parametrize('wrap', [bytes, bytearray, memoryview, lambda b: b.decode('utf-8')])
+    def test_decodes_payload_types(self, wrap):
+        """RMR bytes, memoryviews and str decode to the same indication"""
+        indication = decode_indication(wrap(json.dumps(INDICATION).encode('utf-8')))
+        assert indication.cell_id == 'cell_001'
+        assert indication.ue_id == 'ue_001'
+        assert indication.beam_id == 3
+        assert indication.timestamp == '2025-11-19T10:00:00'
+        assert indication.measurements == [{'name': 'UE.RSRP', 'value': -95.5}]
+        assert indication.get('indication_type') == 'periodic'
+
+    def test_defaults(self):
+        """Missing optional fields get the defaults handlers rely on"""
+        indication = decode_indication(b'{"cell_id": "cell_002"}')
+        assert indication.beam_id == 'n/a'
+        assert indication.timestamp is None
+        assert indication.measurements == []
+        assert indication.ue_list == []
+        assert indication
+
+    def test_already_decoded_passthrough(self):
+        """dicts and indications are accepted without re-encoding"""
+        indication = decode_indication(INDICATION)
+        assert indication.fields is INDICATION
+        assert decode_indication(indication) is indication
+
+    def test_empty_object_is_falsy(self):
+        """An empty body decodes but reports no data"""
+        assert not decode_indication(b'{}')
+
+    @pytest.mark.parametrize('payload', [
+        b'', b'not json', b'[1, 2]', b'"cell"',
+        b'{"measurements": {"name": "UE.RSRP"}}',
+        b'{"ue_list": 5}',
+        b'\xff\xfe',
+    ])
+    def test_invalid_payloads(self, payload):
+        """Malformed payloads raise IndicationDecodeError (a ValueError)"""
+        with pytest.raises(IndicationDecodeError):
+            decode_indication(payload)
+        assert issubclass(IndicationDecodeError, ValueError)
+
+
+class TestCodecBackend:
+    """Test suite for backend selection"""
+
+    def test_dumps_round_trip(self):
+        """dumps returns compact JSON bytes that loads reads back"""
+        encoded = dumps(INDICATION)
+        assert isinstance(encoded, bytes)
+        assert b', ' not in encoded
+        assert loads(encoded) == INDICATION
+
+    def test_stdlib_fallback(self, monkeypatch):
+        """Without orjson/msgspec the stdlib json backend is used"""
+        monkeypatch.setitem(sys.modules, 'orjson', None)
+        monkeypatch.setitem(sys.modules, 'msgspec', None)
+        spec = importlib.util.spec_from_file_location('indication_codec_fallback',
+                                                      indication_codec.__file__)
+        fallback = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(fallback)
+
+        assert fallback.BACKEND == 'json'
+        payload = memoryview(json.dumps(INDICATION).encode('utf-8'))
+        assert fallback.decode_indication(payload).cell_id == 'cell_001'
+        assert fallback.loads(fallback.dumps(INDICATION)) == INDICATION
+        with pytest.raises(fallback.IndicationDecodeError):
+            fallback.loads(b'{')
+
+
+class TestIndicationBatch:
+    """Test suite for batch decoding and per-item handling"""
+
+    def test_json_array_and_ndjson(self):
+        """JSON arrays and NDJSON (optionally gzip) decode to the same items"""
+        batch = [INDICATION, dict(INDICATION, cell_id='cell_002')]
+        ndjson = encode_indication_batch(batch)
+        assert ndjson.count(b'\n') == 2
+
+        for items in (decode_indication_batch(json.dumps(batch).encode('utf-8')),
+                      decode_indication_batch(ndjson, ndjson=True),
+                      decode_indication_batch(gzip.compress(ndjson), ndjson=True, gzip=True)):
+            assert [i.cell_id for i in items] == ['cell_001', 'cell_002']
+
+    def test_bad_items_reported_in_place(self):
+        """Malformed items become errors at their index, the rest still decode"""
+        body = b'{"cell_id": "a"}\nnot json\n\n{}\n{"cell_id": "b"}\n'
+        items = decode_indication_batch(body, ndjson=True)
+        assert len(items) == 4
+        assert items[0].cell_id == 'a' and items[3].cell_id == 'b'
+        assert isinstance(items[1], IndicationDecodeError)
+        assert isinstance(items[2], IndicationDecodeError)
+
+    @pytest.mark.parametrize('body,kwargs', [
+        (b'{"cell_id": "a"}', {}),
+        (b'[]', {}),
+        (b'not gzip', {'gzip': True}),
+        (gzip.compress(b'[' + b'{"cell_id": "a"},' * 100 + b'{}]'), {'gzip': True, 'max_bytes': 256}),
+        (b'[{}, {}, {}]', {'max_items': 2}),
+    ])
+    def test_rejected_batches(self, body, kwargs):
+        """Non-arrays, empty, corrupt, oversized and too-long batches are rejected"""
+        with pytest.raises(IndicationDecodeError):
+            decode_indication_batch(body, **kwargs)
+
+    def test_handle_batch_status(self):
+        """Per-item status reports decode and handler failures"""
+        items = decode_indication_batch(b'[{"cell_id": "a"}, 5, {"cell_id": "boom"}]')
+        handled = []
+
+        def handler(indication):
+            if indication.cell_id == 'boom':
+                raise RuntimeError('handler failed')
+            handled.append(indication.cell_id)
+
+        result = handle_indication_batch(items, handler)
+        assert handled == ['a']
+        assert (result['status'], result['processed'], result['failed']) == ('partial', 1, 2)
+        assert result['results'][0] == {'index': 0, 'status': 'success'}
+        assert result['results'][2] == {'index': 2, 'status': 'error', 'error': 'handler failed'}
+
+
+class TestBinaryIndication:
+    """Test suite for the compact binary indication format"""
+
+    def test_round_trip(self):
+        """Binary indications decode to the same fields as the JSON form"""
+        payload = encode_binary_indication(INDICATION)
+        assert is_binary(payload)
+        assert len(payload) < len(json.dumps(INDICATION)) / 2
+
+        indication = decode_indication(payload)
+        assert indication.cell_id == 'cell_001'
+        assert indication.ue_id == 'ue_001'
+        assert indication.beam_id == 3
+        assert indication.timestamp == '2025-11-19T10:00:00+00:00'
+        assert list(indication.measurements) == INDICATION['measurements']
+
+    def test_timestamp_round_trip_utc(self):
+        """Timestamps travel as UTC epoch seconds, whatever the host or input zone"""
+        indication = dict(INDICATION, timestamp='2025-11-19T18:00:00.500+08:00')
+        decoded = decode_indication(encode_binary_indication(indication))
+        assert decoded.timestamp == '2025-11-19T10:00:00.500000+00:00'
+        assert datetime.fromisoformat(decoded.timestamp) == datetime.fromisoformat(indication['timestamp'])
+
+    def test_zero_copy_arrays(self):
+        """Measurement arrays are views over the payload buffer"""
+        indication = {
+            'cell_id': 'cell_002',
+            'measurements': [
+                {'name': 'L1-RSRP.beam', 'value': -98.0, 'beam_id': 5},
+                {'name': 'DRB.UEThpDl', 'value': 120}
+            ]
+        }
+        decoded = decode_indication(memoryview(encode_binary_indication(indication)))
+        packed = decoded.measurements
+        assert isinstance(packed, PackedMeasurements)
+        assert isinstance(packed.values, memoryview)
+        assert list(packed.values) == [-98.0, 120.0]
+        assert list(packed.kpi_ids) == [21, 1]
+        assert packed[0] == {'name': 'L1-RSRP.beam', 'value': -98.0, 'beam_id': 5}
+        assert packed[1] == {'name': 'DRB.UEThpDl', 'value': 120.0}
+        assert decoded.beam_id == 'n/a'
+        assert decoded.ue_id is None and decoded.timestamp is None
+
+    def test_kpi_ids_match_kpimon_definitions(self):
+        """Wire ids are the KPIMON kpi_definitions ids"""
+        assert KPM_KPI_IDS == {name: d['id'] for name, d in KPI_DEFINITIONS.items()}
+
+    @pytest.mark.parametrize('measurement', [
+        {'name': 'Vendor.Custom', 'value': 1.0},
+        {'name': 'UE.RSRP', 'value': 'high'},
+        {'name': 'UE.RSRP', 'value': -90.0, 'beam_id': 'left'},
+    ])
+    def test_unencodable_indications(self, measurement):
+        """Indications the format cannot carry raise IndicationEncodeError"""
+        with pytest.raises(IndicationEncodeError):
+            encode_binary_indication({'cell_id': 'c', 'measurements': [measurement]})
+
+    def test_truncated_and_unknown_version(self):
+        """Damaged binary payloads are rejected"""
+        payload = encode_binary_indication(INDICATION)
+        with pytest.raises(IndicationDecodeError):
+            decode_indication(payload[:-3])
+        with pytest.raises(IndicationDecodeError):
+            decode_indication(payload[:2] + bytes([9]) + payload[3:])
+
+    def test_cell_id_from_header(self):
+        """cell_id can be read without decoding the measurements"""
+        assert binary_cell_id(encode_binary_indication(INDICATION)) == 'cell_001'
+        assert binary_cell_id(encode_binary_indication({'measurements': []})) is None
+        assert binary_cell_id(b'E2') is None
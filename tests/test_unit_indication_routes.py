@@ -0,0 +1,109 @@
+"""
+Unit Tests for the shared E2 indication route bodies
+Tests decoding, error mapping and load shedding of /e2/indication and
+/e2/indication/batch as served by every xApp
+"""
+
+import os
+import sys
+import json
+import pytest
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../xapps/common'))
+
+from admission_control import AdmissionController, LoadShed
+from indication_codec import NDJSON_CONTENT_TYPE, encode_binary_indication
+from indication_routes import indication_batch_response, indication_response
+
+INDICATION = {'cell_id': 'cell_001', 'ue_id': 'ue_001',
+              'measurements': [{'name': 'UE.RSRP', 'value': -95.0}]}
+
+
+@pytest.fixture
+def handled():
+    return []
+
+
+@pytest.fixture
+def client(handled):
+    admission = AdmissionController(max_concurrent=2, max_queue=2)
+    app = Flask('test_indication_routes')
+
+    def handler(indication):
+        if indication.cell_id == 'boom':
+            raise RuntimeError('handler failed')
+        handled.append(indication)
+
+    def queue_full(payload):
+        raise LoadShed(503, 1, 'ingestion queue full')
+
+    @app.route('/e2/indication', methods=['POST'])
+    def e2_indication():
+        return indication_response(admission, handler)
+
+    @app.route('/e2/indication/raw', methods=['POST'])
+    def e2_indication_raw():
+        return indication_response(admission, handled.append, decode=False, message="Indication queued")
+
+    @app.route('/e2/indication/full', methods=['POST'])
+    def e2_indication_full():
+        return indication_response(admission, queue_full, decode=False)
+
+    @app.route('/e2/indication/batch', methods=['POST'])
+    def e2_indication_batch():
+        return indication_batch_response(admission, handler, received=handled.append)
+
+    return app.test_client()
+
+
+class TestIndicationResponse:
+    """Test suite for indication_response"""
+
+    @pytest.mark.parametrize('body', [json.dumps(INDICATION).encode(), encode_binary_indication(INDICATION)])
+    def test_processed(self, client, handled, body):
+        """JSON and binary bodies are decoded once and handed to the handler"""
+        response = client.post('/e2/indication', data=body)
+        assert response.status_code == 200
+        assert response.get_json() == {'status': 'success', 'message': 'Indication processed'}
+        assert handled[0].cell_id == 'cell_001'
+
+    @pytest.mark.parametrize('body', [b'', b'{not json', b'{}'])
+    def test_rejected(self, client, handled, body):
+        """Empty and undecodable bodies are 400 without calling the handler"""
+        assert client.post('/e2/indication', data=body).status_code == 400
+        assert handled == []
+
+    def test_raw_payload(self, client, handled):
+        """decode=False passes the raw body through"""
+        response = client.post('/e2/indication/raw', data=b'{"cell_id": "c"}')
+        assert response.get_json()['message'] == 'Indication queued'
+        assert handled == [b'{"cell_id": "c"}']
+
+    def test_handler_load_shed(self, client):
+        """A handler may shed load with 429/503 and Retry-After"""
+        response = client.post('/e2/indication/full', data=b'{"cell_id": "c"}')
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
+
+    def test_handler_error(self, client):
+        """Handler failures are 500"""
+        assert client.post('/e2/indication', data=b'{"cell_id": "boom"}').status_code == 500
+
+
+class TestIndicationBatchResponse:
+    """Test suite for indication_batch_response"""
+
+    def test_partial_batch(self, client, handled):
+        """Items are processed independently and the decoded count is reported"""
+        body = '\n'.join([json.dumps(INDICATION), '{bad', json.dumps(dict(INDICATION, cell_id='boom'))])
+        response = client.post('/e2/indication/batch', data=body, content_type=NDJSON_CONTENT_TYPE)
+        assert response.status_code == 200
+        result = response.get_json()
+        assert (result['status'], result['processed'], result['failed']) == ('partial', 1, 2)
+        assert handled[0] == 3 and handled[1].cell_id == 'cell_001'
+
+    def test_undecodable_body(self, client, handled):
+        """A body that is not a batch at all is 400"""
+        assert client.post('/e2/indication/batch', data=b'{"cell_id": 1}').status_code == 400
+        assert handled == []
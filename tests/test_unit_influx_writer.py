@@ -0,0 +1,186 @@
+"""
+Unit Tests for KPIMON asynchronous InfluxDB writer
+Tests line protocol serialization, concurrent batch writes and retries
+"""
+
+import os
+import sys
+import time
+import threading
+import pytest
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../xapps/kpimon-go-xapp/src'))
+
+import influxdb_client
+from influxdb_client.rest import ApiException
+
+from influx_writer import InfluxBatchWriter, KPIPoint, to_line_protocol, written_span
+from kpi_buffer import KPIRingBuffer
+
+
+def reference_line(point: KPIPoint) -> str:
+    """Line protocol produced by the former influxdb_client.Point builder"""
+    p = influxdb_client.Point("kpi_measurement") \
+        .tag("cell_id", point.cell_id) \
+        .tag("kpi_name", point.kpi_name) \
+        .tag("kpi_type", point.kpi_type) \
+        .tag("beam_id", str(point.beam_id)) \
+        .field("value", float(point.value)) \
+        .time(point.timestamp)
+    if point.ue_id:
+        p = p.tag("ue_id", point.ue_id)
+    if point.beam_specific:
+        p = p.tag("beam_specific", "true")
+    return p.to_line_protocol()
+
+
+class TestLineProtocol:
+    """Test suite for direct line protocol serialization"""
+
+    @pytest.mark.parametrize('point', [
+        KPIPoint('2025-11-19T10:00:00.123456', 'cell_001', 'ue_001', 1,
+                 'L1-RSRP.beam', 'beam_signal', -98.5, True),
+        KPIPoint('2025-11-19T10:00:00+08:00', 'cell 002', None, 'n/a',
+                 'DRB.UEThpDl', 'throughput', 52.5, False),
+        KPIPoint('2025-11-19T10:00:00Z', 'cell,003', 'ue=7', 3,
+                 'UE.SINR', 'signal', 0.1, False),
+    ])
+    def test_matches_point_builder(self, point):
+        """Direct serialization produces the same series as Point objects"""
+        assert to_line_protocol([point]) == reference_line(point)
+
+    def test_spilled_records_serialize(self):
+        """Records re-read from a spill file (lists) serialize like tuples"""
+        point = KPIPoint('2025-11-19T10:00:00', 'cell_001', 'ue_001', 2,
+                         'UE.RSRP', 'signal', -90.0, False)
+        assert to_line_protocol([list(point)]) == to_line_protocol([point])
+
+    def test_integral_values_stay_float_fields(self):
+        """Integral KPI values are written as floats, never as integer fields"""
+        point = KPIPoint('2025-11-19T10:00:00', 'cell_001', None, 1,
+                         'DRB.MeanActiveUeDl', 'load', 12, False)
+        assert ' value=12.0 ' in to_line_protocol([point])
+
+    def test_invalid_values_skipped(self):
+        """Non-numeric and non-finite values are not written"""
+        records = [
+            KPIPoint('2025-11-19T10:00:00', 'c', None, 1, 'UE.RSRP', 'signal', None, False),
+            KPIPoint('2025-11-19T10:00:00', 'c', None, 1, 'UE.RSRP', 'signal', float('nan'), False),
+            KPIPoint('2025-11-19T10:00:00', 'c', None, 1, 'UE.RSRP', 'signal', -90, False),
+        ]
+        assert len(to_line_protocol(records).splitlines()) == 1
+
+    def test_written_span(self):
+        """Beams and the oldest timestamp of a batch (beam tag values, epoch seconds)"""
+        records = [
+            KPIPoint('2025-11-19T10:00:05', 'c', None, 1, 'UE.RSRP', 'signal', -90, False),
+            KPIPoint('2025-11-19T10:00:00Z', 'c', None, None, 'DRB.UEThpDl', 'throughput', 5, False),
+            KPIPoint('bogus', 'c', None, 2, 'UE.RSRP', 'signal', -91, False),
+        ]
+        assert written_span(records) == ({'1', '2', 'n/a'}, 1763546400.0)
+        assert written_span([records[2]]) == ({'2'}, None)
+
+
+class TestInfluxBatchWriter:
+    """Test suite for InfluxBatchWriter"""
+
+    @staticmethod
+    def batch(n=3):
+        return [KPIPoint('2025-11-19T10:00:00', 'cell_001', None, 1,
+                         'UE.RSRP', 'signal', -90.0 - i, False) for i in range(n)]
+
+    def test_writes_batch_as_line_protocol(self):
+        """A submitted batch is written in one request"""
+        write_api = MagicMock()
+        writer = InfluxBatchWriter(write_api, 'kpimon', 'oran')
+        assert writer.submit(self.batch())
+        writer.close()
+
+        write_api.write.assert_called_once()
+        record = write_api.write.call_args.kwargs['record']
+        assert isinstance(record, str)
+        assert len(record.splitlines()) == 3
+        assert writer.total_points == 3
+
+    def test_on_written_callback(self):
+        """on_written sees written batches only; its errors do not fail the write"""
+        write_api = MagicMock()
+        write_api.write.side_effect = [None, ApiException(status=400)]
+        written = []
+
+        def on_written(batch):
+            written.append(batch)
+            raise RuntimeError('cache gone')
+
+        writer = InfluxBatchWriter(write_api, 'kpimon', 'oran', max_in_flight=1,
+                                   on_written=on_written)
+        first, second = self.batch(2), self.batch(1)
+        writer.submit(first)
+        writer.submit(second)
+        writer.close()
+
+        assert written == [first]
+        assert writer.total_points == 2
+        assert writer.total_failed == 1
+
+    def test_retries_transient_failures(self):
+        """Transient errors are retried with backoff"""
+        write_api = MagicMock()
+        write_api.write.side_effect = [ConnectionError('reset'), ApiException(status=503), None]
+        writer = InfluxBatchWriter(write_api, 'kpimon', 'oran',
+                                   max_retries=3, retry_base_ms=1, retry_max_ms=5)
+        writer.submit(self.batch())
+        writer.close()
+
+        assert write_api.write.call_count == 3
+        assert writer.total_retries == 2
+        assert writer.total_points == 3
+        assert writer.total_failed == 0
+
+    def test_bad_request_not_retried(self):
+        """Payload errors are dropped without retrying"""
+        write_api = MagicMock()
+        write_api.write.side_effect = ApiException(status=400)
+        writer = InfluxBatchWriter(write_api, 'kpimon', 'oran', max_retries=5, retry_base_ms=1)
+        writer.submit(self.batch())
+        writer.close()
+
+        assert write_api.write.call_count == 1
+        assert writer.total_failed == 3
+
+    def test_in_flight_is_bounded(self):
+        """Submit fails once all writer slots are busy"""
+        release = threading.Event()
+        write_api = MagicMock()
+        write_api.write.side_effect = lambda **kwargs: release.wait(2)
+        writer = InfluxBatchWriter(write_api, 'kpimon', 'oran', max_in_flight=2)
+
+        assert writer.submit(self.batch())
+        assert writer.submit(self.batch())
+        assert writer.submit(self.batch(), timeout=0.05) is False
+
+        release.set()
+        writer.close()
+        assert writer.in_flight() == 0
+
+
+class TestBufferFlushPolicy:
+    """Test suite for size-or-age batch draining"""
+
+    def test_low_rate_flushes_on_age(self):
+        """A partial batch is returned once its oldest record is max_wait old"""
+        buffer = KPIRingBuffer(capacity=100)
+        buffer.append('a')
+        start = time.monotonic()
+        batch = buffer.drain_batch(1000, max_wait=0.05)
+        assert batch == ['a']
+        assert time.monotonic() - start < 1
+
+    def test_high_rate_flushes_on_size(self):
+        """A full batch is returned without waiting"""
+        buffer = KPIRingBuffer(capacity=100)
+        buffer.extend(range(20))
+        start = time.monotonic()
+        assert buffer.drain_batch(10, max_wait=5) == list(range(10))
+        assert time.monotonic() - start < 1
@@ -0,0 +1,162 @@
+"""
+Unit Tests for KPIMON sharded ingestion
+Tests cell_id routing, per-cell ordering across worker processes and supervision
+"""
+
+import os
+import sys
+import json
+import time
+import multiprocessing
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../xapps/common'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../xapps/kpimon-go-xapp/src'))
+
+from ingest_shards import ShardedIngestor, shard_key
+from indication_codec import encode_binary_indication
+
+RESULTS = multiprocessing.get_context('fork').Queue()
+
+
+def recording_worker(shard, work_queue):
+    """Worker that reports (shard, pid, cell_id, seq) for every indication"""
+    while True:
+        payload = work_queue.get()
+        if payload is None:
+            break
+        indication = json.loads(payload)
+        RESULTS.put((shard, os.getpid(), indication['cell_id'], indication['seq']))
+
+
+def crashing_worker(shard, work_queue):
+    """Worker that reports its parent pid and exits immediately"""
+    RESULTS.put((shard, os.getppid()))
+    RESULTS.close()
+    RESULTS.join_thread()
+    os._exit(3)
+
+
+def indication(cell_id, seq):
+    return json.dumps({'cell_id': cell_id, 'seq': seq, 'measurements': []})
+
+
+class TestShardKey:
+    """Test suite for routing key extraction"""
+
+    def test_extracts_cell_id(self):
+        """cell_id is found without decoding the payload"""
+        assert shard_key('{"timestamp": "t", "cell_id": "cell_001", "x": 1}') == 'cell_001'
+        assert shard_key(b'{"cell_id":"cell_002"}') == 'cell_002'
+        assert shard_key('{"cell_id": 42}') == '42'
+        assert shard_key('{"measurements": []}') == ''
+        assert shard_key('not json') == ''
+        assert shard_key(encode_binary_indication({'cell_id': 'cell_003', 'measurements': []})) == 'cell_003'
+
+    def test_decoded_batch_items(self):
+        """Decoded batch items route like their JSON payloads"""
+        ingestor = ShardedIngestor(recording_worker, num_workers=4)
+        assert shard_key({'cell_id': 42}) == '42'
+        assert shard_key({}) == ''
+        assert ingestor.shard_for({'cell_id': 'cell_001'}) == ingestor.shard_for(indication('cell_001', 0))
+
+    def test_routing_is_stable(self):
+        """A cell always maps to the same shard"""
+        ingestor = ShardedIngestor(recording_worker, num_workers=4)
+        shards = {ingestor.shard_for(indication('cell_001', i)) for i in range(20)}
+        assert len(shards) == 1
+        assert len({ingestor.shard_for(indication(f'cell_{i}', 0)) for i in range(50)}) == 4
+
+
+class TestShardedIngestor:
+    """Test suite for worker processes"""
+
+    def test_per_cell_order_preserved(self):
+        """Each cell is handled by one worker process, in submission order"""
+        ingestor = ShardedIngestor(recording_worker, num_workers=3)
+        ingestor.start()
+        try:
+            for seq in range(30):
+                for cell in ('cell_a', 'cell_b', 'cell_c', 'cell_d'):
+                    assert ingestor.submit(indication(cell, seq))
+        finally:
+            ingestor.stop(timeout=10)
+
+        results = [RESULTS.get(timeout=5) for _ in range(120)]
+        pids = {r[1] for r in results}
+        assert os.getpid() not in pids
+
+        for cell in ('cell_a', 'cell_b', 'cell_c', 'cell_d'):
+            handled = [r for r in results if r[2] == cell]
+            assert [r[3] for r in handled] == list(range(30))
+            assert len({(r[0], r[1]) for r in handled}) == 1
+
+    def test_full_queue_drops(self):
+        """A full worker queue drops instead of blocking the receiver"""
+        ingestor = ShardedIngestor(recording_worker, num_workers=1, queue_size=2)
+        ingestor._queues.append(ingestor._ctx.Queue(2))   # not started: nothing consumes
+
+        assert ingestor.submit(indication('c', 0))
+        assert ingestor.submit(indication('c', 1))
+        time.sleep(0.1)
+        assert ingestor.submit(indication('c', 2)) is False
+        assert ingestor.total_dropped == 1
+
+    def test_dead_workers_restarted_by_supervisor(self):
+        """Crashed workers are re-forked by the supervisor, never by the (threaded) parent"""
+        ingestor = ShardedIngestor(crashing_worker, num_workers=2, restart_backoff_s=0.1)
+        ingestor.start()
+        try:
+            reports = [RESULTS.get(timeout=5) for _ in range(6)]
+            assert {parent for _, parent in reports} == {ingestor._supervisor.pid}
+            assert os.getpid() != ingestor._supervisor.pid
+
+            deadline = time.monotonic() + 5
+            restarted = 0
+            while restarted < 2 and time.monotonic() < deadline:
+                restarted += ingestor.check_workers()
+                time.sleep(0.05)
+            assert restarted >= 2
+            assert ingestor.total_restarts >= restarted
+        finally:
+            ingestor.stop(timeout=2)
+        assert not ingestor.supervising
+        while not RESULTS.empty():
+            RESULTS.get()
+
+    def test_supervisor_exit_detected(self):
+        """A dead supervisor is reported so KPIMON can exit and be restarted"""
+        ingestor = ShardedIngestor(recording_worker, num_workers=2)
+        ingestor.start()
+        try:
+            assert ingestor.supervising
+            ingestor._supervisor.kill()
+            deadline = time.monotonic() + 5
+            while ingestor.supervising and time.monotonic() < deadline:
+                time.sleep(0.05)
+            assert not ingestor.supervising
+        finally:
+            ingestor.stop(timeout=2)
+
+    def test_written_spans_reach_parent(self):
+        """Spans written by workers are handed to on_written in the parent, including final flushes"""
+        received = []
+
+        def writing_worker(shard, work_queue):
+            while True:
+                payload = work_queue.get()
+                if payload is None:
+                    break
+                item = json.loads(payload)
+                ingestor.report_written({item['cell_id']}, float(item['seq']))
+
+        ingestor = ShardedIngestor(writing_worker, num_workers=2,
+                                   on_written=lambda beams, since: received.append((beams, since, os.getpid())))
+        ingestor.start()
+        try:
+            for seq in range(5):
+                assert ingestor.submit(indication(f'cell_{seq}', seq))
+        finally:
+            ingestor.stop(timeout=5)
+        assert sorted(since for _, since, _ in received) == [0.0, 1.0, 2.0, 3.0, 4.0]
+        assert {pid for _, _, pid in received} == {os.getpid()}
+        assert ({'cell_3'}, 3.0) in [(beams, since) for beams, since, _ in received]
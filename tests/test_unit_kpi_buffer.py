@@ -0,0 +1,108 @@
+"""
+Unit Tests for KPIMON bounded KPI ring buffer
+Tests overflow policies, batch drain semantics and statistics
+"""
+
+import os
+import sys
+import time
+import threading
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../xapps/kpimon-go-xapp/src'))
+
+from kpi_buffer import KPIRingBuffer
+
+
+class TestKPIRingBuffer:
+    """Test suite for KPIRingBuffer"""
+
+    def test_drain_is_fifo_and_bounded(self):
+        """Drain returns at most max_items in insertion order"""
+        buffer = KPIRingBuffer(capacity=10)
+        buffer.extend(range(5))
+
+        assert buffer.drain(3) == [0, 1, 2]
+        assert buffer.drain(3) == [3, 4]
+        assert buffer.drain(3) == []
+        assert len(buffer) == 0
+
+    def test_drop_oldest_policy(self):
+        """A full drop_oldest buffer discards the oldest records"""
+        buffer = KPIRingBuffer(capacity=3, overflow_policy='drop_oldest')
+        buffer.extend(range(5))
+
+        assert len(buffer) == 3
+        assert buffer.drain(10) == [2, 3, 4]
+        assert buffer.total_dropped == 2
+
+    def test_block_policy_times_out(self):
+        """A full block buffer drops the record after the wait budget"""
+        buffer = KPIRingBuffer(capacity=2, overflow_policy='block', block_timeout_ms=20)
+        buffer.extend([1, 2])
+
+        start = time.monotonic()
+        assert buffer.append(3) is False
+        assert time.monotonic() - start >= 0.015
+        assert buffer.drain(10) == [1, 2]
+        assert buffer.total_dropped == 1
+
+    def test_block_policy_resumes_after_drain(self):
+        """A blocked producer continues once the drainer makes room"""
+        buffer = KPIRingBuffer(capacity=1, overflow_policy='block', block_timeout_ms=2000)
+        buffer.append('first')
+        result = {}
+
+        producer = threading.Thread(target=lambda: result.update(ok=buffer.append('second')))
+        producer.start()
+        time.sleep(0.05)
+        assert buffer.drain(1) == ['first']
+        producer.join(timeout=2)
+
+        assert result['ok'] is True
+        assert buffer.drain(1) == ['second']
+
+    def test_spill_policy_preserves_order(self, tmp_path):
+        """Overflow is spilled to disk and drained after in-memory records"""
+        spill_path = str(tmp_path / 'spill.jsonl')
+        buffer = KPIRingBuffer(capacity=2, overflow_policy='spill', spill_path=spill_path)
+        buffer.extend([{'n': i} for i in range(5)])
+
+        assert len(buffer) == 5
+        assert buffer.total_spilled == 3
+        assert os.path.exists(spill_path)
+
+        drained = buffer.drain(4) + buffer.drain(4)
+        assert [r['n'] for r in drained] == [0, 1, 2, 3, 4]
+        assert not os.path.exists(spill_path)
+
+    def test_spill_limit_drops_records(self, tmp_path):
+        """Records beyond spill_max_bytes are dropped"""
+        buffer = KPIRingBuffer(capacity=1, overflow_policy='spill',
+                               spill_path=str(tmp_path / 'spill.jsonl'), spill_max_bytes=10)
+        buffer.extend([{'n': 0}, {'n': 1}, {'n': 2}])
+        assert buffer.total_spilled == 1
+        assert buffer.total_dropped == 1
+
+    def test_drain_waits_for_first_record(self):
+        """Drain with a timeout wakes up when a record arrives"""
+        buffer = KPIRingBuffer(capacity=10)
+        timer = threading.Timer(0.05, buffer.append, args=('late',))
+        timer.start()
+
+        assert buffer.drain(10, timeout=2) == ['late']
+
+    def test_invalid_policy_rejected(self):
+        """Unknown overflow policies fail fast"""
+        with pytest.raises(ValueError):
+            KPIRingBuffer(overflow_policy='drop_newest')
+
+    def test_stats(self):
+        """Statistics reflect buffer activity"""
+        buffer = KPIRingBuffer.from_config({'capacity': 4})
+        buffer.extend(range(6))
+        stats = buffer.get_stats()
+        assert stats['depth'] == 4
+        assert stats['total_appended'] == 6
+        assert stats['total_dropped'] == 2
+        assert stats['overflow_policy'] == 'drop_oldest'
@@ -0,0 +1,110 @@
+"""
+Unit Tests for KPIMON compiled KPI catalog
+Tests that descriptors reproduce the former per-measurement records and keys
+"""
+
+import os
+import sys
+import json
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../xapps/kpimon-go-xapp/src'))
+
+from kpi_catalog import KPI_DEFINITIONS, KPICatalog, json_scalar
+from beam_index import beam_kpi_key
+
+
+def legacy_record(timestamp, cell_id, ue_id, beam_id, kpi_name, value):
+    """Redis record built by the former dict-per-measurement code"""
+    kpi_def = KPI_DEFINITIONS[kpi_name]
+    return json.dumps({
+        'timestamp': timestamp,
+        'cell_id': cell_id,
+        'ue_id': ue_id,
+        'beam_id': beam_id,
+        'kpi_name': kpi_name,
+        'kpi_value': value,
+        'kpi_type': kpi_def['type'],
+        'unit': kpi_def['unit'],
+        'beam_specific': kpi_def.get('beam_specific', False)
+    })
+
+
+class TestKPIDescriptor:
+    """Test suite for compiled KPI descriptors"""
+
+    @pytest.mark.parametrize('kpi_name,beam_id,ue_id,value', [
+        ('L1-RSRP.beam', 3, 'ue_001', -98.5),
+        ('DRB.UEThpDl', 'n/a', None, 52),
+        ('UE.SINR', 0, 'ue "quoted"', 12.25),
+        ('RRU.PrbUsedDl', None, 'ue_002', None),
+        ('DRB.PacketLossDl', 1, 'ue_003', float('nan')),
+    ])
+    def test_record_matches_legacy_json(self, kpi_name, beam_id, ue_id, value):
+        """Fragment-built records are byte-identical to json.dumps of the old dict"""
+        catalog = KPICatalog()
+        timestamp = '2025-11-19T10:00:00.123456'
+        cell = catalog.cell('cell_001')
+        record = catalog.get(kpi_name).record_json(
+            cell.record_prefix(timestamp, ue_id), cell.beam(beam_id), value
+        )
+        assert record == legacy_record(timestamp, 'cell_001', ue_id, beam_id, kpi_name, value)
+
+    def test_keys_match_legacy_layout(self):
+        """Pre-built key fragments produce the existing Redis key layout"""
+        catalog = KPICatalog()
+        cell = catalog.cell('cell_001')
+        beam = cell.beam(5)
+
+        assert catalog.get('L1-RSRP.beam').cell_key(cell, beam) == 'kpi:cell_001:L1-RSRP.beam:beam_5'
+        assert catalog.get('UE.RSRP').cell_key(cell, beam) == 'kpi:cell_001:UE.RSRP'
+        assert beam.beam_key_prefix + 'UE.RSRP' == beam_kpi_key(5, 'cell_001', 'UE.RSRP')
+        assert cell.series_prefix == 'cell_001:'
+        assert beam.series_prefix == 'cell_001:beam_5:'
+        assert beam.has_beam and not cell.beam('n/a').has_beam
+
+    def test_thresholds_compiled(self):
+        """Anomaly thresholds and directions are part of the descriptor"""
+        catalog = KPICatalog()
+        assert catalog.get('UE.RSRP').threshold == -110.0
+        assert catalog.get('UE.RSRP').direction == 'below'
+        assert catalog.get('RRU.PrbUsedDl').direction == 'above'
+        assert catalog.get('DRB.UEThpDl').threshold is None
+
+    def test_json_scalar(self):
+        """Number fast path agrees with the JSON encoder"""
+        for value in (0, -7, 1.5, -98.123456789, 1e300, True, None, 'x', float('inf')):
+            assert json_scalar(value) == json.dumps(value)
+
+
+class TestKPICatalog:
+    """Test suite for catalog lookups and tag interning"""
+
+    def test_unknown_kpis(self):
+        """Unknown or malformed KPI names have no descriptor"""
+        catalog = KPICatalog()
+        assert catalog.get('Unknown.KPI') is None
+        assert catalog.get(['not', 'hashable']) is None
+        assert 'UE.RSRP' in catalog
+        assert catalog.names() == list(KPI_DEFINITIONS)
+
+    def test_tags_are_reused(self):
+        """Repeated cells and beams return the same interned objects"""
+        catalog = KPICatalog()
+        cell = catalog.cell('cell_001')
+        assert catalog.cell('cell_001') is cell
+        assert cell.beam(2) is cell.beam(2)
+        assert cell.beam(2).label is cell.beam(2).label
+
+    def test_tag_tables_are_bounded(self):
+        """Tag tables are reset once full instead of growing without limit"""
+        catalog = KPICatalog(max_cells=3)
+        for i in range(10):
+            catalog.cell(f'cell_{i}')
+        assert catalog.get_stats()['cells'] <= 3
+
+    def test_unhashable_beam(self):
+        """Malformed beam ids still produce usable tags"""
+        cell = KPICatalog().cell('cell_001')
+        assert cell.beam([1, 2]).label == '[1, 2]'
+        assert cell.beams == {}
@@ -0,0 +1,171 @@
+"""
+Unit Tests for KPIMON live KPI streaming
+Tests subscription filters, coalescing, rate and client limits, SSE framing
+and the /api/beam/stream route
+"""
+
+import os
+import sys
+import json
+import time
+import pytest
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../xapps/kpimon-go-xapp/src'))
+
+import beam_query_api
+from kpi_stream import KPIStreamBroker, StreamLimitError
+
+
+def sse_data(event):
+    """Payload of an `event: kpi` SSE message"""
+    lines = event.strip().split('\n')
+    assert lines[0] == 'event: kpi'
+    return json.loads(lines[1][len('data: '):])['updates']
+
+
+class TestKPIStreamBroker:
+    """Test suite for KPIStreamBroker"""
+
+    def test_filters(self):
+        """Clients only receive updates matching their beam/cell/KPI filters"""
+        broker = KPIStreamBroker(max_rate_hz=1000)
+        sub = broker.subscribe(beams=['1'], kpis=['L1-RSRP.beam'])
+        broker.publish('cell_001', '1', 'L1-RSRP.beam', -90.0, 't1')
+        broker.publish('cell_001', '2', 'L1-RSRP.beam', -80.0, 't1')
+        broker.publish('cell_001', '1', 'UE.SINR', 12.0, 't1')
+        assert sub.next_updates(0.5) == [
+            {'cell_id': 'cell_001', 'beam_id': '1', 'kpi': 'L1-RSRP.beam', 'value': -90.0, 'timestamp': 't1'}
+        ]
+
+    def test_coalesces_per_key(self):
+        """Updates of one (cell, beam, KPI) between emits collapse to the latest value"""
+        broker = KPIStreamBroker(max_rate_hz=1000)
+        sub = broker.subscribe()
+        for i in range(5):
+            broker.publish('cell_001', '1', 'UE.RSRP', -100.0 + i, f't{i}')
+        broker.publish('cell_002', '1', 'UE.RSRP', -70.0, 't4')
+        updates = sub.next_updates(0.5)
+        assert [(u['cell_id'], u['value'], u['timestamp']) for u in updates] == [
+            ('cell_001', -96.0, 't4'), ('cell_002', -70.0, 't4')
+        ]
+        assert sub.coalesced == 4
+
+    def test_rate_limit(self):
+        """A client receives at most max_rate_hz emits per second"""
+        broker = KPIStreamBroker(max_rate_hz=10)
+        sub = broker.subscribe(max_rate_hz=100)  # capped at the broker maximum
+        broker.publish('cell_001', '1', 'UE.RSRP', -90.0, 't1')
+        assert len(sub.next_updates(0.5)) == 1
+
+        broker.publish('cell_001', '1', 'UE.RSRP', -91.0, 't2')
+        start = time.monotonic()
+        assert len(sub.next_updates(0.5)) == 1
+        assert time.monotonic() - start >= 0.09
+
+    def test_bounded_pending(self):
+        """New keys beyond max_pending are dropped, existing keys still update"""
+        broker = KPIStreamBroker(max_pending=2)
+        sub = broker.subscribe()
+        for beam in ('1', '2', '3'):
+            broker.publish('cell_001', beam, 'UE.RSRP', -90.0, 't1')
+        broker.publish('cell_001', '1', 'UE.RSRP', -85.0, 't2')
+        updates = sub.next_updates(0.5)
+        assert [(u['beam_id'], u['value']) for u in updates] == [('1', -85.0), ('2', -90.0)]
+
+    def test_client_limit(self):
+        """Clients beyond max_clients are refused until a stream ends"""
+        broker = KPIStreamBroker(max_clients=1)
+        sub = broker.subscribe()
+        with pytest.raises(StreamLimitError):
+            broker.subscribe()
+        broker.unsubscribe(sub)
+        broker.subscribe()
+        assert broker.get_stats()['rejected'] == 1
+
+    def test_sse_framing_and_heartbeat(self):
+        """The stream starts with a retry hint, sends kpi events and keep-alives"""
+        broker = KPIStreamBroker(max_rate_hz=1000, heartbeat_s=0.05)
+        sub = broker.subscribe()
+        events = broker.sse_events(sub)
+        assert next(events) == 'retry: 3000\n\n'
+
+        broker.publish('cell_001', '3', 'L1-SINR.beam', 15.5, 't1')
+        assert sse_data(next(events)) == [
+            {'cell_id': 'cell_001', 'beam_id': '3', 'kpi': 'L1-SINR.beam', 'value': 15.5, 'timestamp': 't1'}
+        ]
+        assert next(events) == ': keepalive\n\n'
+
+    def test_disconnect_unsubscribes(self):
+        """Closing the event generator (client gone) frees the client slot"""
+        broker = KPIStreamBroker(heartbeat_s=0.05)
+        events = broker.sse_events(broker.subscribe())
+        next(events)
+        assert broker.get_stats()['clients'] == 1
+        events.close()
+        assert broker.get_stats()['clients'] == 0
+
+    def test_close_ends_streams(self):
+        """close() ends every open stream"""
+        broker = KPIStreamBroker(heartbeat_s=5)
+        events = broker.sse_events(broker.subscribe())
+        next(events)
+        broker.close()
+        assert list(events) == []
+
+    def test_publish_without_clients(self):
+        """Publishing with nobody connected is a no-op"""
+        broker = KPIStreamBroker()
+        broker.publish('cell_001', '1', 'UE.RSRP', -90.0, 't1')
+        assert broker.get_stats()['sent'] == 0
+
+
+class TestStreamRoute:
+    """Test suite for GET /api/beam/stream"""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        broker = KPIStreamBroker(max_clients=1, max_rate_hz=1000, heartbeat_s=0.05)
+        monkeypatch.setattr(beam_query_api, 'stream_broker', broker)
+        app = Flask('test_kpi_stream')
+        app.register_blueprint(beam_query_api.beam_api)
+        return app.test_client(), broker
+
+    def test_streams_events(self, client):
+        """The route returns an event stream honouring the query filters"""
+        test_client, broker = client
+        response = test_client.get('/api/beam/stream?beam_id=2&kpi_type=UE.RSRP', buffered=False)
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        assert response.headers['Cache-Control'] == 'no-cache'
+
+        chunks = response.response
+        assert next(chunks) == b'retry: 3000\n\n'
+        broker.publish('cell_001', '1', 'UE.RSRP', -80.0, 't1')
+        broker.publish('cell_001', '2', 'UE.RSRP', -90.0, 't1')
+        assert sse_data(next(chunks).decode()) == [
+            {'cell_id': 'cell_001', 'beam_id': '2', 'kpi': 'UE.RSRP', 'value': -90.0, 'timestamp': 't1'}
+        ]
+        response.close()
+        assert broker.get_stats()['clients'] == 0
+
+    def test_client_limit_returns_429(self, client):
+        """Streams beyond max_clients are refused with 429"""
+        test_client, broker = client
+        broker.subscribe()
+        response = test_client.get('/api/beam/stream')
+        assert response.status_code == 429
+        assert response.get_json()['error_code'] == 'TOO_MANY_STREAMS'
+
+    def test_invalid_beam(self, client):
+        """Beam IDs outside 1..64 are rejected"""
+        test_client, _ = client
+        assert test_client.get('/api/beam/stream?beam_id=1,65').status_code == 400
+        assert test_client.get('/api/beam/stream?beam_id=x').status_code == 400
+
+    def test_disabled(self, monkeypatch):
+        """Without a broker the route answers 503"""
+        monkeypatch.setattr(beam_query_api, 'stream_broker', None)
+        app = Flask('test_kpi_stream_disabled')
+        app.register_blueprint(beam_query_api.beam_api)
+        assert app.test_client().get('/api/beam/stream').status_code == 503
@@ -0,0 +1,120 @@
+"""
+Unit Tests for the KPIMON indication pipeline
+Drives KPIMonitor._handle_indication against fakeredis: Redis records,
+indexes and timelines written for one indication, InfluxDB buffer points
+"""
+
+import os
+import sys
+import time
+import pytest
+import fakeredis
+from prometheus_client import CollectorRegistry, Gauge
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../xapps/common'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../xapps/kpimon-go-xapp/src'))
+
+pytest.importorskip('ricxappframe')
+pytest.importorskip('mdclogpy')
+
+import kpimon
+from kpimon import KPIMonitor
+from cardinality_guard import CardinalityGuard
+from kpi_buffer import KPIRingBuffer
+from kpi_catalog import KPI_DEFINITIONS, KPICatalog
+from stage_profiler import StageProfiler
+
+
+@pytest.fixture
+def monitor(monkeypatch):
+    """KPIMonitor with the indication path wired to fakeredis (no RMR, SDL or InfluxDB)"""
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(kpimon.redis, 'Redis',
+                        lambda **kwargs: fakeredis.FakeRedis(server=server, decode_responses=True))
+
+    monitor = KPIMonitor.__new__(KPIMonitor)
+    monitor.config = monitor._load_config('/nonexistent/config.json')
+    monitor.config['redis']['ttl'] = 120
+    monitor.redis_ttl = monitor.config['redis']['ttl']
+    monitor._init_redis()
+
+    monitor.kpi_definitions = KPI_DEFINITIONS
+    monitor.kpi_catalog = KPICatalog(KPI_DEFINITIONS)
+    monitor.kpi_buffer = KPIRingBuffer()
+    gauge = Gauge('kpimon_kpi_value', 'Current KPI values', ['kpi_type', 'cell_id', 'beam_id'],
+                  registry=CollectorRegistry())
+    monitor.kpi_metrics = CardinalityGuard(gauge)
+    monitor.latest_cache = None
+    monitor.kpi_stream = None
+    monitor.profiler = StageProfiler()
+    monitor.query_cache = None
+    monitor.report_written = None
+    return monitor
+
+
+def indication(measurements, **fields):
+    return {'timestamp': '2025-11-19T10:00:00+00:00', 'cell_id': 'cell_001', 'ue_id': 'ue_001',
+            'beam_id': 1, 'measurements': measurements, **fields}
+
+
+class TestHandleIndication:
+    """Test suite for KPIMonitor._handle_indication"""
+
+    def test_writes_records_and_buffer(self, monitor):
+        """Valid measurements reach Redis and the InfluxDB buffer"""
+        monitor._handle_indication(indication([{'name': 'UE.RSRP', 'value': -95.0},
+                                               {'name': 'L1-RSRP.beam', 'value': -97.5}]))
+        assert set(monitor.redis_client.keys('kpi:*:cell_001:*')) >= {
+            'kpi:beam:1:cell:cell_001:UE.RSRP', 'kpi:beam:1:cell:cell_001:L1-RSRP.beam'
+        }
+        assert set(monitor.redis_client.keys('kpi:cell_001:*')) == {
+            'kpi:cell_001:UE.RSRP', 'kpi:cell_001:L1-RSRP.beam:beam_1'
+        }
+        assert [p.kpi_name for p in monitor.kpi_buffer.drain(10)] == ['UE.RSRP', 'L1-RSRP.beam']
+
+    def test_records_use_configured_ttl(self, monitor):
+        """Records expire with redis.ttl, like the beam/cell indexes pointing at them"""
+        monitor._handle_indication(indication([{'name': 'UE.RSRP', 'value': -95.0}]))
+        client = monitor.redis_client
+        for key in ('kpi:cell_001:UE.RSRP', 'kpi:beam:1:cell:cell_001:UE.RSRP', 'kpi:idx:beam:1:cells'):
+            assert 110 < client.ttl(key) <= 120
+
+    def test_bad_value_skips_only_that_measurement(self, monitor):
+        """A non-numeric value drops its own measurement, not the indication's other writes"""
+        monitor._handle_indication(indication([
+            {'name': 'L1-RSRP.beam', 'value': -95.0},
+            {'name': 'UE.SINR', 'value': float('nan')},
+            {'name': 'UE.RSRP', 'value': 'bad'},
+            {'name': 'DRB.UEThpDl', 'value': 120}
+        ]))
+        assert set(monitor.redis_client.keys('kpi:cell_001:*')) == {
+            'kpi:cell_001:L1-RSRP.beam:beam_1', 'kpi:cell_001:DRB.UEThpDl'
+        }
+        points = monitor.kpi_buffer.drain(10)
+        assert [(p.kpi_name, p.value) for p in points] == [('L1-RSRP.beam', -95.0), ('DRB.UEThpDl', 120.0)]
+
+    def test_missing_timestamp_off_utc_host(self, monitor):
+        """Indications without a timestamp are stamped in UTC and kept in the timeline"""
+        host_tz = os.environ.get('TZ')
+        os.environ['TZ'] = 'America/New_York'
+        time.tzset()
+        try:
+            monitor._handle_indication(indication([{'name': 'UE.RSRP', 'value': -95.0}], timestamp=None))
+        finally:
+            if host_tz is None:
+                del os.environ['TZ']
+            else:
+                os.environ['TZ'] = host_tz
+            time.tzset()
+        client = monitor.redis_client
+        (member, score), = client.zrange('kpi:timeline:cell_001:UE.RSRP', 0, -1, withscores=True)
+        assert abs(score - time.time()) < 60
+        assert monitor.timeline.total_late == 0
+
+    def test_worker_reports_written_span(self, monitor):
+        """An ingestion worker sends its InfluxDB write spans to the parent's query cache"""
+        reported = []
+        monitor.report_written = lambda beams, since: reported.append((beams, since))
+        monitor._handle_indication(indication([{'name': 'UE.RSRP', 'value': -95.0}]))
+        monitor._on_influx_written(monitor.kpi_buffer.drain(10))
+        assert reported == [({'1'}, 1763546400.0)]
@@ -0,0 +1,128 @@
+"""
+Unit Tests for KPIMON in-process latest KPI cache
+Tests TTL, slot bounds, UE counts and cache-first current beam queries
+"""
+
+import os
+import sys
+import json
+import pytest
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../xapps/kpimon-go-xapp/src'))
+
+from latest_cache import LatestKPICache
+from beam_index import beam_kpi_key
+from beam_query_api import BeamQueryService
+
+KPIS = ['UE.RSRP', 'UE.SINR', 'DRB.UEThpDl', 'L1-RSRP.beam']
+
+
+class TestLatestKPICache:
+    """Test suite for LatestKPICache"""
+
+    def test_latest_value_wins(self):
+        """Only the most recent value of a (cell, beam, KPI) is kept"""
+        cache = LatestKPICache(KPIS)
+        cache.update('cell_001', '1', 'UE.RSRP', -95.0, 't1', now=0)
+        cache.update('cell_001', '1', 'UE.RSRP', -91, 't2', now=1)
+        cache.update('cell_001', '1', 'UE.SINR', 14.0, 't2', now=1)
+        assert cache.get('cell_001', '1', now=2) == {'UE.RSRP': (-91.0, 't2'), 'UE.SINR': (14.0, 't2')}
+        assert cache.get('cell_001', '2', now=2) is None
+
+    def test_ignores_unknown_and_non_numeric(self):
+        """Unknown KPIs and non-numeric values are not cached"""
+        cache = LatestKPICache(KPIS)
+        cache.update('cell_001', '1', 'Vendor.X', 1.0, 't')
+        cache.update('cell_001', '1', 'UE.RSRP', 'bad', 't')
+        assert len(cache) == 0
+
+    def test_ttl(self):
+        """Entries older than the TTL are missing"""
+        cache = LatestKPICache(KPIS, ttl_s=300)
+        cache.update('cell_001', '1', 'UE.RSRP', -95.0, 't1', now=0)
+        cache.update('cell_001', '1', 'UE.SINR', 14.0, 't2', now=200)
+        assert set(cache.get('cell_001', '1', now=350)) == {'UE.SINR'}
+        assert cache.get('cell_001', '1', now=600) is None
+        assert cache.cells('1', now=350) == ['cell_001']
+        assert cache.cells('1', now=600) == []
+
+    def test_ue_count(self):
+        """UE count covers UEs seen within the TTL"""
+        cache = LatestKPICache(KPIS, ttl_s=300)
+        cache.update('cell_001', '1', 'UE.RSRP', -95.0, 't', ue_id='ue_1', now=0)
+        cache.update('cell_001', '1', 'UE.RSRP', -95.0, 't', ue_id='ue_2', now=100)
+        cache.update('cell_001', '1', 'UE.RSRP', -95.0, 't', ue_id='ue_2', now=200)
+        assert cache.ue_count('cell_001', '1', now=250) == 2
+        assert cache.ue_count('cell_001', '1', now=350) == 1
+        assert cache.ue_count('cell_002', '1') is None
+
+    def test_bounded_slots(self):
+        """The slot table is cleared when full"""
+        cache = LatestKPICache(KPIS, max_slots=2)
+        for cell in ('a', 'b', 'c'):
+            cache.update(cell, '1', 'UE.RSRP', -95.0, 't')
+        assert len(cache) == 1
+        assert cache.get('a', '1') is None
+        assert cache.get('c', '1') == {'UE.RSRP': (-95.0, 't')}
+        assert cache.get_stats()['clears'] == 1
+
+    def test_not_authoritative_by_default(self):
+        """Only an explicit single-replica config lists beam cells locally"""
+        assert not LatestKPICache.from_config(KPIS).authoritative
+        assert not LatestKPICache.from_config(KPIS, {'max_slots': 16}).authoritative
+        assert LatestKPICache.from_config(KPIS, {'authoritative': True}).authoritative
+
+
+def kpi_record(cell_id, beam_id, kpi_name, value):
+    return json.dumps({'timestamp': '2025-11-19T10:00:00', 'cell_id': cell_id,
+                       'beam_id': beam_id, 'kpi_name': kpi_name, 'kpi_value': value})
+
+
+class TestCacheFirstQueries:
+    """Test suite for BeamQueryService reading the latest cache first"""
+
+    @pytest.fixture
+    def redis_client(self):
+        client = MagicMock()
+        client.smembers.return_value = {'cell_001', 'cell_002'}
+        client.zcount.return_value = 7
+        records = {
+            beam_kpi_key(1, 'cell_002', 'UE.RSRP'): kpi_record('cell_002', 1, 'UE.RSRP', -100.0),
+        }
+        client.mget.side_effect = lambda keys: [records.get(key) for key in keys]
+        return client
+
+    def test_cache_hit_skips_redis(self, redis_client):
+        """A cell held locally is answered without Redis"""
+        cache = LatestKPICache(KPIS, authoritative=True)
+        cache.update('cell_001', '1', 'UE.RSRP', -90.0, 't1', ue_id='ue_1')
+        cache.update('cell_001', '1', 'UE.SINR', 15.0, 't1', ue_id='ue_2')
+        service = BeamQueryService(redis_client, None, 'oran', 'kpimon', latest_cache=cache)
+
+        data = service.get_current_beam_kpi(1, ['all'])
+        assert redis_client.method_calls == []
+        assert data['signal_quality']['rsrp'] == {'value': -90.0, 'unit': 'dBm',
+                                                  'quality': 'good', 'timestamp': 't1'}
+        assert data['metadata'] == {'cell_id': 'cell_001', 'beam_id': 1, 'ue_count': 2}
+
+    def test_other_replica_cells_from_redis(self, redis_client):
+        """Cells not held locally are read from Redis, local ones are not"""
+        cache = LatestKPICache(KPIS, authoritative=False)
+        cache.update('cell_001', '1', 'UE.SINR', 15.0, 't1')
+        service = BeamQueryService(redis_client, None, 'oran', 'kpimon', latest_cache=cache)
+
+        data = service.get_current_beam_kpi(1, ['all'])
+        keys = redis_client.mget.call_args[0][0]
+        assert keys and all(':cell:cell_002:' in key for key in keys)
+        assert data['signal_quality']['sinr']['value'] == 15.0
+        assert data['signal_quality']['rsrp']['value'] == -100.0
+        assert data['metadata']['cell_id'] == 'cell_001'
+
+    def test_empty_cache_falls_back(self, redis_client):
+        """An empty authoritative cache (e.g. after restart) falls back to the Redis index"""
+        cache = LatestKPICache(KPIS, authoritative=True)
+        service = BeamQueryService(redis_client, None, 'oran', 'kpimon', latest_cache=cache)
+        data = service.get_current_beam_kpi(1, ['all'])
+        redis_client.smembers.assert_called_once()
+        assert data['signal_quality']['rsrp']['value'] == -100.0
@@ -0,0 +1,116 @@
+"""
+Unit Tests for KPIMON KPI quality assessment
+Tests the threshold classifier (scalar and vectorized), throughput thresholds
+and the quality histogram of /api/beam/<beam_id>/kpi/timeseries
+"""
+
+import os
+import sys
+import numpy as np
+import pytest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../xapps/kpimon-go-xapp/src'))
+
+import beam_query_api
+from beam_query_api import BeamQueryService
+from query_cache import QueryResultCache
+
+T0 = datetime(2025, 11, 19, 10, 0, tzinfo=timezone.utc)
+
+
+def records(values):
+    return iter([SimpleNamespace(values={'_time': T0 + timedelta(minutes=i), '_value': value})
+                 for i, value in enumerate(values)])
+
+
+@pytest.fixture
+def service():
+    return BeamQueryService(MagicMock(), MagicMock(), 'oran', 'kpimon')
+
+
+class TestAssessQuality:
+    """Test suite for assess_quality and assess_quality_array"""
+
+    @pytest.mark.parametrize('kpi_type,value,quality', [
+        ('rsrp', -85, 'excellent'), ('rsrp', -95, 'good'), ('rsrp', -95.1, 'fair'), ('rsrp', -120, 'poor'),
+        ('rsrq', -9, 'good'), ('sinr', 8, 'fair'), ('sinr', 2, 'poor'),
+        ('throughput_dl', 120.0, 'excellent'), ('throughput_dl', 10, 'fair'), ('throughput_dl', 0.5, 'poor'),
+        ('throughput_ul', 25.0, 'good'),
+    ])
+    def test_thresholds(self, service, kpi_type, value, quality):
+        """Values at a lower bound belong to that level, throughput included"""
+        assert service.assess_quality(kpi_type, value) == quality
+
+    @pytest.mark.parametrize('kpi_type,value', [('rsrp', None), ('rsrp', float('nan')), ('rsrp', 'x'),
+                                                ('bogus', 1.0)])
+    def test_unknown(self, service, kpi_type, value):
+        """Missing values and KPIs without thresholds are unknown"""
+        assert service.assess_quality(kpi_type, value) == 'unknown'
+
+    @pytest.mark.parametrize('kpi_type', ['rsrp', 'rsrq', 'sinr', 'throughput_dl', 'throughput_ul'])
+    def test_array_matches_scalar(self, service, kpi_type):
+        """The vectorized classifier agrees with assess_quality, bounds included"""
+        values = np.concatenate([np.linspace(-130, 130, 521), [-105, -95, -85, 5, 50, 100]])
+        labels = service.assess_quality_array(kpi_type, values)
+        assert list(labels) == [service.assess_quality(kpi_type, v) for v in values]
+
+    def test_array_missing_values(self, service):
+        """None and NaN entries are unknown"""
+        labels = service.assess_quality_array('sinr', [25.0, None, float('nan'), 1.0])
+        assert labels.tolist() == ['excellent', 'unknown', 'unknown', 'poor']
+        assert service.assess_quality_array('bogus', [1.0, 2.0]).tolist() == ['unknown', 'unknown']
+
+    def test_histogram(self, service):
+        """Every level is counted, including empty ones"""
+        assert service.quality_histogram('rsrp', [-80, -90, -92, -130, None]) == {
+            'poor': 1, 'fair': 0, 'good': 2, 'excellent': 1, 'unknown': 1
+        }
+
+    def test_current_throughput_quality(self, service):
+        """Current throughput values carry a quality assessment"""
+        data = {'throughput': {}}
+        service._add_current_kpi(data, 'DRB.UEThpDl', 60.0, 't1')
+        assert data['throughput']['downlink']['quality'] == 'good'
+
+
+class TestQualityHistogramRoute:
+    """Test suite for summary=quality on the time-series endpoint"""
+
+    @pytest.fixture
+    def client(self, service, monkeypatch):
+        monkeypatch.setattr(beam_query_api, 'beam_service', service)
+        app = Flask('test_quality_assessment')
+        app.register_blueprint(beam_query_api.beam_api)
+        return app.test_client()
+
+    def test_summary(self, service, client):
+        """The response counts aggregation windows per quality level"""
+        service.query_api.query_stream.return_value = records([-80.0, -90.0, -100.0, -100.0, -120.0])
+        response = client.get('/api/beam/1/kpi/timeseries?kpi_type=rsrp&interval=1m&summary=quality')
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body['quality'] == {'excellent': 1, 'good': 1, 'fair': 2, 'poor': 1, 'unknown': 0}
+        assert body['count'] == 5 and 'datapoints' not in body
+        assert 'aggregateWindow(every: 1m' in service.query_api.query_stream.call_args.args[0]
+
+    def test_summary_cached(self, service):
+        """Closed-window histograms are served from the query cache"""
+        service.query_cache = QueryResultCache(closed_ttl_s=1e9)
+        service.query_api.query_stream.side_effect = lambda *a, **k: records([-90.0])
+        for _ in range(2):
+            service.get_quality_histogram(1, 'sinr', T0 - timedelta(hours=1), T0)
+        assert service.query_api.query_stream.call_count == 1
+
+    def test_throughput_timeseries(self, service, client):
+        """Throughput datapoints are assessed instead of reported as unknown"""
+        service.query_api.query_stream.return_value = records([120.0, 30.0])
+        body = client.get('/api/beam/1/kpi/timeseries?kpi_type=throughput_dl').get_json()
+        assert [p['quality'] for p in body['datapoints']] == ['excellent', 'fair']
+
+    def test_invalid_summary(self, client):
+        """Unknown summary modes are rejected"""
+        assert client.get('/api/beam/1/kpi/timeseries?kpi_type=rsrp&summary=mean').status_code == 400
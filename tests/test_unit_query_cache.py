@@ -0,0 +1,172 @@
+"""
+Unit Tests for the KPIMON beam query result cache
+Tests TTL buckets, LRU bounds, single-flight loading, invalidation and the
+cached BeamQueryService queries
+"""
+
+import os
+import sys
+import time
+import threading
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../xapps/kpimon-go-xapp/src'))
+
+from query_cache import QueryResultCache
+from beam_query_api import BeamQueryService
+
+
+def counting_loader(value='result'):
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return value
+    return loader, calls
+
+
+class TestQueryResultCache:
+    """Test suite for QueryResultCache"""
+
+    def test_open_window_reused_within_bucket(self):
+        """Open-window results are shared within a time bucket, recomputed in the next"""
+        cache = QueryResultCache(bucket_s=10)
+        loader, calls = counting_loader()
+        assert cache.get_or_load('q', loader, now=100) == 'result'
+        assert cache.get_or_load('q', loader, now=109.9) == 'result'
+        assert len(calls) == 1
+        cache.get_or_load('q', loader, now=110)
+        assert len(calls) == 2
+
+    def test_closed_window_ttl(self):
+        """Closed-window results live for closed_ttl_s"""
+        cache = QueryResultCache(bucket_s=10, closed_ttl_s=60)
+        loader, calls = counting_loader()
+        cache.get_or_load('q', loader, beam='1', window_end=50, now=100)
+        cache.get_or_load('q', loader, beam='1', window_end=50, now=159)
+        assert len(calls) == 1
+        cache.get_or_load('q', loader, beam='1', window_end=50, now=161)
+        assert len(calls) == 2
+
+    def test_lru_eviction(self):
+        """The least recently used result is evicted beyond max_entries"""
+        cache = QueryResultCache(max_entries=2, closed_ttl_s=1e9)
+        loader, calls = counting_loader()
+        for key in ('a', 'b', 'a', 'c'):
+            cache.get_or_load(key, loader, window_end=0)
+        assert len(cache) == 2
+        cache.get_or_load('a', loader, window_end=0)
+        assert len(calls) == 3
+        cache.get_or_load('b', loader, window_end=0)
+        assert len(calls) == 4
+        assert cache.get_stats()['evictions'] == 2
+
+    def test_single_flight(self):
+        """Concurrent identical misses run the query once"""
+        cache = QueryResultCache()
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def slow_loader():
+            calls.append(1)
+            started.set()
+            release.wait(2)
+            return {'rows': 3}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_load('q', slow_loader)))
+                   for _ in range(4)]
+        threads[0].start()
+        started.wait(2)
+        for thread in threads[1:]:
+            thread.start()
+        deadline = time.monotonic() + 2
+        while cache.get_stats()['coalesced'] < 3 and time.monotonic() < deadline:
+            time.sleep(0.005)
+        release.set()
+        for thread in threads:
+            thread.join(2)
+
+        assert len(calls) == 1
+        assert results == [{'rows': 3}] * 4
+
+    def test_errors_propagate_and_are_not_cached(self):
+        """A failed query raises for every waiter and is retried by the next request"""
+        cache = QueryResultCache()
+
+        def failing():
+            raise RuntimeError('influx down')
+
+        with pytest.raises(RuntimeError):
+            cache.get_or_load('q', failing)
+        loader, calls = counting_loader()
+        assert cache.get_or_load('q', loader) == 'result'
+        assert len(calls) == 1
+
+    def test_invalidate_closed_windows(self):
+        """Writes into a closed window drop it; other beams, earlier windows and open windows stay"""
+        cache = QueryResultCache(closed_ttl_s=1e9)
+        loader, calls = counting_loader()
+        cache.get_or_load('beam1_old', loader, beam='1', window_end=100, now=500)
+        cache.get_or_load('beam1_recent', loader, beam='1', window_end=300, now=500)
+        cache.get_or_load('beam2_recent', loader, beam='2', window_end=300, now=500)
+        cache.get_or_load('beam1_open', loader, beam='1', now=500)
+
+        assert cache.invalidate({'1'}, since=200) == 1
+        assert len(cache) == 3
+        cache.get_or_load('beam1_recent', loader, beam='1', window_end=300, now=500)
+        assert len(calls) == 5
+
+    def test_invalidate_during_load(self):
+        """A result whose window was written to while it loaded is not cached"""
+        cache = QueryResultCache(closed_ttl_s=1e9)
+
+        def loader():
+            cache.invalidate({'1'}, since=0)
+            return 'stale'
+
+        cache.get_or_load('q', loader, beam='1', window_end=100)
+        assert len(cache) == 0
+
+
+class TestCachedBeamQueries:
+    """Test suite for BeamQueryService queries through the result cache"""
+
+    @pytest.fixture
+    def service(self):
+        influx = MagicMock()
+        influx.query_api.return_value.query.return_value = []
+        influx.query_api.return_value.query_stream.return_value = iter(())
+        return BeamQueryService(MagicMock(), influx, 'oran', 'kpimon',
+                                query_cache=QueryResultCache(closed_ttl_s=1e9))
+
+    def test_historical_normalized_keys(self, service):
+        """Requests that produce the same Flux query share one result"""
+        query = service.query_api.query
+        service.get_historical_beam_kpi(1, ['all'], 'last_15m', 'mean')
+        service.get_historical_beam_kpi(1, ['rsrp'], 'bogus', 'p95')
+        assert query.call_count == 1
+        service.get_historical_beam_kpi(1, ['all'], 'last_15m', 'raw')
+        service.get_historical_beam_kpi(2, ['all'], 'last_15m', 'mean')
+        assert query.call_count == 3
+
+    def test_timeseries_closed_window(self, service):
+        """Past windows stay cached until points inside them are written"""
+        query = service.query_api.query_stream
+        end = datetime(2025, 11, 19, 10, 0)
+        start = end - timedelta(hours=1)
+        service.get_timeseries_data(1, 'rsrp', start, end)
+        service.get_timeseries_data(1, 'rsrp', start, end)
+        assert query.call_count == 1
+
+        service.query_cache.invalidate({'1'}, since=end.timestamp() - 3600 * 24)
+        service.get_timeseries_data(1, 'rsrp', start, end)
+        assert query.call_count == 2
+
+    def test_unknown_timeseries_kpi(self, service):
+        """Unknown KPI types are rejected before any query"""
+        with pytest.raises(ValueError):
+            service.get_timeseries_data(1, 'bogus')
+        service.query_api.query_stream.assert_not_called()
@@ -0,0 +1,117 @@
+"""
+Unit Tests for KPIMON pipelined Redis writer
+Tests command coalescing, flush triggers and error handling
+"""
+
+import os
+import sys
+import time
+import pytest
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../xapps/kpimon-go-xapp/src'))
+
+from redis_writer import RedisBatchWriter
+
+
+@pytest.fixture
+def redis_client():
+    """Mock Redis client whose pipelines record executed commands"""
+    client = MagicMock()
+    client.pipelines = []
+
+    def make_pipeline(transaction=False):
+        pipe = MagicMock()
+        client.pipelines.append(pipe)
+        return pipe
+
+    client.pipeline.side_effect = make_pipeline
+    return client
+
+
+class TestRedisBatchWriter:
+    """Test suite for RedisBatchWriter"""
+
+    def test_submit_flushes_group_in_one_pipeline(self, redis_client):
+        """Without a latency budget every submitted group is one round trip"""
+        writer = RedisBatchWriter(redis_client)
+        writer.submit([
+            ('setex', ('kpi:cell_001:UE.RSRP', 300, '{}')),
+            ('setex', ('kpi:beam:1:cell:cell_001:UE.RSRP', 300, '{}')),
+            ('zadd', ('kpi:timeline:cell_001', {'t': -95.0})),
+        ])
+
+        assert len(redis_client.pipelines) == 1
+        pipe = redis_client.pipelines[0]
+        assert pipe.setex.call_count == 2
+        pipe.zadd.assert_called_once_with('kpi:timeline:cell_001', {'t': -95.0})
+        pipe.execute.assert_called_once()
+        assert writer.pending() == 0
+
+    def test_empty_submit_is_noop(self, redis_client):
+        """Empty command groups do not touch Redis"""
+        writer = RedisBatchWriter(redis_client)
+        writer.submit([])
+        assert redis_client.pipelines == []
+
+    def test_coalesces_until_batch_size(self, redis_client):
+        """With a latency budget groups are held until the batch is full"""
+        writer = RedisBatchWriter(redis_client, max_batch_size=4, max_latency_ms=10000)
+        writer.start()
+        try:
+            writer.submit([('setex', ('a', 300, '1')), ('setex', ('b', 300, '1'))])
+            assert redis_client.pipelines == []
+            assert writer.pending() == 2
+
+            writer.submit([('setex', ('c', 300, '1')), ('setex', ('d', 300, '1'))])
+            assert len(redis_client.pipelines) == 1
+            assert redis_client.pipelines[0].setex.call_count == 4
+        finally:
+            writer.stop()
+
+    def test_latency_budget_triggers_flush(self, redis_client):
+        """Queued commands are flushed by the background thread after the budget"""
+        writer = RedisBatchWriter(redis_client, max_batch_size=1000, max_latency_ms=20)
+        writer.start()
+        try:
+            writer.submit([('setex', ('a', 300, '1'))])
+            deadline = time.time() + 2
+            while writer.pending() and time.time() < deadline:
+                time.sleep(0.01)
+            assert writer.pending() == 0
+            assert len(redis_client.pipelines) == 1
+        finally:
+            writer.stop()
+
+    def test_stop_flushes_remaining(self, redis_client):
+        """Stopping the writer flushes commands still queued"""
+        writer = RedisBatchWriter(redis_client, max_latency_ms=60000)
+        writer.start()
+        writer.submit([('setex', ('a', 300, '1'))])
+        writer.stop()
+        assert writer.pending() == 0
+        assert writer.total_commands == 1
+
+    def test_flush_error_is_counted_and_dropped(self, redis_client):
+        """A failing pipeline is logged and counted, not raised to the handler"""
+        pipe = MagicMock()
+        pipe.execute.side_effect = ConnectionError("redis down")
+        redis_client.pipeline.side_effect = None
+        redis_client.pipeline.return_value = pipe
+
+        writer = RedisBatchWriter(redis_client)
+        writer.submit([('setex', ('a', 300, '1'))])
+
+        assert writer.total_errors == 1
+        assert writer.pending() == 0
+
+    def test_from_config(self, redis_client):
+        """Writer settings are read from the redis.batch config section"""
+        writer = RedisBatchWriter.from_config(redis_client, {
+            'max_batch_size': 50,
+            'max_latency_ms': 5,
+            'transaction': True
+        })
+        assert writer.max_batch_size == 50
+        assert writer.max_latency == pytest.approx(0.005)
+        assert writer.transaction is True
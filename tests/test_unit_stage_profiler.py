@@ -0,0 +1,102 @@
+"""
+Unit Tests for KPIMON stage profiler
+Tests sampling, per-stage accounting and folded stack sampling
+"""
+
+import os
+import sys
+import time
+import threading
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../xapps/kpimon-go-xapp/src'))
+
+from stage_profiler import StageProfiler, StageStats
+
+
+class TestStageProfiler:
+    """Test suite for StageProfiler"""
+
+    def test_disabled_by_default(self):
+        """A disabled profiler traces nothing"""
+        profiler = StageProfiler()
+        assert profiler.start() is None
+        profiler.finish(None)
+        with profiler.time_stage('anomaly_detection'):
+            pass
+        assert profiler.breakdown()['stages'] == {}
+
+    def test_sampling_rate(self):
+        """Only every Nth indication is traced"""
+        profiler = StageProfiler(enabled=True, sample_rate=0.25)
+        traces = [profiler.start() for _ in range(100)]
+        assert sum(t is not None for t in traces) == 25
+
+    def test_stage_breakdown(self):
+        """Time between marks is attributed to the marked stage"""
+        profiler = StageProfiler(enabled=True, sample_rate=1)
+        for _ in range(3):
+            trace = profiler.start()
+            trace.mark('json_decode')
+            time.sleep(0.002)
+            trace.mark('redis_write')
+            trace.mark('definition_lookup')
+            trace.mark('definition_lookup')
+            profiler.finish(trace)
+
+        stages = profiler.breakdown()['stages']
+        assert stages['total']['count'] == 3
+        assert stages['definition_lookup']['count'] == 3
+        assert stages['redis_write']['mean_us'] >= 2000
+        assert stages['redis_write']['share'] > 0.5
+        assert stages['redis_write']['p50_us'] >= 2000
+
+    def test_batch_stage_and_reset(self):
+        """Batch stages are recorded and reset() clears statistics"""
+        profiler = StageProfiler(enabled=True)
+        with profiler.time_stage('anomaly_detection'):
+            pass
+        assert profiler.breakdown()['stages']['anomaly_detection']['count'] == 1
+        profiler.reset()
+        assert profiler.breakdown()['stages'] == {}
+
+    def test_configure_validates_rate(self):
+        """Invalid sample rates are rejected"""
+        profiler = StageProfiler()
+        with pytest.raises(ValueError):
+            profiler.configure(sample_rate=0)
+        profiler.configure(enabled=True, sample_rate=0.5)
+        assert profiler.enabled and profiler.sample_rate == 0.5
+
+    def test_sample_stacks(self):
+        """Stack sampling returns folded stacks of other threads"""
+        stop = threading.Event()
+
+        def busy_worker():
+            while not stop.is_set():
+                sum(range(1000))
+
+        worker = threading.Thread(target=busy_worker, name='busy')
+        worker.start()
+        try:
+            result = StageProfiler(stack_interval_ms=1).sample_stacks(0.05)
+        finally:
+            stop.set()
+            worker.join()
+
+        assert result['samples'] >= 2
+        stacks = [s['stack'] for s in result['stacks']]
+        assert any(s.startswith('busy;') and 'busy_worker' in s for s in stacks)
+
+
+class TestStageStats:
+    """Test suite for log2 latency buckets"""
+
+    def test_quantiles(self):
+        """Quantiles are bucket upper bounds in microseconds"""
+        stats = StageStats()
+        for ns in [1_500] * 90 + [100_000] * 10:
+            stats.add(ns)
+        assert stats.quantile(0.5) == 2.0
+        assert stats.quantile(0.99) == 128.0
+        assert stats.max_ns == 100_000
@@ -0,0 +1,141 @@
+"""
+Unit Tests for KPIMON E2 subscription manager
+Tests the pending/active/failed/deleting state machine and node changes
+"""
+
+import os
+import sys
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../xapps/kpimon-go-xapp/src'))
+
+from subscription_manager import (
+    RIC_SUB_DEL_REQ, RIC_SUB_REQ, SubscriptionManager, SubscriptionState, fetch_connected_nodes
+)
+
+TEMPLATE = {'event_trigger': {'report_period': 1000}, 'actions': [{'action_id': 1}]}
+
+
+def make_manager(**kwargs):
+    kwargs.setdefault('nodes', ['gnb_1'])
+    kwargs.setdefault('retry_backoff_s', 5)
+    return SubscriptionManager(TEMPLATE, **kwargs)
+
+
+def states(manager):
+    return sorted((s['e2_node_id'], s['state']) for s in manager.subscriptions(now=0))
+
+
+class TestSubscriptionManager:
+    """Test suite for SubscriptionManager"""
+
+    def test_subscribes_once_per_node(self):
+        """Each node gets one request; reconciling again sends nothing"""
+        manager = make_manager(nodes=['gnb_1', 'gnb_2'])
+        actions = manager.reconcile(now=0)
+        assert [a[0] for a in actions] == [RIC_SUB_REQ, RIC_SUB_REQ]
+        assert {a[1]['e2_node_id'] for a in actions} == {'gnb_1', 'gnb_2'}
+        assert actions[0][1]['event_trigger'] == {'report_period': 1000}
+        assert actions[0][1]['ran_function_id'] == 2
+
+        for _, request in actions:
+            manager.on_response({'request_id': request['request_id'], 'status': 'success'}, now=1)
+        assert manager.reconcile(now=60) == []
+        assert manager.reconcile(now=3600) == []
+        assert states(manager) == [('gnb_1', 'active'), ('gnb_2', 'active')]
+
+    def test_routed_subscription_without_nodes(self):
+        """Without configured nodes one RMR-routed subscription is kept"""
+        manager = SubscriptionManager(TEMPLATE)
+        (msg_type, request), = manager.reconcile(now=0)
+        assert msg_type == RIC_SUB_REQ
+        assert 'e2_node_id' not in request
+
+    def test_failure_retried_with_backoff(self):
+        """Rejected subscriptions are retried after an exponential backoff"""
+        manager = make_manager(retry_backoff_s=5, max_backoff_s=300)
+        (_, first), = manager.reconcile(now=0)
+        manager.on_response({'request_id': first['request_id'], 'status': 'failure',
+                             'reason': 'ran_function_not_supported'}, now=1)
+        assert states(manager) == [('gnb_1', 'failed')]
+        assert manager.reconcile(now=5) == []
+
+        (_, second), = manager.reconcile(now=6)
+        assert second['request_id'] != first['request_id']
+        manager.on_response({'request_id': second['request_id'], 'status': 'failure'}, now=7)
+        assert manager.reconcile(now=16) == []
+        assert len(manager.reconcile(now=17)) == 1
+        assert manager.get_stats()['total_failures'] == 2
+
+    def test_timeout_deletes_then_resubscribes(self):
+        """An unanswered request is deleted before it is retried"""
+        manager = make_manager(response_timeout_s=10, retry_backoff_s=5)
+        (_, request), = manager.reconcile(now=0)
+
+        actions = manager.reconcile(now=10)
+        assert actions == [(RIC_SUB_DEL_REQ, {'request_id': request['request_id'],
+                                              'ran_function_id': 2, 'e2_node_id': 'gnb_1'})]
+        assert manager.reconcile(now=14) == []
+        assert [a[0] for a in manager.reconcile(now=15)] == [RIC_SUB_REQ]
+
+        # A late success for the timed-out request does not make it active again
+        manager.on_response({'request_id': request['request_id'], 'status': 'success'}, now=16)
+        assert ('gnb_1', 'deleting') in states(manager)
+
+    def test_node_change(self):
+        """Removed nodes are unsubscribed, new nodes subscribed"""
+        manager = make_manager(nodes=['gnb_1'])
+        (_, request), = manager.reconcile(now=0)
+        manager.on_response({'request_id': request['request_id'], 'status': 'success',
+                             'subscription_id': 'sub-7'}, now=1)
+
+        assert manager.set_nodes(['gnb_2'])
+        assert not manager.set_nodes(['gnb_2'])
+        actions = manager.reconcile(now=2)
+        assert (RIC_SUB_DEL_REQ, {'request_id': request['request_id'], 'ran_function_id': 2,
+                                  'subscription_id': 'sub-7', 'e2_node_id': 'gnb_1'}) in actions
+        assert any(t == RIC_SUB_REQ and r['e2_node_id'] == 'gnb_2' for t, r in actions)
+
+        assert manager.on_delete_response({'request_id': request['request_id'], 'status': 'success'})
+        assert states(manager) == [('gnb_2', 'pending')]
+
+    def test_unknown_success_is_deleted(self):
+        """Successful responses to unknown requests (old instance) are deleted"""
+        manager = make_manager()
+        actions = manager.on_response({'request_id': 'kpimon_old_1', 'status': 'success',
+                                       'e2_node_id': 'gnb_1'}, now=0)
+        assert actions == [(RIC_SUB_DEL_REQ, {'request_id': 'kpimon_old_1',
+                                              'ran_function_id': 2, 'e2_node_id': 'gnb_1'})]
+
+    def test_delete_retries_are_bounded(self):
+        """Unanswered deletes are resent, then dropped"""
+        manager = make_manager(delete_timeout_s=10, max_delete_attempts=2)
+        manager.reconcile(now=0)
+        manager.delete_all(now=1)
+        assert [a[0] for a in manager.reconcile(now=11)] == [RIC_SUB_DEL_REQ]
+        assert manager.reconcile(now=21) == []
+        assert manager.subscriptions(now=21) == []
+
+    def test_delete_all_stops_subscribing(self):
+        """After delete_all nothing is resubscribed"""
+        manager = make_manager(nodes=['gnb_1', 'gnb_2'])
+        manager.reconcile(now=0)
+        assert [a[0] for a in manager.delete_all(now=1)] == [RIC_SUB_DEL_REQ, RIC_SUB_DEL_REQ]
+        assert manager.reconcile(now=2) == []
+        assert all(s['state'] == SubscriptionState.DELETING.value
+                   for s in manager.subscriptions(now=2))
+
+
+class TestFetchConnectedNodes:
+    """Test suite for E2 Manager node discovery"""
+
+    def test_connected_nodes_only(self):
+        """Only CONNECTED nodes are returned"""
+        session = MagicMock()
+        session.get.return_value.json.return_value = [
+            {'inventoryName': 'gnb_2', 'connectionStatus': 'CONNECTED'},
+            {'inventoryName': 'gnb_1', 'connectionStatus': 'CONNECTED'},
+            {'inventoryName': 'gnb_3', 'connectionStatus': 'DISCONNECTED'},
+        ]
+        assert fetch_connected_nodes('http://e2mgr:3800/', session=session) == ['gnb_1', 'gnb_2']
+        session.get.assert_called_once_with('http://e2mgr:3800/v1/nodeb/states', timeout=5)
@@ -0,0 +1,127 @@
+"""
+Unit Tests for KPIMON bounded timeline store
+Tests score=time encoding, retention trimming and rollup buckets
+"""
+
+import os
+import sys
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../xapps/kpimon-go-xapp/src'))
+
+from timeline_store import TimelineStore, rollup_key, timeline_key
+
+ROLLUPS = [{'resolution_s': 10, 'retention_s': 3600}, {'resolution_s': 60, 'retention_s': 86400}]
+
+
+def by_method(commands, method):
+    return [args for m, args in commands if m == method]
+
+
+class TestTimelineWrites:
+    """Test suite for raw timeline writes"""
+
+    def test_sample_scored_by_time(self):
+        """Samples are scored by time with value and UE in the member"""
+        store = TimelineStore(retention_s=900)
+        commands = store.sample_commands('cell_001:UE.RSRP', 1000.5, -95.5, 'ue_001', now=1001.0)
+
+        key, mapping = by_method(commands, 'zadd')[0]
+        assert key == timeline_key('cell_001:UE.RSRP') == 'kpi:timeline:cell_001:UE.RSRP'
+        assert mapping == {'1000.500:ue_001:-95.5': 1000.5}
+
+    def test_trimmed_once_per_interval(self):
+        """Retention trimming and EXPIRE are issued at most once per trim interval"""
+        store = TimelineStore(retention_s=900, trim_interval_s=10)
+        first = store.sample_commands('c:k', 1000.0, 1, now=1000.0)
+        second = store.sample_commands('c:k', 1001.0, 2, now=1005.0)
+        third = store.sample_commands('c:k', 1002.0, 3, now=1011.0)
+
+        assert by_method(first, 'zremrangebyscore') == [('kpi:timeline:c:k', '-inf', 100.0)]
+        assert by_method(first, 'expire') == [('kpi:timeline:c:k', 910)]
+        assert by_method(second, 'zremrangebyscore') == []
+        assert len(by_method(third, 'zremrangebyscore')) == 1
+
+    def test_invalid_values_not_stored(self):
+        """Non-numeric and non-finite samples produce no writes"""
+        store = TimelineStore()
+        assert store.sample_commands('c:k', 1000.0, None) == []
+        assert store.sample_commands('c:k', 1000.0, float('nan')) == []
+
+    def test_timestamp_parsing(self):
+        """ISO and epoch timestamps map to epoch seconds"""
+        store = TimelineStore()
+        assert store.to_epoch('2025-11-19T10:00:00Z') == 1763546400.0
+        assert store.to_epoch('2025-11-19T10:00:00+00:00') == 1763546400.0
+        assert store.to_epoch(1763546400) == 1763546400.0
+
+    def test_naive_timestamp_is_utc(self):
+        """Naive ISO timestamps land at the same instant as in InfluxDB"""
+        from influx_writer import timestamp_ns
+        store = TimelineStore()
+        assert store.to_epoch('2025-11-19T10:00:00') == 1763546400.0
+        assert store.to_epoch('2025-11-19T10:00:00.250') == timestamp_ns('2025-11-19T10:00:00.250') / 1_000_000_000
+
+
+class TestRollups:
+    """Test suite for multi-resolution rollups"""
+
+    def test_bucket_written_when_next_bucket_starts(self):
+        """A bucket is written once, with count/sum/min/max, when it closes"""
+        store = TimelineStore(rollups=ROLLUPS)
+        commands = []
+        for t, v in ((1000.0, 1.0), (1003.0, 5.0), (1009.0, 3.0)):
+            commands += store.sample_commands('c:k', t, v, now=t)
+        assert by_method(commands, 'zadd') == [
+            (timeline_key('c:k'), m) for m in
+            ({'1000.000::1.0': 1000.0}, {'1003.000::5.0': 1003.0}, {'1009.000::3.0': 1009.0})
+        ]
+
+        commands = store.sample_commands('c:k', 1010.0, 7.0, now=1010.0)
+        assert (rollup_key(10, 'c:k'), {'1000:3:9.0:1.0:5.0': 1000.0}) in by_method(commands, 'zadd')
+
+    def test_late_samples_dropped_from_rollups(self):
+        """Samples older than a written bucket don't duplicate it"""
+        store = TimelineStore(rollups=ROLLUPS[:1])
+        store.sample_commands('c:k', 1000.0, 1.0, now=1000.0)
+        store.sample_commands('c:k', 1010.0, 1.0, now=1010.0)
+        commands = store.sample_commands('c:k', 1005.0, 1.0, now=1011.0)
+
+        assert not [a for a in by_method(commands, 'zadd') if a[0].startswith('kpi:rollup')]
+        assert store.total_late == 1
+
+    def test_expired_samples_not_written(self):
+        """Samples already past retention are counted as late instead of added and trimmed"""
+        store = TimelineStore(retention_s=900, rollups=ROLLUPS[:1])
+        assert store.sample_commands('c:k', 1000.0, 1.0, now=1000.0 + 900) == []
+        assert store.sample_commands('c:k', 1000.0, 1.0, now=1000.0 + 3610) == []
+        assert store.total_late == 3
+
+        commands = store.sample_commands('c:k', 1000.0, 1.0, now=1000.0 + 899)
+        assert by_method(commands, 'zadd') == [(timeline_key('c:k'), {'1000.000::1.0': 1000.0})]
+
+    def test_flush_closes_idle_buckets(self):
+        """Buckets of series that stopped reporting are written by flush_rollups"""
+        store = TimelineStore(rollups=ROLLUPS)
+        store.sample_commands('c:k', 1000.0, 2.0, now=1000.0)
+
+        assert store.flush_rollups(now=1005.0) == []
+        commands = store.flush_rollups(now=1020.0)
+        assert by_method(commands, 'zadd') == [(rollup_key(10, 'c:k'), {'1000:1:2.0:2.0:2.0': 1000.0})]
+        assert len(by_method(store.flush_rollups(now=1100.0), 'zadd')) == 1
+
+    def test_read_back(self):
+        """Raw samples and rollup buckets are decoded by read()"""
+        store = TimelineStore()
+        redis_client = MagicMock()
+        redis_client.zrangebyscore.return_value = ['1000.000:ue:1:-95.5', '1001.000::-96.0']
+        assert store.read(redis_client, 'c:k', 0, 2000) == [
+            {'timestamp': 1000.0, 'value': -95.5, 'ue_id': 'ue:1'},
+            {'timestamp': 1001.0, 'value': -96.0, 'ue_id': None},
+        ]
+
+        redis_client.zrangebyscore.return_value = ['1000:4:10.0:1.0:4.0']
+        assert store.read(redis_client, 'c:k', 0, 2000, resolution=10) == [
+            {'timestamp': 1000.0, 'count': 4, 'mean': 2.5, 'min': 1.0, 'max': 4.0}
+        ]
+        redis_client.zrangebyscore.assert_called_with(rollup_key(10, 'c:k'), 0, 2000)
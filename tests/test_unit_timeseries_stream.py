@@ -0,0 +1,123 @@
+"""
+Unit Tests for KPIMON streamed time-series queries
+Tests the time-ordered Flux query, lazy row parsing and the NDJSON/columnar
+output of /api/beam/<beam_id>/kpi/timeseries
+"""
+
+import os
+import sys
+import json
+import pytest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../xapps/kpimon-go-xapp/src'))
+
+import beam_query_api
+from beam_query_api import BeamQueryService
+
+T0 = datetime(2025, 11, 19, 10, 0, tzinfo=timezone.utc)
+
+
+def records(values, fail_after=None):
+    """Lazily produced Flux records, optionally failing mid-stream"""
+    for i, value in enumerate(values):
+        if i == fail_after:
+            raise ConnectionError('stream reset')
+        yield SimpleNamespace(values={'_time': T0 + timedelta(seconds=5 * i), '_value': value})
+
+
+@pytest.fixture
+def service():
+    influx = MagicMock()
+    return BeamQueryService(MagicMock(), influx, 'oran', 'kpimon')
+
+
+@pytest.fixture
+def client(service, monkeypatch):
+    monkeypatch.setattr(beam_query_api, 'beam_service', service)
+    app = Flask('test_timeseries_stream')
+    app.register_blueprint(beam_query_api.beam_api)
+    return app.test_client()
+
+
+class TestTimeseriesQuery:
+    """Test suite for the time-series Flux query"""
+
+    def test_time_ordered_query(self, service):
+        """Series are merged and sorted by InfluxDB, with RFC3339 range bounds"""
+        service.query_api.query_stream.return_value = records([-90.0])
+        service.get_timeseries_data(1, 'rsrp', datetime(2025, 11, 19, 9), datetime(2025, 11, 19, 10), '1m')
+        flux = service.query_api.query_stream.call_args.args[0]
+        assert 'range(start: 2025-11-19T09:00:00+00:00, stop: 2025-11-19T10:00:00+00:00)' in flux
+        assert 'aggregateWindow(every: 1m' in flux
+        assert '|> group()' in flux and 'sort(columns: ["_time"])' in flux
+
+    def test_stream_is_lazy(self, service):
+        """Rows are parsed as the caller consumes them"""
+        consumed = []
+
+        def tracked():
+            for record in records([-90.0, -91.0, -92.0]):
+                consumed.append(record)
+                yield record
+
+        service.query_api.query_stream.return_value = tracked()
+        points = service.stream_timeseries_data(1, 'rsrp')
+        assert consumed == []
+        assert next(points) == (T0, -90.0)
+        assert len(consumed) == 1
+
+    @pytest.mark.parametrize('kpi_type,interval', [('bogus', '5s'), ('rsrp', '5s) |> drop('), ('rsrp', '0s')])
+    def test_invalid_parameters(self, service, kpi_type, interval):
+        """Unknown KPI types and non-duration intervals are rejected before querying"""
+        with pytest.raises(ValueError):
+            service.stream_timeseries_data(1, kpi_type, interval=interval)
+        service.query_api.query_stream.assert_not_called()
+
+
+class TestTimeseriesRoute:
+    """Test suite for GET /api/beam/<beam_id>/kpi/timeseries output formats"""
+
+    def test_json(self, service, client):
+        """The default JSON response keeps its layout"""
+        service.query_api.query_stream.return_value = records([-90.0, -100.0])
+        body = client.get('/api/beam/1/kpi/timeseries?kpi_type=rsrp').get_json()
+        assert body['count'] == 2
+        assert body['datapoints'][0] == {'timestamp': T0.isoformat(), 'value': -90.0, 'quality': 'good'}
+
+    def test_ndjson(self, service, client):
+        """ndjson streams one point per line"""
+        service.query_api.query_stream.return_value = records([-90.0, -100.0, -112.0])
+        response = client.get('/api/beam/1/kpi/timeseries?kpi_type=rsrp&format=ndjson')
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        lines = [json.loads(line) for line in response.data.decode().splitlines()]
+        assert [(p['value'], p['quality']) for p in lines] == [(-90.0, 'good'), (-100.0, 'fair'),
+                                                              (-112.0, 'poor')]
+        assert lines[1]['timestamp'] == (T0 + timedelta(seconds=5)).isoformat()
+
+    def test_columnar_chunks(self, service, client):
+        """columnar streams parallel arrays, chunk_size points per line"""
+        service.query_api.query_stream.return_value = records([-90.0, -100.0, -112.0])
+        response = client.get('/api/beam/1/kpi/timeseries?kpi_type=rsrp&format=columnar&chunk_size=2')
+        chunks = [json.loads(line) for line in response.data.decode().splitlines()]
+        assert [c['value'] for c in chunks] == [[-90.0, -100.0], [-112.0]]
+        assert chunks[0]['quality'] == ['good', 'fair']
+        assert len(chunks[0]['timestamp']) == 2
+
+    def test_error_mid_stream(self, service, client):
+        """A query failing after the response started ends it with an error line"""
+        service.query_api.query_stream.return_value = records([-90.0, -91.0], fail_after=1)
+        response = client.get('/api/beam/1/kpi/timeseries?kpi_type=rsrp&format=ndjson')
+        lines = [json.loads(line) for line in response.data.decode().splitlines()]
+        assert lines[0]['value'] == -90.0
+        assert 'stream reset' in lines[-1]['error']
+
+    @pytest.mark.parametrize('query', ['format=xml', 'format=ndjson&interval=bogus', 'start_time=yesterday'])
+    def test_invalid_parameters(self, client, query):
+        """Bad formats, intervals and timestamps are rejected with 400"""
+        response = client.get(f'/api/beam/1/kpi/timeseries?kpi_type=rsrp&{query}')
+        assert response.status_code == 400
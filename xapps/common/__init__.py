@@ -10,13 +10,62 @@ from .dual_path_messenger import (
     EndpointConfig,
     PathHealthMetrics
 )
+from .indication_codec import (
+    E2Indication,
+    PackedMeasurements,
+    IndicationDecodeError,
+    IndicationEncodeError,
+    BINARY_CONTENT_TYPE,
+    NDJSON_CONTENT_TYPE,
+    KPM_KPI_IDS,
+    decode_indication,
+    decode_indication_batch,
+    encode_indication_batch,
+    handle_indication_batch,
+    encode_binary_indication,
+    is_binary,
+    loads,
+    dumps
+)
+from .admission_control import (
+    AdmissionController,
+    LoadShed,
+    Priority,
+    CONTROL_MESSAGE_TYPES,
+    message_priority
+)
+from .http_server import XappHTTPServer
+from .indication_routes import indication_response, indication_batch_response
 
 __all__ = [
     'DualPathMessenger',
     'CommunicationPath',
     'PathStatus',
     'EndpointConfig',
-    'PathHealthMetrics'
+    'PathHealthMetrics',
+    'E2Indication',
+    'PackedMeasurements',
+    'IndicationDecodeError',
+    'IndicationEncodeError',
+    'BINARY_CONTENT_TYPE',
+    'NDJSON_CONTENT_TYPE',
+    'KPM_KPI_IDS',
+    'decode_indication',
+    'decode_indication_batch',
+    'encode_indication_batch',
+    'handle_indication_batch',
+    'encode_binary_indication',
+    'is_binary',
+    'loads',
+    'dumps',
+    'AdmissionController',
+    'LoadShed',
+    'Priority',
+    'CONTROL_MESSAGE_TYPES',
+    'message_priority',
+    'XappHTTPServer',
+    'indication_response',
+    'indication_batch_response'
 ]
 
 __version__ = '1.0.0'
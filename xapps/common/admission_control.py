@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Admission Control for xApp HTTP fallback routes
+Bounds the work an `/e2/indication` route accepts while RMR is failed over to
+HTTP: a fixed number of requests run, a bounded queue waits (control-plane
+messages first), everything else is shed with 429/503 and Retry-After
+
+Author: O-RAN RIC Platform Team
+Date: 2025-11-19
+"""
+
+import heapq
+import itertools
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import Any, Dict, Iterator, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+ADMISSION_REQUESTS = Counter(
+    'admission_requests_total',
+    'Requests seen by HTTP admission control',
+    ['endpoint', 'priority', 'outcome']
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    'admission_in_flight',
+    'Requests currently being processed',
+    ['endpoint']
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    'admission_queue_depth',
+    'Requests waiting for a processing slot',
+    ['endpoint']
+)
+ADMISSION_QUEUE_WAIT = Histogram(
+    'admission_queue_wait_seconds',
+    'Time admitted requests waited for a processing slot',
+    ['endpoint'],
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0]
+)
+
+# Message types answered ahead of KPI reports: subscription/control outcomes
+# and A1 policy requests (RIC_SUB_RESP, RIC_SUB_DEL_RESP, RIC_SUB_FAILURE,
+# RIC_SUB_DEL_FAILURE, RIC_CONTROL_ACK, RIC_CONTROL_FAILURE, A1_POLICY_REQ)
+CONTROL_MESSAGE_TYPES = frozenset({12011, 12013, 12014, 12015, 12041, 12042, 20010})
+
+
+class Priority(IntEnum):
+    """Admission priority (lower value is served first)"""
+    CONTROL = 0
+    REPORT = 1
+
+
+def message_priority(msg_type: Any) -> Priority:
+    """
+    Priority of a message from its RMR message type
+
+    Args:
+        msg_type: Message type (int or the X-Message-Type header); missing or
+            unknown types are treated as KPI reports
+
+    Returns:
+        Priority.CONTROL for control-plane messages, else Priority.REPORT
+    """
+    try:
+        msg_type = int(msg_type)
+    except (TypeError, ValueError):
+        return Priority.REPORT
+    return Priority.CONTROL if msg_type in CONTROL_MESSAGE_TYPES else Priority.REPORT
+
+
+class LoadShed(Exception):
+    """Request rejected by admission control"""
+
+    def __init__(self, status_code: int, retry_after: int, reason: str):
+        super().__init__(f"Server overloaded ({reason}), retry after {retry_after}s")
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """Response headers for the rejection"""
+        return {'Retry-After': str(self.retry_after)}
+
+
+class AdmissionController:
+    """
+    Bounded concurrency + bounded priority queue for an HTTP route
+
+    Features:
+    - At most max_concurrent requests processed at once; control-plane
+      messages may use control_reserve extra slots
+    - Up to max_queue requests wait (control_reserve more for control),
+      control before reports, FIFO within a priority
+    - Queue full: 429 immediately; no slot within queue_timeout_s: 503;
+      both with Retry-After
+    - Prometheus metrics for admitted and shed requests, queue depth and wait
+
+    Queued requests wait on the HTTP server's worker threads, so the server
+    needs at least max_threads workers for the queue to ever fill (see
+    XappHTTPServer busy_threads).
+    """
+
+    def __init__(self, name: str = 'e2_indication', max_concurrent: int = 8,
+                 max_queue: int = 16, queue_timeout_s: float = 0.5,
+                 retry_after_s: float = 1, control_reserve: int = 2):
+        """
+        Initialize admission controller
+
+        Args:
+            name: Endpoint label for metrics
+            max_concurrent: Requests processed concurrently
+            max_queue: Requests allowed to wait for a slot
+            queue_timeout_s: Maximum time a request waits before it is shed
+            retry_after_s: Retry-After advertised to shed clients
+            control_reserve: Extra slots and queue places for control messages
+        """
+        self.name = name
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.max_queue = max(0, int(max_queue))
+        self.queue_timeout = max(0.0, float(queue_timeout_s))
+        self.retry_after = max(1, math.ceil(retry_after_s))
+        self.control_reserve = max(0, int(control_reserve))
+
+        self._cond = threading.Condition()
+        self._queue = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+
+        self.admitted = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict] = None,
+                    name: str = 'e2_indication') -> 'AdmissionController':
+        """Create a controller from the `admission` config section"""
+        config = config or {}
+        return cls(
+            name=name,
+            max_concurrent=config.get('max_concurrent', 8),
+            max_queue=config.get('max_queue', 16),
+            queue_timeout_s=config.get('queue_timeout_s', 0.5),
+            retry_after_s=config.get('retry_after_s', 1),
+            control_reserve=config.get('control_reserve', 2)
+        )
+
+    @property
+    def max_threads(self) -> int:
+        """Worker threads the route can hold at saturation (every slot and queue place)"""
+        return self.max_concurrent + self.max_queue + 2 * self.control_reserve
+
+    def _slots(self, priority: Priority) -> int:
+        return self.max_concurrent + (self.control_reserve if priority == Priority.CONTROL else 0)
+
+    def _queue_limit(self, priority: Priority) -> int:
+        return self.max_queue + (self.control_reserve if priority == Priority.CONTROL else 0)
+
+    def _shed(self, priority: Priority, status_code: int, reason: str) -> LoadShed:
+        ADMISSION_REQUESTS.labels(endpoint=self.name, priority=priority.name.lower(),
+                                  outcome=f'shed_{reason}').inc()
+        return LoadShed(status_code, self.retry_after, reason)
+
+    def _admit(self, priority: Priority, waited: float):
+        self._in_flight += 1
+        self.admitted += 1
+        ADMISSION_IN_FLIGHT.labels(endpoint=self.name).set(self._in_flight)
+        ADMISSION_QUEUE_WAIT.labels(endpoint=self.name).observe(waited)
+        ADMISSION_REQUESTS.labels(endpoint=self.name, priority=priority.name.lower(),
+                                  outcome='admitted').inc()
+
+    def acquire(self, priority: Priority = Priority.REPORT):
+        """
+        Wait for a processing slot
+
+        Args:
+            priority: Request priority
+
+        Raises:
+            LoadShed: 429 if the queue is full, 503 if no slot freed in time
+        """
+        start = time.monotonic()
+        with self._cond:
+            # Run immediately if a slot is free and nobody of equal or higher priority waits
+            if self._in_flight < self._slots(priority) and \
+                    not (self._queue and self._queue[0][0] <= priority):
+                self._admit(priority, 0.0)
+                return
+
+            if len(self._queue) >= self._queue_limit(priority):
+                self.shed_queue_full += 1
+                raise self._shed(priority, 429, 'queue_full')
+
+            entry = (priority, next(self._seq))
+            heapq.heappush(self._queue, entry)
+            ADMISSION_QUEUE_DEPTH.labels(endpoint=self.name).set(len(self._queue))
+            deadline = start + self.queue_timeout
+            try:
+                while True:
+                    if self._queue[0] is entry and self._in_flight < self._slots(priority):
+                        heapq.heappop(self._queue)
+                        self._admit(priority, time.monotonic() - start)
+                        # The next waiter may fit in a reserved slot
+                        self._cond.notify_all()
+                        return
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._queue.remove(entry)
+                        heapq.heapify(self._queue)
+                        self._cond.notify_all()
+                        self.shed_timeout += 1
+                        raise self._shed(priority, 503, 'timeout')
+                    self._cond.wait(remaining)
+            finally:
+                ADMISSION_QUEUE_DEPTH.labels(endpoint=self.name).set(len(self._queue))
+
+    def release(self):
+        """Return a processing slot"""
+        with self._cond:
+            self._in_flight -= 1
+            ADMISSION_IN_FLIGHT.labels(endpoint=self.name).set(self._in_flight)
+            self._cond.notify_all()
+
+    @contextmanager
+    def admit(self, priority: Priority = Priority.REPORT) -> Iterator[None]:
+        """
+        Hold a processing slot for the duration of the block
+
+        Raises:
+            LoadShed: Request rejected (see acquire)
+        """
+        self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get admission statistics"""
+        with self._cond:
+            return {
+                'in_flight': self._in_flight,
+                'queued': len(self._queue),
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'admitted': self.admitted,
+                'shed_queue_full': self.shed_queue_full,
+                'shed_timeout': self.shed_timeout
+            }
@@ -5,11 +5,12 @@ Implements RMR (primary) + HTTP (fallback) redundant communication with automati
 Compliant with O-RAN SC best practices for near-RT RIC xApps
 """
 
+import gzip
 import json
 import time
 import logging
 import requests
-from typing import Dict, List, Optional, Callable, Any
+from typing import Dict, List, Optional, Callable, Any, Union
 from dataclasses import dataclass
 from threading import Thread, Lock
 from enum import Enum
@@ -70,6 +71,20 @@ message_latency = Histogram(
     ['path_type']
 )
 
+http_batches_sent = Counter(
+    f'{METRIC_PREFIX}http_batches_total',
+    'HTTP message batches sent',
+    ['destination', 'result']
+)
+
+http_batch_size = Histogram(
+    f'{METRIC_PREFIX}http_batch_size',
+    'Messages per HTTP batch',
+    buckets=[1, 5, 10, 25, 50, 100, 250, 500, 1000]
+)
+
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+
 
 class CommunicationPath(Enum):
     """Communication path types"""
@@ -106,6 +121,7 @@ class EndpointConfig:
     rmr_port: int = 4560
     health_endpoint: str = "/ric/v1/health/alive"
     message_endpoint: str = "/e2/indication"
+    batch_endpoint: str = "/e2/indication/batch"
 
     @property
     def http_base_url(self) -> str:
@@ -186,6 +202,17 @@ class DualPathMessenger:
         # Endpoint registry
         self.endpoints: Dict[str, EndpointConfig] = {}
 
+        # Destination -> time until which it asked us not to send (Retry-After)
+        self.http_backoff_until: Dict[str, float] = {}
+
+        # Destination -> [(msg_type, message)] waiting to be sent as one HTTP batch
+        self.http_batches: Dict[str, List] = {}
+        self.http_batch_started: Dict[str, float] = {}
+        # Destination -> messages taken from the queue whose batch request is in flight
+        self.http_batch_inflight: Dict[str, int] = {}
+        self.batch_lock = Lock()
+        self.batch_flush_thread: Optional[Thread] = None
+
         # Health check thread
         self.running = False
         self.health_check_thread: Optional[Thread] = None
@@ -208,7 +235,11 @@ class DualPathMessenger:
             'failover_threshold': 3,  # consecutive failures before failover
             'recovery_threshold': 5,  # consecutive successes before recovery
             'max_retry_attempts': 2,
-            'retry_delay': 0.5  # seconds
+            'retry_delay': 0.5,  # seconds
+            'http_batch_max_size': 0,  # messages per HTTP batch (0 = no batching)
+            'http_batch_max_delay_ms': 50,  # oldest batched message waits at most this long
+            'http_batch_max_pending': 10000,  # per destination, queued plus in-flight batches
+            'http_batch_gzip_min_bytes': 4096  # compress batch bodies from this size
         }
 
     def initialize_rmr(self, use_fake_sdl: bool = False) -> bool:
@@ -302,25 +333,35 @@ class DualPathMessenger:
         msg_type: int,
         payload: Any,
         destination: Optional[str] = None,
-        force_path: Optional[CommunicationPath] = None
+        force_path: Optional[CommunicationPath] = None,
+        content_type: Optional[str] = None,
+        batch: bool = False
     ) -> bool:
         """
         Send message with automatic path selection and failover
 
         Args:
             msg_type: RMR message type
-            payload: Message payload (dict or string)
+            payload: Message payload (dict, string or bytes)
             destination: Destination service name (required for HTTP)
             force_path: Force specific communication path (for testing)
+            content_type: Content type of a non-JSON bytes payload (e.g. the
+                binary indication format); sent as-is on both paths
+            batch: Over HTTP, coalesce with other batchable messages to the same
+                destination (when http_batch_max_size > 0). Opt-in per call: use
+                for high-rate reports only; True then means queued, delivery is
+                asynchronous
 
         Returns:
             True if message sent successfully
         """
         start_time = time.time()
 
-        # Convert payload to string if needed
+        # Convert payload to string if needed (bytes are sent as-is)
         if isinstance(payload, dict):
             payload_str = json.dumps(payload)
+        elif isinstance(payload, (bytes, bytearray)):
+            payload_str = payload
         else:
             payload_str = str(payload)
 
@@ -339,7 +380,7 @@ class DualPathMessenger:
 
         # Try primary path
         success = self._send_via_path(
-            primary_path, msg_type, payload_str, destination
+            primary_path, msg_type, payload_str, destination, content_type, batch
         )
 
         if success:
@@ -353,7 +394,7 @@ class DualPathMessenger:
         )
 
         success = self._send_via_path(
-            fallback_path, msg_type, payload_str, destination
+            fallback_path, msg_type, payload_str, destination, content_type, batch
         )
 
         if success:
@@ -378,8 +419,10 @@ class DualPathMessenger:
         self,
         path: CommunicationPath,
         msg_type: int,
-        payload: str,
-        destination: Optional[str]
+        payload: Union[str, bytes],
+        destination: Optional[str],
+        content_type: Optional[str] = None,
+        batch: bool = False
     ) -> bool:
         """
         Send message via specific path
@@ -387,8 +430,10 @@ class DualPathMessenger:
         Args:
             path: Communication path to use
             msg_type: Message type
-            payload: Message payload as string
+            payload: Message payload as string or bytes
             destination: Destination service name
+            content_type: Content type of a non-JSON bytes payload
+            batch: Queue for an HTTP batch instead of sending alone
 
         Returns:
             True if successful
@@ -396,12 +441,12 @@ class DualPathMessenger:
         if path == CommunicationPath.RMR:
             return self._send_via_rmr(msg_type, payload, destination)
         else:
-            return self._send_via_http(msg_type, payload, destination)
+            return self._send_via_http(msg_type, payload, destination, content_type, batch)
 
     def _send_via_rmr(
         self,
         msg_type: int,
-        payload: str,
+        payload: Union[str, bytes],
         destination: Optional[str]
     ) -> bool:
         """
@@ -422,7 +467,9 @@ class DualPathMessenger:
 
         try:
             # Send via RMR
-            success = self.rmr_xapp.rmr_send(payload.encode(), msg_type)
+            if isinstance(payload, str):
+                payload = payload.encode()
+            success = self.rmr_xapp.rmr_send(payload, msg_type)
 
             if success:
                 logger.debug(
@@ -448,8 +495,10 @@ class DualPathMessenger:
     def _send_via_http(
         self,
         msg_type: int,
-        payload: str,
-        destination: Optional[str]
+        payload: Union[str, bytes],
+        destination: Optional[str],
+        content_type: Optional[str] = None,
+        batch: bool = False
     ) -> bool:
         """
         Send message via HTTP fallback
@@ -458,6 +507,9 @@ class DualPathMessenger:
             msg_type: Message type
             payload: Message payload
             destination: Destination service name (required)
+            content_type: Content type of a non-JSON bytes payload; sent as the
+                raw body with message type and source in X- headers
+            batch: Queue for the destination's next batch (JSON payloads only)
 
         Returns:
             True if successful
@@ -470,21 +522,44 @@ class DualPathMessenger:
             logger.error(f"No endpoint registered for {destination}")
             return False
 
+        # Peer is shedding load: do not add to it until its Retry-After passes
+        if time.time() < self.http_backoff_until.get(destination, 0):
+            logger.debug(f"HTTP send to {destination} deferred (peer overloaded)")
+            return False
+
+        if batch and not content_type and self.config.get('http_batch_max_size', 0) > 0:
+            return self._queue_http_batch(msg_type, payload, destination)
+
         endpoint = self.endpoints[destination]
         url = f"{endpoint.http_base_url}{endpoint.message_endpoint}"
 
         try:
-            # Prepare payload
-            payload_dict = json.loads(payload) if isinstance(payload, str) else payload
-            payload_dict['message_type'] = msg_type
-            payload_dict['source_xapp'] = self.xapp_name
-
-            # Send HTTP POST
-            response = self.http_session.post(
-                url,
-                json=payload_dict,
-                timeout=self.config['http_timeout']
-            )
+            if content_type and isinstance(payload, (bytes, bytearray)):
+                # Opaque body (e.g. binary indication): send unchanged
+                response = self.http_session.post(
+                    url,
+                    data=payload,
+                    headers={
+                        'Content-Type': content_type,
+                        'X-Message-Type': str(msg_type),
+                        'X-Source-Xapp': self.xapp_name
+                    },
+                    timeout=self.config['http_timeout']
+                )
+            else:
+                # Prepare payload
+                payload_dict = (json.loads(payload)
+                                if isinstance(payload, (str, bytes, bytearray)) else payload)
+                payload_dict['message_type'] = msg_type
+                payload_dict['source_xapp'] = self.xapp_name
+
+                # Send HTTP POST (message type header lets the peer prioritize)
+                response = self.http_session.post(
+                    url,
+                    json=payload_dict,
+                    headers={'X-Message-Type': str(msg_type)},
+                    timeout=self.config['http_timeout']
+                )
 
             if response.status_code == 200:
                 logger.debug(f"Sent message type {msg_type} via HTTP to {destination}")
@@ -494,6 +569,19 @@ class DualPathMessenger:
                 ).inc()
                 self._update_path_health(CommunicationPath.HTTP, success=True)
                 return True
+            elif response.status_code in (429, 503) and 'Retry-After' in response.headers:
+                # Load shed by the peer's admission control: the path works,
+                # so back off instead of counting it against path health
+                try:
+                    retry_after = float(response.headers['Retry-After'])
+                except ValueError:
+                    retry_after = 1.0
+                self.http_backoff_until[destination] = time.time() + retry_after
+                logger.warning(
+                    f"{destination} shed message type {msg_type} "
+                    f"(HTTP {response.status_code}), backing off {retry_after}s"
+                )
+                return False
             else:
                 logger.warning(
                     f"HTTP send failed with status {response.status_code}: "
@@ -511,6 +599,126 @@ class DualPathMessenger:
             self._update_path_health(CommunicationPath.HTTP, success=False)
             return False
 
+    def _queue_http_batch(self, msg_type: int, payload: Union[str, bytes, Dict],
+                          destination: str) -> bool:
+        """
+        Queue a JSON message for the destination's next HTTP batch
+
+        The batch is sent when it reaches http_batch_max_size (in this thread)
+        or when its oldest message is http_batch_max_delay_ms old (flush thread).
+
+        The backlog bound counts queued messages and those of batches still
+        being sent, so a slow destination cannot accumulate more than
+        http_batch_max_pending messages in flushes of concurrent senders.
+
+        Returns:
+            False if the destination's backlog is at http_batch_max_pending
+        """
+        message = (json.loads(payload)
+                   if isinstance(payload, (str, bytes, bytearray)) else dict(payload))
+        message['message_type'] = msg_type
+        message['source_xapp'] = self.xapp_name
+
+        with self.batch_lock:
+            pending = self.http_batches.setdefault(destination, [])
+            backlog = len(pending) + self.http_batch_inflight.get(destination, 0)
+            if backlog >= self.config.get('http_batch_max_pending', 10000):
+                logger.warning(f"HTTP batch backlog for {destination} full, message dropped")
+                return False
+            if not pending:
+                self.http_batch_started[destination] = time.time()
+            pending.append((msg_type, message))
+            full = len(pending) >= self.config['http_batch_max_size']
+
+        if full:
+            self._flush_http_batch(destination)
+        return True
+
+    def _flush_http_batch(self, destination: str):
+        """Send the queued messages of a destination as one NDJSON request"""
+        with self.batch_lock:
+            items = self.http_batches.pop(destination, None)
+            self.http_batch_started.pop(destination, None)
+            if not items:
+                return
+            self.http_batch_inflight[destination] = \
+                self.http_batch_inflight.get(destination, 0) + len(items)
+        try:
+            self._send_http_batch(destination, items)
+        finally:
+            with self.batch_lock:
+                self.http_batch_inflight[destination] -= len(items)
+
+    def _send_http_batch(self, destination: str, items: List):
+        """POST one batch of (msg_type, message) items and record per-item results"""
+        endpoint = self.endpoints[destination]
+        url = f"{endpoint.http_base_url}{endpoint.batch_endpoint}"
+        body = b'\n'.join(json.dumps(message).encode('utf-8') for _, message in items) + b'\n'
+        headers = {'Content-Type': NDJSON_CONTENT_TYPE}
+        if len(body) >= self.config.get('http_batch_gzip_min_bytes', 4096):
+            body = gzip.compress(body, compresslevel=1)
+            headers['Content-Encoding'] = 'gzip'
+        msg_types = {msg_type for msg_type, _ in items}
+        if len(msg_types) == 1:
+            headers['X-Message-Type'] = str(next(iter(msg_types)))
+        http_batch_size.observe(len(items))
+
+        failed = [True] * len(items)
+        try:
+            response = self.http_session.post(
+                url, data=body, headers=headers, timeout=self.config['http_timeout']
+            )
+            if response.status_code == 200:
+                for result in response.json().get('results', []):
+                    index = result.get('index')
+                    if isinstance(index, int) and 0 <= index < len(items):
+                        failed[index] = result.get('status') != 'success'
+                self._update_path_health(CommunicationPath.HTTP, success=True)
+            elif response.status_code in (429, 503) and 'Retry-After' in response.headers:
+                try:
+                    retry_after = float(response.headers['Retry-After'])
+                except ValueError:
+                    retry_after = 1.0
+                self.http_backoff_until[destination] = time.time() + retry_after
+                logger.warning(
+                    f"{destination} shed a batch of {len(items)} messages "
+                    f"(HTTP {response.status_code}), backing off {retry_after}s"
+                )
+            else:
+                logger.warning(
+                    f"HTTP batch send failed with status {response.status_code}: "
+                    f"{response.text}"
+                )
+                self._update_path_health(CommunicationPath.HTTP, success=False)
+        except requests.exceptions.Timeout:
+            logger.warning(f"HTTP batch to {destination} timed out")
+            self._update_path_health(CommunicationPath.HTTP, success=False)
+        except Exception as e:
+            logger.error(f"Exception sending HTTP batch: {e}")
+            self._update_path_health(CommunicationPath.HTTP, success=False)
+
+        for (msg_type, _), item_failed in zip(items, failed):
+            if item_failed:
+                messages_failed.labels(message_type=str(msg_type), path_type='http').inc()
+            else:
+                messages_sent_http.labels(message_type=str(msg_type), destination=destination).inc()
+        http_batches_sent.labels(
+            destination=destination,
+            result='success' if not any(failed) else ('partial' if not all(failed) else 'failed')
+        ).inc()
+
+    def _batch_flush_loop(self):
+        """Send HTTP batches whose oldest message reached http_batch_max_delay_ms"""
+        max_delay = self.config.get('http_batch_max_delay_ms', 50) / 1000.0
+        while self.running:
+            time.sleep(max(max_delay / 2, 0.005))
+            now = time.time()
+            with self.batch_lock:
+                due = [destination for destination, started in self.http_batch_started.items()
+                       if now - started >= max_delay]
+            for destination in due:
+                self._flush_http_batch(destination)
+
     def _update_path_health(self, path: CommunicationPath, success: bool):
         """
         Update health metrics for a communication path
@@ -665,6 +873,11 @@ class DualPathMessenger:
         self.health_check_thread = Thread(target=self._health_check_loop, daemon=True)
         self.health_check_thread.start()
 
+        # Start HTTP batch flusher
+        if self.config.get('http_batch_max_size', 0) > 0:
+            self.batch_flush_thread = Thread(target=self._batch_flush_loop, daemon=True)
+            self.batch_flush_thread.start()
+
         logger.info("DualPathMessenger started")
 
     def stop(self):
@@ -675,6 +888,12 @@ class DualPathMessenger:
         if self.health_check_thread:
             self.health_check_thread.join(timeout=5)
 
+        # Send what is still batched
+        if self.batch_flush_thread:
+            self.batch_flush_thread.join(timeout=5)
+        for destination in list(self.http_batches):
+            self._flush_http_batch(destination)
+
         if self.rmr_xapp:
             self.rmr_xapp.stop()
 
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+HTTP Serving for xApp Flask applications
+Runs an xApp's WSGI app under waitress (a production, thread-pooled server)
+instead of the Werkzeug development server, with bounded workers and
+connections, keep-alive and graceful shutdown
+
+Author: O-RAN RIC Platform Team
+Date: 2025-11-19
+"""
+
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import waitress as _waitress
+    from waitress.server import BaseWSGIServer as _WaitressListener
+except ImportError:
+    _waitress = None
+
+SERVERS = ('waitress', 'werkzeug')
+
+
+class XappHTTPServer:
+    """
+    Embedded WSGI server for an xApp's HTTP API
+
+    Features:
+    - waitress: fixed worker thread pool, connection limit, idle keep-alive
+      timeout, listen backlog; falls back to Werkzeug when not installed
+    - One process: the app keeps sharing in-process state (caches,
+      subscriptions, queues) with the RMR side, unlike pre-fork servers
+    - Graceful shutdown: stop accepting, let in-flight requests finish
+      (bounded by shutdown_timeout_s), then close connections
+    - Thread budget: from_config raises threads to cover the workers that
+      admission-controlled and streaming routes can hold, plus probe_threads
+      spare ones so health and metrics probes are answered at saturation
+    """
+
+    def __init__(self, app: Callable, host: str = '0.0.0.0', port: int = 8080,
+                 server: str = 'waitress', threads: int = 8, connection_limit: int = 100,
+                 keepalive_timeout_s: float = 30, backlog: int = 1024,
+                 shutdown_timeout_s: float = 5, name: str = 'http'):
+        """
+        Initialize HTTP server
+
+        Args:
+            app: WSGI application (Flask app)
+            host: Listen address
+            port: Listen port
+            server: 'waitress' or 'werkzeug' (development server)
+            threads: Worker threads handling requests
+            connection_limit: Maximum open connections (waitress)
+            keepalive_timeout_s: Idle keep-alive connection timeout (waitress)
+            backlog: Listen backlog
+            shutdown_timeout_s: Time in-flight requests get on stop()
+            name: Name for logging
+        """
+        if server not in SERVERS:
+            raise ValueError(f"Unknown HTTP server '{server}' (expected one of {SERVERS})")
+        if server == 'waitress' and _waitress is None:
+            logger.warning(f"{name}: waitress not installed, using the Werkzeug development server")
+            server = 'werkzeug'
+
+        self.app = app
+        self.host = host
+        self.port = int(port)
+        self.server = server
+        self.threads = max(1, int(threads))
+        self.connection_limit = max(1, int(connection_limit))
+        self.keepalive_timeout = max(1, int(keepalive_timeout_s))
+        self.backlog = max(1, int(backlog))
+        self.shutdown_timeout = max(0.0, float(shutdown_timeout_s))
+        self.name = name
+
+        self._server: Any = None
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_config(cls, app: Callable, config: Optional[Dict] = None, host: str = '0.0.0.0',
+                    port: int = 8080, name: str = 'http',
+                    busy_threads: int = 0) -> 'XappHTTPServer':
+        """
+        Create a server from the `http_server` config section
+
+        Args:
+            app: WSGI application (Flask app)
+            config: `http_server` config section
+            host: Listen address
+            port: Listen port
+            name: Name for logging
+            busy_threads: Worker threads other routes can hold at saturation
+                (admitted, queued and streaming requests); the pool gets at
+                least probe_threads (default 2) more
+
+        Returns:
+            XappHTTPServer
+        """
+        config = config or {}
+        threads = int(config.get('threads', 8))
+        required = busy_threads + int(config.get('probe_threads', 2))
+        if threads < required:
+            logger.warning(f"{name}: http_server.threads={threads} cannot serve probes at "
+                           f"saturation, using {required} threads")
+            threads = required
+        return cls(
+            app,
+            host=host,
+            port=port,
+            server=config.get('server', 'waitress'),
+            threads=threads,
+            connection_limit=config.get('connection_limit', 100),
+            keepalive_timeout_s=config.get('keepalive_timeout_s', 30),
+            backlog=config.get('backlog', 1024),
+            shutdown_timeout_s=config.get('shutdown_timeout_s', 5),
+            name=name
+        )
+
+    @property
+    def bound_port(self) -> Optional[int]:
+        """Port actually listened on (useful with port 0)"""
+        if self._server is None:
+            return None
+        if self.server == 'waitress':
+            return self._server.effective_port
+        return self._server.server_port
+
+    def bind(self):
+        """Create the server and bind the listening socket"""
+        if self._server is not None:
+            return
+        if self.server == 'waitress':
+            self._server = _waitress.create_server(
+                self.app,
+                host=self.host,
+                port=self.port,
+                threads=self.threads,
+                connection_limit=self.connection_limit,
+                channel_timeout=self.keepalive_timeout,
+                backlog=self.backlog,
+                ident=self.name
+            )
+        else:
+            from werkzeug.serving import make_server
+            self._server = make_server(self.host, self.port, self.app, threaded=True)
+            self._server.socket.listen(self.backlog)
+        logger.info(f"{self.name}: {self.server} listening on {self.host}:{self.bound_port}"
+                    + (f" ({self.threads} threads)" if self.server == 'waitress' else ""))
+
+    def serve_forever(self):
+        """Bind (if needed) and serve until stop() (blocking)"""
+        self.bind()
+        if self.server == 'waitress':
+            self._server.run()
+        else:
+            self._server.serve_forever()
+
+    def start(self) -> threading.Thread:
+        """Serve in a daemon thread"""
+        self.bind()
+        self._thread = threading.Thread(target=self.serve_forever, name=f"{self.name}-server",
+                                        daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        """Stop accepting connections, drain in-flight requests, close"""
+        server, self._server = self._server, None
+        if server is None:
+            return
+
+        if self.server == 'waitress':
+            # create_server returns the listener itself, or a MultiSocketServer
+            channels = server.map if hasattr(server, 'map') else server._map
+            for channel in list(channels.values()):
+                if isinstance(channel, _WaitressListener):
+                    channel.accepting = False
+            dispatcher = server.task_dispatcher
+            deadline = time.monotonic() + self.shutdown_timeout
+            while (dispatcher.active_count or dispatcher.queue) and time.monotonic() < deadline:
+                time.sleep(0.05)
+            if dispatcher.active_count or dispatcher.queue:
+                logger.warning(f"{self.name}: closing with requests still in flight")
+            server.close()
+        else:
+            server.shutdown()
+            server.server_close()
+
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.shutdown_timeout + 1)
+        logger.info(f"{self.name}: HTTP server stopped")
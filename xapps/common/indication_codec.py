@@ -0,0 +1,583 @@
+#!/usr/bin/env python3
+"""
+E2 Indication Codec for O-RAN xApps
+Decodes indication payloads straight from RMR/HTTP bytes with the fastest
+available JSON backend (orjson, msgspec, stdlib json), decodes batches
+(JSON array / NDJSON, optionally gzip), and defines the compact binary
+indication format producers can opt into
+
+Author: O-RAN RIC Platform Team
+Date: 2025-11-19
+"""
+
+import sys
+import json
+import math
+import zlib
+import struct
+import logging
+from datetime import datetime, timezone
+from collections.abc import Sequence
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson as _orjson
+except ImportError:
+    _orjson = None
+
+try:
+    import msgspec as _msgspec
+except ImportError:
+    _msgspec = None
+
+Payload = Union[bytes, bytearray, memoryview, str]
+
+
+class IndicationDecodeError(ValueError):
+    """Payload is not valid JSON or not an E2 indication object"""
+
+
+class IndicationEncodeError(ValueError):
+    """Indication cannot be represented in the binary format (send JSON instead)"""
+
+
+# Compact binary indication format, version 1 (little-endian):
+#   header   24 bytes: magic "E2", version u8, flags u8, measurement count u16,
+#            beam_id i16 (-1 = n/a), timestamp f64 (UTC epoch seconds, NaN = absent),
+#            cell_id length u16, ue_id length u16, reserved u32
+#   values   f64[count]  measurement values (8-byte aligned)
+#   kpi_ids  u16[count]  KPI ids from the KPIMON kpi_definitions
+#   beams    i16[count]  per-measurement beam_id, -1 = indication beam
+#            (only with FLAG_MEASUREMENT_BEAMS)
+#   cell_id, ue_id       UTF-8
+# A single KPI record is an indication with one measurement.
+BINARY_MAGIC = b'E2'
+BINARY_VERSION = 1
+BINARY_CONTENT_TYPE = 'application/vnd.oran.e2-indication.v1+binary'
+FLAG_MEASUREMENT_BEAMS = 0x01
+FLAG_CELL_ID = 0x02
+FLAG_UE_ID = 0x04
+NO_BEAM = -1
+
+_HEADER = struct.Struct('<2sBBHhdHHI')
+_NATIVE_LITTLE_ENDIAN = sys.byteorder == 'little'
+
+# Wire ids of the E2SM-KPM measurements (same ids as KPIMON kpi_definitions)
+KPM_KPI_IDS: Dict[str, int] = {
+    "DRB.UEThpDl": 1,
+    "DRB.UEThpUl": 2,
+    "DRB.RlcSduDelayDl": 3,
+    "DRB.PacketLossDl": 4,
+    "RRU.PrbUsedDl": 5,
+    "RRU.PrbUsedUl": 6,
+    "DRB.MeanActiveUeDl": 7,
+    "DRB.MeanActiveUeUl": 8,
+    "RRC.ConnMax": 9,
+    "RRC.ConnMean": 10,
+    "RRC.ConnEstabSucc": 11,
+    "HO.AttOutInterEnbN1": 12,
+    "HO.SuccOutInterEnbN1": 13,
+    "PDCP.BytesTransmittedDl": 14,
+    "PDCP.BytesTransmittedUl": 15,
+    "UE.RSRP": 16,
+    "UE.RSRQ": 17,
+    "UE.SINR": 18,
+    "QoS.DlPktDelayPerQCI": 19,
+    "QoS.UlPktDelayPerQCI": 20,
+    "L1-RSRP.beam": 21,
+    "L1-SINR.beam": 22
+}
+_KPM_KPI_NAMES: Dict[int, str] = {kpi_id: name for name, kpi_id in KPM_KPI_IDS.items()}
+
+
+if _orjson is not None:
+    BACKEND = 'orjson'
+    _DECODE_ERRORS = (_orjson.JSONDecodeError,)
+
+    def _loads(payload: Payload) -> Any:
+        return _orjson.loads(payload)
+
+    def _dumps(obj: Any) -> bytes:
+        return _orjson.dumps(obj, option=_orjson.OPT_SERIALIZE_NUMPY)
+
+elif _msgspec is not None:
+    BACKEND = 'msgspec'
+    _DECODE_ERRORS = (_msgspec.DecodeError,)
+    _decoder = _msgspec.json.Decoder()
+    _encoder = _msgspec.json.Encoder()
+
+    def _loads(payload: Payload) -> Any:
+        return _decoder.decode(payload)
+
+    def _dumps(obj: Any) -> bytes:
+        return _encoder.encode(obj)
+
+else:
+    BACKEND = 'json'
+    _DECODE_ERRORS = (ValueError,)
+
+    def _loads(payload: Payload) -> Any:
+        if isinstance(payload, memoryview):
+            payload = payload.tobytes()
+        return json.loads(payload)
+
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def loads(payload: Payload) -> Any:
+    """
+    Decode a JSON payload without an intermediate str copy
+
+    Args:
+        payload: RMR payload bytes, memoryview, bytearray or str
+
+    Raises:
+        IndicationDecodeError: Payload is empty or not valid JSON
+    """
+    if not payload:
+        raise IndicationDecodeError("Empty payload")
+    try:
+        return _loads(payload)
+    except _DECODE_ERRORS as e:
+        raise IndicationDecodeError(f"Invalid JSON payload: {e}") from e
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode an object as compact JSON bytes (ready for an RMR payload)"""
+    return _dumps(obj)
+
+
+class E2Indication:
+    """
+    Typed view of a decoded E2SM-KPM indication
+
+    Features:
+    - Fixed attributes (slots) for the fields every xApp reads
+    - Structure is validated once at decode time: top level must be an
+      object, measurements and ue_list must be arrays
+    - Original object kept in `fields` for message-specific extras
+    """
+
+    __slots__ = ('cell_id', 'ue_id', 'beam_id', 'timestamp',
+                 'measurements', 'ue_list', 'fields')
+
+    def __init__(self, cell_id: Any = None, ue_id: Any = None, beam_id: Any = 'n/a',
+                 timestamp: Optional[str] = None,
+                 measurements: Optional[List[Dict[str, Any]]] = None,
+                 ue_list: Optional[List[Dict[str, Any]]] = None,
+                 fields: Optional[Dict[str, Any]] = None):
+        self.cell_id = cell_id
+        self.ue_id = ue_id
+        self.beam_id = beam_id
+        self.timestamp = timestamp
+        self.measurements = measurements if measurements is not None else []
+        self.ue_list = ue_list if ue_list is not None else []
+        self.fields = fields if fields is not None else {}
+
+    @classmethod
+    def from_dict(cls, data: Any) -> 'E2Indication':
+        """
+        Build an indication from a decoded JSON object
+
+        Raises:
+            IndicationDecodeError: The object does not have the indication structure
+        """
+        if not isinstance(data, dict):
+            raise IndicationDecodeError(
+                f"Indication must be a JSON object, got {type(data).__name__}")
+
+        measurements = data.get('measurements')
+        if measurements is None:
+            measurements = []
+        elif not isinstance(measurements, list):
+            raise IndicationDecodeError("'measurements' must be an array")
+
+        ue_list = data.get('ue_list')
+        if ue_list is None:
+            ue_list = []
+        elif not isinstance(ue_list, list):
+            raise IndicationDecodeError("'ue_list' must be an array")
+
+        return cls(
+            cell_id=data.get('cell_id'),
+            ue_id=data.get('ue_id'),
+            beam_id=data.get('beam_id', 'n/a'),
+            timestamp=data.get('timestamp'),
+            measurements=measurements,
+            ue_list=ue_list,
+            fields=data
+        )
+
+    @classmethod
+    def from_binary(cls, payload: Union[bytes, bytearray, memoryview],
+                    kpi_names: Optional[Dict[int, str]] = None) -> 'E2Indication':
+        """
+        Decode a binary indication; measurement arrays are views over the payload
+
+        Args:
+            payload: Binary indication (see BINARY_MAGIC)
+            kpi_names: KPI id -> name (defaults to KPM_KPI_IDS)
+
+        Raises:
+            IndicationDecodeError: Truncated payload or unsupported version
+        """
+        view = memoryview(payload)
+        if view.ndim != 1 or view.itemsize != 1:
+            view = view.cast('B')
+        if len(view) < _HEADER.size:
+            raise IndicationDecodeError("Truncated binary indication header")
+
+        (magic, version, flags, count, beam_id, timestamp,
+         cell_len, ue_len, _) = _HEADER.unpack_from(view)
+        if magic != BINARY_MAGIC:
+            raise IndicationDecodeError("Not a binary indication")
+        if version != BINARY_VERSION:
+            raise IndicationDecodeError(f"Unsupported binary indication version {version}")
+
+        values_end = _HEADER.size + 8 * count
+        ids_end = values_end + 2 * count
+        beams_end = ids_end + (2 * count if flags & FLAG_MEASUREMENT_BEAMS else 0)
+        cell_end = beams_end + cell_len
+        if len(view) < cell_end + ue_len:
+            raise IndicationDecodeError("Truncated binary indication body")
+
+        try:
+            cell_id = str(view[beams_end:cell_end], 'utf-8') if flags & FLAG_CELL_ID else None
+            ue_id = str(view[cell_end:cell_end + ue_len], 'utf-8') if flags & FLAG_UE_ID else None
+        except UnicodeDecodeError as e:
+            raise IndicationDecodeError(f"Invalid UTF-8 id in binary indication: {e}") from e
+
+        measurements = PackedMeasurements(
+            _array(view[_HEADER.size:values_end], 'd'),
+            _array(view[values_end:ids_end], 'H'),
+            _array(view[ids_end:beams_end], 'h') if flags & FLAG_MEASUREMENT_BEAMS else None,
+            _KPM_KPI_NAMES if kpi_names is None else kpi_names
+        )
+        beam = 'n/a' if beam_id == NO_BEAM else beam_id
+        timestamp = None if math.isnan(timestamp) else datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+        return cls(
+            cell_id=cell_id,
+            ue_id=ue_id,
+            beam_id=beam,
+            timestamp=timestamp,
+            measurements=measurements,
+            fields={'cell_id': cell_id, 'ue_id': ue_id, 'beam_id': beam,
+                    'timestamp': timestamp, 'measurements': measurements}
+        )
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """dict-style access to any field of the original object"""
+        return self.fields.get(key, default)
+
+    def __bool__(self) -> bool:
+        return bool(self.fields)
+
+    def __repr__(self) -> str:
+        return (f"E2Indication(cell_id={self.cell_id!r}, ue_id={self.ue_id!r}, "
+                f"beam_id={self.beam_id!r}, measurements={len(self.measurements)})")
+
+
+def decode_indication(payload: Union[Payload, Dict[str, Any], E2Indication]) -> E2Indication:
+    """
+    Decode an E2 indication from RMR/HTTP payload bytes
+
+    JSON and binary payloads are told apart by the binary magic bytes, so
+    consumers accept both without negotiation. Already decoded objects (dict
+    or E2Indication) are accepted as well, so handlers can be called from
+    both the RMR and the HTTP path.
+
+    Args:
+        payload: Raw payload, decoded dict or E2Indication
+
+    Returns:
+        E2Indication
+
+    Raises:
+        IndicationDecodeError: Payload is not a valid indication
+    """
+    if isinstance(payload, E2Indication):
+        return payload
+    if isinstance(payload, dict):
+        return E2Indication.from_dict(payload)
+    if is_binary(payload):
+        return E2Indication.from_binary(payload)
+    return E2Indication.from_dict(loads(payload))
+
+
+# Batches: a JSON array of indications or NDJSON (one indication per line),
+# optionally gzip-compressed (Content-Encoding: gzip)
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+MAX_BATCH_ITEMS = 10000
+MAX_BATCH_BYTES = 16 * 1024 * 1024
+
+# One decoded batch item: the indication, or why it was rejected
+BatchItem = Union[E2Indication, IndicationDecodeError]
+
+
+def _gunzip(payload: Payload, max_bytes: int) -> bytes:
+    """Decompress a gzip body, refusing output larger than max_bytes"""
+    inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        data = inflater.decompress(bytes(payload), max_bytes + 1)
+    except zlib.error as e:
+        raise IndicationDecodeError(f"Invalid gzip body: {e}") from None
+    if len(data) > max_bytes:
+        raise IndicationDecodeError(f"Batch exceeds {max_bytes} bytes uncompressed")
+    if not inflater.eof:
+        raise IndicationDecodeError("Truncated gzip body")
+    return data
+
+
+def _batch_item(data: Any) -> BatchItem:
+    try:
+        indication = decode_indication(data)
+    except IndicationDecodeError as e:
+        return e
+    return indication if indication else IndicationDecodeError("Empty indication")
+
+
+def decode_indication_batch(payload: Payload, ndjson: bool = False, gzip: bool = False,
+                            max_items: int = MAX_BATCH_ITEMS,
+                            max_bytes: int = MAX_BATCH_BYTES) -> List[BatchItem]:
+    """
+    Decode a batch of E2 indications
+
+    Items are decoded independently: a malformed item is returned as its
+    IndicationDecodeError in place, so one bad item does not reject the batch.
+
+    Args:
+        payload: Request body
+        ndjson: Body is NDJSON instead of a JSON array
+        gzip: Body is gzip-compressed
+        max_items: Maximum indications per batch
+        max_bytes: Maximum (uncompressed) body size
+
+    Returns:
+        E2Indication or IndicationDecodeError per item, in order
+
+    Raises:
+        IndicationDecodeError: The body as a whole cannot be decoded or is too large
+    """
+    if gzip:
+        payload = _gunzip(payload, max_bytes)
+    elif len(payload) > max_bytes:
+        raise IndicationDecodeError(f"Batch exceeds {max_bytes} bytes")
+
+    if ndjson:
+        if isinstance(payload, str):
+            payload = payload.encode('utf-8')
+        items = [line for line in bytes(payload).splitlines() if line.strip()]
+    else:
+        items = loads(payload)
+        if not isinstance(items, list):
+            raise IndicationDecodeError(
+                f"Batch must be a JSON array, got {type(items).__name__}")
+
+    if not items:
+        raise IndicationDecodeError("Empty batch")
+    if len(items) > max_items:
+        raise IndicationDecodeError(f"Batch has {len(items)} indications (max {max_items})")
+    return [_batch_item(item) for item in items]
+
+
+def encode_indication_batch(indications: Iterable[Union[Dict[str, Any], E2Indication]]) -> bytes:
+    """Encode indications as an NDJSON batch body"""
+    lines = [dumps(i.fields if isinstance(i, E2Indication) else i) for i in indications]
+    return b'\n'.join(lines) + b'\n'
+
+
+def handle_indication_batch(items: List[BatchItem],
+                            handler: Callable[[E2Indication], Any]) -> Dict[str, Any]:
+    """
+    Run a handler over decoded batch items and collect per-item status
+
+    Args:
+        items: Result of decode_indication_batch
+        handler: Called with each valid indication; an exception marks the item failed
+
+    Returns:
+        {'status', 'processed', 'failed', 'results': [{'index', 'status'[, 'error']}]}
+    """
+    results = []
+    failed = 0
+    for index, item in enumerate(items):
+        error = item if isinstance(item, IndicationDecodeError) else None
+        if error is None:
+            try:
+                handler(item)
+            except Exception as e:
+                logger.error(f"Error processing batch indication {index}: {e}")
+                error = e
+        if error is None:
+            results.append({'index': index, 'status': 'success'})
+        else:
+            failed += 1
+            results.append({'index': index, 'status': 'error', 'error': str(error)})
+
+    return {
+        'status': 'success' if not failed else ('partial' if failed < len(items) else 'error'),
+        'processed': len(items) - failed,
+        'failed': failed,
+        'results': results
+    }
+
+
+class PackedMeasurements(Sequence):
+    """
+    Measurements of a binary indication
+
+    `values`, `kpi_ids` and `beam_ids` are read-only views over the payload
+    (no per-measurement objects). Indexing or iterating yields the same
+    {'name', 'value'[, 'beam_id']} dicts as a JSON indication, so existing
+    handlers work unchanged; measurements with an unknown KPI id get name None.
+    """
+
+    __slots__ = ('values', 'kpi_ids', 'beam_ids', 'kpi_names')
+
+    def __init__(self, values: Sequence, kpi_ids: Sequence,
+                 beam_ids: Optional[Sequence], kpi_names: Dict[int, str]):
+        self.values = values
+        self.kpi_ids = kpi_ids
+        self.beam_ids = beam_ids
+        self.kpi_names = kpi_names
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        measurement = {
+            'name': self.kpi_names.get(self.kpi_ids[index]),
+            'value': self.values[index]
+        }
+        if self.beam_ids is not None and self.beam_ids[index] != NO_BEAM:
+            measurement['beam_id'] = self.beam_ids[index]
+        return measurement
+
+    def __repr__(self) -> str:
+        return f"PackedMeasurements({list(self)!r})"
+
+
+def _array(view: memoryview, fmt: str) -> Sequence:
+    """Typed view of a little-endian array (copied only on big-endian hosts)"""
+    if _NATIVE_LITTLE_ENDIAN:
+        return view.cast(fmt)
+    return struct.unpack(f'<{len(view) // struct.calcsize(fmt)}{fmt}', view)
+
+
+def is_binary(payload: Any) -> bool:
+    """True for payloads in the binary indication format"""
+    return isinstance(payload, (bytes, bytearray, memoryview)) and payload[:2] == BINARY_MAGIC
+
+
+def _wire_id(value: Any, what: str) -> Optional[bytes]:
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        value = str(value)
+    encoded = value.encode('utf-8')
+    if len(encoded) > 0xFFFF:
+        raise IndicationEncodeError(f"{what} too long for the binary format")
+    return encoded
+
+
+def _wire_beam(beam_id: Any) -> int:
+    if beam_id is None or beam_id == 'n/a':
+        return NO_BEAM
+    try:
+        beam = int(beam_id)
+    except (TypeError, ValueError):
+        raise IndicationEncodeError(f"Non-numeric beam_id {beam_id!r}")
+    if not 0 <= beam <= 0x7FFF:
+        raise IndicationEncodeError(f"beam_id {beam} out of range")
+    return beam
+
+
+def encode_binary_indication(indication: Union[Dict[str, Any], E2Indication],
+                             kpi_ids: Optional[Dict[str, int]] = None) -> bytes:
+    """
+    Encode an indication in the compact binary format
+
+    Args:
+        indication: Indication dict (JSON structure) or E2Indication
+        kpi_ids: KPI name -> id (defaults to KPM_KPI_IDS)
+
+    Returns:
+        Binary payload, typically 3-5x smaller than the JSON text
+
+    Raises:
+        IndicationEncodeError: Unknown KPI, non-numeric value or id out of
+            range; the producer should send the indication as JSON instead
+    """
+    indication = decode_indication(indication)
+    kpi_ids = KPM_KPI_IDS if kpi_ids is None else kpi_ids
+    measurements = indication.measurements
+    count = len(measurements)
+    if count > 0xFFFF:
+        raise IndicationEncodeError("Too many measurements for the binary format")
+
+    values = []
+    ids = []
+    beams = []
+    for measurement in measurements:
+        name = measurement.get('name')
+        kpi_id = kpi_ids.get(name) if isinstance(name, str) else None
+        if kpi_id is None:
+            raise IndicationEncodeError(f"KPI {name!r} has no binary id")
+        value = measurement.get('value')
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise IndicationEncodeError(f"Non-numeric value for KPI {name}")
+        values.append(value)
+        ids.append(kpi_id)
+        beams.append(_wire_beam(measurement.get('beam_id')))
+
+    cell = _wire_id(indication.cell_id, 'cell_id')
+    ue = _wire_id(indication.ue_id, 'ue_id')
+    flags = (FLAG_CELL_ID if cell is not None else 0) | (FLAG_UE_ID if ue is not None else 0)
+    if any(beam != NO_BEAM for beam in beams):
+        flags |= FLAG_MEASUREMENT_BEAMS
+
+    timestamp = float('nan')
+    if indication.timestamp:
+        try:
+            dt = datetime.fromisoformat(indication.timestamp)
+        except (TypeError, ValueError):
+            raise IndicationEncodeError(f"Invalid timestamp {indication.timestamp!r}")
+        # Naive timestamps are UTC, as the KPIMON InfluxDB writer reads them
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        timestamp = dt.timestamp()
+
+    cell = cell or b''
+    ue = ue or b''
+    parts = [
+        _HEADER.pack(BINARY_MAGIC, BINARY_VERSION, flags, count,
+                     _wire_beam(indication.beam_id), timestamp, len(cell), len(ue), 0),
+        struct.pack(f'<{count}d', *values),
+        struct.pack(f'<{count}H', *ids)
+    ]
+    if flags & FLAG_MEASUREMENT_BEAMS:
+        parts.append(struct.pack(f'<{count}h', *beams))
+    parts.append(cell)
+    parts.append(ue)
+    return b''.join(parts)
+
+
+def binary_cell_id(payload: Union[bytes, bytearray, memoryview]) -> Optional[str]:
+    """cell_id of a binary indication read from its header (None if absent or malformed)"""
+    try:
+        _, _, flags, count, _, _, cell_len, _, _ = _HEADER.unpack_from(payload)
+    except struct.error:
+        return None
+    if not flags & FLAG_CELL_ID:
+        return None
+    start = _HEADER.size + 10 * count + (2 * count if flags & FLAG_MEASUREMENT_BEAMS else 0)
+    try:
+        return bytes(payload[start:start + cell_len]).decode('utf-8')
+    except UnicodeDecodeError:
+        return None
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Shared E2 indication route bodies for xApp HTTP servers
+Admission control, single-pass decoding and error mapping of the
+/e2/indication and /e2/indication/batch routes, so every xApp answers the
+same way (400 undecodable, 429/503 with Retry-After when shedding load)
+
+Author: O-RAN RIC Platform Team
+Date: 2025-11-19
+"""
+
+import logging
+from typing import Any, Callable, Optional
+
+from flask import jsonify, request
+
+try:
+    from .admission_control import AdmissionController, LoadShed, message_priority
+    from .indication_codec import (
+        NDJSON_CONTENT_TYPE, IndicationDecodeError, decode_indication, decode_indication_batch,
+        handle_indication_batch
+    )
+except ImportError:
+    # Imported flat: xApps put xapps/common on sys.path
+    from admission_control import AdmissionController, LoadShed, message_priority
+    from indication_codec import (
+        NDJSON_CONTENT_TYPE, IndicationDecodeError, decode_indication, decode_indication_batch,
+        handle_indication_batch
+    )
+
+logger = logging.getLogger(__name__)
+
+
+def indication_response(admission: AdmissionController, handler: Callable[[Any], Any],
+                        decode: bool = True, message: str = "Indication processed"):
+    """
+    Body of a POST /e2/indication route
+
+    Args:
+        admission: Admission controller of the route
+        handler: Called with the decoded E2Indication (raw body bytes when
+            decode is False); may raise LoadShed to reject with 429/503
+        decode: Decode the body before calling handler
+        message: Success message of the response
+
+    Returns:
+        Flask response tuple
+    """
+    try:
+        # Shed load beyond the configured concurrency/queue bounds
+        with admission.admit(message_priority(request.headers.get('X-Message-Type'))):
+            # Raw body: decoded once, never re-serialized
+            payload = request.get_data(cache=False)
+            if decode:
+                try:
+                    payload = decode_indication(payload)
+                except IndicationDecodeError as e:
+                    return jsonify({"error": str(e)}), 400
+            if not payload:
+                return jsonify({"error": "No data provided"}), 400
+
+            handler(payload)
+
+        return jsonify({"status": "success", "message": message}), 200
+
+    except LoadShed as e:
+        return jsonify({"error": str(e)}), e.status_code, e.headers
+    except Exception as e:
+        logger.error(f"Error processing E2 indication: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+def indication_batch_response(admission: AdmissionController, handler: Callable[[Any], Any],
+                              received: Optional[Callable[[int], Any]] = None):
+    """
+    Body of a POST /e2/indication/batch route (JSON array or NDJSON, optionally gzip)
+
+    Args:
+        admission: Admission controller of the route
+        handler: Called with each decoded E2Indication (see handle_indication_batch)
+        received: Called with the number of decoded indications
+
+    Returns:
+        Flask response tuple with the per-item results
+    """
+    try:
+        with admission.admit(message_priority(request.headers.get('X-Message-Type'))):
+            try:
+                items = decode_indication_batch(
+                    request.get_data(cache=False),
+                    ndjson=request.mimetype == NDJSON_CONTENT_TYPE,
+                    gzip=request.content_encoding == 'gzip'
+                )
+            except IndicationDecodeError as e:
+                return jsonify({"error": str(e)}), 400
+            if received is not None:
+                received(len(items))
+            result = handle_indication_batch(items, handler)
+        return jsonify(result), 200
+
+    except LoadShed as e:
+        return jsonify({"error": str(e)}), e.status_code, e.headers
+    except Exception as e:
+        logger.error(f"Error processing E2 indication batch: {e}")
+        return jsonify({"error": str(e)}), 500
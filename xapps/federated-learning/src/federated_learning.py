@@ -9,6 +9,8 @@ IMPORTANT: This xApp uses the COMPOSITION pattern for RMR API integration,
 NOT inheritance. This is the proven approach from Phase 3 Traffic Steering.
 """
 
+import os
+import sys
 import json
 import time
 import logging
@@ -32,6 +34,10 @@ from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.hazmat.primitives import serialization
 from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
 
+# Add common library path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../common'))
+from http_server import XappHTTPServer
+
 # Configure logging
 logger = Logger(name="FEDERATED_LEARNING")
 logger.set_level(logging.INFO)
@@ -151,6 +157,11 @@ class FederatedLearning:
         self.config = self._load_config(config_path)
         self.xapp = None
         self.running = False
+
+        # Production WSGI server for the REST API
+        self.http_server = XappHTTPServer.from_config(
+            app, self.config.get('http_server'), port=self.config['http_port'], name='federated-learning'
+        )
         
         # FL State
         self.current_round = 0
@@ -1016,12 +1027,13 @@ class FederatedLearning:
             """Get FL metrics in JSON format (legacy endpoint)"""
             return jsonify(self.metrics), 200
 
-        app.run(host='0.0.0.0', port=self.config['http_port'])
+        self.http_server.serve_forever()
     
     def stop(self):
         """Stop the xApp"""
         logger.info("Stopping Federated Learning xApp...")
         self.running = False
+        self.http_server.stop()
         if self.xapp:
             self.xapp.stop()
         logger.info("Federated Learning xApp stopped")
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Deduplicating alarm sink for KPIMON xApp
+Aggregates repeated anomalies per (cell, beam, KPI, type) within a window,
+keeps occurrence counters and first/last-seen times, and writes trimmed
+alarm lists and summaries through the pipelined Redis writer
+
+Key layout:
+    alarms:{cell_id}                 LIST  emitted alarms (trimmed to max_list_length)
+    alarms:{cell_id}:beam_{beam_id}  LIST  emitted alarms of one beam
+    alarms:summary:{cell_id}         HASH  "{beam}|{kpi}|{type}" -> occurrence summary
+
+Author: O-RAN RIC Platform Team
+Date: 2025-11-19
+"""
+
+import json
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from prometheus_client import Counter, Gauge
+
+from beam_index import NO_BEAM
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+ALARMS_EMITTED = Counter('kpimon_alarms_emitted_total', 'Total anomalies written as alarms')
+ALARMS_SUPPRESSED = Counter(
+    'kpimon_alarms_suppressed_total',
+    'Total anomalies folded into an existing alarm within the dedup window'
+)
+ALARMS_ACTIVE = Gauge('kpimon_alarms_active', 'Distinct (cell, beam, KPI, type) alarms being tracked')
+
+AlarmKey = Tuple[Any, Any, str, str]
+
+
+def _isoformat(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+
+
+class AlarmState:
+    """Occurrence tracking of one (cell, beam, KPI, type) alarm"""
+
+    __slots__ = ('count', 'first_seen', 'last_seen', 'last_emitted', 'last_value', 'dirty')
+
+    def __init__(self, now: float):
+        self.count = 0
+        self.first_seen = now
+        self.last_seen = now
+        self.last_emitted = None
+        self.last_value = None
+        self.dirty = False
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'first_seen': _isoformat(self.first_seen),
+            'last_seen': _isoformat(self.last_seen),
+            'last_value': self.last_value
+        }
+
+
+class AlarmSink:
+    """
+    Rate-limited alarm writer
+
+    Features:
+    - One alarm per (cell, beam, KPI, type) per dedup window; repeats only
+      bump in-memory counters
+    - Periodic per-cell summary hashes with count and first/last-seen
+    - Alarm lists bounded with LTRIM
+    - All writes of a detection batch go out in one pipeline
+    """
+
+    def __init__(self, redis_writer, dedup_window_s: float = 60,
+                 max_list_length: int = 1000, ttl: int = 86400,
+                 summary_interval_s: float = 10, max_active: int = 10000):
+        """
+        Initialize alarm sink
+
+        Args:
+            redis_writer: RedisBatchWriter used for all alarm writes
+            dedup_window_s: Repeats within this window are folded into one alarm;
+                an ongoing alarm is re-emitted once per window
+            max_list_length: Alarms kept per list
+            ttl: Seconds alarm lists and summaries are kept
+            summary_interval_s: Minimum interval between summary writes
+            max_active: Maximum tracked alarms; beyond it alarms are not deduplicated
+        """
+        self.redis_writer = redis_writer
+        self.window = float(dedup_window_s)
+        self.max_list_length = max(1, int(max_list_length))
+        self.ttl = ttl
+        self.summary_interval = float(summary_interval_s)
+        self.max_active = max(1, int(max_active))
+
+        self._active: Dict[AlarmKey, AlarmState] = {}
+        self._commands: List[Tuple[str, Tuple[Any, ...]]] = []
+        self._last_summary = 0.0
+        self._lock = threading.Lock()
+
+        self.total_emitted = 0
+        self.total_suppressed = 0
+
+    @classmethod
+    def from_config(cls, redis_writer, config: Optional[Dict] = None) -> 'AlarmSink':
+        """Create a sink from the `alarms` config section"""
+        config = config or {}
+        return cls(
+            redis_writer,
+            dedup_window_s=config.get('dedup_window_s', 60),
+            max_list_length=config.get('max_list_length', 1000),
+            ttl=config.get('ttl', 86400),
+            summary_interval_s=config.get('summary_interval_s', 10),
+            max_active=config.get('max_active', 10000)
+        )
+
+    def raise_alarm(self, cell_id: str, anomalies: List[Dict], beam_id=None,
+                    now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Record anomalies of a cell/beam, queueing an alarm for the new ones
+
+        Args:
+            cell_id: Cell the anomalies belong to
+            anomalies: Anomaly dicts with at least 'kpi' and 'type'
+            beam_id: Beam of the anomalies
+            now: Current epoch seconds (defaults to time.time())
+
+        Returns:
+            The queued alarm, or None if every anomaly was suppressed
+        """
+        now = time.time() if now is None else now
+        emitted = []
+
+        with self._lock:
+            for anomaly in anomalies:
+                key = (cell_id, anomaly.get('beam_id', beam_id), anomaly.get('kpi'), anomaly.get('type'))
+                state = self._track(key, now)
+
+                state.count += 1
+                state.last_seen = now
+                state.last_value = anomaly.get('value')
+                state.dirty = True
+
+                if state.last_emitted is not None and now - state.last_emitted < self.window:
+                    self.total_suppressed += 1
+                    ALARMS_SUPPRESSED.inc()
+                    continue
+
+                state.last_emitted = now
+                emitted.append(dict(anomaly, count=state.count,
+                                    first_seen=_isoformat(state.first_seen)))
+
+            if not emitted:
+                return None
+
+            alarm = {
+                'timestamp': _isoformat(now),
+                'cell_id': cell_id,
+                'beam_id': beam_id,
+                'anomalies': emitted,
+                'severity': 'warning'
+            }
+            alarm_json = json.dumps(alarm)
+
+            self._queue_list_write(f"alarms:{cell_id}", alarm_json)
+            # Beam-specific alarms are stored separately for easier filtering
+            if beam_id is not None and beam_id != NO_BEAM:
+                self._queue_list_write(f"alarms:{cell_id}:beam_{beam_id}", alarm_json)
+
+            self.total_emitted += len(emitted)
+            ALARMS_EMITTED.inc(len(emitted))
+            return alarm
+
+    def _track(self, key: AlarmKey, now: float) -> AlarmState:
+        """State of an alarm key, evicting expired alarms when the table is full"""
+        state = self._active.get(key)
+        if state is not None:
+            return state
+
+        if len(self._active) >= self.max_active:
+            self._evict(now, write_summaries=True)
+        state = AlarmState(now)
+        if len(self._active) < self.max_active:
+            self._active[key] = state
+            ALARMS_ACTIVE.set(len(self._active))
+        return state
+
+    def _queue_list_write(self, key: str, alarm_json: str):
+        self._commands.append(('rpush', (key, alarm_json)))
+        self._commands.append(('ltrim', (key, -self.max_list_length, -1)))
+        self._commands.append(('expire', (key, self.ttl)))
+
+    def _queue_summaries(self):
+        """Queue summary hash updates of alarms that changed since the last write"""
+        by_cell: Dict[Any, Dict[str, str]] = {}
+        for (cell_id, beam_id, kpi, anomaly_type), state in self._active.items():
+            if state.dirty:
+                by_cell.setdefault(cell_id, {})[f"{beam_id}|{kpi}|{anomaly_type}"] = \
+                    json.dumps(state.summary())
+                state.dirty = False
+
+        for cell_id, fields in by_cell.items():
+            key = f"alarms:summary:{cell_id}"
+            self._commands.append(('hset', (key, None, None, fields)))
+            self._commands.append(('expire', (key, self.ttl)))
+
+    def _evict(self, now: float, write_summaries: bool):
+        """Forget alarms not seen for a full window (their summary stays in Redis)"""
+        if write_summaries:
+            self._queue_summaries()
+        expired = [key for key, state in self._active.items() if now - state.last_seen >= self.window]
+        for key in expired:
+            del self._active[key]
+        ALARMS_ACTIVE.set(len(self._active))
+
+    def flush(self, now: Optional[float] = None, force: bool = False) -> int:
+        """
+        Write queued alarms, plus summaries once per summary interval
+
+        Args:
+            now: Current epoch seconds (defaults to time.time())
+            force: Write summaries regardless of the interval
+
+        Returns:
+            Number of Redis commands submitted
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            if force or now - self._last_summary >= self.summary_interval:
+                self._last_summary = now
+                self._evict(now, write_summaries=True)
+            commands, self._commands = self._commands, []
+
+        if commands and self.redis_writer:
+            self.redis_writer.submit(commands)
+        return len(commands)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get sink statistics"""
+        with self._lock:
+            active = len(self._active)
+        return {
+            'active_alarms': active,
+            'total_emitted': self.total_emitted,
+            'total_suppressed': self.total_suppressed,
+            'dedup_window_s': self.window,
+            'max_list_length': self.max_list_length
+        }
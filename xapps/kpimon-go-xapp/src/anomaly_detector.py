@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Vectorized anomaly detection for KPIMON xApp
+Evaluates whole batches of buffered KPI points with NumPy: static thresholds
+indexed by KPI id (with per-cell/per-beam overrides) and rolling EWMA z-scores
+per (cell, beam, KPI) series
+
+Author: O-RAN RIC Platform Team
+Date: 2025-11-19
+"""
+
+import math
+import logging
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from prometheus_client import Counter, Histogram
+
+from kpi_catalog import KPICatalog
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+ANOMALIES_DETECTED = Counter(
+    'kpimon_anomalies_detected_total',
+    'Total number of KPI anomalies detected',
+    ['method']
+)
+DETECTION_TIME = Histogram(
+    'kpimon_anomaly_detection_seconds',
+    'Time spent evaluating one batch of KPI points'
+)
+
+# (cell_id, beam_id) -> anomalies, the shape expected by KPIMonitor._raise_alarm
+AlarmGroups = Dict[Tuple[Any, Any], List[Dict[str, Any]]]
+
+# KPIPoint field positions (records may also be lists re-read from a spill file)
+_CELL, _BEAM, _KPI, _VALUE = 1, 3, 4, 6
+
+
+def _as_float(value: Any) -> float:
+    """KPI value as float, NaN for anything non-numeric"""
+    if type(value) is float or type(value) is int:
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class AnomalyDetector:
+    """
+    Batch KPI anomaly detector
+
+    Features:
+    - Threshold and direction arrays indexed by KPI id; one masked comparison
+      per batch instead of per-measurement if/elif chains
+    - Per-cell and per-(cell, beam) threshold overrides
+    - Rolling EWMA mean/variance per (cell, beam, KPI) series with z-score
+      detection, updated in submission order
+    - Bounded series state (reset when full)
+    """
+
+    def __init__(self, catalog: KPICatalog,
+                 overrides: Optional[List[Dict[str, Any]]] = None,
+                 zscore_enabled: bool = False,
+                 ewma_alpha: float = 0.1,
+                 zscore_threshold: float = 4.0,
+                 min_samples: int = 30,
+                 max_series: int = 100000):
+        """
+        Initialize anomaly detector
+
+        Args:
+            catalog: Compiled KPI catalog providing ids and default thresholds
+            overrides: Threshold overrides, each {"cell_id", "kpi", "threshold"}
+                with optional "beam_id" and "direction"
+            zscore_enabled: Enable rolling z-score detection
+            ewma_alpha: EWMA smoothing factor for series mean/variance
+            zscore_threshold: |z| above which a point is anomalous
+            min_samples: Samples a series needs before z-scores are evaluated
+            max_series: Maximum number of tracked series
+        """
+        self.catalog = catalog
+        self.zscore_enabled = zscore_enabled
+        self.alpha = float(ewma_alpha)
+        self.zscore_threshold = float(zscore_threshold)
+        self.min_samples = int(min_samples)
+        self.max_series = int(max_series)
+
+        # KPI name -> dense index into the threshold arrays
+        size = max((kpi.id for kpi in catalog), default=0) + 1
+        self._kpi_index: Dict[str, int] = {kpi.name: kpi.id for kpi in catalog}
+        self._kpi_names: List[Optional[str]] = [None] * size
+        self.thresholds = np.full(size, np.nan)
+        self.below = np.zeros(size, dtype=bool)
+        for kpi in catalog:
+            self._kpi_names[kpi.id] = kpi.name
+            if kpi.threshold is not None:
+                self.thresholds[kpi.id] = kpi.threshold
+                self.below[kpi.id] = kpi.direction == 'below'
+
+        # (cell, kpi) and (cell, beam label, kpi) -> (threshold, below)
+        self._overrides: Dict[Tuple, Tuple[float, bool]] = {}
+        self._override_cells = set()
+        for override in overrides or []:
+            self.add_override(**override)
+
+        # Series state, indexed by series id
+        self._series: Dict[Tuple, int] = {}
+        self._mean = np.zeros(1024)
+        self._var = np.zeros(1024)
+        self._count = np.zeros(1024, dtype=np.int64)
+
+        self.total_points = 0
+        self.total_anomalies = 0
+
+    @classmethod
+    def from_config(cls, catalog: KPICatalog, config: Optional[Dict] = None) -> 'AnomalyDetector':
+        """Create a detector from the `anomaly_detection` config section"""
+        config = config or {}
+        zscore = config.get('zscore', {})
+        return cls(
+            catalog,
+            overrides=config.get('overrides'),
+            zscore_enabled=zscore.get('enabled', False),
+            ewma_alpha=zscore.get('ewma_alpha', 0.1),
+            zscore_threshold=zscore.get('threshold', 4.0),
+            min_samples=zscore.get('min_samples', 30),
+            max_series=config.get('max_series', 100000)
+        )
+
+    def add_override(self, cell_id: str, kpi: str, threshold: float,
+                     beam_id: Any = None, direction: Optional[str] = None):
+        """
+        Override a KPI threshold for one cell or one beam of a cell
+
+        Args:
+            cell_id: Cell the override applies to
+            kpi: KPI name
+            threshold: Threshold value
+            beam_id: Restrict the override to this beam
+            direction: 'above' or 'below' (defaults to the KPI's direction)
+        """
+        if kpi not in self._kpi_index:
+            raise ValueError(f"Unknown KPI in threshold override: {kpi}")
+        if direction is None:
+            direction = self.catalog.get(kpi).direction
+        if direction not in ('above', 'below'):
+            raise ValueError(f"Invalid threshold direction: {direction}")
+
+        key = (cell_id, kpi) if beam_id is None else (cell_id, str(beam_id), kpi)
+        self._overrides[key] = (float(threshold), direction == 'below')
+        self._override_cells.add(cell_id)
+
+    def detect(self, points: Sequence[Sequence]) -> AlarmGroups:
+        """
+        Evaluate a batch of KPI points
+
+        Args:
+            points: KPIPoint tuples in arrival order
+
+        Returns:
+            Anomalies grouped by (cell_id, beam_id)
+        """
+        if not len(points):
+            return {}
+
+        with DETECTION_TIME.time():
+            kpi_index = self._kpi_index
+            idx = np.fromiter((kpi_index.get(p[_KPI], 0) for p in points),
+                              dtype=np.intp, count=len(points))
+            values = np.fromiter((_as_float(p[_VALUE]) for p in points),
+                                 dtype=float, count=len(points))
+            known = idx > 0
+
+            thresholds = self.thresholds[idx]
+            below = self.below[idx]
+            if self._override_cells:
+                self._apply_overrides(points, thresholds, below)
+
+            # NaN thresholds/values compare False, so they never flag
+            with np.errstate(invalid='ignore'):
+                breached = known & np.where(below, values < thresholds, values > thresholds)
+
+            groups: AlarmGroups = defaultdict(list)
+            for i in np.flatnonzero(breached):
+                self._add(groups, points[i], {
+                    'kpi': self._kpi_names[idx[i]],
+                    'value': points[i][_VALUE],
+                    'threshold': float(thresholds[i]),
+                    'type': 'below_threshold' if below[i] else 'above_threshold'
+                })
+            ANOMALIES_DETECTED.labels(method='threshold').inc(int(breached.sum()))
+
+            if self.zscore_enabled:
+                self._detect_zscore(points, idx, values, known & ~breached, groups)
+
+        self.total_points += len(points)
+        self.total_anomalies += sum(len(g) for g in groups.values())
+        return dict(groups)
+
+    def _apply_overrides(self, points: Sequence[Sequence],
+                         thresholds: np.ndarray, below: np.ndarray):
+        """Patch thresholds of points from cells with overrides"""
+        overrides = self._overrides
+        cells = self._override_cells
+        for i, p in enumerate(points):
+            if p[_CELL] not in cells:
+                continue
+            override = (overrides.get((p[_CELL], str(p[_BEAM]), p[_KPI]))
+                        or overrides.get((p[_CELL], p[_KPI])))
+            if override:
+                thresholds[i], below[i] = override
+
+    def _series_ids(self, points: Sequence[Sequence], mask: np.ndarray) -> np.ndarray:
+        """Dense series ids of the masked points, allocating state as needed"""
+        series = self._series
+        positions = np.flatnonzero(mask)
+        keys = [(points[i][_CELL], points[i][_BEAM], points[i][_KPI]) for i in positions]
+
+        if len(series) + len(keys) > self.max_series and any(k not in series for k in keys):
+            logger.warning(f"Anomaly detector tracks {len(series)} series, resetting state")
+            series.clear()
+            self._count[:] = 0
+
+        ids = np.empty(len(keys), dtype=np.intp)
+        for n, key in enumerate(keys):
+            sid = series.get(key)
+            if sid is None:
+                sid = series[key] = len(series)
+                if sid >= len(self._mean):
+                    grow = len(self._mean)
+                    self._mean = np.concatenate([self._mean, np.zeros(grow)])
+                    self._var = np.concatenate([self._var, np.zeros(grow)])
+                    self._count = np.concatenate([self._count, np.zeros(grow, dtype=np.int64)])
+                self._mean[sid] = self._var[sid] = 0.0
+                self._count[sid] = 0
+            ids[n] = sid
+        return ids
+
+    def _detect_zscore(self, points: Sequence[Sequence], idx: np.ndarray,
+                       values: np.ndarray, candidates: np.ndarray, groups: AlarmGroups):
+        """Score points against their series EWMA, then fold them into it"""
+        mask = np.isfinite(values) & (idx > 0)
+        positions = np.flatnonzero(mask)
+        if not len(positions):
+            return
+        sids = self._series_ids(points, mask)
+        x = values[positions]
+
+        # Occurrence rank of each point within its series; each rank is one
+        # vectorized update so repeated series are applied in arrival order
+        order = np.argsort(sids, kind='stable')
+        sorted_ids = sids[order]
+        starts = np.r_[0, np.flatnonzero(np.diff(sorted_ids)) + 1]
+        group_start = np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+        rank = np.empty(len(order), dtype=np.intp)
+        rank[order] = np.arange(len(order)) - group_start
+
+        z = np.zeros(len(positions))
+        alpha = self.alpha
+        for r in range(int(rank.max()) + 1):
+            sel = np.flatnonzero(rank == r)
+            s = sids[sel]
+            diff = x[sel] - self._mean[s]
+            std = np.sqrt(self._var[s])
+            ready = (self._count[s] >= self.min_samples) & (std > 0)
+            z[sel] = np.where(ready, diff / np.where(std > 0, std, 1.0), 0.0)
+
+            # EWMA mean/variance; the first sample seeds the mean
+            first = self._count[s] == 0
+            incr = np.where(first, diff, alpha * diff)
+            self._mean[s] += incr
+            self._var[s] = np.where(first, 0.0, (1 - alpha) * (self._var[s] + diff * incr))
+            self._count[s] += 1
+
+        flagged = (np.abs(z) > self.zscore_threshold) & candidates[positions]
+        for n in np.flatnonzero(flagged):
+            i = positions[n]
+            self._add(groups, points[i], {
+                'kpi': self._kpi_names[idx[i]],
+                'value': points[i][_VALUE],
+                'zscore': round(float(z[n]), 2),
+                'type': 'above_expected' if z[n] > 0 else 'below_expected'
+            })
+        ANOMALIES_DETECTED.labels(method='zscore').inc(int(flagged.sum()))
+
+    @staticmethod
+    def _add(groups: AlarmGroups, point: Sequence, anomaly: Dict[str, Any]):
+        beam_id = point[_BEAM]
+        if beam_id is not None:
+            anomaly['beam_id'] = beam_id
+        groups[(point[_CELL], beam_id)].append(anomaly)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get detector statistics"""
+        return {
+            'total_points': self.total_points,
+            'total_anomalies': self.total_anomalies,
+            'tracked_series': len(self._series),
+            'overrides': len(self._overrides),
+            'zscore_enabled': self.zscore_enabled
+        }
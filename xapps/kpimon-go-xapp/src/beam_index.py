@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Beam/cell secondary indexes for KPIMON Redis data
+Maintained by KPIMON at write time so the beam query API can resolve
+queries with bounded SMEMBERS + MGET instead of scanning the keyspace
+
+Key layout:
+    kpi:idx:beams                        SET   beam ids with recent KPIs
+    kpi:idx:cells                        SET   cell ids with recent beam KPIs
+    kpi:idx:cell:{cell_id}:beams         SET   beam ids reported by a cell
+    kpi:idx:beam:{beam_id}:cells         SET   cells reporting a beam
+    ue:idx:beam:{beam_id}:cell:{cell_id} ZSET  ue_id -> last seen (epoch seconds)
+
+Author: O-RAN RIC Platform Team
+Date: 2025-11-19
+"""
+
+import time
+from typing import Any, Iterable, List, Optional, Set, Tuple
+
+# Same shape as redis_writer.RedisCommand
+RedisCommand = Tuple[str, Tuple[Any, ...]]
+
+# Beam id used by KPIMON when an indication carries no beam information
+NO_BEAM = 'n/a'
+
+
+def beam_kpi_key(beam_id, cell_id: str, kpi_name: str) -> str:
+    """Key of the latest KPI record for a (beam, cell, KPI)"""
+    return f"kpi:beam:{beam_id}:cell:{cell_id}:{kpi_name}"
+
+
+def beams_index_key() -> str:
+    return "kpi:idx:beams"
+
+
+def cells_index_key() -> str:
+    return "kpi:idx:cells"
+
+
+def cell_beams_key(cell_id: str) -> str:
+    return f"kpi:idx:cell:{cell_id}:beams"
+
+
+def beam_cells_key(beam_id) -> str:
+    return f"kpi:idx:beam:{beam_id}:cells"
+
+
+def beam_ues_key(beam_id, cell_id: str) -> str:
+    return f"ue:idx:beam:{beam_id}:cell:{cell_id}"
+
+
+class BeamIndex:
+    """
+    Maintains and reads the beam/cell/UE secondary indexes
+
+    All index keys share the TTL of the KPI records they point to, so an
+    index disappears together with the data once a cell stops reporting.
+    """
+
+    def __init__(self, ttl: int = 300):
+        """
+        Initialize beam index
+
+        Args:
+            ttl: Seconds index entries (and UE associations) stay valid
+        """
+        self.ttl = ttl
+
+    def index_commands(self, cell_id: str, beam_ids: Iterable,
+                       ue_id: Optional[str] = None,
+                       now: Optional[float] = None) -> List[RedisCommand]:
+        """
+        Build the index writes for one indication
+
+        Args:
+            cell_id: Reporting cell
+            beam_ids: Distinct beam ids carried by the indication
+            ue_id: Optional UE served by these beams
+            now: Current epoch seconds (defaults to time.time())
+
+        Returns:
+            Commands to submit together with the KPI writes
+        """
+        beams = [b for b in beam_ids if b is not None and b != NO_BEAM]
+        if not beams or cell_id is None:
+            return []
+
+        now = time.time() if now is None else now
+        ttl = self.ttl
+        commands: List[RedisCommand] = [
+            ('sadd', (beams_index_key(), *beams)),
+            ('expire', (beams_index_key(), ttl)),
+            ('sadd', (cells_index_key(), cell_id)),
+            ('expire', (cells_index_key(), ttl)),
+            ('sadd', (cell_beams_key(cell_id), *beams)),
+            ('expire', (cell_beams_key(cell_id), ttl)),
+        ]
+
+        for beam_id in beams:
+            commands.append(('sadd', (beam_cells_key(beam_id), cell_id)))
+            commands.append(('expire', (beam_cells_key(beam_id), ttl)))
+
+            if ue_id:
+                ue_key = beam_ues_key(beam_id, cell_id)
+                commands.append(('zadd', (ue_key, {ue_id: now})))
+                commands.append(('zremrangebyscore', (ue_key, '-inf', now - ttl)))
+                commands.append(('expire', (ue_key, ttl)))
+
+        return commands
+
+    @staticmethod
+    def _to_beam_ids(members: Iterable) -> Set[int]:
+        """Convert index members to integer beam ids, skipping malformed entries"""
+        beam_ids = set()
+        for member in members:
+            try:
+                beam_ids.add(int(member))
+            except (TypeError, ValueError):
+                continue
+        return beam_ids
+
+    def list_beams(self, redis_client, cell_id: Optional[str] = None) -> Set[int]:
+        """Beam ids with recent KPIs, optionally restricted to one cell"""
+        key = cell_beams_key(cell_id) if cell_id else beams_index_key()
+        return self._to_beam_ids(redis_client.smembers(key))
+
+    def list_cells(self, redis_client, beam_id=None) -> Set[str]:
+        """Cells with recent beam KPIs, optionally restricted to one beam"""
+        key = beam_cells_key(beam_id) if beam_id is not None else cells_index_key()
+        return set(redis_client.smembers(key))
+
+    def list_beam_cells(self, redis_client,
+                        cell_id: Optional[str] = None) -> List[Tuple[int, str]]:
+        """
+        (beam_id, cell_id) pairs with recent KPIs, sorted by beam then cell
+
+        Args:
+            redis_client: Redis client
+            cell_id: Optional cell filter
+
+        Returns:
+            Pairs resolved in at most two round trips
+        """
+        if cell_id:
+            return [(beam_id, cell_id) for beam_id in sorted(self.list_beams(redis_client, cell_id))]
+
+        cells = sorted(self.list_cells(redis_client))
+        if not cells:
+            return []
+
+        pipe = redis_client.pipeline(transaction=False)
+        for cell in cells:
+            pipe.smembers(cell_beams_key(cell))
+
+        pairs = []
+        for cell, members in zip(cells, pipe.execute()):
+            pairs.extend((beam_id, cell) for beam_id in self._to_beam_ids(members))
+        return sorted(pairs)
+
+    def ue_count(self, redis_client, beam_id, cell_id: str,
+                 now: Optional[float] = None) -> int:
+        """Number of UEs seen on a beam within the TTL window"""
+        now = time.time() if now is None else now
+        return int(redis_client.zcount(beam_ues_key(beam_id, cell_id), now - self.ttl, '+inf'))
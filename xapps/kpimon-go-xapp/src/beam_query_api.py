@@ -7,26 +7,119 @@ Author: O-RAN RIC Platform Team
 Date: 2025-11-19
 """
 
+import re
 import json
+import time
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
-from flask import Blueprint, jsonify, request
+from bisect import bisect_right
+from itertools import islice
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Any, Tuple
+from flask import Blueprint, Response, jsonify, request
+import numpy as np
 import redis
 from influxdb_client import InfluxDBClient
 from influxdb_client.client.query_api import QueryApi
 
+from beam_index import BeamIndex, beam_kpi_key, beam_ues_key
+from latest_cache import LatestKPICache
+from kpi_stream import KPIStreamBroker, StreamLimitError
+from query_cache import QueryResultCache
+from downsample import METHODS as DOWNSAMPLE_METHODS, auto_interval, downsample
+
 logger = logging.getLogger(__name__)
 
 # Create Flask Blueprint for beam API
 beam_api = Blueprint('beam_api', __name__, url_prefix='/api')
 
+# Current-KPI response layout: kpi_name -> (category, field, unit, quality type)
+CURRENT_KPI_FIELDS = {
+    'UE.RSRP': ('signal_quality', 'rsrp', 'dBm', 'rsrp'),
+    'UE.RSRQ': ('signal_quality', 'rsrq', 'dB', 'rsrq'),
+    'UE.SINR': ('signal_quality', 'sinr', 'dB', 'sinr'),
+    'DRB.UEThpDl': ('throughput', 'downlink', 'Mbps', 'throughput_dl'),
+    'DRB.UEThpUl': ('throughput', 'uplink', 'Mbps', 'throughput_ul'),
+    'RRU.PrbUsedDl': ('resource_utilization', 'prb_usage_dl', 'percentage', None),
+    'RRU.PrbUsedUl': ('resource_utilization', 'prb_usage_ul', 'percentage', None),
+    'DRB.PacketLossDl': ('packet_loss', 'downlink', 'percentage', None),
+    'DRB.PacketLossUl': ('packet_loss', 'uplink', 'percentage', None),
+}
+
+# KPIs read per (beam, cell); beam-level L1 KPIs only contribute metadata
+BEAM_KPI_NAMES = list(CURRENT_KPI_FIELDS) + ['L1-RSRP.beam', 'L1-SINR.beam']
+
+# Historical query time ranges -> Flux durations (unknown ranges use 15m)
+HISTORICAL_DURATIONS = {
+    'last_5m': '5m',
+    'last_15m': '15m',
+    'last_1h': '1h',
+    'last_24h': '24h'
+}
+
+# Historical aggregations run in Flux (others fall back to mean)
+HISTORICAL_AGGREGATIONS = ('mean', 'min', 'max')
+
+# Time-series KPI types -> KPI names
+TIMESERIES_KPIS = {
+    'rsrp': 'UE.RSRP',
+    'rsrq': 'UE.RSRQ',
+    'sinr': 'UE.SINR',
+    'throughput_dl': 'DRB.UEThpDl',
+    'throughput_ul': 'DRB.UEThpUl'
+}
+
+
+# KPIs returned by historical queries
+HISTORICAL_KPI_NAMES = list(TIMESERIES_KPIS.values())
+
+# Beams per batch query (the whole beam ID range)
+MAX_BATCH_BEAMS = 64
+
+
+def _flux_regex(values: List[str]) -> str:
+    """Anchored Flux regex literal matching any of the values exactly"""
+    pattern = '|'.join(re.escape(v) for v in values).replace('/', '\\/')
+    return f"/^({pattern})$/"
+
+
+# Flux duration literal accepted as a time-series interval
+INTERVAL_PATTERN = re.compile(r'^[1-9][0-9]*(ms|s|m|h|d|w)$')
+
+# Streamed time-series output
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+STREAM_FORMATS = ('ndjson', 'columnar')
+STREAM_LINES_PER_WRITE = 500
+
+# Bounds of the max_points (downsampling) parameter
+MIN_POINTS = 3
+MAX_POINTS = 10000
+
+# Quality levels, worst first; missing/non-numeric values are 'unknown'
+QUALITY_LEVELS = ('poor', 'fair', 'good', 'excellent')
+QUALITY_LABELS = np.array(QUALITY_LEVELS + ('unknown',), dtype=object)
+
+
+def _epoch(value: datetime) -> float:
+    """Epoch seconds of a datetime (naive = UTC, as for written points)"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _rfc3339(value: datetime) -> str:
+    """Flux time literal of a datetime (naive = UTC)"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.isoformat()
+
 
 class BeamQueryService:
     """Service for querying beam-specific KPI data"""
 
     def __init__(self, redis_client: redis.Redis, influx_client: Optional[InfluxDBClient],
-                 influx_org: str, influx_bucket: str):
+                 influx_org: str, influx_bucket: str, redis_ttl: int = 300,
+                 latest_cache: Optional[LatestKPICache] = None,
+                 query_cache: Optional[QueryResultCache] = None):
         """
         Initialize Beam Query Service
 
@@ -35,8 +128,14 @@ class BeamQueryService:
             influx_client: InfluxDB client for historical data
             influx_org: InfluxDB organization
             influx_bucket: InfluxDB bucket name
+            redis_ttl: TTL of KPIMON real-time records (bounds the UE window)
+            latest_cache: In-process latest values, read before Redis
+            query_cache: Result cache for InfluxDB (historical/time-series) queries
         """
         self.redis = redis_client
+        self.latest_cache = latest_cache
+        self.query_cache = query_cache
+        self.index = BeamIndex(ttl=redis_ttl)
         self.influx = influx_client
         self.influx_org = influx_org
         self.influx_bucket = influx_bucket
@@ -64,42 +163,75 @@ class BeamQueryService:
                 'good': 13,
                 'fair': 8,
                 'poor': 3
+            },
+            'throughput_dl': {
+                'excellent': 100,
+                'good': 50,
+                'fair': 10,
+                'poor': 1
+            },
+            'throughput_ul': {
+                'excellent': 50,
+                'good': 20,
+                'fair': 5,
+                'poor': 1
             }
         }
 
+        # Lower bounds of fair, good and excellent (higher is better for every KPI)
+        self.quality_bounds = {
+            kpi_type: np.array([thresholds[level] for level in QUALITY_LEVELS[1:]], dtype=np.float64)
+            for kpi_type, thresholds in self.quality_thresholds.items()
+        }
+
     def assess_quality(self, kpi_type: str, value: float) -> str:
         """Assess KPI quality based on thresholds"""
-        if kpi_type not in self.quality_thresholds:
+        bounds = self.quality_bounds.get(kpi_type)
+        try:
+            if bounds is None or value != value:
+                return 'unknown'
+            return QUALITY_LEVELS[bisect_right(bounds, value)]
+        except TypeError:
             return 'unknown'
 
-        thresholds = self.quality_thresholds[kpi_type]
+    def _quality_levels(self, kpi_type: str, values) -> np.ndarray:
+        """Indices into QUALITY_LABELS for a series of KPI values"""
+        values = np.asarray(values, dtype=np.float64)
+        bounds = self.quality_bounds.get(kpi_type)
+        if bounds is None:
+            return np.full(values.shape, len(QUALITY_LEVELS), dtype=np.intp)
 
-        if kpi_type == 'rsrp' or kpi_type == 'rsrq':
-            # Lower values are worse
-            if value >= thresholds['excellent']:
-                return 'excellent'
-            elif value >= thresholds['good']:
-                return 'good'
-            elif value >= thresholds['fair']:
-                return 'fair'
-            else:
-                return 'poor'
-        else:
-            # Higher values are better (SINR)
-            if value >= thresholds['excellent']:
-                return 'excellent'
-            elif value >= thresholds['good']:
-                return 'good'
-            elif value >= thresholds['fair']:
-                return 'fair'
-            else:
-                return 'poor'
+        levels = np.searchsorted(bounds, values, side='right')
+        levels[np.isnan(values)] = len(QUALITY_LEVELS)
+        return levels
+
+    def assess_quality_array(self, kpi_type: str, values) -> np.ndarray:
+        """
+        Assess the quality of a whole series of KPI values at once
+
+        Args:
+            kpi_type: KPI type (rsrp, rsrq, sinr, throughput_dl, throughput_ul)
+            values: KPI values (None and NaN are 'unknown')
+
+        Returns:
+            Array of quality labels, one per value
+        """
+        return QUALITY_LABELS[self._quality_levels(kpi_type, values)]
+
+    def quality_histogram(self, kpi_type: str, values) -> Dict[str, int]:
+        """Number of values at each quality level (plus 'unknown')"""
+        counts = np.bincount(self._quality_levels(kpi_type, values), minlength=len(QUALITY_LABELS))
+        return {label: int(count) for label, count in zip(QUALITY_LABELS, counts)}
 
     def get_current_beam_kpi(self, beam_id: int, kpi_types: List[str],
                              cell_id: Optional[str] = None,
                              ue_id: Optional[str] = None) -> Dict[str, Any]:
         """
-        Get current KPI measurements for a beam from Redis
+        Get current KPI measurements for a beam
+
+        Values processed by this KPIMON process come from the in-process
+        latest cache; only (cell, beam) pairs it does not hold are read from
+        Redis (data written by other replicas or before a restart).
 
         Args:
             beam_id: Beam identifier
@@ -111,18 +243,37 @@ class BeamQueryService:
             Dictionary with beam KPI measurements
         """
         try:
-            # Build Redis key pattern
-            if cell_id:
-                pattern = f"kpi:beam:{beam_id}:cell:{cell_id}:*"
-            else:
-                pattern = f"kpi:beam:{beam_id}:*"
+            cache = self.latest_cache
+            beam_label = str(beam_id)
 
-            # Get all matching keys
-            keys = self.redis.keys(pattern)
+            # Resolve cells locally when this process sees every indication,
+            # otherwise from the beam index (no keyspace scan)
+            cells = None
+            if cell_id:
+                cells = [cell_id]
+            elif cache is not None and cache.authoritative:
+                cells = cache.cells(beam_label) or None
+            if cells is None:
+                cells = sorted(self.index.list_cells(self.redis, beam_id))
 
-            if not keys:
+            if not cells:
                 return None
 
+            # (cell, records) in cell order; cached cells carry local entries
+            records = []
+            remote = []
+            for cell in cells:
+                entries = cache.get(cell, beam_label, BEAM_KPI_NAMES) if cache is not None else None
+                if entries is None:
+                    remote.append(cell)
+                records.append((cell, entries))
+
+            values = iter(())
+            if remote:
+                keys = [beam_kpi_key(beam_id, cell, kpi_name)
+                        for cell in remote for kpi_name in BEAM_KPI_NAMES]
+                values = iter(self.redis.mget(keys))
+
             # Organize data
             data = {
                 'signal_quality': {},
@@ -132,83 +283,44 @@ class BeamQueryService:
                 'metadata': {}
             }
 
-            # Fetch and parse KPI data
-            for key in keys:
-                kpi_json = self.redis.get(key)
-                if not kpi_json:
+            # Parse KPI data
+            found = False
+            for cell, entries in records:
+                if entries is not None:
+                    for kpi_name, (kpi_value, timestamp) in entries.items():
+                        found = True
+                        self._add_current_kpi(data, kpi_name, kpi_value, timestamp)
+                        if not data['metadata']:
+                            data['metadata'] = {
+                                'cell_id': cell,
+                                'beam_id': beam_id,
+                                'ue_count': self._get_ue_count(beam_id, cell)
+                            }
                     continue
 
-                kpi_data = json.loads(kpi_json)
-                kpi_name = kpi_data.get('kpi_name')
-                kpi_value = kpi_data.get('kpi_value')
-                timestamp = kpi_data.get('timestamp')
-
-                # Map KPIs to response structure
-                if kpi_name == 'UE.RSRP':
-                    data['signal_quality']['rsrp'] = {
-                        'value': kpi_value,
-                        'unit': 'dBm',
-                        'quality': self.assess_quality('rsrp', kpi_value),
-                        'timestamp': timestamp
-                    }
-                elif kpi_name == 'UE.RSRQ':
-                    data['signal_quality']['rsrq'] = {
-                        'value': kpi_value,
-                        'unit': 'dB',
-                        'quality': self.assess_quality('rsrq', kpi_value),
-                        'timestamp': timestamp
-                    }
-                elif kpi_name == 'UE.SINR':
-                    data['signal_quality']['sinr'] = {
-                        'value': kpi_value,
-                        'unit': 'dB',
-                        'quality': self.assess_quality('sinr', kpi_value),
-                        'timestamp': timestamp
-                    }
-                elif kpi_name == 'DRB.UEThpDl':
-                    data['throughput']['downlink'] = {
-                        'value': kpi_value,
-                        'unit': 'Mbps',
-                        'timestamp': timestamp
-                    }
-                elif kpi_name == 'DRB.UEThpUl':
-                    data['throughput']['uplink'] = {
-                        'value': kpi_value,
-                        'unit': 'Mbps',
-                        'timestamp': timestamp
-                    }
-                elif kpi_name == 'RRU.PrbUsedDl':
-                    data['resource_utilization']['prb_usage_dl'] = {
-                        'value': kpi_value,
-                        'unit': 'percentage',
-                        'timestamp': timestamp
-                    }
-                elif kpi_name == 'RRU.PrbUsedUl':
-                    data['resource_utilization']['prb_usage_ul'] = {
-                        'value': kpi_value,
-                        'unit': 'percentage',
-                        'timestamp': timestamp
-                    }
-                elif kpi_name == 'DRB.PacketLossDl':
-                    data['packet_loss']['downlink'] = {
-                        'value': kpi_value,
-                        'unit': 'percentage',
-                        'timestamp': timestamp
-                    }
-                elif kpi_name == 'DRB.PacketLossUl':
-                    data['packet_loss']['uplink'] = {
-                        'value': kpi_value,
-                        'unit': 'percentage',
-                        'timestamp': timestamp
-                    }
-
-                # Add metadata
-                if 'metadata' not in data or not data['metadata']:
-                    data['metadata'] = {
-                        'cell_id': kpi_data.get('cell_id'),
-                        'beam_id': beam_id,
-                        'ue_count': self._get_ue_count(beam_id, kpi_data.get('cell_id'))
-                    }
+                for _ in BEAM_KPI_NAMES:
+                    kpi_json = next(values)
+                    if not kpi_json:
+                        continue
+
+                    found = True
+                    kpi_data = json.loads(kpi_json)
+                    kpi_name = kpi_data.get('kpi_name')
+                    kpi_value = kpi_data.get('kpi_value')
+
+                    # Map KPIs to response structure
+                    self._add_current_kpi(data, kpi_name, kpi_value, kpi_data.get('timestamp'))
+
+                    # Add metadata
+                    if not data['metadata']:
+                        data['metadata'] = {
+                            'cell_id': kpi_data.get('cell_id'),
+                            'beam_id': beam_id,
+                            'ue_count': self._get_ue_count(beam_id, kpi_data.get('cell_id'))
+                        }
+
+            if not found:
+                return None
 
             # Remove empty categories
             data = {k: v for k, v in data.items() if v}
@@ -219,6 +331,22 @@ class BeamQueryService:
             logger.error(f"Error getting current beam KPI: {e}")
             raise
 
+    def _add_current_kpi(self, data: Dict[str, Any], kpi_name: str, kpi_value, timestamp):
+        """Place a current KPI value into the response structure"""
+        field = CURRENT_KPI_FIELDS.get(kpi_name)
+        if not field:
+            return
+
+        category, name, unit, quality_type = field
+        entry = {
+            'value': kpi_value,
+            'unit': unit
+        }
+        if quality_type:
+            entry['quality'] = self.assess_quality(quality_type, kpi_value)
+        entry['timestamp'] = timestamp
+        data[category][name] = entry
+
     def get_historical_beam_kpi(self, beam_id: int, kpi_types: List[str],
                                 time_range: str, aggregation: str) -> Dict[str, Any]:
         """
@@ -236,16 +364,24 @@ class BeamQueryService:
         if not self.query_api:
             raise Exception("InfluxDB not available")
 
+        # Normalize to what the Flux query depends on, so equivalent requests
+        # share a cache entry (the query always reads the same KPI set)
+        duration = HISTORICAL_DURATIONS.get(time_range, '15m')
+        if aggregation != 'raw' and aggregation not in HISTORICAL_AGGREGATIONS:
+            aggregation = 'mean'
+
+        if self.query_cache is None:
+            return self._query_historical_beam_kpi(beam_id, duration, aggregation)
+        return self.query_cache.get_or_load(
+            ('historical', beam_id, duration, aggregation),
+            lambda: self._query_historical_beam_kpi(beam_id, duration, aggregation),
+            beam=str(beam_id)
+        )
+
+    def _query_historical_beam_kpi(self, beam_id: int, duration: str,
+                                   aggregation: str) -> Dict[str, Any]:
+        """Run the historical Flux query (duration and aggregation normalized)"""
         try:
-            # Map time range to InfluxDB duration
-            time_map = {
-                'last_5m': '5m',
-                'last_15m': '15m',
-                'last_1h': '1h',
-                'last_24h': '24h'
-            }
-            duration = time_map.get(time_range, '15m')
-
             # Build Flux query
             if aggregation == 'raw':
                 query = f'''
@@ -258,7 +394,6 @@ class BeamQueryService:
                 '''
             else:
                 # Aggregation query
-                agg_func = aggregation if aggregation in ['mean', 'min', 'max'] else 'mean'
                 query = f'''
                 from(bucket: "{self.influx_bucket}")
                   |> range(start: -{duration})
@@ -266,8 +401,8 @@ class BeamQueryService:
                   |> filter(fn: (r) => r.beam_id == "{beam_id}")
                   |> filter(fn: (r) => r.kpi_name =~ /UE.RSRP|UE.RSRQ|UE.SINR|DRB.UEThpDl|DRB.UEThpUl/)
                   |> group(columns: ["kpi_name"])
-                  |> {agg_func}()
-                  |> yield(name: "{agg_func}")
+                  |> {aggregation}()
+                  |> yield(name: "{aggregation}")
                 '''
 
             # Execute query
@@ -278,39 +413,9 @@ class BeamQueryService:
                 'signal_quality': {},
                 'throughput': {}
             }
-
             for table in tables:
                 for record in table.records:
-                    kpi_name = record.values.get('kpi_name')
-                    value = record.values.get('_value')
-
-                    measurement = {
-                        'value': value,
-                        'timestamp': record.values.get('_time').isoformat()
-                    }
-
-                    if aggregation != 'raw':
-                        measurement['sample_count'] = len(table.records)
-
-                    # Map to response structure
-                    if kpi_name == 'UE.RSRP':
-                        measurement['unit'] = 'dBm'
-                        measurement['quality'] = self.assess_quality('rsrp', value)
-                        data['signal_quality']['rsrp'] = measurement
-                    elif kpi_name == 'UE.RSRQ':
-                        measurement['unit'] = 'dB'
-                        measurement['quality'] = self.assess_quality('rsrq', value)
-                        data['signal_quality']['rsrq'] = measurement
-                    elif kpi_name == 'UE.SINR':
-                        measurement['unit'] = 'dB'
-                        measurement['quality'] = self.assess_quality('sinr', value)
-                        data['signal_quality']['sinr'] = measurement
-                    elif kpi_name == 'DRB.UEThpDl':
-                        measurement['unit'] = 'Mbps'
-                        data['throughput']['downlink'] = measurement
-                    elif kpi_name == 'DRB.UEThpUl':
-                        measurement['unit'] = 'Mbps'
-                        data['throughput']['uplink'] = measurement
+                    self._add_historical_kpi(data, record, aggregation, len(table.records))
 
             return data
 
@@ -318,10 +423,131 @@ class BeamQueryService:
             logger.error(f"Error getting historical beam KPI: {e}")
             raise
 
+    def _add_historical_kpi(self, data: Dict[str, Dict], record, aggregation: str,
+                            sample_count: int):
+        """Place one historical Flux record into the response layout"""
+        kpi_name = record.values.get('kpi_name')
+        layout = CURRENT_KPI_FIELDS.get(kpi_name)
+        if layout is None or layout[0] not in data:
+            return
+        category, name, unit, quality_type = layout
+        value = record.values.get('_value')
+
+        # Aggregates carry the window stop instead of a point time
+        point_time = record.values.get('_time') or record.values.get('_stop')
+        measurement = {
+            'value': value,
+            'timestamp': point_time.isoformat() if point_time else None
+        }
+        if aggregation != 'raw':
+            measurement['sample_count'] = sample_count
+        measurement['unit'] = unit
+        if quality_type:
+            measurement['quality'] = self.assess_quality(quality_type, value)
+        data[category][name] = measurement
+
+    def get_historical_beams_kpi(self, beam_ids: Optional[List[int]], kpi_types: List[str],
+                                 cell_ids: Optional[List[str]] = None,
+                                 time_range: str = 'last_15m',
+                                 aggregation: str = 'mean') -> Dict[int, Dict[str, Any]]:
+        """
+        Get historical KPI measurements for several beams with one Flux query
+
+        Series are grouped by (beam_id, kpi_name) and aggregated across the
+        selected cells, so a cell's beam heatmap is one query instead of one
+        per beam.
+
+        Args:
+            beam_ids: Beam identifiers (None for every beam)
+            kpi_types: KPI types (rsrp, rsrq, sinr, throughput_dl, throughput_ul) or ['all']
+            cell_ids: Optional cell ID filter
+            time_range: Time range (last_5m, last_15m, last_1h, last_24h)
+            aggregation: Aggregation method (raw, mean, min, max)
+
+        Returns:
+            Beam ID -> measurements in the single-beam historical layout
+            (beams without data are absent)
+        """
+        if not self.query_api:
+            raise Exception("InfluxDB not available")
+
+        if not kpi_types or 'all' in kpi_types:
+            kpi_names = HISTORICAL_KPI_NAMES
+        else:
+            unknown = [k for k in kpi_types if k not in TIMESERIES_KPIS]
+            if unknown:
+                raise ValueError(f"Unknown KPI type: {', '.join(unknown)}")
+            kpi_names = sorted({TIMESERIES_KPIS[k] for k in kpi_types})
+
+        duration = HISTORICAL_DURATIONS.get(time_range, '15m')
+        if aggregation != 'raw' and aggregation not in HISTORICAL_AGGREGATIONS:
+            aggregation = 'mean'
+        beams = tuple(sorted(set(beam_ids))) if beam_ids else None
+        cells = tuple(sorted(set(cell_ids))) if cell_ids else None
+
+        if self.query_cache is None:
+            return self._query_historical_beams_kpi(beams, kpi_names, cells, duration, aggregation)
+        return self.query_cache.get_or_load(
+            ('historical_batch', beams, tuple(kpi_names), cells, duration, aggregation),
+            lambda: self._query_historical_beams_kpi(beams, kpi_names, cells, duration, aggregation)
+        )
+
+    def _query_historical_beams_kpi(self, beam_ids: Optional[tuple], kpi_names: List[str],
+                                    cell_ids: Optional[tuple], duration: str,
+                                    aggregation: str) -> Dict[int, Dict[str, Any]]:
+        """Run the grouped multi-beam Flux query"""
+        try:
+            filters = [f"r.kpi_name =~ {_flux_regex(kpi_names)}"]
+            if beam_ids:
+                filters.append(f"r.beam_id =~ {_flux_regex([str(b) for b in beam_ids])}")
+            if cell_ids:
+                filters.append(f"r.cell_id =~ {_flux_regex(list(cell_ids))}")
+            filter_lines = ''.join(f'''
+                  |> filter(fn: (r) => {f})''' for f in filters)
+            aggregate = '' if aggregation == 'raw' else f'''
+                  |> {aggregation}()'''
+
+            query = f'''
+                from(bucket: "{self.influx_bucket}")
+                  |> range(start: -{duration})
+                  |> filter(fn: (r) => r._measurement == "kpi_measurement"){filter_lines}
+                  |> group(columns: ["beam_id", "kpi_name"]){aggregate}
+                  |> yield(name: "{aggregation}")
+                '''
+
+            # Execute query
+            tables = self.query_api.query(query, org=self.influx_org)
+
+            # One table per (beam, KPI)
+            beams: Dict[int, Dict[str, Any]] = {}
+            for table in tables:
+                for record in table.records:
+                    try:
+                        beam_id = int(record.values.get('beam_id'))
+                    except (TypeError, ValueError):
+                        continue
+                    data = beams.get(beam_id)
+                    if data is None:
+                        data = beams[beam_id] = {'signal_quality': {}, 'throughput': {}}
+                    self._add_historical_kpi(data, record, aggregation, len(table.records))
+
+            return beams
+
+        except Exception as e:
+            logger.error(f"Error getting historical multi-beam KPI: {e}")
+            raise
+
+    def timeseries_interval(self, start_time: Optional[datetime], end_time: Optional[datetime],
+                            max_points: int) -> str:
+        """Aggregation window giving the downsampler a few windows per kept point"""
+        start_time, end_time = self._timeseries_range(start_time, end_time)
+        return auto_interval((end_time - start_time).total_seconds(), max_points)
+
     def get_timeseries_data(self, beam_id: int, kpi_type: str,
                             start_time: Optional[datetime] = None,
                             end_time: Optional[datetime] = None,
-                            interval: str = '5s') -> List[Dict[str, Any]]:
+                            interval: str = '5s', max_points: Optional[int] = None,
+                            method: str = 'lttb') -> List[Dict[str, Any]]:
         """
         Get time-series KPI data for a beam
 
@@ -331,57 +557,210 @@ class BeamQueryService:
             start_time: Start timestamp
             end_time: End timestamp
             interval: Data point interval
+            max_points: Downsample to at most this many points (None: all windows)
+            method: Downsampling method (lttb, minmax)
 
         Returns:
             List of time-series data points
         """
-        if not self.query_api:
-            raise Exception("InfluxDB not available")
+        kpi_name = self._timeseries_kpi(kpi_type, interval, max_points, method)
+
+        def load():
+            return self._query_timeseries_data(beam_id, kpi_type, kpi_name, start_time, end_time,
+                                               interval, max_points, method)
+
+        if self.query_cache is None:
+            return load()
+
+        # A window with both ends in the past is closed (cached until late
+        # data for the beam is written); anything relative to now is open
+        window_end = None
+        if start_time and end_time and _epoch(end_time) <= time.time():
+            window_end = _epoch(end_time)
+        return self.query_cache.get_or_load(
+            ('timeseries', beam_id, kpi_name,
+             _epoch(start_time) if start_time else None,
+             _epoch(end_time) if end_time else None, interval,
+             max_points, method if max_points else None),
+            load,
+            beam=str(beam_id),
+            window_end=window_end
+        )
+
+    def stream_timeseries_data(self, beam_id: int, kpi_type: str,
+                               start_time: Optional[datetime] = None,
+                               end_time: Optional[datetime] = None,
+                               interval: str = '5s', max_points: Optional[int] = None,
+                               method: str = 'lttb') -> Iterator[Tuple[datetime, Any]]:
+        """
+        Stream time-series KPI data for a beam, oldest first
 
+        The query is sent immediately (so connection and parameter errors
+        raise here); rows are parsed from the response as they are consumed,
+        never holding the whole result, unless max_points asks for
+        downsampling (which needs the whole series). Not cached.
+
+        Args:
+            beam_id: Beam identifier
+            kpi_type: KPI type (rsrp, rsrq, sinr, throughput_dl, throughput_ul)
+            start_time: Start timestamp
+            end_time: End timestamp
+            interval: Data point interval
+            max_points: Downsample to at most this many points (None: all windows)
+            method: Downsampling method (lttb, minmax)
+
+        Returns:
+            Iterator of (time, value) in time order
+        """
+        kpi_name = self._timeseries_kpi(kpi_type, interval, max_points, method)
         try:
-            # Map KPI type to InfluxDB field
-            kpi_map = {
-                'rsrp': 'UE.RSRP',
-                'rsrq': 'UE.RSRQ',
-                'sinr': 'UE.SINR',
-                'throughput_dl': 'DRB.UEThpDl',
-                'throughput_ul': 'DRB.UEThpUl'
-            }
-            kpi_name = kpi_map.get(kpi_type)
-            if not kpi_name:
-                raise ValueError(f"Unknown KPI type: {kpi_type}")
+            records = self.query_api.query_stream(
+                self._timeseries_query(beam_id, kpi_name, start_time, end_time, interval),
+                org=self.influx_org
+            )
+        except Exception as e:
+            logger.error(f"Error streaming timeseries data: {e}")
+            raise
+        points = ((record.values.get('_time'), record.values.get('_value')) for record in records)
+        if max_points:
+            return iter(self._downsample_points(points, max_points, method))
+        return points
+
+    def get_quality_histogram(self, beam_id: int, kpi_type: str,
+                              start_time: Optional[datetime] = None,
+                              end_time: Optional[datetime] = None,
+                              interval: str = '5s') -> Dict[str, int]:
+        """
+        Count a beam's aggregation windows per quality level over a time range
 
-            # Default time range: last 1 hour
-            if not start_time:
-                start_time = datetime.now() - timedelta(hours=1)
-            if not end_time:
-                end_time = datetime.now()
+        Args:
+            beam_id: Beam identifier
+            kpi_type: KPI type (rsrp, rsrq, sinr, throughput_dl, throughput_ul)
+            start_time: Start timestamp
+            end_time: End timestamp
+            interval: Aggregation window
 
-            # Build Flux query
-            query = f'''
+        Returns:
+            Window count per quality level (poor, fair, good, excellent, unknown)
+        """
+        kpi_name = self._timeseries_kpi(kpi_type, interval)
+
+        def load():
+            try:
+                records = self.query_api.query_stream(
+                    self._timeseries_query(beam_id, kpi_name, start_time, end_time, interval),
+                    org=self.influx_org
+                )
+                values = np.fromiter((np.nan if v is None else v
+                                      for v in (record.values.get('_value') for record in records)),
+                                     dtype=np.float64)
+                return self.quality_histogram(kpi_type, values)
+            except Exception as e:
+                logger.error(f"Error getting quality histogram: {e}")
+                raise
+
+        if self.query_cache is None:
+            return load()
+
+        window_end = None
+        if start_time and end_time and _epoch(end_time) <= time.time():
+            window_end = _epoch(end_time)
+        return self.query_cache.get_or_load(
+            ('quality_histogram', beam_id, kpi_name,
+             _epoch(start_time) if start_time else None,
+             _epoch(end_time) if end_time else None, interval),
+            load,
+            beam=str(beam_id),
+            window_end=window_end
+        )
+
+    def _timeseries_kpi(self, kpi_type: str, interval: str, max_points: Optional[int] = None,
+                        method: str = 'lttb') -> str:
+        """Validate time-series parameters, returning the KPI name"""
+        if not self.query_api:
+            raise Exception("InfluxDB not available")
+        kpi_name = TIMESERIES_KPIS.get(kpi_type)
+        if not kpi_name:
+            raise ValueError(f"Unknown KPI type: {kpi_type}")
+        if not INTERVAL_PATTERN.match(interval):
+            raise ValueError(f"Invalid interval: {interval}")
+        if max_points is not None and not MIN_POINTS <= max_points <= MAX_POINTS:
+            raise ValueError(f"max_points must be between {MIN_POINTS} and {MAX_POINTS}")
+        if method not in DOWNSAMPLE_METHODS:
+            raise ValueError(f"Unknown downsampling method: {method}")
+        return kpi_name
+
+    @staticmethod
+    def _timeseries_range(start_time: Optional[datetime],
+                          end_time: Optional[datetime]) -> Tuple[datetime, datetime]:
+        """Time-series range with defaults (last hour, ending now)"""
+        if not end_time:
+            end_time = datetime.now(timezone.utc)
+        elif end_time.tzinfo is None:
+            end_time = end_time.replace(tzinfo=timezone.utc)
+        if not start_time:
+            start_time = end_time - timedelta(hours=1)
+        elif start_time.tzinfo is None:
+            start_time = start_time.replace(tzinfo=timezone.utc)
+        return start_time, end_time
+
+    @staticmethod
+    def _downsample_points(points: Iterator[Tuple[datetime, Any]], max_points: int,
+                           method: str) -> List[Tuple[datetime, Any]]:
+        """Visually faithful subset of a time-ordered series (NumPy, before serialization)"""
+        times, values = [], []
+        for point_time, value in points:
+            times.append(point_time)
+            values.append(value)
+        if len(values) <= max_points:
+            return list(zip(times, values))
+
+        x = np.fromiter((t.timestamp() for t in times), dtype=np.float64, count=len(times))
+        y = np.array(values, dtype=np.float64)
+        return [(times[i], values[i]) for i in downsample(x, y, max_points, method)]
+
+    def _timeseries_query(self, beam_id: int, kpi_name: str, start_time: Optional[datetime],
+                          end_time: Optional[datetime], interval: str) -> str:
+        """Flux query of one beam's KPI series, merged across cells/UEs and time-ordered"""
+        start_time, end_time = self._timeseries_range(start_time, end_time)
+
+        # InfluxDB merges the per-cell/UE series and sorts, so rows arrive in
+        # time order and can be streamed without sorting here
+        return f'''
             from(bucket: "{self.influx_bucket}")
-              |> range(start: {start_time.isoformat()}, stop: {end_time.isoformat()})
+              |> range(start: {_rfc3339(start_time)}, stop: {_rfc3339(end_time)})
               |> filter(fn: (r) => r._measurement == "kpi_measurement")
               |> filter(fn: (r) => r.beam_id == "{beam_id}")
               |> filter(fn: (r) => r.kpi_name == "{kpi_name}")
               |> aggregateWindow(every: {interval}, fn: mean, createEmpty: false)
+              |> group()
+              |> sort(columns: ["_time"])
+              |> keep(columns: ["_time", "_value"])
               |> yield(name: "timeseries")
             '''
 
-            # Execute query
-            tables = self.query_api.query(query, org=self.influx_org)
-
-            # Parse results
-            datapoints = []
-            for table in tables:
-                for record in table.records:
-                    datapoints.append({
-                        'timestamp': record.values.get('_time').isoformat(),
-                        'value': record.values.get('_value'),
-                        'quality': self.assess_quality(kpi_type, record.values.get('_value'))
-                    })
+    def _query_timeseries_data(self, beam_id: int, kpi_type: str, kpi_name: str,
+                               start_time: Optional[datetime], end_time: Optional[datetime],
+                               interval: str, max_points: Optional[int] = None,
+                               method: str = 'lttb') -> List[Dict[str, Any]]:
+        """Run the time-series Flux query"""
+        try:
+            records = self.query_api.query_stream(
+                self._timeseries_query(beam_id, kpi_name, start_time, end_time, interval),
+                org=self.influx_org
+            )
+            points = ((record.values.get('_time'), record.values.get('_value')) for record in records)
+            if max_points:
+                points = self._downsample_points(points, max_points, method)
+            else:
+                points = list(points)
 
-            return sorted(datapoints, key=lambda x: x['timestamp'])
+            qualities = self.assess_quality_array(kpi_type, [value for _, value in points])
+            return [{
+                'timestamp': point_time.isoformat(),
+                'value': value,
+                'quality': quality
+            } for (point_time, value), quality in zip(points, qualities)]
 
         except Exception as e:
             logger.error(f"Error getting timeseries data: {e}")
@@ -392,40 +771,46 @@ class BeamQueryService:
         """
         List all active beams with basic statistics
 
+        All (beam, cell) pairs are summarized from one batched Redis round
+        (MGET + ZCOUNT pipeline) after resolving the pairs from the index.
+
         Args:
             cell_id: Optional cell ID filter
             min_rsrp: Optional minimum RSRP filter
 
         Returns:
-            List of active beams with summary statistics
+            List of active beams (one entry per beam and cell) with summary statistics
         """
         try:
-            # Get all beam keys from Redis
-            if cell_id:
-                pattern = f"kpi:beam:*:cell:{cell_id}:*"
-            else:
-                pattern = "kpi:beam:*"
-
-            keys = self.redis.keys(pattern)
+            # Resolve (beam, cell) pairs from the beam index
+            pairs = self.index.list_beam_cells(self.redis, cell_id)
+            if not pairs:
+                return []
+
+            # Fetch all records and UE counts in one pipeline
+            now = time.time()
+            kpi_count = len(BEAM_KPI_NAMES)
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.mget([beam_kpi_key(beam_id, cell, kpi_name)
+                       for beam_id, cell in pairs for kpi_name in BEAM_KPI_NAMES])
+            for beam_id, cell in pairs:
+                pipe.zcount(beam_ues_key(beam_id, cell), now - self.index.ttl, '+inf')
+            results = pipe.execute()
+            values, ue_counts = results[0], results[1:]
 
-            # Extract unique beam IDs
-            beam_ids = set()
-            for key in keys:
-                parts = key.split(':')
-                if len(parts) >= 3:
-                    beam_ids.add(int(parts[2]))
-
-            # Get summary for each beam
             beams = []
-            for beam_id in sorted(beam_ids):
-                beam_data = self.get_current_beam_kpi(beam_id, ['all'])
-                if not beam_data:
+            for i, (beam_id, cell) in enumerate(pairs):
+                records = values[i * kpi_count:(i + 1) * kpi_count]
+                latest = {}
+                for kpi_name, kpi_json in zip(BEAM_KPI_NAMES, records):
+                    if kpi_json:
+                        latest[kpi_name] = json.loads(kpi_json).get('kpi_value')
+
+                # Beam has no live records (index entry outlived the data)
+                if not latest:
                     continue
 
-                # Extract RSRP if available
-                rsrp = None
-                if 'signal_quality' in beam_data and 'rsrp' in beam_data['signal_quality']:
-                    rsrp = beam_data['signal_quality']['rsrp']['value']
+                rsrp = latest.get('UE.RSRP')
 
                 # Apply RSRP filter
                 if min_rsrp is not None and (rsrp is None or rsrp < min_rsrp):
@@ -434,26 +819,20 @@ class BeamQueryService:
                 # Build summary
                 summary = {
                     'beam_id': beam_id,
-                    'cell_id': beam_data.get('metadata', {}).get('cell_id'),
+                    'cell_id': cell,
                     'status': 'active',
                     'last_update': datetime.now().isoformat(),
                     'summary': {}
                 }
 
-                # Add RSRP
-                if rsrp is not None:
-                    summary['summary']['rsrp_avg'] = rsrp
-
-                # Add RSRQ
-                if 'signal_quality' in beam_data and 'rsrq' in beam_data['signal_quality']:
-                    summary['summary']['rsrq_avg'] = beam_data['signal_quality']['rsrq']['value']
-
-                # Add SINR
-                if 'signal_quality' in beam_data and 'sinr' in beam_data['signal_quality']:
-                    summary['summary']['sinr_avg'] = beam_data['signal_quality']['sinr']['value']
+                for kpi_name, field in (('UE.RSRP', 'rsrp_avg'),
+                                        ('UE.RSRQ', 'rsrq_avg'),
+                                        ('UE.SINR', 'sinr_avg')):
+                    if latest.get(kpi_name) is not None:
+                        summary['summary'][field] = latest[kpi_name]
 
                 # Add UE count
-                summary['summary']['ue_count'] = beam_data.get('metadata', {}).get('ue_count', 0)
+                summary['summary']['ue_count'] = int(ue_counts[i] or 0)
 
                 beams.append(summary)
 
@@ -465,27 +844,83 @@ class BeamQueryService:
 
     def _get_ue_count(self, beam_id: int, cell_id: str) -> int:
         """Get number of UEs served by this beam"""
+        if self.latest_cache is not None:
+            count = self.latest_cache.ue_count(str(cell_id), str(beam_id))
+            if count is not None:
+                return count
         try:
-            # This is a simplified implementation
-            # In a real system, this would query actual UE association data
-            pattern = f"ue:beam:{beam_id}:cell:{cell_id}:*"
-            return len(self.redis.keys(pattern))
-        except:
+            return self.index.ue_count(self.redis, beam_id, cell_id)
+        except Exception:
             return 0
 
 
 # Global service instance (initialized by KPIMON xApp)
 beam_service: Optional[BeamQueryService] = None
 
+# Live KPI stream (None when disabled or sharded: workers see the indications)
+stream_broker: Optional[KPIStreamBroker] = None
+
 
 def init_beam_service(redis_client: redis.Redis, influx_client: Optional[InfluxDBClient],
-                      influx_org: str, influx_bucket: str):
-    """Initialize the beam query service"""
-    global beam_service
-    beam_service = BeamQueryService(redis_client, influx_client, influx_org, influx_bucket)
+                      influx_org: str, influx_bucket: str, redis_ttl: int = 300,
+                      latest_cache: Optional[LatestKPICache] = None,
+                      stream: Optional[KPIStreamBroker] = None,
+                      query_cache: Optional[QueryResultCache] = None):
+    """Initialize the beam query service (and the live KPI stream, if enabled)"""
+    global beam_service, stream_broker
+    beam_service = BeamQueryService(redis_client, influx_client, influx_org, influx_bucket,
+                                    redis_ttl=redis_ttl, latest_cache=latest_cache,
+                                    query_cache=query_cache)
+    stream_broker = stream
     logger.info("Beam Query Service initialized")
 
 
+def _timeseries_lines(points: Iterator[Tuple[datetime, Any]], kpi_type: str,
+                      columnar: bool, chunk_size: int) -> Iterator[str]:
+    """
+    NDJSON body of a streamed time series
+
+    One {"timestamp", "value", "quality"} object per line, or with columnar
+    one object of parallel arrays per chunk_size points. A query failing
+    mid-stream ends the body with an {"error": ...} line.
+    """
+    assess = beam_service.assess_quality_array
+
+    def point_lines(batch):
+        qualities = assess(kpi_type, [value for _, value in batch])
+        return [json.dumps({
+            'timestamp': point_time.isoformat(),
+            'value': value,
+            'quality': quality
+        }) for (point_time, value), quality in zip(batch, qualities)]
+
+    chunk = []
+    try:
+        if columnar:
+            for block in iter(lambda: list(islice(points, chunk_size)), []):
+                values = [value for _, value in block]
+                yield json.dumps({
+                    'timestamp': [point_time.isoformat() for point_time, _ in block],
+                    'value': values,
+                    'quality': assess(kpi_type, values).tolist()
+                }) + '\n'
+            return
+
+        # Quality is assessed per write batch of points
+        for point in points:
+            chunk.append(point)
+            if len(chunk) >= STREAM_LINES_PER_WRITE:
+                batch, chunk = chunk, []
+                yield '\n'.join(point_lines(batch)) + '\n'
+        batch, chunk = chunk, []
+        if batch:
+            yield '\n'.join(point_lines(batch)) + '\n'
+    except Exception as e:
+        logger.error(f"Error streaming timeseries data: {e}")
+        # Points already parsed go out before the error
+        yield '\n'.join(point_lines(chunk) + [json.dumps({'error': str(e)})]) + '\n'
+
+
 # Flask API Routes
 
 @beam_api.route('/beam/<int:beam_id>/kpi', methods=['GET'])
@@ -567,6 +1002,93 @@ def get_beam_kpi(beam_id: int):
         }), 500
 
 
+@beam_api.route('/beam/kpi/batch', methods=['GET'])
+def get_beams_kpi_batch():
+    """
+    Get historical KPI measurements for several beams in one request
+
+    Answered with a single Flux query grouped by (beam_id, kpi_name), e.g. a
+    cell's beam heatmap. Current values of all beams are served by /beam/list.
+
+    Query Parameters:
+        - beam_id: Comma-separated beam IDs (default: all beams)
+        - cell_id: Comma-separated cell IDs (default: all cells)
+        - kpi_type: Comma-separated KPI types (default: all)
+        - time_range: Time range (default: last_15m)
+        - aggregation: Aggregation method (default: mean)
+    """
+    try:
+        beam_arg = request.args.get('beam_id')
+        try:
+            beam_ids = [int(b) for b in beam_arg.split(',')] if beam_arg else None
+        except ValueError:
+            beam_ids = [0]
+        if beam_ids is not None and (len(beam_ids) > MAX_BATCH_BEAMS
+                                     or not all(1 <= b <= 64 for b in beam_ids)):
+            return jsonify({
+                'status': 'error',
+                'error_code': 'INVALID_PARAMETER',
+                'message': 'beam_id must be a comma-separated list of integers between 1 and 64',
+                'timestamp': datetime.now().isoformat()
+            }), 400
+
+        time_range = request.args.get('time_range', 'last_15m')
+        if time_range == 'current':
+            return jsonify({
+                'status': 'error',
+                'error_code': 'INVALID_PARAMETER',
+                'message': 'time_range=current is not supported for batch queries, use /api/beam/list',
+                'timestamp': datetime.now().isoformat()
+            }), 400
+
+        kpi_type = request.args.get('kpi_type', 'all')
+        cell_arg = request.args.get('cell_id')
+        aggregation = request.args.get('aggregation', 'mean')
+        try:
+            beams = beam_service.get_historical_beams_kpi(
+                beam_ids,
+                kpi_type.split(','),
+                cell_ids=cell_arg.split(',') if cell_arg else None,
+                time_range=time_range,
+                aggregation=aggregation
+            )
+        except ValueError as e:
+            return jsonify({
+                'status': 'error',
+                'error_code': 'INVALID_PARAMETER',
+                'message': str(e),
+                'timestamp': datetime.now().isoformat()
+            }), 400
+
+        response = {
+            'status': 'success',
+            'timestamp': datetime.now().isoformat(),
+            'query_params': {
+                'beam_id': beam_arg or 'all',
+                'cell_id': cell_arg or 'all',
+                'kpi_type': kpi_type,
+                'time_range': time_range,
+                'aggregation': aggregation
+            },
+            'beams': [{'beam_id': beam_id, 'data': beams[beam_id]} for beam_id in sorted(beams)],
+            'count': len(beams),
+            'source': 'influxdb'
+        }
+        if beam_ids:
+            response['missing'] = sorted(set(beam_ids) - set(beams))
+
+        return jsonify(response), 200
+
+    except Exception as e:
+        logger.error(f"Error in get_beams_kpi_batch: {e}")
+        return jsonify({
+            'status': 'error',
+            'error_code': 'INTERNAL_ERROR',
+            'message': str(e),
+            'timestamp': datetime.now().isoformat()
+        }), 500
+
+
 @beam_api.route('/beam/<int:beam_id>/kpi/timeseries', methods=['GET'])
 def get_beam_kpi_timeseries(beam_id: int):
     """
@@ -576,7 +1098,15 @@ def get_beam_kpi_timeseries(beam_id: int):
         - kpi_type: KPI type (required)
         - start_time: Start timestamp (optional)
         - end_time: End timestamp (optional)
-        - interval: Data point interval (default: 5s)
+        - interval: Data point interval (default: 5s, or chosen from the range
+          with max_points)
+        - max_points: Downsample to at most this many points (optional)
+        - downsample: Downsampling method, lttb (default) or minmax
+        - format: json (default), ndjson (streamed, one point per line) or
+          columnar (streamed, parallel arrays per chunk)
+        - chunk_size: Points per columnar line (default: 1000)
+        - summary: quality returns the number of aggregation windows per
+          quality level instead of the datapoints
     """
     try:
         # Validate beam_id
@@ -600,14 +1130,74 @@ def get_beam_kpi_timeseries(beam_id: int):
 
         start_time_str = request.args.get('start_time')
         end_time_str = request.args.get('end_time')
-        interval = request.args.get('interval', '5s')
-
-        # Parse timestamps
-        start_time = datetime.fromisoformat(start_time_str.replace('Z', '+00:00')) if start_time_str else None
-        end_time = datetime.fromisoformat(end_time_str.replace('Z', '+00:00')) if end_time_str else None
+        interval = request.args.get('interval')
+        method = request.args.get('downsample', 'lttb')
+        summary = request.args.get('summary')
+        if summary is not None and summary != 'quality':
+            return jsonify({
+                'status': 'error',
+                'error_code': 'INVALID_PARAMETER',
+                'message': 'summary must be quality',
+                'timestamp': datetime.now().isoformat()
+            }), 400
+        output_format = request.args.get('format', 'json')
+        if output_format != 'json' and output_format not in STREAM_FORMATS:
+            return jsonify({
+                'status': 'error',
+                'error_code': 'INVALID_PARAMETER',
+                'message': f"format must be one of json, {', '.join(STREAM_FORMATS)}",
+                'timestamp': datetime.now().isoformat()
+            }), 400
 
-        # Query timeseries data
-        datapoints = beam_service.get_timeseries_data(beam_id, kpi_type, start_time, end_time, interval)
+        try:
+            # Parse timestamps
+            start_time = datetime.fromisoformat(start_time_str.replace('Z', '+00:00')) if start_time_str else None
+            end_time = datetime.fromisoformat(end_time_str.replace('Z', '+00:00')) if end_time_str else None
+
+            # Downsampling: let InfluxDB aggregate to a few windows per kept point
+            max_points_str = request.args.get('max_points')
+            max_points = int(max_points_str) if max_points_str else None
+            if not interval:
+                interval = beam_service.timeseries_interval(start_time, end_time, max_points) \
+                    if max_points else '5s'
+
+            # Quality histogram over every window of the range (never downsampled)
+            if summary:
+                histogram = beam_service.get_quality_histogram(beam_id, kpi_type, start_time,
+                                                               end_time, interval)
+                return jsonify({
+                    'status': 'success',
+                    'beam_id': beam_id,
+                    'kpi_type': kpi_type,
+                    'start_time': start_time.isoformat() if start_time else None,
+                    'end_time': end_time.isoformat() if end_time else None,
+                    'interval': interval,
+                    'summary': summary,
+                    'quality': histogram,
+                    'count': sum(histogram.values())
+                }), 200
+
+            # Large ranges: stream rows from InfluxDB straight into the response
+            if output_format in STREAM_FORMATS:
+                points = beam_service.stream_timeseries_data(beam_id, kpi_type, start_time, end_time,
+                                                             interval, max_points, method)
+                chunk_size = min(max(request.args.get('chunk_size', 1000, type=int), 1), 10000)
+                return Response(
+                    _timeseries_lines(points, kpi_type, output_format == 'columnar', chunk_size),
+                    mimetype=NDJSON_CONTENT_TYPE,
+                    headers={'X-Accel-Buffering': 'no'}
+                )
+
+            # Query timeseries data
+            datapoints = beam_service.get_timeseries_data(beam_id, kpi_type, start_time, end_time,
+                                                          interval, max_points, method)
+        except ValueError as e:
+            return jsonify({
+                'status': 'error',
+                'error_code': 'INVALID_PARAMETER',
+                'message': str(e),
+                'timestamp': datetime.now().isoformat()
+            }), 400
 
         # Build response
         response = {
@@ -620,6 +1210,9 @@ def get_beam_kpi_timeseries(beam_id: int):
             'datapoints': datapoints,
             'count': len(datapoints)
         }
+        if max_points:
+            response['max_points'] = max_points
+            response['downsample'] = method
 
         return jsonify(response), 200
 
@@ -633,6 +1226,65 @@ def get_beam_kpi_timeseries(beam_id: int):
         }), 500
 
 
+@beam_api.route('/beam/stream', methods=['GET'])
+def stream_beam_kpi():
+    """
+    Stream live KPI updates as Server-Sent Events
+
+    Each `kpi` event carries the updates since the previous event, at most
+    one per (cell, beam, KPI) and at most max_rate_hz events per second.
+
+    Query Parameters:
+        - beam_id: Comma-separated beam IDs (default: all)
+        - cell_id: Comma-separated cell IDs (default: all)
+        - kpi_type: Comma-separated KPI names, e.g. L1-RSRP.beam (default: all)
+        - max_rate_hz: Maximum events per second (default and cap: stream.max_rate_hz)
+    """
+    if stream_broker is None:
+        return jsonify({
+            'status': 'error',
+            'error_code': 'STREAM_UNAVAILABLE',
+            'message': 'Live KPI streaming is not enabled on this instance',
+            'timestamp': datetime.now().isoformat()
+        }), 503
+
+    beam_arg = request.args.get('beam_id')
+    try:
+        beam_ids = [int(b) for b in beam_arg.split(',')] if beam_arg else None
+    except ValueError:
+        beam_ids = [0]
+    if beam_ids is not None and not all(1 <= b <= 64 for b in beam_ids):
+        return jsonify({
+            'status': 'error',
+            'error_code': 'INVALID_PARAMETER',
+            'message': 'beam_id must be a comma-separated list of integers between 1 and 64',
+            'timestamp': datetime.now().isoformat()
+        }), 400
+
+    cell_arg = request.args.get('cell_id')
+    kpi_arg = request.args.get('kpi_type')
+    try:
+        subscription = stream_broker.subscribe(
+            beams=[str(b) for b in beam_ids] if beam_ids else None,
+            cells=cell_arg.split(',') if cell_arg else None,
+            kpis=kpi_arg.split(',') if kpi_arg and kpi_arg != 'all' else None,
+            max_rate_hz=request.args.get('max_rate_hz', type=float)
+        )
+    except StreamLimitError as e:
+        return jsonify({
+            'status': 'error',
+            'error_code': 'TOO_MANY_STREAMS',
+            'message': str(e),
+            'timestamp': datetime.now().isoformat()
+        }), 429, {'Retry-After': '30'}
+
+    return Response(
+        stream_broker.sse_events(subscription),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @beam_api.route('/beam/list', methods=['GET'])
 def list_beams():
     """
@@ -641,21 +1293,38 @@ def list_beams():
     Query Parameters:
         - cell_id: Cell ID filter (optional)
         - min_rsrp: Minimum RSRP filter (optional)
+        - offset: Number of beams to skip (default: 0)
+        - limit: Maximum number of beams to return (optional)
     """
     try:
         # Get query parameters
         cell_id = request.args.get('cell_id')
         min_rsrp = request.args.get('min_rsrp', type=float)
+        offset = request.args.get('offset', 0, type=int)
+        limit = request.args.get('limit', type=int)
+
+        if offset < 0 or (limit is not None and limit < 1):
+            return jsonify({
+                'status': 'error',
+                'error_code': 'INVALID_PARAMETER',
+                'message': 'offset must be >= 0 and limit must be >= 1',
+                'timestamp': datetime.now().isoformat()
+            }), 400
 
         # List beams
         beams = beam_service.list_active_beams(cell_id, min_rsrp)
+        total = len(beams)
+        page = beams[offset:offset + limit] if limit is not None else beams[offset:]
 
         # Build response
         response = {
             'status': 'success',
             'timestamp': datetime.now().isoformat(),
-            'beams': beams,
-            'count': len(beams)
+            'beams': page,
+            'count': len(page),
+            'total': total,
+            'offset': offset,
+            'limit': limit
         }
 
         return jsonify(response), 200
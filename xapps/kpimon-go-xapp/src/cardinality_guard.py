@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Prometheus label cardinality guard for KPIMON xApp
+Caps the number of kpimon_kpi_value series, evicts label sets that stopped
+updating (LRU by last update) and optionally folds beams into buckets
+
+In Prometheus multiprocess mode (sharded ingestion) a removed child stays in
+the process's mmap file and is still exported, so eviction cannot shrink the
+merged output: the guard then bounds what is written instead (new label sets
+beyond max_series are dropped) and folds per-beam series into buckets.
+
+Author: O-RAN RIC Platform Team
+Date: 2025-11-19
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+SERIES_ACTIVE = Gauge(
+    'kpimon_metric_series_active',
+    'Label sets currently exported by a guarded metric',
+    ['metric']
+)
+SERIES_EVICTED = Counter(
+    'kpimon_metric_series_evicted_total',
+    'Label sets removed by the cardinality guard',
+    ['metric', 'reason']
+)
+SERIES_REJECTED = Counter(
+    'kpimon_metric_series_rejected_total',
+    'New label sets not exported because a multiprocess guard was full',
+    ['metric']
+)
+
+BEAM_MODES = ('per_beam', 'bucket', 'none')
+
+
+class CardinalityGuard:
+    """
+    Bounded wrapper around a labelled (kpi_type, cell_id, beam_id) gauge
+
+    Features:
+    - Hard cap on exported series; the least recently updated series is
+      removed when a new one would exceed it
+    - Series not updated for stale_after_s are removed by evict_stale()
+    - Beam label modes: per_beam, bucket (e.g. "0-7") or none ("all")
+    - Eviction counters and active series gauge per guarded metric
+    - Multiprocess mode: hard per-process cap (no eviction), beams bucketed
+    """
+
+    def __init__(self, gauge: Gauge, max_series: int = 10000,
+                 stale_after_s: float = 600, beam_mode: str = 'per_beam',
+                 beam_bucket_size: int = 8, multiprocess: bool = False):
+        """
+        Initialize cardinality guard
+
+        Args:
+            gauge: Gauge labelled (kpi_type, cell_id, beam_id)
+            max_series: Maximum exported label sets
+            stale_after_s: Remove label sets not updated for this long (0 = never)
+            beam_mode: per_beam, bucket or none
+            beam_bucket_size: Beams per bucket in bucket mode
+            multiprocess: Gauge values live in prometheus_client mmap files
+                (removed series stay exported)
+        """
+        if beam_mode not in BEAM_MODES:
+            raise ValueError(f"Invalid beam_mode {beam_mode!r}, expected one of {BEAM_MODES}")
+        if multiprocess and beam_mode == 'per_beam':
+            logger.warning(f"{gauge._name}: per_beam series cannot be evicted in multiprocess mode, "
+                           f"using beam_mode 'bucket'")
+            beam_mode = 'bucket'
+
+        self.gauge = gauge
+        self.name = gauge._name
+        self.max_series = max(1, int(max_series))
+        self.stale_after = float(stale_after_s)
+        self.beam_mode = beam_mode
+        self.beam_bucket_size = max(1, int(beam_bucket_size))
+        self.multiprocess = multiprocess
+
+        # labels -> [child, last update]; ordered least recently updated first
+        self._series: 'OrderedDict[Tuple[str, str, str], list]' = OrderedDict()
+        self._beam_labels: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+        self.evicted_capacity = 0
+        self.evicted_stale = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_config(cls, gauge: Gauge, config: Optional[Dict] = None,
+                    multiprocess: bool = False) -> 'CardinalityGuard':
+        """Create a guard from a `metrics_cardinality` config section"""
+        config = config or {}
+        return cls(
+            gauge,
+            max_series=config.get('max_series', 10000),
+            stale_after_s=config.get('stale_after_s', 600),
+            beam_mode=config.get('beam_mode', 'per_beam'),
+            beam_bucket_size=config.get('beam_bucket_size', 8),
+            multiprocess=multiprocess
+        )
+
+    def beam_label(self, beam_label: str) -> str:
+        """Exported beam label for a beam"""
+        if self.beam_mode == 'per_beam':
+            return beam_label
+        if self.beam_mode == 'none':
+            return 'all'
+
+        label = self._beam_labels.get(beam_label)
+        if label is None:
+            try:
+                low = int(beam_label) // self.beam_bucket_size * self.beam_bucket_size
+                label = f"{low}-{low + self.beam_bucket_size - 1}"
+            except ValueError:
+                label = beam_label
+            if len(self._beam_labels) < 4096:
+                self._beam_labels[beam_label] = label
+        return label
+
+    def set(self, kpi_type: str, cell_id: str, beam_id: str, value: Any,
+            now: Optional[float] = None):
+        """
+        Set the gauge of a (KPI, cell, beam), creating or refreshing its series
+
+        In bucket/none mode the series shows the latest value of any beam in it.
+        In multiprocess mode a new series is dropped once max_series are written.
+        """
+        labels = (kpi_type, cell_id, self.beam_label(beam_id))
+        now = time.monotonic() if now is None else now
+
+        with self._lock:
+            entry = self._series.get(labels)
+            if entry is None:
+                if len(self._series) >= self.max_series:
+                    if self.multiprocess:
+                        self.rejected += 1
+                        SERIES_REJECTED.labels(metric=self.name).inc()
+                        return
+                    self._evict_oldest()
+                entry = self._series[labels] = [self.gauge.labels(*labels), now]
+                SERIES_ACTIVE.labels(metric=self.name).set(len(self._series))
+            else:
+                entry[1] = now
+                self._series.move_to_end(labels)
+
+        entry[0].set(value)
+
+    def _evict_oldest(self):
+        labels, _ = self._series.popitem(last=False)
+        self._remove(labels)
+        self.evicted_capacity += 1
+        SERIES_EVICTED.labels(metric=self.name, reason='capacity').inc()
+
+    def _remove(self, labels: Tuple[str, str, str]):
+        try:
+            self.gauge.remove(*labels)
+        except KeyError:
+            pass
+
+    def evict_stale(self, now: Optional[float] = None) -> int:
+        """
+        Remove label sets not updated within stale_after_s
+
+        A no-op in multiprocess mode: the series would stay exported while its
+        slot went to a new one.
+
+        Returns:
+            Number of removed label sets
+        """
+        if self.stale_after <= 0 or self.multiprocess:
+            return 0
+        now = time.monotonic() if now is None else now
+        cutoff = now - self.stale_after
+        removed = 0
+
+        with self._lock:
+            while self._series:
+                labels, entry = next(iter(self._series.items()))
+                if entry[1] > cutoff:
+                    break
+                del self._series[labels]
+                self._remove(labels)
+                removed += 1
+            if removed:
+                self.evicted_stale += removed
+                SERIES_EVICTED.labels(metric=self.name, reason='stale').inc(removed)
+                SERIES_ACTIVE.labels(metric=self.name).set(len(self._series))
+
+        return removed
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get guard statistics"""
+        return {
+            'metric': self.name,
+            'series': len(self._series),
+            'max_series': self.max_series,
+            'beam_mode': self.beam_mode,
+            'multiprocess': self.multiprocess,
+            'rejected': self.rejected,
+            'evicted_capacity': self.evicted_capacity,
+            'evicted_stale': self.evicted_stale
+        }
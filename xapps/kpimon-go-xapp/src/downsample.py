@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Time-series downsampling for KPIMON beam query API
+Reduces a KPI series to what a chart can draw (LTTB or min/max envelope)
+and picks the InfluxDB aggregation window for a time range
+
+Author: O-RAN RIC Platform Team
+Date: 2025-11-19
+"""
+
+import math
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+METHODS = ('lttb', 'minmax')
+
+# Query this many aggregation windows per output point, so the downsampler
+# has detail to choose from while InfluxDB still does most of the reduction
+OVERSAMPLE = 4
+
+# Aggregation windows auto-selection rounds up to, in seconds
+NICE_WINDOWS = [
+    (1, '1s'), (2, '2s'), (5, '5s'), (10, '10s'), (15, '15s'), (30, '30s'),
+    (60, '1m'), (120, '2m'), (300, '5m'), (600, '10m'), (900, '15m'), (1800, '30m'),
+    (3600, '1h'), (7200, '2h'), (21600, '6h'), (43200, '12h'), (86400, '1d'),
+]
+
+
+def auto_interval(range_s: float, max_points: int, oversample: int = OVERSAMPLE) -> str:
+    """
+    Aggregation window for a time range and output size
+
+    Args:
+        range_s: Queried time range in seconds
+        max_points: Points the caller will keep
+        oversample: Windows queried per kept point
+
+    Returns:
+        Flux duration of the smallest nice window yielding at most
+        max_points * oversample windows
+    """
+    target = range_s / max(1, max_points * oversample)
+    for seconds, duration in NICE_WINDOWS:
+        if seconds >= target:
+            return duration
+    return f"{math.ceil(target / 86400)}d"
+
+
+def lttb(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets point selection
+
+    Keeps the first and last point and, from each of max_points - 2 equal
+    buckets, the point forming the largest triangle with the previously
+    kept point and the next bucket's average: peaks and dips survive.
+
+    Args:
+        x: Point times (ascending, float)
+        y: Point values (finite)
+        max_points: Points to keep (at least 3)
+
+    Returns:
+        Indices of the kept points, ascending
+    """
+    n = len(y)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    # Bucket boundaries over the points between first and last
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+        else:
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        # Twice the triangle area for each candidate (the factor does not matter)
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a])
+                      - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        selected[i + 1] = a
+
+    return selected
+
+
+def minmax(y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Min/max envelope point selection
+
+    Keeps the minimum and maximum of each of max_points // 2 equal buckets,
+    so the drawn band covers every extreme of the full series.
+
+    Args:
+        y: Point values (finite, time order)
+        max_points: Points to keep (at least 2)
+
+    Returns:
+        Indices of the kept points, ascending
+    """
+    n = len(y)
+    buckets = max_points // 2
+    if max_points >= n or buckets < 1:
+        return np.arange(n)
+
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    bucket = np.repeat(np.arange(buckets), np.diff(edges))
+
+    # Sorted by bucket, then value: each bucket's first entry is its minimum, last its maximum
+    order = np.lexsort((y, bucket))
+    picked = np.concatenate([order[edges[:-1]], order[edges[1:] - 1]])
+    return np.unique(picked)
+
+
+def downsample(x: np.ndarray, y: np.ndarray, max_points: int, method: str = 'lttb') -> np.ndarray:
+    """
+    Indices of the points to keep from a time-ordered series
+
+    Non-finite values are never kept.
+
+    Args:
+        x: Point times (ascending, float)
+        y: Point values
+        max_points: Maximum points to keep
+        method: 'lttb' or 'minmax'
+
+    Returns:
+        Indices into x/y, ascending
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown downsampling method '{method}' (expected one of {METHODS})")
+
+    finite = np.flatnonzero(np.isfinite(y))
+    if len(finite) < len(y):
+        x, y = x[finite], y[finite]
+    else:
+        finite = None
+
+    if method == 'lttb':
+        keep = lttb(x, y, max_points)
+    else:
+        keep = minmax(y, max_points)
+    return keep if finite is None else finite[keep]
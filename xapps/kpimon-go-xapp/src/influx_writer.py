@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Asynchronous InfluxDB writer for KPIMON xApp
+Serializes buffered KPI tuples straight to line protocol and writes batches
+concurrently with retry and exponential backoff
+
+Author: O-RAN RIC Platform Team
+Date: 2025-11-19
+"""
+
+import math
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+MEASUREMENT = "kpi_measurement"
+
+# Prometheus metrics
+INFLUX_POINTS_WRITTEN = Counter('kpimon_influx_points_written_total', 'Total KPI points written to InfluxDB')
+INFLUX_POINTS_FAILED = Counter('kpimon_influx_points_failed_total', 'Total KPI points dropped after retries')
+INFLUX_RETRIES = Counter('kpimon_influx_write_retries_total', 'Total InfluxDB write retries')
+INFLUX_IN_FLIGHT = Gauge('kpimon_influx_batches_in_flight', 'InfluxDB batches currently being written')
+INFLUX_WRITE_TIME = Histogram(
+    'kpimon_influx_write_seconds',
+    'Time to write one batch to InfluxDB (including retries)'
+)
+
+# HTTP statuses for which retrying the same payload cannot succeed
+NON_RETRYABLE_STATUS = {400, 401, 403, 404, 413, 422}
+
+
+class KPIPoint(NamedTuple):
+    """Buffered KPI measurement (plain tuple; survives a JSON spill as a list)"""
+    timestamp: Any
+    cell_id: str
+    ue_id: Optional[str]
+    beam_id: Any
+    kpi_name: str
+    kpi_type: str
+    value: float
+    beam_specific: bool
+
+
+def _escape_tag(value: str) -> str:
+    """Escape a tag key/value for line protocol"""
+    return value.replace('\\', '\\\\').replace(',', '\\,').replace('=', '\\=').replace(' ', '\\ ')
+
+
+def timestamp_ns(timestamp) -> Optional[int]:
+    """
+    Convert an indication timestamp to epoch nanoseconds
+
+    ISO strings without an offset are read as UTC, numbers as epoch seconds.
+    Every store that keys samples by time (InfluxDB, the Redis timeline) uses
+    this conversion so one indication lands at one instant everywhere.
+
+    Returns:
+        Epoch nanoseconds, or None when the timestamp does not parse
+    """
+    try:
+        if isinstance(timestamp, (int, float)):
+            return int(timestamp * 1_000_000_000)
+        dt = datetime.fromisoformat(str(timestamp))
+    except (TypeError, ValueError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    delta = dt - datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return (delta.days * 86400 + delta.seconds) * 1_000_000_000 + delta.microseconds * 1000
+
+
+def _timestamp_ns(timestamp, cache: Dict[Any, Optional[int]]) -> Optional[int]:
+    """timestamp_ns() memoized per batch"""
+    if timestamp in cache:
+        return cache[timestamp]
+    ns = cache[timestamp] = timestamp_ns(timestamp)
+    return ns
+
+
+def written_span(records: Iterable) -> Tuple[Set[str], Optional[float]]:
+    """
+    Beams and oldest timestamp of a batch of KPI tuples
+
+    Returns:
+        (beam labels as written in the beam_id tag, oldest epoch seconds or
+        None when no timestamp parses)
+    """
+    beams: Set[str] = set()
+    oldest: Optional[int] = None
+    ts_cache: Dict[Any, Optional[int]] = {}
+    for record in records:
+        beam_id = record[3]
+        beams.add('n/a' if beam_id is None else str(beam_id))
+        ns = _timestamp_ns(record[0], ts_cache)
+        if ns is not None and (oldest is None or ns < oldest):
+            oldest = ns
+    return beams, None if oldest is None else oldest / 1_000_000_000
+
+
+def to_line_protocol(records: Iterable) -> str:
+    """
+    Serialize buffered KPI tuples to InfluxDB line protocol
+
+    Produces the same series as the former influxdb_client.Point builder:
+    measurement kpi_measurement, tags beam_id/beam_specific/cell_id/kpi_name/
+    kpi_type/ue_id and field value, with nanosecond timestamps.
+
+    Args:
+        records: KPIPoint tuples (or equivalent sequences)
+
+    Returns:
+        Newline-separated line protocol
+    """
+    lines: List[str] = []
+    ts_cache: Dict[Any, Optional[int]] = {}
+    tag_cache: Dict[Any, str] = {}
+
+    for timestamp, cell_id, ue_id, beam_id, kpi_name, kpi_type, value, beam_specific in records:
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            continue
+        if not math.isfinite(value):
+            continue
+
+        # Tags must be sorted by key; consecutive points usually share them
+        tag_key = (cell_id, ue_id, beam_id, kpi_name, kpi_type, beam_specific)
+        tags = tag_cache.get(tag_key)
+        if tags is None:
+            tags = f"beam_id={_escape_tag(str('n/a' if beam_id is None else beam_id))}"
+            if beam_specific:
+                tags += ",beam_specific=true"
+            tags += (f",cell_id={_escape_tag(str(cell_id))}"
+                     f",kpi_name={_escape_tag(str(kpi_name))}"
+                     f",kpi_type={_escape_tag(str(kpi_type))}")
+            if ue_id:
+                tags += f",ue_id={_escape_tag(str(ue_id))}"
+            tag_cache[tag_key] = tags
+
+        ns = _timestamp_ns(timestamp, ts_cache)
+        if ns is None:
+            lines.append(f"{MEASUREMENT},{tags} value={value!r}")
+        else:
+            lines.append(f"{MEASUREMENT},{tags} value={value!r} {ns}")
+
+    return "\n".join(lines)
+
+
+class InfluxBatchWriter:
+    """
+    Concurrent InfluxDB batch writer
+
+    Features:
+    - Bounded number of batches in flight (submit blocks when saturated,
+      pushing back on the KPI buffer instead of growing memory)
+    - Retry with exponential backoff and jitter for transient failures
+    - Line protocol serialization in the writer threads
+    - Optional on_written callback per successfully written batch (query
+      cache invalidation)
+    """
+
+    def __init__(self, write_api, bucket: str, org: str,
+                 max_in_flight: int = 4, max_retries: int = 5,
+                 retry_base_ms: float = 200, retry_max_ms: float = 10000,
+                 on_written: Optional[Callable[[List], None]] = None):
+        """
+        Initialize InfluxDB batch writer
+
+        Args:
+            write_api: Synchronous influxdb_client WriteApi (one call per batch)
+            bucket: Target bucket
+            org: Target organization
+            max_in_flight: Maximum concurrent batch writes
+            max_retries: Retries per batch before it is dropped
+            retry_base_ms: First retry delay
+            retry_max_ms: Retry delay cap
+            on_written: Called (in the writer thread) with each batch once written
+        """
+        self.write_api = write_api
+        self.bucket = bucket
+        self.org = org
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.max_retries = max(0, int(max_retries))
+        self.retry_base = retry_base_ms / 1000.0
+        self.retry_max = retry_max_ms / 1000.0
+        self.on_written = on_written
+
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_in_flight,
+            thread_name_prefix='influx-writer'
+        )
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+        self._closed = False
+
+        self.total_points = 0
+        self.total_failed = 0
+        self.total_retries = 0
+
+    @classmethod
+    def from_config(cls, write_api, influx_config: Dict,
+                    on_written: Optional[Callable[[List], None]] = None) -> 'InfluxBatchWriter':
+        """Create a writer from the `influxdb` config section"""
+        writer_config = influx_config.get('writer', {})
+        return cls(
+            write_api,
+            bucket=influx_config['bucket'],
+            org=influx_config['org'],
+            max_in_flight=writer_config.get('max_in_flight', 4),
+            max_retries=writer_config.get('max_retries', 5),
+            retry_base_ms=writer_config.get('retry_base_ms', 200),
+            retry_max_ms=writer_config.get('retry_max_ms', 10000),
+            on_written=on_written
+        )
+
+    def submit(self, batch: List, timeout: Optional[float] = None) -> bool:
+        """
+        Hand a batch to a writer thread
+
+        Args:
+            batch: Buffered KPI tuples
+            timeout: Seconds to wait for a free slot (None = wait indefinitely)
+
+        Returns:
+            False if the writer is closed or no slot became free in time
+        """
+        if not batch:
+            return True
+        if self._closed:
+            return False
+        if not self._slots.acquire(timeout=timeout):
+            return False
+
+        with self._in_flight_lock:
+            self._in_flight += 1
+            INFLUX_IN_FLIGHT.set(self._in_flight)
+
+        try:
+            self._executor.submit(self._write_batch, batch)
+        except RuntimeError:
+            # Executor shut down concurrently
+            self._release()
+            return False
+        return True
+
+    def _release(self):
+        with self._in_flight_lock:
+            self._in_flight -= 1
+            INFLUX_IN_FLIGHT.set(self._in_flight)
+        self._slots.release()
+
+    def _write_batch(self, batch: List):
+        """Serialize and write one batch, retrying transient failures"""
+        try:
+            body = to_line_protocol(batch)
+            if not body:
+                return
+
+            with INFLUX_WRITE_TIME.time():
+                attempt = 0
+                while True:
+                    try:
+                        self.write_api.write(bucket=self.bucket, org=self.org, record=body)
+                        break
+                    except Exception as e:
+                        status = getattr(e, 'status', None)
+                        if attempt >= self.max_retries or status in NON_RETRYABLE_STATUS:
+                            INFLUX_POINTS_FAILED.inc(len(batch))
+                            self.total_failed += len(batch)
+                            logger.error(
+                                f"Dropping {len(batch)} KPI points after {attempt} retries: {e}"
+                            )
+                            return
+
+                        delay = min(self.retry_max, self.retry_base * (2 ** attempt))
+                        delay *= 0.5 + random.random() / 2
+                        attempt += 1
+                        INFLUX_RETRIES.inc()
+                        self.total_retries += 1
+                        logger.warning(
+                            f"InfluxDB write failed ({e}), retry {attempt}/{self.max_retries} "
+                            f"in {delay:.2f}s"
+                        )
+                        time.sleep(delay)
+
+            INFLUX_POINTS_WRITTEN.inc(len(batch))
+            self.total_points += len(batch)
+            logger.debug(f"Wrote {len(batch)} KPI points to InfluxDB")
+            if self.on_written:
+                try:
+                    self.on_written(batch)
+                except Exception as e:
+                    logger.warning(f"InfluxDB on_written callback failed: {e}")
+
+        except Exception as e:
+            INFLUX_POINTS_FAILED.inc(len(batch))
+            self.total_failed += len(batch)
+            logger.error(f"Error writing KPI batch to InfluxDB: {e}")
+        finally:
+            self._release()
+
+    def in_flight(self) -> int:
+        """Number of batches currently being written"""
+        with self._in_flight_lock:
+            return self._in_flight
+
+    def close(self, wait: bool = True):
+        """Stop accepting batches and optionally wait for in-flight writes"""
+        self._closed = True
+        self._executor.shutdown(wait=wait)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get writer statistics"""
+        return {
+            'in_flight': self.in_flight(),
+            'max_in_flight': self.max_in_flight,
+            'total_points': self.total_points,
+            'total_failed': self.total_failed,
+            'total_retries': self.total_retries
+        }
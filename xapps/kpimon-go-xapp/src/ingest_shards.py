@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Sharded indication ingestion for KPIMON xApp
+Routes raw indication payloads by cell_id to N forked worker processes so one
+pod uses several cores while keeping per-cell ordering
+
+Author: O-RAN RIC Platform Team
+Date: 2025-11-19
+"""
+
+import os
+import re
+import sys
+import json
+import zlib
+import queue
+import signal
+import logging
+import threading
+import multiprocessing
+import multiprocessing.connection
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Union
+
+from prometheus_client import Counter, Gauge
+
+from indication_codec import binary_cell_id, is_binary
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics (parent process)
+SHARD_DISPATCHED = Counter(
+    'kpimon_shard_dispatched_total',
+    'Indications dispatched to ingestion workers',
+    ['shard']
+)
+SHARD_DROPPED = Counter(
+    'kpimon_shard_dropped_total',
+    'Indications dropped because a worker queue was full',
+    ['shard']
+)
+SHARD_RESTARTS = Counter(
+    'kpimon_shard_restarts_total',
+    'Ingestion worker restarts after unexpected exits',
+    ['shard']
+)
+SHARD_WORKERS_ALIVE = Gauge('kpimon_shard_workers_alive', 'Ingestion worker processes alive')
+
+# Cheap cell_id extraction so the parent does not decode every payload
+_CELL_ID_RE = re.compile(r'"cell_id"\s*:\s*("(?:[^"\\]|\\.)*"|-?\d+|null)')
+_CELL_ID_RE_BYTES = re.compile(_CELL_ID_RE.pattern.encode('ascii'))
+
+# worker_main(shard_index, work_queue): runs in the child until it reads None
+WorkerMain = Callable[[int, Any], None]
+
+# on_written(beams, since): runs in the parent for each span a worker wrote to InfluxDB
+WrittenCallback = Callable[[Set[str], float], None]
+
+
+def shard_key(payload: Union[str, bytes, Dict[str, Any]]) -> str:
+    """cell_id of a JSON or binary indication payload as routing key ('' if absent)"""
+    if isinstance(payload, dict):
+        # Already decoded (batch item)
+        cell_id = payload.get('cell_id')
+        return '' if cell_id is None else str(cell_id)
+    if is_binary(payload):
+        return binary_cell_id(payload) or ''
+    if isinstance(payload, bytes):
+        match = _CELL_ID_RE_BYTES.search(payload)
+        if match:
+            return match.group(1).strip(b'"').decode('utf-8', errors='replace')
+    else:
+        match = _CELL_ID_RE.search(payload)
+        if match:
+            return match.group(1).strip('"')
+    try:
+        return str(json.loads(payload).get('cell_id', ''))
+    except (ValueError, AttributeError):
+        return ''
+
+
+class ShardedIngestor:
+    """
+    Dispatches indications to per-shard worker processes
+
+    Features:
+    - Stable crc32(cell_id) routing: all indications of a cell go to the
+      same worker and are processed in arrival order
+    - One bounded queue per worker; a full queue drops instead of blocking
+      the RMR/HTTP receive path
+    - Workers are forked by a single-threaded supervisor process, itself
+      forked before any other thread starts, so a restart never forks a
+      process holding other threads' locks or the parent's listening sockets
+    - The supervisor restarts workers that die; check_workers() reports
+      restarts to the parent and whether the supervisor is still running
+    - Workers report the beams/oldest time of their InfluxDB writes with
+      report_written(); the parent receives them in on_written so the query
+      results it caches are invalidated as in the unsharded process
+    - With PROMETHEUS_MULTIPROC_DIR set, worker metrics are merged by the
+      parent's /metrics endpoint (see multiprocess_registry)
+    """
+
+    def __init__(self, worker_main: WorkerMain, num_workers: int = 2,
+                 queue_size: int = 10000, put_timeout_ms: float = 0,
+                 restart_backoff_s: float = 1.0, on_written: Optional[WrittenCallback] = None):
+        """
+        Initialize sharded ingestor
+
+        Args:
+            worker_main: Function run in each worker process
+            num_workers: Number of worker processes
+            queue_size: Capacity of each worker queue
+            put_timeout_ms: Time to wait for space in a full queue before dropping
+            restart_backoff_s: Pause after restarting workers (bounds crash loops)
+            on_written: Called in the parent with the spans reported by workers
+        """
+        self.worker_main = worker_main
+        self.num_workers = max(1, int(num_workers))
+        self.queue_size = max(1, int(queue_size))
+        self.put_timeout = max(0.0, float(put_timeout_ms)) / 1000.0
+        self.restart_backoff = max(0.0, float(restart_backoff_s))
+        self.on_written = on_written
+
+        self._ctx = multiprocessing.get_context('fork')
+        self._queues: List[Any] = []
+        self._supervisor: Optional[multiprocessing.Process] = None
+        # Written spans, worker -> parent (unbounded: a lost span leaves a stale cached result)
+        self._written: Optional[Any] = None
+        self._forwarder: Optional[threading.Thread] = None
+        self._stop_event = self._ctx.Event()
+        # Written by the supervisor, read by the parent
+        self._alive = self._ctx.Array('b', self.num_workers, lock=False)
+        self._restarts = self._ctx.Array('l', self.num_workers, lock=False)
+        self._reported_restarts = [0] * self.num_workers
+
+        self.total_dispatched = 0
+        self.total_dropped = 0
+
+    @classmethod
+    def from_config(cls, worker_main: WorkerMain, config: Optional[Dict] = None,
+                    on_written: Optional[WrittenCallback] = None) -> 'ShardedIngestor':
+        """Create an ingestor from the `sharding` config section"""
+        config = config or {}
+        return cls(
+            worker_main,
+            num_workers=config.get('workers', 2),
+            queue_size=config.get('queue_size', 10000),
+            put_timeout_ms=config.get('put_timeout_ms', 0),
+            restart_backoff_s=config.get('restart_backoff_s', 1.0),
+            on_written=on_written
+        )
+
+    @property
+    def total_restarts(self) -> int:
+        return sum(self._restarts)
+
+    @property
+    def supervising(self) -> bool:
+        """True while the supervisor (and so worker restarts) is running"""
+        return self._supervisor is not None and self._supervisor.is_alive()
+
+    def shard_for(self, payload: Union[str, bytes, Dict[str, Any]]) -> int:
+        """Worker index of an indication"""
+        return zlib.crc32(shard_key(payload).encode('utf-8')) % self.num_workers
+
+    def start(self):
+        """Fork the worker supervisor (call before starting other threads)"""
+        self._stop_event.clear()
+        self._queues = [self._ctx.Queue(self.queue_size) for _ in range(self.num_workers)]
+        self._written = self._ctx.Queue() if self.on_written else None
+        # Not daemonic: daemonic processes cannot have children
+        self._supervisor = self._ctx.Process(
+            target=self._supervise, args=(os.getpid(),), name="kpimon-shard-supervisor"
+        )
+        self._supervisor.start()
+        if self._written is not None:
+            self._forwarder = threading.Thread(
+                target=self._forward_written, name="kpimon-shard-written", daemon=True
+            )
+            self._forwarder.start()
+        SHARD_WORKERS_ALIVE.set(self.num_workers)
+        logger.info(f"Started ingestion supervisor with {self.num_workers} workers")
+
+    def _spawn(self, shard: int) -> multiprocessing.Process:
+        worker = self._ctx.Process(
+            target=self.worker_main,
+            args=(shard, self._queues[shard]),
+            name=f"kpimon-shard-{shard}",
+            daemon=True
+        )
+        worker.start()
+        self._alive[shard] = 1
+        return worker
+
+    def _supervise(self, parent_pid: int):
+        """Supervisor process: forks the workers and restarts those that die"""
+        # Stopped by the parent (stop event + SIGTERM), not by a terminal's SIGINT
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+        workers: List[Optional[multiprocessing.Process]] = [
+            self._spawn(shard) for shard in range(self.num_workers)
+        ]
+        try:
+            while any(workers):
+                if os.getppid() != parent_pid:
+                    logger.error("KPIMON parent exited, stopping ingestion workers")
+                    break
+                multiprocessing.connection.wait([w.sentinel for w in workers if w], timeout=1)
+
+                restarted = False
+                for shard, worker in enumerate(workers):
+                    if worker is None or worker.is_alive():
+                        continue
+                    self._alive[shard] = 0
+                    mark_process_dead(worker.pid)
+                    if worker.exitcode == 0 or self._stop_event.is_set():
+                        workers[shard] = None
+                        continue
+                    logger.error(f"Ingestion worker {shard} (pid {worker.pid}) exited with "
+                                 f"{worker.exitcode}, restarting")
+                    workers[shard] = self._spawn(shard)
+                    self._restarts[shard] += 1
+                    restarted = True
+                if restarted:
+                    self._stop_event.wait(self.restart_backoff)
+        finally:
+            for shard, worker in enumerate(workers):
+                if worker is not None and worker.is_alive():
+                    worker.terminate()
+                    worker.join(1)
+                    mark_process_dead(worker.pid)
+                self._alive[shard] = 0
+
+    def report_written(self, beams: Iterable[str], since: float):
+        """Worker side: pass the span of an InfluxDB write to the parent's on_written"""
+        if self._written is not None:
+            self._written.put((set(beams), since))
+
+    def _forward_written(self):
+        """Parent thread: hands the spans reported by workers to on_written"""
+        while True:
+            span = self._written.get()
+            if span is None:
+                break
+            try:
+                self.on_written(*span)
+            except Exception as e:
+                logger.error(f"Failed to handle written span from ingestion worker: {e}")
+
+    def submit(self, payload: Union[str, bytes, Dict[str, Any]]) -> bool:
+        """
+        Queue an indication for its worker
+
+        Returns:
+            False if the worker queue was full and the indication was dropped
+        """
+        shard = self.shard_for(payload)
+        try:
+            if self.put_timeout:
+                self._queues[shard].put(payload, timeout=self.put_timeout)
+            else:
+                self._queues[shard].put_nowait(payload)
+        except queue.Full:
+            self.total_dropped += 1
+            SHARD_DROPPED.labels(shard=str(shard)).inc()
+            return False
+
+        self.total_dispatched += 1
+        SHARD_DISPATCHED.labels(shard=str(shard)).inc()
+        return True
+
+    def check_workers(self) -> int:
+        """
+        Report worker restarts made by the supervisor since the last call
+
+        Returns:
+            Number of restarted workers
+        """
+        restarted = 0
+        for shard in range(self.num_workers):
+            count = self._restarts[shard]
+            delta = count - self._reported_restarts[shard]
+            if delta:
+                self._reported_restarts[shard] = count
+                SHARD_RESTARTS.labels(shard=str(shard)).inc(delta)
+                restarted += delta
+        SHARD_WORKERS_ALIVE.set(sum(self._alive))
+        return restarted
+
+    def stop(self, timeout: float = 10):
+        """Ask workers to drain their queues and exit, then stop the supervisor"""
+        self._stop_event.set()
+        for q in self._queues:
+            try:
+                q.put(None, timeout=1)
+            except queue.Full:
+                pass
+
+        if self._supervisor is not None:
+            self._supervisor.join(timeout)
+            if self._supervisor.is_alive():
+                logger.warning("Ingestion workers did not stop, terminating")
+                self._supervisor.terminate()
+                self._supervisor.join(5)
+        if self._forwarder is not None:
+            # After the workers' final flushes, which are queued ahead of this
+            self._written.put(None)
+            self._forwarder.join(timeout)
+            self._forwarder = None
+        SHARD_WORKERS_ALIVE.set(0)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get ingestor statistics"""
+        depths = []
+        for q in self._queues:
+            try:
+                depths.append(q.qsize())
+            except NotImplementedError:
+                depths.append(None)
+        return {
+            'workers': self.num_workers,
+            'supervising': self.supervising,
+            'alive': [bool(alive) for alive in self._alive],
+            'queue_depths': depths,
+            'total_dispatched': self.total_dispatched,
+            'total_dropped': self.total_dropped,
+            'total_restarts': self.total_restarts
+        }
+
+
+def multiprocess_enabled() -> bool:
+    """True when prometheus_client runs in multiprocess mode"""
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR') or os.environ.get('prometheus_multiproc_dir'))
+
+
+def multiprocess_registry():
+    """Registry merging the metrics of all processes (None outside multiprocess mode)"""
+    if not multiprocess_enabled():
+        return None
+    from prometheus_client import CollectorRegistry, multiprocess
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def mark_process_dead(pid: Optional[int]):
+    """Drop live gauges of an exited worker from the merged metrics"""
+    if pid is None or not multiprocess_enabled():
+        return
+    from prometheus_client import multiprocess
+    try:
+        multiprocess.mark_process_dead(pid)
+    except OSError:
+        pass
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Bounded KPI ring buffer for KPIMON xApp
+Decouples the RMR/HTTP ingestion threads from the KPI processor with a
+fixed-capacity, deque-backed buffer and batch-drain semantics
+
+Author: O-RAN RIC Platform Team
+Date: 2025-11-19
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from enum import Enum
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+BUFFER_DEPTH = Gauge('kpimon_kpi_buffer_depth', 'Number of KPI records waiting in the buffer')
+BUFFER_DROPS = Counter(
+    'kpimon_kpi_buffer_dropped_total',
+    'Total number of KPI records dropped by the buffer',
+    ['reason']
+)
+BUFFER_SPILLED = Counter(
+    'kpimon_kpi_buffer_spilled_total',
+    'Total number of KPI records spilled to disk'
+)
+BUFFER_DRAIN_TIME = Histogram(
+    'kpimon_kpi_buffer_drain_seconds',
+    'Time spent draining a batch from the KPI buffer',
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1)
+)
+
+
+class OverflowPolicy(Enum):
+    """Behaviour when the buffer is full"""
+    DROP_OLDEST = "drop_oldest"
+    BLOCK = "block"
+    SPILL = "spill"
+
+
+class KPIRingBuffer:
+    """
+    Fixed-capacity KPI buffer with batch drain
+
+    Overflow policies:
+    - drop_oldest: producers never wait; the oldest record is discarded.
+      Appends and pops rely on deque's atomic operations and take no lock.
+    - block: producers wait up to block_timeout for space, then drop the record
+    - spill: overflow is appended to a JSON-lines file and re-read in order
+      once the in-memory ring has been drained
+
+    Records must be JSON-serializable when the spill policy is used.
+    """
+
+    def __init__(self, capacity: int = 100000,
+                 overflow_policy: str = OverflowPolicy.DROP_OLDEST.value,
+                 block_timeout_ms: float = 100,
+                 spill_path: Optional[str] = None,
+                 spill_max_bytes: int = 256 * 1024 * 1024):
+        """
+        Initialize KPI ring buffer
+
+        Args:
+            capacity: Maximum number of records held in memory
+            overflow_policy: drop_oldest, block or spill
+            block_timeout_ms: Producer wait budget for the block policy
+            spill_path: Spill file for the spill policy
+            spill_max_bytes: Spill file size limit; further overflow is dropped
+        """
+        self.capacity = max(1, int(capacity))
+        self.policy = OverflowPolicy(overflow_policy)
+        self.block_timeout = max(0.0, float(block_timeout_ms)) / 1000.0
+        self.spill_path = spill_path or '/tmp/kpimon-buffer-spill.jsonl'
+        self.spill_max_bytes = spill_max_bytes
+
+        # drop_oldest lets the deque discard the oldest record on append
+        maxlen = self.capacity if self.policy == OverflowPolicy.DROP_OLDEST else None
+        self._items: Deque[Any] = deque(maxlen=maxlen)
+
+        # Wakeups for the drainer and for blocked producers
+        self._not_empty = threading.Event()
+        self._not_full = threading.Event()
+        self._not_full.set()
+
+        # Guards capacity checks for block/spill and the spill file
+        self._lock = threading.Lock()
+        self._spilled = 0
+        self._spill_bytes = 0
+        self._spill_offset = 0
+
+        self.total_appended = 0
+        self.total_dropped = 0
+        self.total_spilled = 0
+
+        if self.policy == OverflowPolicy.SPILL and os.path.exists(self.spill_path):
+            os.remove(self.spill_path)
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict] = None) -> 'KPIRingBuffer':
+        """Create a buffer from the `kpi_buffer` config section"""
+        config = config or {}
+        return cls(
+            capacity=config.get('capacity', 100000),
+            overflow_policy=config.get('overflow_policy', OverflowPolicy.DROP_OLDEST.value),
+            block_timeout_ms=config.get('block_timeout_ms', 100),
+            spill_path=config.get('spill_path'),
+            spill_max_bytes=config.get('spill_max_bytes', 256 * 1024 * 1024)
+        )
+
+    def __len__(self) -> int:
+        return len(self._items) + self._spilled
+
+    def append(self, item: Any) -> bool:
+        """
+        Add a record to the buffer
+
+        Returns:
+            False if the record was dropped
+        """
+        if self.policy == OverflowPolicy.DROP_OLDEST:
+            if len(self._items) >= self.capacity:
+                self._count_drop('overflow')
+            self._items.append(item)
+            self.total_appended += 1
+            if not self._not_empty.is_set():
+                self._not_empty.set()
+            return True
+
+        if self.policy == OverflowPolicy.BLOCK:
+            return self._append_blocking(item)
+
+        return self._append_spilling(item)
+
+    def extend(self, items: Iterable[Any]) -> int:
+        """
+        Add several records
+
+        Returns:
+            Number of records accepted
+        """
+        accepted = 0
+        for item in items:
+            if self.append(item):
+                accepted += 1
+        return accepted
+
+    def _append_blocking(self, item: Any) -> bool:
+        """Wait for space up to block_timeout, then drop the record"""
+        deadline = time.monotonic() + self.block_timeout
+        while True:
+            with self._lock:
+                if len(self._items) < self.capacity:
+                    self._items.append(item)
+                    self.total_appended += 1
+                    self._not_empty.set()
+                    return True
+                self._not_full.clear()
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._count_drop('timeout')
+                return False
+            self._not_full.wait(remaining)
+
+    def _append_spilling(self, item: Any) -> bool:
+        """Keep the record in memory if possible, otherwise spill it to disk"""
+        with self._lock:
+            # Once spilling, newer records also go to disk to preserve order
+            if self._spilled == 0 and len(self._items) < self.capacity:
+                self._items.append(item)
+                self.total_appended += 1
+                self._not_empty.set()
+                return True
+
+            line = json.dumps(item) + '\n'
+            if self._spill_bytes + len(line) > self.spill_max_bytes:
+                self._count_drop('spill_full')
+                return False
+
+            try:
+                with open(self.spill_path, 'a') as f:
+                    f.write(line)
+            except OSError as e:
+                logger.error(f"Failed to spill KPI record: {e}")
+                self._count_drop('spill_error')
+                return False
+
+            self._spilled += 1
+            self._spill_bytes += len(line)
+            self.total_appended += 1
+            self.total_spilled += 1
+            BUFFER_SPILLED.inc()
+            self._not_empty.set()
+            return True
+
+    def _count_drop(self, reason: str):
+        self.total_dropped += 1
+        BUFFER_DROPS.labels(reason=reason).inc()
+
+    def drain(self, max_items: int, timeout: Optional[float] = None) -> List[Any]:
+        """
+        Remove up to max_items records in FIFO order
+
+        Args:
+            max_items: Batch size limit
+            timeout: Seconds to wait for the first record (None = don't wait)
+
+        Returns:
+            Drained records (possibly empty)
+        """
+        if timeout and not len(self):
+            self._not_empty.wait(timeout)
+
+        start = time.perf_counter()
+        self._not_empty.clear()
+
+        batch: List[Any] = []
+        items = self._items
+        try:
+            while len(batch) < max_items:
+                batch.append(items.popleft())
+        except IndexError:
+            pass
+
+        if len(batch) < max_items and self._spilled:
+            batch.extend(self._read_spill(max_items - len(batch)))
+
+        # Records may remain or have arrived meanwhile
+        if len(self):
+            self._not_empty.set()
+        if batch:
+            self._not_full.set()
+
+        BUFFER_DEPTH.set(len(self))
+        BUFFER_DRAIN_TIME.observe(time.perf_counter() - start)
+        return batch
+
+    def drain_batch(self, max_items: int, max_wait: float) -> List[Any]:
+        """
+        Collect a batch that is either full or max_wait old
+
+        Waits up to max_wait for the first record, then keeps collecting until
+        max_items records are gathered or max_wait has passed since the first
+        record arrived. Bounds data freshness for low-rate producers while
+        still forming large batches under load.
+
+        Args:
+            max_items: Batch size that triggers an immediate return
+            max_wait: Maximum age in seconds of the oldest record in the batch
+
+        Returns:
+            Drained records (empty if nothing arrived within max_wait)
+        """
+        batch = self.drain(max_items, timeout=max_wait)
+        if not batch:
+            return batch
+
+        deadline = time.monotonic() + max_wait
+        while len(batch) < max_items:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            batch.extend(self.drain(max_items - len(batch), timeout=remaining))
+
+        return batch
+
+    def _read_spill(self, max_items: int) -> List[Any]:
+        """Read spilled records back in order; truncate the file when consumed"""
+        records: List[Any] = []
+        with self._lock:
+            try:
+                with open(self.spill_path, 'r') as f:
+                    f.seek(self._spill_offset)
+                    while len(records) < max_items:
+                        line = f.readline()
+                        if not line:
+                            break
+                        records.append(json.loads(line))
+                    self._spill_offset = f.tell()
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to read KPI spill file, discarding it: {e}")
+                self._count_drop('spill_error')
+                records = []
+                self._spilled = 0
+
+            self._spilled = max(0, self._spilled - len(records))
+            if self._spilled == 0:
+                self._spill_offset = 0
+                self._spill_bytes = 0
+                try:
+                    os.remove(self.spill_path)
+                except OSError:
+                    pass
+
+        return records
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get buffer statistics"""
+        return {
+            'depth': len(self),
+            'in_memory': len(self._items),
+            'spilled': self._spilled,
+            'capacity': self.capacity,
+            'overflow_policy': self.policy.value,
+            'total_appended': self.total_appended,
+            'total_dropped': self.total_dropped,
+            'total_spilled': self.total_spilled
+        }
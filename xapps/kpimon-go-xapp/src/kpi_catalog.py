@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Compiled KPI catalog for KPIMON xApp
+Turns the E2SM-KPM KPI definitions into slot-based descriptors with
+pre-built Redis key, timeline series and JSON fragments, and interns
+cell/beam tags so the per-measurement indication path only concatenates
+strings
+
+Author: O-RAN RIC Platform Team
+Date: 2025-11-19
+"""
+
+import sys
+import json
+import math
+from typing import Any, Dict, Iterator, Optional
+
+from beam_index import NO_BEAM, beam_kpi_key
+
+# KPI definitions for O-RAN Release J
+# threshold/direction: anomaly when value is above/below threshold
+KPI_DEFINITIONS: Dict[str, Dict[str, Any]] = {
+    "DRB.UEThpDl": {"id": 1, "type": "throughput", "unit": "Mbps"},
+    "DRB.UEThpUl": {"id": 2, "type": "throughput", "unit": "Mbps"},
+    "DRB.RlcSduDelayDl": {"id": 3, "type": "latency", "unit": "ms"},
+    "DRB.PacketLossDl": {"id": 4, "type": "loss", "unit": "percentage",
+                         "threshold": 5.0, "direction": "above"},
+    "RRU.PrbUsedDl": {"id": 5, "type": "resource", "unit": "percentage",
+                      "threshold": 90.0, "direction": "above"},
+    "RRU.PrbUsedUl": {"id": 6, "type": "resource", "unit": "percentage",
+                      "threshold": 90.0, "direction": "above"},
+    "DRB.MeanActiveUeDl": {"id": 7, "type": "load", "unit": "count"},
+    "DRB.MeanActiveUeUl": {"id": 8, "type": "load", "unit": "count"},
+    "RRC.ConnMax": {"id": 9, "type": "connection", "unit": "count"},
+    "RRC.ConnMean": {"id": 10, "type": "connection", "unit": "count"},
+    "RRC.ConnEstabSucc": {"id": 11, "type": "success_rate", "unit": "percentage",
+                          "threshold": 95.0, "direction": "below"},
+    "HO.AttOutInterEnbN1": {"id": 12, "type": "handover", "unit": "count"},
+    "HO.SuccOutInterEnbN1": {"id": 13, "type": "handover", "unit": "count"},
+    "PDCP.BytesTransmittedDl": {"id": 14, "type": "volume", "unit": "bytes"},
+    "PDCP.BytesTransmittedUl": {"id": 15, "type": "volume", "unit": "bytes"},
+    "UE.RSRP": {"id": 16, "type": "signal", "unit": "dBm",
+                "threshold": -110.0, "direction": "below"},
+    "UE.RSRQ": {"id": 17, "type": "signal", "unit": "dB"},
+    "UE.SINR": {"id": 18, "type": "signal", "unit": "dB"},
+    "QoS.DlPktDelayPerQCI": {"id": 19, "type": "qos", "unit": "ms"},
+    "QoS.UlPktDelayPerQCI": {"id": 20, "type": "qos", "unit": "ms"},
+    # Beam-specific KPIs (5G NR beamforming)
+    "L1-RSRP.beam": {"id": 21, "type": "beam_signal", "unit": "dBm", "beam_specific": True,
+                     "threshold": -105.0, "direction": "below"},
+    "L1-SINR.beam": {"id": 22, "type": "beam_signal", "unit": "dB", "beam_specific": True,
+                     "threshold": 10.0, "direction": "below"}
+}
+
+
+def json_scalar(value: Any) -> str:
+    """json.dumps for a KPI value, skipping the encoder for plain numbers"""
+    value_type = type(value)
+    if value_type is int or (value_type is float and math.isfinite(value)):
+        return repr(value)
+    return json.dumps(value)
+
+
+class KPIDescriptor:
+    """
+    Compiled definition of one KPI
+
+    Holds everything the indication path needs per measurement: tag values,
+    the beam flag, the anomaly threshold and pre-serialized JSON fragments.
+    """
+
+    __slots__ = ('name', 'id', 'type', 'unit', 'beam_specific',
+                 'threshold', 'direction', 'json_head', 'json_tail')
+
+    def __init__(self, name: str, definition: Dict[str, Any]):
+        self.name = sys.intern(name)
+        self.id = definition['id']
+        self.type = sys.intern(definition['type'])
+        self.unit = definition['unit']
+        self.beam_specific = bool(definition.get('beam_specific', False))
+        self.threshold = definition.get('threshold')
+        self.direction = definition.get('direction', 'above')
+
+        # Record layout: timestamp, cell_id, ue_id, beam_id | kpi_name, kpi_value | kpi_type, unit, beam_specific
+        self.json_head = ', "kpi_name": ' + json.dumps(self.name) + ', "kpi_value": '
+        self.json_tail = (', "kpi_type": ' + json.dumps(self.type)
+                          + ', "unit": ' + json.dumps(self.unit)
+                          + ', "beam_specific": ' + json.dumps(self.beam_specific) + '}')
+
+    def record_json(self, record_prefix: str, beam: 'BeamTags', value: Any) -> str:
+        """
+        Serialize the Redis KPI record of one measurement
+
+        Byte-identical to json.dumps of the record dict KPIMON used to build.
+
+        Args:
+            record_prefix: CellTags.record_prefix() of the indication
+            beam: Beam tags of the measurement
+            value: Measured value
+        """
+        return record_prefix + beam.json + self.json_head + json_scalar(value) + self.json_tail
+
+    def cell_key(self, cell: 'CellTags', beam: 'BeamTags') -> str:
+        """Cell-centric Redis key (kpi:{cell}:{kpi}[:beam_{beam}])"""
+        if self.beam_specific:
+            return cell.key_prefix + self.name + beam.key_suffix
+        return cell.key_prefix + self.name
+
+    def __repr__(self) -> str:
+        return f"KPIDescriptor({self.name!r}, id={self.id}, type={self.type!r})"
+
+
+class BeamTags:
+    """Interned tags and key fragments of one (cell, beam)"""
+
+    __slots__ = ('beam_id', 'label', 'json', 'has_beam', 'key_suffix',
+                 'beam_key_prefix', 'series_prefix')
+
+    def __init__(self, cell_label: str, beam_id: Any):
+        self.beam_id = beam_id
+        self.label = sys.intern(str(beam_id))
+        self.json = json.dumps(beam_id)
+        self.has_beam = beam_id != NO_BEAM
+        self.key_suffix = ':beam_' + self.label
+        self.beam_key_prefix = beam_kpi_key(beam_id, cell_label, '')
+        self.series_prefix = f"{cell_label}:beam_{self.label}:"
+
+
+class CellTags:
+    """Interned tags and key fragments of one cell, with its beam table"""
+
+    __slots__ = ('cell_id', 'label', 'json', 'key_prefix', 'series_prefix',
+                 'beams', 'max_beams')
+
+    def __init__(self, cell_id: Any, max_beams: int = 1024):
+        self.cell_id = cell_id
+        self.label = sys.intern(str(cell_id))
+        self.json = json.dumps(cell_id)
+        self.key_prefix = 'kpi:' + self.label + ':'
+        self.series_prefix = self.label + ':'
+        self.beams: Dict[Any, BeamTags] = {}
+        self.max_beams = max_beams
+
+    def beam(self, beam_id: Any) -> BeamTags:
+        """Tags of a beam reported by this cell"""
+        try:
+            return self.beams[beam_id]
+        except KeyError:
+            pass
+        except TypeError:
+            # Unhashable beam id from a malformed indication
+            return BeamTags(self.label, beam_id)
+
+        if len(self.beams) >= self.max_beams:
+            self.beams.clear()
+        tags = self.beams[beam_id] = BeamTags(self.label, beam_id)
+        return tags
+
+    def record_prefix(self, timestamp: Any, ue_id: Any) -> str:
+        """JSON record fields shared by all measurements of an indication"""
+        return ('{"timestamp": ' + json.dumps(timestamp)
+                + ', "cell_id": ' + self.json
+                + ', "ue_id": ' + json.dumps(ue_id)
+                + ', "beam_id": ')
+
+
+class KPICatalog:
+    """
+    Lookup table of compiled KPI descriptors and interned cell tags
+
+    Features:
+    - One dict lookup per measurement returns a slot-based descriptor
+    - Redis keys and JSON records are assembled from cached fragments
+    - Cell and beam strings are interned once and reused across indications
+    - Bounded tag tables (cleared when full) so malformed ids cannot grow memory
+    """
+
+    def __init__(self, definitions: Optional[Dict[str, Dict[str, Any]]] = None,
+                 max_cells: int = 10000):
+        """
+        Initialize KPI catalog
+
+        Args:
+            definitions: KPI name -> definition (defaults to KPI_DEFINITIONS)
+            max_cells: Size of the interned cell table
+        """
+        definitions = KPI_DEFINITIONS if definitions is None else definitions
+        self.descriptors: Dict[str, KPIDescriptor] = {
+            name: KPIDescriptor(name, definition) for name, definition in definitions.items()
+        }
+        self.max_cells = max_cells
+        self._cells: Dict[Any, CellTags] = {}
+
+    def get(self, kpi_name: Any) -> Optional[KPIDescriptor]:
+        """Descriptor of a KPI, None for unknown KPIs"""
+        try:
+            return self.descriptors.get(kpi_name)
+        except TypeError:
+            return None
+
+    def __contains__(self, kpi_name: Any) -> bool:
+        return self.get(kpi_name) is not None
+
+    def __iter__(self) -> Iterator[KPIDescriptor]:
+        return iter(self.descriptors.values())
+
+    def __len__(self) -> int:
+        return len(self.descriptors)
+
+    def names(self):
+        """KPI names in definition order"""
+        return list(self.descriptors)
+
+    def cell(self, cell_id: Any) -> CellTags:
+        """Interned tags of a cell"""
+        try:
+            return self._cells[cell_id]
+        except KeyError:
+            pass
+        except TypeError:
+            return CellTags(cell_id)
+
+        if len(self._cells) >= self.max_cells:
+            self._cells.clear()
+        tags = self._cells[cell_id] = CellTags(cell_id)
+        return tags
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get catalog statistics"""
+        return {
+            'kpis': len(self.descriptors),
+            'cells': len(self._cells),
+            'max_cells': self.max_cells
+        }
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Live KPI stream broker for KPIMON xApp
+Fans out KPI updates from indication processing to long-lived client
+streams (Server-Sent Events) with per-client filters and rate coalescing
+
+Author: O-RAN RIC Platform Team
+Date: 2025-11-19
+"""
+
+import json
+import time
+import logging
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+STREAM_CLIENTS = Gauge('kpimon_stream_clients', 'Connected live KPI stream clients')
+STREAM_UPDATES = Counter(
+    'kpimon_stream_updates_total',
+    'KPI updates offered to stream clients',
+    ['result']
+)
+STREAM_REJECTED = Counter('kpimon_stream_rejected_total', 'Stream connections refused (client limit)')
+
+# Client reconnect delay advertised in the SSE stream
+RECONNECT_MS = 3000
+
+# (cell label, beam label, kpi name)
+UpdateKey = Tuple[str, str, str]
+
+
+class StreamLimitError(RuntimeError):
+    """The broker already serves max_clients streams"""
+
+
+class KPISubscription:
+    """
+    One client stream: filters plus the coalesced updates not yet sent
+
+    Updates for the same (cell, beam, KPI) overwrite each other until the
+    next emit, so a client never receives more than one value per key per
+    interval, however fast indications arrive.
+    """
+
+    def __init__(self, beams: Optional[Iterable[str]] = None, cells: Optional[Iterable[str]] = None,
+                 kpis: Optional[Iterable[str]] = None, min_interval_s: float = 0.5,
+                 max_pending: int = 4096):
+        self.beams = frozenset(beams) if beams else None
+        self.cells = frozenset(cells) if cells else None
+        self.kpis = frozenset(kpis) if kpis else None
+        self.min_interval = min_interval_s
+        self.max_pending = max_pending
+
+        self._pending: Dict[UpdateKey, Tuple[Any, Any]] = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._last_emit = 0.0
+        self.closed = False
+        self.sent = 0
+        self.coalesced = 0
+
+    def matches(self, cell: str, beam: str, kpi_name: str) -> bool:
+        """Whether an update passes this client's filters"""
+        return ((self.beams is None or beam in self.beams)
+                and (self.cells is None or cell in self.cells)
+                and (self.kpis is None or kpi_name in self.kpis))
+
+    def offer(self, key: UpdateKey, value: Any, timestamp: Any):
+        """Add (or overwrite) a pending update"""
+        with self._lock:
+            if key in self._pending:
+                self.coalesced += 1
+                STREAM_UPDATES.labels(result='coalesced').inc()
+            elif len(self._pending) >= self.max_pending:
+                STREAM_UPDATES.labels(result='dropped').inc()
+                return
+            else:
+                STREAM_UPDATES.labels(result='queued').inc()
+            self._pending[key] = (value, timestamp)
+        self._ready.set()
+
+    def close(self):
+        """End the stream (wakes a waiting next_updates)"""
+        self.closed = True
+        self._ready.set()
+
+    def next_updates(self, timeout: float) -> List[Dict[str, Any]]:
+        """
+        Wait for pending updates, honouring the minimum emit interval
+
+        Returns:
+            Updates to send ([] on timeout or when closed)
+        """
+        deadline = time.monotonic() + timeout
+        # Rate limit: do not emit before min_interval after the previous emit
+        wait_until = self._last_emit + self.min_interval
+        now = time.monotonic()
+        if wait_until > now:
+            time.sleep(min(wait_until, deadline) - now)
+
+        remaining = deadline - time.monotonic()
+        if not self._ready.wait(max(remaining, 0)) or self.closed:
+            return []
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._ready.clear()
+        self._last_emit = time.monotonic()
+        self.sent += len(pending)
+        return [
+            {'cell_id': cell, 'beam_id': beam, 'kpi': kpi_name, 'value': value, 'timestamp': ts}
+            for (cell, beam, kpi_name), (value, ts) in pending.items()
+        ]
+
+
+class KPIStreamBroker:
+    """
+    Publish/subscribe hub between indication processing and stream clients
+
+    Features:
+    - publish() is a no-op without clients, so ingestion pays nothing until
+      someone streams
+    - Per-client beam/cell/KPI filters and max update rate (coalescing)
+    - Bounded number of clients (each stream holds an HTTP worker thread)
+    - SSE framing with heartbeats so idle streams survive proxies and
+      disconnected clients are noticed
+    """
+
+    def __init__(self, max_clients: int = 8, max_rate_hz: float = 2.0,
+                 heartbeat_s: float = 15, max_pending: int = 4096):
+        """
+        Initialize stream broker
+
+        Args:
+            max_clients: Maximum concurrent streams
+            max_rate_hz: Highest update rate a client may request (and the default)
+            heartbeat_s: Idle interval after which a keep-alive comment is sent
+            max_pending: Maximum distinct pending updates per client
+        """
+        self.max_clients = max(1, int(max_clients))
+        self.max_rate_hz = float(max_rate_hz)
+        self.heartbeat = float(heartbeat_s)
+        self.max_pending = max(1, int(max_pending))
+
+        self._subscribers: List[KPISubscription] = []
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict] = None) -> 'KPIStreamBroker':
+        """Create a broker from the `stream` config section"""
+        config = config or {}
+        return cls(
+            max_clients=config.get('max_clients', 8),
+            max_rate_hz=config.get('max_rate_hz', 2.0),
+            heartbeat_s=config.get('heartbeat_s', 15),
+            max_pending=config.get('max_pending', 4096)
+        )
+
+    def publish(self, cell: str, beam: str, kpi_name: str, value: Any, timestamp: Any):
+        """Offer a KPI update to every matching client"""
+        subscribers = self._subscribers
+        if not subscribers:
+            return
+        key = (cell, beam, kpi_name)
+        for subscription in subscribers:
+            if subscription.matches(cell, beam, kpi_name):
+                subscription.offer(key, value, timestamp)
+
+    def subscribe(self, beams: Optional[Iterable[str]] = None, cells: Optional[Iterable[str]] = None,
+                  kpis: Optional[Iterable[str]] = None,
+                  max_rate_hz: Optional[float] = None) -> KPISubscription:
+        """
+        Register a client stream
+
+        Args:
+            beams: Beam labels (str(beam_id)) to receive, None for all
+            cells: Cell ids to receive, None for all
+            kpis: KPI names to receive, None for all
+            max_rate_hz: Requested update rate, capped at the broker maximum
+
+        Raises:
+            StreamLimitError: max_clients streams are already open
+        """
+        rate = self.max_rate_hz if not max_rate_hz or max_rate_hz <= 0 \
+            else min(max_rate_hz, self.max_rate_hz)
+        subscription = KPISubscription(beams, cells, kpis, 1.0 / rate, self.max_pending)
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                self.rejected += 1
+                STREAM_REJECTED.inc()
+                raise StreamLimitError(f"Stream limit reached ({self.max_clients} clients)")
+            # Copy-on-write so publish() iterates without the lock
+            self._subscribers = self._subscribers + [subscription]
+            STREAM_CLIENTS.set(len(self._subscribers))
+        return subscription
+
+    def unsubscribe(self, subscription: KPISubscription):
+        """Remove a client stream"""
+        subscription.close()
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not subscription]
+            STREAM_CLIENTS.set(len(self._subscribers))
+
+    def close(self):
+        """End all streams"""
+        with self._lock:
+            subscribers, self._subscribers = self._subscribers, []
+            STREAM_CLIENTS.set(0)
+        for subscription in subscribers:
+            subscription.close()
+
+    def sse_events(self, subscription: KPISubscription) -> Iterator[str]:
+        """
+        Server-Sent Events for a subscription until it is closed
+
+        Yields `event: kpi` messages with a JSON {"updates": [...]} payload and
+        `: keepalive` comments when idle; unsubscribes when the client goes away.
+        """
+        try:
+            yield f"retry: {RECONNECT_MS}\n\n"
+            while not subscription.closed:
+                updates = subscription.next_updates(self.heartbeat)
+                if subscription.closed:
+                    break
+                if updates:
+                    yield f"event: kpi\ndata: {json.dumps({'updates': updates})}\n\n"
+                else:
+                    yield ": keepalive\n\n"
+        finally:
+            self.unsubscribe(subscription)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get broker statistics"""
+        subscribers = self._subscribers
+        return {
+            'clients': len(subscribers),
+            'max_clients': self.max_clients,
+            'max_rate_hz': self.max_rate_hz,
+            'rejected': self.rejected,
+            'sent': sum(s.sent for s in subscribers),
+            'coalesced': sum(s.coalesced for s in subscribers)
+        }
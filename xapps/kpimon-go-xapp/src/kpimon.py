@@ -8,11 +8,12 @@ Version: 1.1.0
 import sys
 import os
 import json
+import math
 import time
 import logging
 import threading
-from typing import Dict, List, Any
-from datetime import datetime
+from typing import Dict, List, Any, Set
+from datetime import datetime, timezone
 import redis
 import influxdb_client
 from influxdb_client.client.write_api import SYNCHRONOUS
@@ -29,10 +30,47 @@ import numpy as np
 
 # Import dual-path messenger
 from dual_path_messenger import DualPathMessenger, EndpointConfig, CommunicationPath
+from indication_codec import decode_indication
+from admission_control import AdmissionController, LoadShed
+from indication_routes import indication_response, indication_batch_response
+from http_server import XappHTTPServer
 
 # Import beam query API
 from beam_query_api import beam_api, init_beam_service
 
+# Import pipelined Redis writer and beam/cell indexes
+from redis_writer import RedisBatchWriter
+from beam_index import BeamIndex
+from alarm_sink import AlarmSink
+from timeline_store import TimelineStore
+
+# Import bounded KPI buffer and asynchronous InfluxDB writer
+from kpi_buffer import KPIRingBuffer
+from influx_writer import InfluxBatchWriter, KPIPoint, written_span
+
+# Import compiled KPI catalog and batch anomaly detector
+from kpi_catalog import KPI_DEFINITIONS, KPICatalog
+from anomaly_detector import AnomalyDetector
+
+# Import opt-in hot-path stage profiler and metric cardinality guard
+from stage_profiler import StageProfiler
+from cardinality_guard import CardinalityGuard
+
+# Import sharded multi-process ingestion
+from ingest_shards import ShardedIngestor, multiprocess_enabled, multiprocess_registry
+
+# Import E2 subscription state machine
+from subscription_manager import SubscriptionManager, fetch_connected_nodes
+
+# Import in-process latest KPI cache for current beam queries
+from latest_cache import LatestKPICache
+
+# Import live KPI stream broker (Server-Sent Events)
+from kpi_stream import KPIStreamBroker
+
+# Import result cache for historical/time-series beam queries
+from query_cache import QueryResultCache
+
 # Configure logging
 logger = Logger(name="KPIMON")
 logger.set_level(logging.INFO)
@@ -40,7 +78,8 @@ logger.set_level(logging.INFO)
 # Prometheus metrics
 MESSAGES_RECEIVED = Counter('kpimon_messages_received_total', 'Total number of messages received')
 MESSAGES_PROCESSED = Counter('kpimon_messages_processed_total', 'Total number of messages processed')
-KPI_VALUES = Gauge('kpimon_kpi_value', 'Current KPI values', ['kpi_type', 'cell_id', 'beam_id'])
+KPI_VALUES = Gauge('kpimon_kpi_value', 'Current KPI values', ['kpi_type', 'cell_id', 'beam_id'],
+                   multiprocess_mode='liveall')
 PROCESSING_TIME = Histogram('kpimon_processing_time_seconds', 'Time spent processing messages')
 
 # E2SM-KPM v3.0 Message Types (O-RAN Release J)
@@ -63,10 +102,10 @@ class KPIMonitor:
     def __init__(self, config_path: str = "/app/config/config.json"):
         """Initialize KPIMON xApp"""
         self.config = self._load_config(config_path)
+        # One TTL for KPI records and everything pointing at them (indexes, local cache)
+        self.redis_ttl = self.config['redis'].get('ttl', 300)
         self.sdl = SDLWrapper(use_fake_sdl=False)
         self.running = False
-        self.subscriptions = {}
-        self.kpi_buffer = []
 
         # Initialize dual-path messenger
         self.messenger = DualPathMessenger(
@@ -83,32 +122,72 @@ class KPIMonitor:
         self._init_redis()
         self._init_influxdb()
         
-        # KPI definitions for O-RAN Release J
-        self.kpi_definitions = {
-            "DRB.UEThpDl": {"id": 1, "type": "throughput", "unit": "Mbps"},
-            "DRB.UEThpUl": {"id": 2, "type": "throughput", "unit": "Mbps"},
-            "DRB.RlcSduDelayDl": {"id": 3, "type": "latency", "unit": "ms"},
-            "DRB.PacketLossDl": {"id": 4, "type": "loss", "unit": "percentage"},
-            "RRU.PrbUsedDl": {"id": 5, "type": "resource", "unit": "percentage"},
-            "RRU.PrbUsedUl": {"id": 6, "type": "resource", "unit": "percentage"},
-            "DRB.MeanActiveUeDl": {"id": 7, "type": "load", "unit": "count"},
-            "DRB.MeanActiveUeUl": {"id": 8, "type": "load", "unit": "count"},
-            "RRC.ConnMax": {"id": 9, "type": "connection", "unit": "count"},
-            "RRC.ConnMean": {"id": 10, "type": "connection", "unit": "count"},
-            "RRC.ConnEstabSucc": {"id": 11, "type": "success_rate", "unit": "percentage"},
-            "HO.AttOutInterEnbN1": {"id": 12, "type": "handover", "unit": "count"},
-            "HO.SuccOutInterEnbN1": {"id": 13, "type": "handover", "unit": "count"},
-            "PDCP.BytesTransmittedDl": {"id": 14, "type": "volume", "unit": "bytes"},
-            "PDCP.BytesTransmittedUl": {"id": 15, "type": "volume", "unit": "bytes"},
-            "UE.RSRP": {"id": 16, "type": "signal", "unit": "dBm"},
-            "UE.RSRQ": {"id": 17, "type": "signal", "unit": "dB"},
-            "UE.SINR": {"id": 18, "type": "signal", "unit": "dB"},
-            "QoS.DlPktDelayPerQCI": {"id": 19, "type": "qos", "unit": "ms"},
-            "QoS.UlPktDelayPerQCI": {"id": 20, "type": "qos", "unit": "ms"},
-            # Beam-specific KPIs (5G NR beamforming)
-            "L1-RSRP.beam": {"id": 21, "type": "beam_signal", "unit": "dBm", "beam_specific": True},
-            "L1-SINR.beam": {"id": 22, "type": "beam_signal", "unit": "dB", "beam_specific": True}
-        }
+        # KPI definitions for O-RAN Release J, compiled for the indication path
+        self.kpi_definitions = KPI_DEFINITIONS
+        self.kpi_catalog = KPICatalog(self.kpi_definitions)
+        detection_config = self.config.get('anomaly_detection', {})
+        self.anomaly_detector = AnomalyDetector.from_config(
+            self.kpi_catalog, detection_config
+        ) if detection_config.get('enabled', True) else None
+
+        # One tracked E2SM-KPM subscription per E2 node (no blind resubscribes)
+        sub_config = self.config['subscription']
+        self.subscription_manager = SubscriptionManager.from_config({
+            "event_trigger": {
+                "report_period": sub_config['report_period']
+            },
+            "actions": [
+                {
+                    "action_id": 1,
+                    "action_type": "report",
+                    "measurements": list(self.kpi_definitions.keys()),
+                    "granularity_period": sub_config['granularity_period']
+                }
+            ]
+        }, sub_config)
+
+        # Bounded kpimon_kpi_value series (LRU/stale eviction, optional beam buckets;
+        # a hard cap with bucketed beams when worker metrics are merged via mmap files)
+        self.kpi_metrics = CardinalityGuard.from_config(
+            KPI_VALUES, self.config.get('metrics_cardinality'),
+            multiprocess=multiprocess_enabled()
+        )
+
+        # Optional sharding of indications by cell_id across worker processes
+        # (workers send their InfluxDB write spans back for query cache invalidation)
+        sharding_config = self.config.get('sharding', {})
+        self.ingestor = ShardedIngestor.from_config(
+            self._run_shard_worker, sharding_config, on_written=self._invalidate_query_cache
+        ) if sharding_config.get('enabled', False) else None
+        self.report_written = None
+
+        # Points waiting for InfluxDB (each ingestion worker allocates its own when sharded)
+        self.kpi_buffer = KPIRingBuffer.from_config(self.config.get('kpi_buffer')) \
+            if not self.ingestor else None
+
+        # Latest value per (cell, beam, KPI) for local current-KPI queries
+        # (not in the sharded parent: workers process the indications)
+        cache_config = self.config.get('latest_cache', {})
+        self.latest_cache = LatestKPICache.from_config(
+            self.kpi_catalog.names(), cache_config,
+            ttl_s=self.redis_ttl
+        ) if cache_config.get('enabled', True) and not self.ingestor else None
+
+        # Reuse of InfluxDB query results across identical dashboard requests
+        query_cache_config = self.config.get('query_cache', {})
+        self.query_cache = QueryResultCache.from_config(query_cache_config) \
+            if query_cache_config.get('enabled', True) else None
+
+        # Live KPI push to /api/beam/stream clients (not in the sharded parent either)
+        stream_config = self.config.get('stream', {})
+        self.kpi_stream = KPIStreamBroker.from_config(stream_config) \
+            if stream_config.get('enabled', True) and not self.ingestor else None
+
+        # Bounded concurrency/queue for the HTTP fallback indication route
+        self.admission = AdmissionController.from_config(self.config.get('admission'))
+
+        # Opt-in per-stage profiling of indication processing
+        self.profiler = StageProfiler.from_config(self.config.get('profiling'))
 
         # Initialize Flask app for health checks and beam query API
         self.flask_app = Flask(__name__)
@@ -117,6 +196,13 @@ class KPIMonitor:
         # Register beam query API blueprint
         self.flask_app.register_blueprint(beam_api)
 
+        # Production WSGI server for the Flask app (port 8081)
+        self.http_server = XappHTTPServer.from_config(
+            self.flask_app, self.config.get('http_server'), port=8081, name='kpimon',
+            busy_threads=self.admission.max_threads
+            + (self.kpi_stream.max_clients if self.kpi_stream else 0)
+        )
+
         logger.info(f"KPIMON xApp initialized with dual-path communication")
 
     def _register_endpoints(self):
@@ -147,18 +233,129 @@ class KPIMonitor:
                 "redis": {
                     "host": "redis-service.ricplt",
                     "port": 6379,
-                    "db": 0
+                    "db": 0,
+                    "ttl": 300,  # KPI records, beam/cell indexes and latest_cache entries
+                    "batch": {
+                        "max_batch_size": 1000,
+                        "max_latency_ms": 0,  # 0 = one pipeline per indication
+                        "transaction": False
+                    }
                 },
                 "influxdb": {
                     "url": "http://influxdb-service.ricplt:8086",
                     "token": "my-token",
                     "org": "oran",
-                    "bucket": "kpimon"
+                    "bucket": "kpimon",
+                    "writer": {
+                        "max_in_flight": 4,
+                        "max_retries": 5,
+                        "retry_base_ms": 200,
+                        "retry_max_ms": 10000
+                    }
                 },
                 "subscription": {
                     "report_period": 1000,  # ms
                     "granularity_period": 1000,  # ms
-                    "max_measurements": 20
+                    "max_measurements": 20,
+                    "ran_function_id": 2,  # E2SM-KPM
+                    "e2_nodes": [],  # empty: one RMR-routed subscription
+                    "e2mgr_url": "",  # poll connected nodes from the E2 Manager
+                    "node_refresh_interval_s": 30,
+                    "check_interval_s": 5,
+                    "response_timeout_s": 10,
+                    "retry_backoff_s": 5,
+                    "max_backoff_s": 300,
+                    "delete_timeout_s": 10,
+                    "max_delete_attempts": 3
+                },
+                "latest_cache": {
+                    "enabled": True,
+                    "max_slots": 8192,  # (cell, beam) pairs
+                    "max_ues_per_slot": 4096,
+                    "authoritative": True  # single replica: list beam cells locally
+                },
+                "query_cache": {
+                    "enabled": True,
+                    "max_entries": 1024,
+                    "bucket_s": 10,  # relative ranges (last_15m) reused within a bucket
+                    "closed_ttl_s": 300,  # past windows, dropped early on late writes
+                    "wait_timeout_s": 30  # wait for an identical in-flight query
+                },
+                "stream": {
+                    "enabled": True,
+                    "max_clients": 8,  # each open stream holds an HTTP worker thread
+                    "max_rate_hz": 2.0,  # per-client update cap (updates coalesced)
+                    "heartbeat_s": 15,
+                    "max_pending": 4096  # distinct (cell, beam, KPI) updates per client
+                },
+                "http_server": {
+                    "server": "waitress",  # or "werkzeug" (development server)
+                    "threads": 40,  # >= admission slots + queue + stream.max_clients + probe_threads
+                    "probe_threads": 2,  # kept free for health/metrics probes at saturation
+                    "connection_limit": 100,
+                    "keepalive_timeout_s": 30,
+                    "backlog": 1024,
+                    "shutdown_timeout_s": 5  # in-flight requests drained on stop
+                },
+                "admission": {
+                    "max_concurrent": 8,  # indications processed at once
+                    "max_queue": 16,  # waiting beyond this: 429 (each waiter holds a worker thread)
+                    "queue_timeout_s": 0.5,  # no slot in time: 503
+                    "retry_after_s": 1,
+                    "control_reserve": 2  # extra slots for control-plane messages
+                },
+                "kpi_buffer": {
+                    "capacity": 100000,
+                    "overflow_policy": "drop_oldest",  # drop_oldest, block, spill
+                    "block_timeout_ms": 100,
+                    "batch_size": 1000,
+                    "flush_interval_ms": 1000  # max age of buffered points
+                },
+                "anomaly_detection": {
+                    "enabled": True,
+                    "overrides": [],  # {"cell_id", "kpi", "threshold"[, "beam_id", "direction"]}
+                    "zscore": {
+                        "enabled": False,
+                        "ewma_alpha": 0.1,
+                        "threshold": 4.0,
+                        "min_samples": 30
+                    },
+                    "max_series": 100000
+                },
+                "alarms": {
+                    "dedup_window_s": 60,
+                    "max_list_length": 1000,
+                    "ttl": 86400,
+                    "summary_interval_s": 10,
+                    "max_active": 10000
+                },
+                "timeline": {
+                    "retention_s": 900,
+                    "trim_interval_s": 10,
+                    "rollups": [
+                        {"resolution_s": 1, "retention_s": 3600},
+                        {"resolution_s": 10, "retention_s": 21600},
+                        {"resolution_s": 60, "retention_s": 86400}
+                    ]
+                },
+                "metrics_cardinality": {
+                    "max_series": 10000,
+                    "stale_after_s": 600,
+                    "beam_mode": "per_beam",  # per_beam, bucket, none
+                    "beam_bucket_size": 8
+                },
+                "sharding": {
+                    "enabled": False,
+                    "workers": 2,
+                    "queue_size": 10000,
+                    "put_timeout_ms": 0,
+                    "restart_backoff_s": 1.0  # pause after restarting crashed workers
+                },
+                "profiling": {
+                    "enabled": False,
+                    "sample_rate": 0.01,
+                    "stack_interval_ms": 10,
+                    "max_duration_s": 30
                 }
             }
     
@@ -172,24 +369,59 @@ class KPIMonitor:
                 decode_responses=True
             )
             self.redis_client.ping()
+            self.redis_writer = RedisBatchWriter.from_config(
+                self.redis_client,
+                self.config['redis'].get('batch')
+            )
+            self.beam_index = BeamIndex(ttl=self.redis_ttl)
+            self.alarm_sink = AlarmSink.from_config(self.redis_writer, self.config.get('alarms'))
+            self.timeline = TimelineStore.from_config(self.config.get('timeline'))
             logger.info("Redis connection established")
         except Exception as e:
             logger.error(f"Failed to connect to Redis: {e}")
             self.redis_client = None
+            self.redis_writer = None
+            self.beam_index = None
+            self.alarm_sink = None
+            self.timeline = None
     
     def _init_influxdb(self):
         """Initialize InfluxDB connection"""
         try:
+            writer_config = self.config['influxdb'].get('writer', {})
             self.influx_client = influxdb_client.InfluxDBClient(
                 url=self.config['influxdb']['url'],
                 token=self.config['influxdb']['token'],
-                org=self.config['influxdb']['org']
+                org=self.config['influxdb']['org'],
+                connection_pool_maxsize=writer_config.get('max_in_flight', 4)
             )
+            # Each writer thread issues one synchronous request per batch
             self.write_api = self.influx_client.write_api(write_options=SYNCHRONOUS)
+            self.influx_writer = InfluxBatchWriter.from_config(
+                self.write_api, self.config['influxdb'], on_written=self._on_influx_written
+            )
             logger.info("InfluxDB connection established")
         except Exception as e:
             logger.error(f"Failed to connect to InfluxDB: {e}")
             self.influx_client = None
+            self.influx_writer = None
+
+    def _on_influx_written(self, batch: List):
+        """Drop cached query results the written points fall into"""
+        if self.query_cache is None and self.report_written is None:
+            return
+        beams, oldest = written_span(batch)
+        if oldest is None:
+            return
+        if self.report_written:
+            # Ingestion worker: the parent serves queries and owns the cache
+            self.report_written(beams, oldest)
+        else:
+            self._invalidate_query_cache(beams, oldest)
+
+    def _invalidate_query_cache(self, beams: Set[str], since: float):
+        if self.query_cache is not None:
+            self.query_cache.invalidate(beams, since)
 
     def _setup_health_routes(self):
         """Setup Flask routes for health checks and E2 indications"""
@@ -216,60 +448,105 @@ class KPIMonitor:
             """Detailed communication path health status"""
             return jsonify(self.messenger.get_health_summary()), 200
 
+        @self.flask_app.route('/subscriptions', methods=['GET'])
+        def subscriptions():
+            """E2 subscriptions and their states"""
+            return jsonify({
+                **self.subscription_manager.get_stats(),
+                "subscriptions": self.subscription_manager.subscriptions()
+            }), 200
+
+        @self.flask_app.route('/debug/profile', methods=['GET'])
+        def debug_profile():
+            """Per-stage processing breakdown, optionally with sampled stacks"""
+            result = self.profiler.breakdown()
+            if request.args.get('flamegraph', 'false').lower() == 'true':
+                try:
+                    duration = float(request.args.get('duration_s', 5))
+                    result['flamegraph'] = self.profiler.sample_stacks(duration)
+                except ValueError:
+                    return jsonify({"error": "duration_s must be a number"}), 400
+                except RuntimeError as e:
+                    return jsonify({"error": str(e)}), 409
+            return jsonify(result), 200
+
+        @self.flask_app.route('/debug/profile', methods=['POST'])
+        def debug_profile_configure():
+            """Enable/disable profiling, change the sample rate or reset statistics"""
+            data = request.get_json(silent=True) or {}
+            try:
+                self.profiler.configure(data.get('enabled'), data.get('sample_rate'))
+            except (TypeError, ValueError) as e:
+                return jsonify({"error": str(e)}), 400
+            if data.get('reset'):
+                self.profiler.reset()
+            return jsonify(self.profiler.breakdown()), 200
+
         @self.flask_app.route('/e2/indication', methods=['POST'])
         def e2_indication():
             """Receive E2 indications from simulator (for testing)"""
-            try:
-                # Increment received counter
-                MESSAGES_RECEIVED.inc()
-
-                data = request.get_json()
-                if not data:
-                    return jsonify({"error": "No data provided"}), 400
-
-                # Process the indication
-                self._handle_indication(json.dumps(data))
-
-                # Increment processed counter
-                MESSAGES_PROCESSED.inc()
-
-                return jsonify({
-                    "status": "success",
-                    "message": "Indication processed"
-                }), 200
-
-            except Exception as e:
-                logger.error(f"Error processing E2 indication: {e}")
-                return jsonify({"error": str(e)}), 500
+            MESSAGES_RECEIVED.inc()
+            # Sharded: the raw body goes to the cell's ingestion worker, which decodes it
+            if self.ingestor:
+                return indication_response(self.admission, self._submit_indication,
+                                           decode=False, message="Indication queued")
+            return indication_response(self.admission, self._process_indication)
+
+        @self.flask_app.route('/e2/indication/batch', methods=['POST'])
+        def e2_indication_batch():
+            """Receive a batch of E2 indications (JSON array or NDJSON, optionally gzip)"""
+            # Sharded: queue each item for its cell's worker (decoded fields pickle cheaply)
+            handler = self._submit_batch_item if self.ingestor else self._process_indication
+            return indication_batch_response(self.admission, handler, received=MESSAGES_RECEIVED.inc)
+
+    def _process_indication(self, indication):
+        """Process one indication received over HTTP"""
+        self._handle_indication(indication)
+        MESSAGES_PROCESSED.inc()
+
+    def _submit_indication(self, payload: bytes):
+        """Queue one raw HTTP indication for its ingestion worker"""
+        if not self.ingestor.submit(payload):
+            raise LoadShed(503, self.admission.retry_after, 'ingestion queue full')
+
+    def _submit_batch_item(self, indication):
+        """Queue one batch indication for its ingestion worker"""
+        if not self.ingestor.submit(indication.fields):
+            raise RuntimeError("Ingestion queue full")
 
     def start(self):
         """Start the xApp with dual-path communication"""
         logger.info("Starting KPIMON xApp (Release J - Dual-Path)...")
         self.running = True
 
+        # Fork the ingestion supervisor before any other thread exists
+        if self.ingestor:
+            self.ingestor.start()
+
         # Initialize beam query service
         init_beam_service(
             self.redis_client,
             self.influx_client,
             self.config['influxdb']['org'],
-            self.config['influxdb']['bucket']
+            self.config['influxdb']['bucket'],
+            redis_ttl=self.redis_ttl,
+            latest_cache=self.latest_cache,
+            stream=self.kpi_stream,
+            query_cache=self.query_cache
         )
         logger.info("Beam Query Service initialized")
 
-        # Start Prometheus metrics server
-        start_http_server(8080)
+        # Start Prometheus metrics server (merging worker metrics when sharded)
+        registry = multiprocess_registry() if self.ingestor else None
+        if registry:
+            start_http_server(8080, registry=registry)
+        else:
+            start_http_server(8080)
         logger.info("Prometheus metrics server started on port 8080")
 
-        # Start Flask server on port 8081 (health checks + beam query API)
-        flask_thread = threading.Thread(target=lambda: self.flask_app.run(
-            host='0.0.0.0',
-            port=8081,
-            debug=False,
-            use_reloader=False
-        ))
-        flask_thread.daemon = True
-        flask_thread.start()
-        logger.info("Flask server started on port 8081 (health checks + beam query API)")
+        # Start HTTP server on port 8081 (health checks + beam query API)
+        self.http_server.start()
+        logger.info("HTTP server started on port 8081 (health checks + beam query API)")
 
         # Initialize RMR through DualPathMessenger
         rmr_initialized = self.messenger.initialize_rmr(use_fake_sdl=False)
@@ -283,14 +560,19 @@ class KPIMonitor:
         self.messenger.start()
 
         # Start subscription thread
-        sub_thread = threading.Thread(target=self._subscription_manager)
+        sub_thread = threading.Thread(target=self._subscription_loop)
         sub_thread.daemon = True
         sub_thread.start()
 
-        # Start KPI processor thread
-        processor_thread = threading.Thread(target=self._kpi_processor)
-        processor_thread.daemon = True
-        processor_thread.start()
+        # Start Redis batch flusher (only active when coalescing across indications)
+        if self.redis_writer:
+            self.redis_writer.start()
+
+        # Start KPI processor thread (workers run their own when sharded)
+        if not self.ingestor:
+            processor_thread = threading.Thread(target=self._kpi_processor)
+            processor_thread.daemon = True
+            processor_thread.start()
 
         # Run the xApp
         logger.info("KPIMON xApp started successfully")
@@ -302,9 +584,62 @@ class KPIMonitor:
         else:
             logger.info("Running in HTTP-only mode")
 
-        # Keep main thread alive
+        # Keep main thread alive and report ingestion worker restarts
         while self.running:
             time.sleep(1)
+            if self.ingestor:
+                self.ingestor.check_workers()
+                if not self.ingestor.supervising and self.running:
+                    # Nobody left to process indications: let Kubernetes restart the pod
+                    logger.error("Ingestion supervisor exited, stopping KPIMON")
+                    self.stop()
+                    sys.exit(1)
+
+    def _run_shard_worker(self, shard: int, work_queue):
+        """Ingestion worker process: processes the indications of its cells in order"""
+        # Forked from the parent: open our own connections, buffer and writers
+        # (queries are served by the parent: written spans go back to its result cache)
+        self.report_written = self.ingestor.report_written
+        self.ingestor = None
+        self.query_cache = None
+        self._init_redis()
+        self._init_influxdb()
+        self.kpi_buffer = KPIRingBuffer.from_config(self.config.get('kpi_buffer'))
+        self.running = True
+
+        if self.redis_writer:
+            self.redis_writer.start()
+        processor_thread = threading.Thread(target=self._kpi_processor)
+        processor_thread.daemon = True
+        processor_thread.start()
+        logger.info(f"Ingestion worker {shard} started (pid {os.getpid()})")
+
+        while True:
+            payload = work_queue.get()
+            if payload is None:
+                break
+            try:
+                with PROCESSING_TIME.time():
+                    self._handle_indication(payload)
+                MESSAGES_PROCESSED.inc()
+            except Exception as e:
+                logger.error(f"Ingestion worker {shard} failed to process indication: {e}")
+
+        # Drain what is still buffered, then flush and close our writers
+        self.running = False
+        processor_thread.join(timeout=5)
+        remaining = self.kpi_buffer.drain(len(self.kpi_buffer))
+        if remaining and self.influx_writer:
+            self.influx_writer.submit(remaining)
+        if self.alarm_sink:
+            self.alarm_sink.flush(force=True)
+        if self.redis_writer:
+            self.redis_writer.stop()
+        if self.influx_writer:
+            self.influx_writer.close()
+        if self.influx_client:
+            self.influx_client.close()
+        logger.info(f"Ingestion worker {shard} stopped")
     
     def _handle_message_internal(self, xapp, summary, sbuf):
         """Internal message handler for DualPathMessenger"""
@@ -313,13 +648,17 @@ class KPIMonitor:
         msg_type = summary.get(rmr.RMR_MS_MSG_TYPE, summary.get('message type', 0))
         logger.debug(f"Received message type: {msg_type}")
 
-        # Extract payload from buffer
+        # Extract payload from buffer (kept as bytes, decoders read them directly)
         if sbuf:
-            payload_bytes = rmr.get_payload(sbuf)
-            payload = payload_bytes.decode('utf-8') if payload_bytes else ""
+            payload = rmr.get_payload(sbuf) or b""
         else:
             payload = summary.get('payload', '{}')
 
+        # Indications are processed (and counted) by the cell's worker when sharded
+        if msg_type == RIC_INDICATION and self.ingestor:
+            self.ingestor.submit(payload)
+            return
+
         try:
             with PROCESSING_TIME.time():
                 if msg_type == RIC_INDICATION:
@@ -338,81 +677,113 @@ class KPIMonitor:
     
     def _handle_indication(self, payload):
         """Handle RIC Indication messages containing KPIs with beam_id support"""
+        trace = self.profiler.start()
         try:
-            # Parse E2SM-KPM v3.0 indication
-            indication = json.loads(payload)
+            # Parse E2SM-KPM v3.0 indication (raw bytes, or already decoded on the HTTP path)
+            indication = decode_indication(payload)
+            if trace:
+                trace.mark('json_decode')
 
             # Extract KPI data (with backward compatibility)
-            cell_id = indication.get('cell_id')
-            ue_id = indication.get('ue_id')
-            beam_id = indication.get('beam_id', 'n/a')  # NEW: Extract beam_id (SSB Index)
-            timestamp = indication.get('timestamp', datetime.now().isoformat())
-            measurements = indication.get('measurements', [])
+            cell_id = indication.cell_id
+            ue_id = indication.ue_id
+            beam_id = indication.beam_id  # NEW: Extract beam_id (SSB Index), 'n/a' if absent
+            timestamp = indication.timestamp or datetime.now(timezone.utc).isoformat()
+            measurements = indication.measurements
 
             logger.debug(f"Received {len(measurements)} measurements from cell {cell_id}, beam {beam_id}")
 
-            # Process each measurement
-            for measurement in measurements:
-                kpi_name = measurement.get('name')
-                kpi_value = measurement.get('value')
-                # Beam-specific measurements may have beam_id in the measurement itself
-                measurement_beam_id = measurement.get('beam_id', beam_id)
-
-                if kpi_name in self.kpi_definitions:
-                    kpi_def = self.kpi_definitions[kpi_name]
-                    is_beam_specific = kpi_def.get('beam_specific', False)
-
-                    kpi_data = {
-                        'timestamp': timestamp,
-                        'cell_id': cell_id,
-                        'ue_id': ue_id,
-                        'beam_id': measurement_beam_id,  # NEW: Include beam_id
-                        'kpi_name': kpi_name,
-                        'kpi_value': kpi_value,
-                        'kpi_type': kpi_def['type'],
-                        'unit': kpi_def['unit'],
-                        'beam_specific': is_beam_specific
-                    }
-
-                    # Add to buffer for batch processing
-                    self.kpi_buffer.append(kpi_data)
-
-                    # Update Prometheus metrics with beam_id label
-                    KPI_VALUES.labels(
-                        kpi_type=kpi_name,
-                        cell_id=cell_id,
-                        beam_id=str(measurement_beam_id)
-                    ).set(kpi_value)
-
-                    # Store in Redis for real-time access
-                    if self.redis_client:
-                        # Store with beam_id in key for beam-specific KPIs
-                        if is_beam_specific:
-                            key = f"kpi:{cell_id}:{kpi_name}:beam_{measurement_beam_id}"
-                        else:
-                            key = f"kpi:{cell_id}:{kpi_name}"
+            # All Redis writes of this indication go out in one pipeline
+            redis_ops = []
+            indication_beams = set()
+            latest = self.latest_cache
+            stream = self.kpi_stream
 
-                        self.redis_client.setex(key, 300, json.dumps(kpi_data))
+            # Interned cell tags and the JSON fields shared by all measurements
+            catalog = self.kpi_catalog
+            cell = catalog.cell(cell_id)
+            record_prefix = cell.record_prefix(timestamp, ue_id)
+            epoch = self.timeline.to_epoch(timestamp) if self.timeline else None
+            if trace:
+                trace.mark('definition_lookup')
 
-                        # Additional beam-centric storage for beam query API
-                        beam_key = f"kpi:beam:{measurement_beam_id}:cell:{cell_id}:{kpi_name}"
-                        self.redis_client.setex(beam_key, 300, json.dumps(kpi_data))
-
-                        # Update UE-beam association if ue_id present
-                        if ue_id:
-                            ue_beam_key = f"ue:beam:{measurement_beam_id}:cell:{cell_id}:{ue_id}"
-                            self.redis_client.setex(ue_beam_key, 300, "1")
-
-                        # Store in timeline (cell-level for backward compatibility)
-                        self.redis_client.zadd(f"kpi:timeline:{cell_id}", {timestamp: kpi_value})
-
-                        # NEW: Store beam-specific timeline
-                        if is_beam_specific and measurement_beam_id != 'n/a':
-                            beam_timeline_key = f"kpi:timeline:{cell_id}:beam_{measurement_beam_id}"
-                            self.redis_client.zadd(beam_timeline_key, {timestamp: kpi_value})
+            # Process each measurement
+            for measurement in measurements:
+                kpi = catalog.get(measurement.get('name'))
+                if kpi is None:
+                    continue
+
+                # Non-numeric values are skipped before any store sees them, so one
+                # bad measurement does not drop the writes of the others
+                try:
+                    kpi_value = float(measurement.get('value'))
+                except (TypeError, ValueError):
+                    continue
+                if not math.isfinite(kpi_value):
+                    continue
 
-            # Trigger anomaly detection
-            self._detect_anomalies(cell_id, measurements, beam_id)
+                # Beam-specific measurements may have beam_id in the measurement itself
+                beam = cell.beam(measurement.get('beam_id', beam_id))
+                if trace:
+                    trace.mark('definition_lookup')
+
+                # Add to buffer for batch processing (serialized straight to line protocol)
+                self.kpi_buffer.append(KPIPoint(
+                    timestamp, cell_id, ue_id, beam.beam_id,
+                    kpi.name, kpi.type, kpi_value, kpi.beam_specific
+                ))
+                if trace:
+                    trace.mark('buffer_append')
+
+                # Update Prometheus metrics with beam_id label
+                self.kpi_metrics.set(kpi.name, cell.label, beam.label, kpi_value)
+                if trace:
+                    trace.mark('prometheus_update')
+
+                # Latest value for local current-KPI queries
+                if latest is not None:
+                    latest.update(cell.label, beam.label, kpi.name, kpi_value, timestamp, ue_id)
+                    if trace:
+                        trace.mark('latest_cache')
+
+                # Push to live stream clients (no-op when nobody is connected)
+                if stream is not None:
+                    stream.publish(cell.label, beam.label, kpi.name, kpi_value, timestamp)
+                    if trace:
+                        trace.mark('stream_publish')
+
+                # Store in Redis for real-time access
+                if self.redis_writer:
+                    kpi_json = kpi.record_json(record_prefix, beam, kpi_value)
+
+                    # Cell-centric key (with beam suffix for beam-specific KPIs)
+                    redis_ops.append(('setex', (kpi.cell_key(cell, beam), self.redis_ttl, kpi_json)))
+
+                    # Additional beam-centric storage for beam query API
+                    redis_ops.append(('setex', (beam.beam_key_prefix + kpi.name, self.redis_ttl, kpi_json)))
+                    indication_beams.add(beam.beam_id)
+
+                    # Per-KPI timeline scored by sample time (trimmed to retention)
+                    redis_ops.extend(self.timeline.sample_commands(
+                        cell.series_prefix + kpi.name, epoch, kpi_value, ue_id
+                    ))
+
+                    # Beam-specific timeline
+                    if kpi.beam_specific and beam.has_beam:
+                        redis_ops.extend(self.timeline.sample_commands(
+                            beam.series_prefix + kpi.name, epoch, kpi_value, ue_id
+                        ))
+                    if trace:
+                        trace.mark('redis_prepare')
+
+            if redis_ops:
+                # Maintain beam/cell/UE indexes used by the beam query API
+                redis_ops.extend(self.beam_index.index_commands(cell_id, indication_beams, ue_id))
+                self.redis_writer.submit(redis_ops)
+                if trace:
+                    trace.mark('redis_write')
+
+            self.profiler.finish(trace)
 
         except Exception as e:
             logger.error(f"Error handling indication: {e}")
@@ -421,17 +792,7 @@ class KPIMonitor:
         """Handle subscription response"""
         try:
             resp = json.loads(payload)
-            req_id = resp.get('request_id')
-            status = resp.get('status')
-            
-            if status == 'success':
-                self.subscriptions[req_id] = {
-                    'status': 'active',
-                    'timestamp': datetime.now().isoformat()
-                }
-                logger.info(f"Subscription {req_id} activated successfully")
-            else:
-                logger.error(f"Subscription {req_id} failed: {resp.get('reason')}")
+            self._send_subscription_requests(self.subscription_manager.on_response(resp))
         except Exception as e:
             logger.error(f"Error handling subscription response: {e}")
     
@@ -439,176 +800,95 @@ class KPIMonitor:
         """Handle subscription delete response"""
         try:
             resp = json.loads(payload)
-            req_id = resp.get('request_id')
-            
-            if req_id in self.subscriptions:
-                del self.subscriptions[req_id]
-                logger.info(f"Subscription {req_id} deleted successfully")
+            self.subscription_manager.on_delete_response(resp)
         except Exception as e:
             logger.error(f"Error handling subscription delete response: {e}")
+
+    def _send_subscription_requests(self, actions):
+        """Send RIC_SUB_REQ / RIC_SUB_DEL_REQ messages from the subscription manager"""
+        for msg_type, request in actions:
+            self._send_message(msg_type, json.dumps(request))
+            logger.info(f"Sent {'subscription' if msg_type == RIC_SUB_REQ else 'subscription delete'} "
+                        f"request: {request['request_id']}")
     
-    def _subscription_manager(self):
-        """Manage E2 subscriptions"""
+    def _subscription_loop(self):
+        """Reconcile E2 subscriptions with the set of connected E2 nodes"""
+        sub_config = self.config['subscription']
+        check_interval = sub_config.get('check_interval_s', 5)
+        refresh_interval = sub_config.get('node_refresh_interval_s', 30)
+        e2mgr_url = sub_config.get('e2mgr_url')
+        next_refresh = 0.0
+
         while self.running:
             try:
-                # Create subscription request for E2SM-KPM v3.0
-                sub_request = {
-                    "request_id": f"kpimon_{int(time.time())}",
-                    "ran_function_id": 2,  # E2SM-KPM
-                    "event_trigger": {
-                        "report_period": self.config['subscription']['report_period']
-                    },
-                    "actions": [
-                        {
-                            "action_id": 1,
-                            "action_type": "report",
-                            "measurements": list(self.kpi_definitions.keys()),
-                            "granularity_period": self.config['subscription']['granularity_period']
-                        }
-                    ]
-                }
-                
-                # Send subscription request
-                self._send_message(RIC_SUB_REQ, json.dumps(sub_request))
-                logger.info(f"Sent subscription request: {sub_request['request_id']}")
-                
-                # Wait before next subscription check
-                time.sleep(60)
+                # Follow E2 node connects/disconnects reported by the E2 Manager
+                if e2mgr_url and time.monotonic() >= next_refresh:
+                    next_refresh = time.monotonic() + refresh_interval
+                    try:
+                        self.subscription_manager.set_nodes(fetch_connected_nodes(e2mgr_url))
+                    except Exception as e:
+                        logger.warning(f"Failed to fetch E2 nodes from {e2mgr_url}: {e}")
+
+                self._send_subscription_requests(self.subscription_manager.reconcile())
+                time.sleep(check_interval)
                 
             except Exception as e:
                 logger.error(f"Error in subscription manager: {e}")
                 time.sleep(10)
     
     def _kpi_processor(self):
-        """Process KPI buffer and store in InfluxDB with beam_id support"""
+        """Drain the KPI buffer by size or age and hand batches to the InfluxDB writer"""
+        buffer_config = self.config.get('kpi_buffer', {})
+        batch_size = buffer_config.get('batch_size', 1000)
+        flush_interval = buffer_config.get('flush_interval_ms', 1000) / 1000.0
+
         while self.running:
             try:
-                if len(self.kpi_buffer) >= 100:  # Batch size
-                    batch = self.kpi_buffer[:100]
-                    self.kpi_buffer = self.kpi_buffer[100:]
-
-                    # Write to InfluxDB
-                    if self.influx_client:
-                        points = []
-                        for kpi in batch:
-                            # Create point with beam_id tag for filtering
-                            point = influxdb_client.Point("kpi_measurement") \
-                                .tag("cell_id", kpi['cell_id']) \
-                                .tag("kpi_name", kpi['kpi_name']) \
-                                .tag("kpi_type", kpi['kpi_type']) \
-                                .tag("beam_id", str(kpi.get('beam_id', 'n/a'))) \
-                                .field("value", float(kpi['kpi_value'])) \
-                                .time(kpi['timestamp'])
-
-                            # Add ue_id as field for better querying
-                            if kpi.get('ue_id'):
-                                point = point.tag("ue_id", kpi['ue_id'])
-
-                            # Mark if beam-specific for easy filtering
-                            if kpi.get('beam_specific', False):
-                                point = point.tag("beam_specific", "true")
-
-                            points.append(point)
-
-                        self.write_api.write(
-                            bucket=self.config['influxdb']['bucket'],
-                            org=self.config['influxdb']['org'],
-                            record=points
-                        )
-                        logger.debug(f"Wrote {len(points)} KPI points to InfluxDB")
-
-                time.sleep(1)
+                # Returns when batch_size points are buffered or the oldest is flush_interval old
+                batch = self.kpi_buffer.drain_batch(batch_size, flush_interval)
+
+                # Drop kpimon_kpi_value series of cells/beams that stopped reporting
+                self.kpi_metrics.evict_stale()
+
+                # Close timeline rollup buckets of series that stopped reporting
+                if self.timeline and self.redis_writer:
+                    self.redis_writer.submit(self.timeline.flush_rollups())
+
+                # Anomaly detection runs on the whole batch, off the indication path
+                if batch and self.anomaly_detector:
+                    self._detect_anomalies(batch)
+
+                # Write to InfluxDB asynchronously (blocks only when all writers are busy)
+                if batch and self.influx_writer:
+                    self.influx_writer.submit(batch)
 
             except Exception as e:
                 logger.error(f"Error in KPI processor: {e}")
                 time.sleep(5)
     
-    def _detect_anomalies(self, cell_id: str, measurements: List[Dict], beam_id=None):
-        """Detect anomalies in KPI data including beam-specific metrics"""
+    def _detect_anomalies(self, batch: List[KPIPoint]):
+        """Detect anomalies in a batch of KPI points including beam-specific metrics"""
         try:
-            # Simple threshold-based anomaly detection
-            anomalies = []
-
-            for measurement in measurements:
-                kpi_name = measurement.get('name')
-                kpi_value = measurement.get('value')
-                measurement_beam_id = measurement.get('beam_id', beam_id)
-
-                # Define thresholds
-                thresholds = {
-                    "DRB.PacketLossDl": 5.0,  # Alert if packet loss > 5%
-                    "RRU.PrbUsedDl": 90.0,     # Alert if PRB usage > 90%
-                    "RRU.PrbUsedUl": 90.0,     # Alert if PRB usage > 90%
-                    "UE.RSRP": -110.0,         # Alert if RSRP < -110 dBm
-                    "RRC.ConnEstabSucc": 95.0,  # Alert if success rate < 95%
-                    # Beam-specific thresholds
-                    "L1-RSRP.beam": -105.0,    # Alert if beam RSRP < -105 dBm
-                    "L1-SINR.beam": 10.0       # Alert if beam SINR < 10 dB
-                }
-
-                if kpi_name in thresholds:
-                    threshold = thresholds[kpi_name]
-
-                    if kpi_name in ["UE.RSRP", "L1-RSRP.beam"]:
-                        if kpi_value < threshold:
-                            anomaly = {
-                                'kpi': kpi_name,
-                                'value': kpi_value,
-                                'threshold': threshold,
-                                'type': 'below_threshold'
-                            }
-                            if measurement_beam_id is not None:
-                                anomaly['beam_id'] = measurement_beam_id
-                            anomalies.append(anomaly)
-                    elif kpi_name in ["RRC.ConnEstabSucc", "L1-SINR.beam"]:
-                        if kpi_value < threshold:
-                            anomaly = {
-                                'kpi': kpi_name,
-                                'value': kpi_value,
-                                'threshold': threshold,
-                                'type': 'below_threshold'
-                            }
-                            if measurement_beam_id is not None:
-                                anomaly['beam_id'] = measurement_beam_id
-                            anomalies.append(anomaly)
-                    else:
-                        if kpi_value > threshold:
-                            anomaly = {
-                                'kpi': kpi_name,
-                                'value': kpi_value,
-                                'threshold': threshold,
-                                'type': 'above_threshold'
-                            }
-                            if measurement_beam_id is not None:
-                                anomaly['beam_id'] = measurement_beam_id
-                            anomalies.append(anomaly)
-
-            if anomalies:
+            with self.profiler.time_stage('anomaly_detection'):
+                alarms = self.anomaly_detector.detect(batch)
+            for (cell_id, beam_id), anomalies in alarms.items():
                 self._raise_alarm(cell_id, anomalies, beam_id)
 
+            # Queued alarms and due summaries go out in one pipeline
+            if self.alarm_sink:
+                self.alarm_sink.flush()
+
         except Exception as e:
             logger.error(f"Error detecting anomalies: {e}")
     
     def _raise_alarm(self, cell_id: str, anomalies: List[Dict], beam_id=None):
         """Raise alarm for detected anomalies including beam-specific issues"""
-        alarm = {
-            'timestamp': datetime.now().isoformat(),
-            'cell_id': cell_id,
-            'beam_id': beam_id,
-            'anomalies': anomalies,
-            'severity': 'warning'
-        }
-
-        # Store alarm in Redis
-        if self.redis_client:
-            self.redis_client.rpush(f"alarms:{cell_id}", json.dumps(alarm))
-            self.redis_client.expire(f"alarms:{cell_id}", 86400)  # 24 hours
-
-            # Store beam-specific alarms separately for easier filtering
-            if beam_id is not None and beam_id != 'n/a':
-                beam_alarm_key = f"alarms:{cell_id}:beam_{beam_id}"
-                self.redis_client.rpush(beam_alarm_key, json.dumps(alarm))
-                self.redis_client.expire(beam_alarm_key, 86400)  # 24 hours
+        # Repeats within the dedup window only update counters
+        if self.alarm_sink:
+            alarm = self.alarm_sink.raise_alarm(cell_id, anomalies, beam_id)
+            if alarm is None:
+                return
+            anomalies = alarm['anomalies']
 
         logger.warning(f"Anomaly detected in cell {cell_id}, beam {beam_id}: {anomalies}")
     
@@ -630,8 +910,19 @@ class KPIMonitor:
         """Stop the xApp"""
         logger.info("Stopping KPIMON xApp...")
         self.running = False
-        if self.xapp:
-            self.xapp.stop()
+        if self.kpi_stream:
+            self.kpi_stream.close()
+        self.http_server.stop()
+        self._send_subscription_requests(self.subscription_manager.delete_all())
+        if self.ingestor:
+            self.ingestor.stop()
+        if self.alarm_sink:
+            self.alarm_sink.flush(force=True)
+        if self.redis_writer:
+            self.redis_writer.stop()
+        self.messenger.stop()
+        if self.influx_writer:
+            self.influx_writer.close()
         if self.influx_client:
             self.influx_client.close()
         logger.info("KPIMON xApp stopped")
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+In-process latest KPI cache for KPIMON xApp
+Keeps the most recent value of every (cell, beam, KPI) processed by this
+process in compact NumPy arrays so "current" beam queries skip Redis
+
+Author: O-RAN RIC Platform Team
+Date: 2025-11-19
+"""
+
+import time
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+CACHE_LOOKUPS = Counter(
+    'kpimon_latest_cache_lookups_total',
+    'Current-KPI lookups served by the in-process cache',
+    ['result']
+)
+CACHE_SLOTS = Gauge('kpimon_latest_cache_slots', '(cell, beam) slots held by the latest KPI cache')
+
+# (value, timestamp) of a cached KPI
+Entry = Tuple[float, Any]
+
+
+class LatestKPICache:
+    """
+    Latest value per (cell, beam, KPI) with TTL
+
+    Features:
+    - One row per interned (cell, beam) slot, one column per KPI; values and
+      update times in float64 arrays, timestamps as shared string references
+    - Entries older than ttl_s are treated as missing (same TTL as the Redis
+      records), so a lookup never returns data Redis would have expired
+    - Recent UEs per slot for the beam UE count
+    - Bounded slot table, cleared when full
+    - authoritative: this process sees every indication (one replica, no
+      sharding), so the beam -> cells listing can also be served locally
+    """
+
+    def __init__(self, kpi_names: Iterable[str], ttl_s: float = 300, max_slots: int = 8192,
+                 max_ues_per_slot: int = 4096, authoritative: bool = False):
+        """
+        Initialize latest KPI cache
+
+        Args:
+            kpi_names: KPI names (columns)
+            ttl_s: Entry lifetime in seconds
+            max_slots: Maximum (cell, beam) slots
+            max_ues_per_slot: Maximum UEs tracked per slot
+            authoritative: Whether this process receives all indications
+        """
+        self.kpi_names: List[str] = list(kpi_names)
+        self._columns: Dict[str, int] = {name: i for i, name in enumerate(self.kpi_names)}
+        self.ttl = float(ttl_s)
+        self.max_slots = max(1, int(max_slots))
+        self.max_ues_per_slot = max(1, int(max_ues_per_slot))
+        self.authoritative = authoritative
+
+        shape = (self.max_slots, len(self.kpi_names))
+        self._values = np.full(shape, np.nan)
+        self._updated = np.full(shape, -np.inf)
+        self._stamps = np.empty(shape, dtype=object)
+
+        # (cell label, beam label) -> row; beam label -> {cell label: row}
+        self._slots: Dict[Tuple[str, str], int] = {}
+        self._beam_cells: Dict[str, Dict[str, int]] = {}
+        self._ues: List[Dict[Any, float]] = []
+        self._lock = threading.Lock()
+
+        self.clears = 0
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, kpi_names: Iterable[str], config: Optional[Dict] = None,
+                    ttl_s: float = 300) -> 'LatestKPICache':
+        """Create a cache from the `latest_cache` config section"""
+        config = config or {}
+        return cls(
+            kpi_names,
+            ttl_s=ttl_s,
+            max_slots=config.get('max_slots', 8192),
+            max_ues_per_slot=config.get('max_ues_per_slot', 4096),
+            authoritative=config.get('authoritative', False)
+        )
+
+    def _slot(self, cell: str, beam: str) -> int:
+        row = self._slots.get((cell, beam))
+        if row is not None:
+            return row
+
+        if len(self._slots) >= self.max_slots:
+            self._clear()
+        row = len(self._slots)
+        self._slots[(cell, beam)] = row
+        self._beam_cells.setdefault(beam, {})[cell] = row
+        self._ues.append({})
+        CACHE_SLOTS.set(len(self._slots))
+        return row
+
+    def _clear(self):
+        self._slots.clear()
+        self._beam_cells.clear()
+        self._ues.clear()
+        self._values.fill(np.nan)
+        self._updated.fill(-np.inf)
+        self._stamps.fill(None)
+        self.clears += 1
+        logger.warning(f"Latest KPI cache full ({self.max_slots} slots), cleared")
+
+    def update(self, cell: str, beam: str, kpi_name: str, value: Any, timestamp: Any,
+               ue_id: Any = None, now: Optional[float] = None):
+        """
+        Record the latest value of a (cell, beam, KPI)
+
+        Args:
+            cell: Cell label
+            beam: Beam label (str(beam_id))
+            kpi_name: KPI name; unknown KPIs are ignored
+            value: Numeric KPI value; non-numeric values are ignored
+            timestamp: Indication timestamp returned with the value
+            ue_id: UE that reported the measurement (for the UE count)
+        """
+        column = self._columns.get(kpi_name)
+        if column is None:
+            return
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return
+        now = time.monotonic() if now is None else now
+
+        with self._lock:
+            row = self._slot(cell, beam)
+            self._values[row, column] = value
+            self._updated[row, column] = now
+            self._stamps[row, column] = timestamp
+            if ue_id is not None:
+                ues = self._ues[row]
+                if ue_id not in ues and len(ues) >= self.max_ues_per_slot:
+                    ues.clear()
+                ues[ue_id] = now
+
+    def get(self, cell: str, beam: str, kpi_names: Optional[Iterable[str]] = None,
+            now: Optional[float] = None) -> Optional[Dict[str, Entry]]:
+        """
+        Fresh entries of a (cell, beam)
+
+        Returns:
+            kpi_name -> (value, timestamp) in kpi_names order, or None if this
+            process holds no fresh data for the (cell, beam)
+        """
+        now = time.monotonic() if now is None else now
+        names = self.kpi_names if kpi_names is None else kpi_names
+
+        with self._lock:
+            row = self._slots.get((cell, beam))
+            if row is None:
+                self.misses += 1
+                CACHE_LOOKUPS.labels(result='miss').inc()
+                return None
+
+            cutoff = now - self.ttl
+            updated = self._updated[row]
+            entries = {}
+            for name in names:
+                column = self._columns.get(name)
+                if column is not None and updated[column] > cutoff:
+                    entries[name] = (float(self._values[row, column]), self._stamps[row, column])
+
+        if not entries:
+            self.misses += 1
+            CACHE_LOOKUPS.labels(result='expired').inc()
+            return None
+        self.hits += 1
+        CACHE_LOOKUPS.labels(result='hit').inc()
+        return entries
+
+    def cells(self, beam: str, now: Optional[float] = None) -> List[str]:
+        """Cells with fresh data for a beam, sorted"""
+        now = time.monotonic() if now is None else now
+        cutoff = now - self.ttl
+        with self._lock:
+            rows = self._beam_cells.get(beam, {})
+            return sorted(cell for cell, row in rows.items() if self._updated[row].max() > cutoff)
+
+    def ue_count(self, cell: str, beam: str, now: Optional[float] = None) -> Optional[int]:
+        """UEs seen on a (cell, beam) within the TTL (None if the slot is unknown)"""
+        now = time.monotonic() if now is None else now
+        cutoff = now - self.ttl
+        with self._lock:
+            row = self._slots.get((cell, beam))
+            if row is None:
+                return None
+            ues = self._ues[row]
+            for ue_id in [ue for ue, seen in ues.items() if seen <= cutoff]:
+                del ues[ue_id]
+            return len(ues)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        return {
+            'slots': len(self._slots),
+            'max_slots': self.max_slots,
+            'kpis': len(self.kpi_names),
+            'authoritative': self.authoritative,
+            'hits': self.hits,
+            'misses': self.misses,
+            'clears': self.clears
+        }
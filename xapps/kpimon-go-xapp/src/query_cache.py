@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Query result cache for KPIMON beam query API
+Reuses InfluxDB query results across identical dashboard requests: TTL + LRU
+entries keyed by normalized query parameters, time-bucketed keys for
+relative ranges, single-flight loading and invalidation on late writes
+
+Author: O-RAN RIC Platform Team
+Date: 2025-11-19
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+QUERY_CACHE_REQUESTS = Counter(
+    'kpimon_query_cache_requests_total',
+    'Beam queries seen by the result cache',
+    ['result']
+)
+QUERY_CACHE_ENTRIES = Gauge('kpimon_query_cache_entries', 'Query results held by the result cache')
+QUERY_CACHE_INVALIDATIONS = Counter(
+    'kpimon_query_cache_invalidations_total',
+    'Cached query results dropped because data inside their window was written'
+)
+
+
+class _Entry:
+    """Cached result with its expiry and (closed windows) invalidation scope"""
+    __slots__ = ('value', 'expires', 'beam', 'window_end')
+
+    def __init__(self, value: Any, expires: float, beam: Optional[str], window_end: Optional[float]):
+        self.value = value
+        self.expires = expires
+        self.beam = beam
+        self.window_end = window_end
+
+
+class _Flight:
+    """A load in progress that concurrent identical queries wait for"""
+    __slots__ = ('done', 'value', 'error', 'beam', 'window_end', 'stale')
+
+    def __init__(self, beam: Optional[str], window_end: Optional[float]):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+        self.beam = beam
+        self.window_end = window_end
+        self.stale = False
+
+
+class QueryResultCache:
+    """
+    TTL + LRU cache of beam query results with request coalescing
+
+    Features:
+    - Keys are normalized query parameters supplied by the caller
+    - Open windows (relative ranges such as last_15m, or no end time) get the
+      current time bucket appended to their key and expire at the end of the
+      bucket: results are reused for up to bucket_s, then recomputed
+    - Closed windows (end time in the past) live for closed_ttl_s and are
+      dropped when KPI points for their beam with a timestamp at or before the
+      window end are written (late or replayed data)
+    - Single-flight: concurrent misses for one key run a single query, the
+      other requests wait for its result (errors are not cached)
+    - At most max_entries results, least recently used evicted first
+
+    Cached values are shared between requests and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int = 1024, bucket_s: float = 10,
+                 closed_ttl_s: float = 300, wait_timeout_s: float = 30):
+        """
+        Initialize query result cache
+
+        Args:
+            max_entries: Maximum cached results
+            bucket_s: Time bucket for open-window keys (maximum staleness)
+            closed_ttl_s: Lifetime of closed-window results
+            wait_timeout_s: Longest a request waits for an identical in-flight
+                query before running its own
+        """
+        self.max_entries = max(1, int(max_entries))
+        self.bucket_s = max(0.001, float(bucket_s))
+        self.closed_ttl = max(0.0, float(closed_ttl_s))
+        self.wait_timeout = max(0.0, float(wait_timeout_s))
+
+        self._entries: 'OrderedDict[Hashable, _Entry]' = OrderedDict()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict] = None) -> 'QueryResultCache':
+        """Create a cache from the `query_cache` config section"""
+        config = config or {}
+        return cls(
+            max_entries=config.get('max_entries', 1024),
+            bucket_s=config.get('bucket_s', 10),
+            closed_ttl_s=config.get('closed_ttl_s', 300),
+            wait_timeout_s=config.get('wait_timeout_s', 30)
+        )
+
+    def bucket(self, now: Optional[float] = None) -> int:
+        """Time bucket of a wall-clock time (aligned across replicas)"""
+        return int((time.time() if now is None else now) // self.bucket_s)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], beam: Optional[str] = None,
+                    window_end: Optional[float] = None, now: Optional[float] = None) -> Any:
+        """
+        Return the cached result for a query, running loader on a miss
+
+        Args:
+            key: Normalized query parameters
+            loader: Runs the query (called at most once per key at a time)
+            beam: Beam label the query reads (invalidation scope)
+            window_end: Epoch end of a closed query window, None for open windows
+            now: Current epoch time (default: time.time())
+
+        Returns:
+            The query result
+
+        Raises:
+            Whatever loader raises (for this request and requests waiting on it)
+        """
+        now = time.time() if now is None else now
+        if window_end is None:
+            bucket = self.bucket(now)
+            key = (key, bucket)
+            expires = (bucket + 1) * self.bucket_s
+        else:
+            key = (key, None)
+            expires = now + self.closed_ttl
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    QUERY_CACHE_REQUESTS.labels(result='hit').inc()
+                    return entry.value
+                del self._entries[key]
+
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight(beam, window_end)
+                self.misses += 1
+                QUERY_CACHE_REQUESTS.labels(result='miss').inc()
+            else:
+                self.coalesced += 1
+                QUERY_CACHE_REQUESTS.labels(result='coalesced').inc()
+
+        if not leader:
+            if not flight.done.wait(self.wait_timeout):
+                logger.warning(f"Query cache: gave up waiting for in-flight query {key}")
+                return loader()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                if flight.error is None and not flight.stale:
+                    self._store(key, _Entry(flight.value, expires, beam, window_end))
+            flight.done.set()
+        return flight.value
+
+    def _store(self, key: Hashable, entry: _Entry):
+        """Insert an entry, evicting expired and then least recently used ones (lock held)"""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            now = time.time()
+            for stale_key in [k for k, e in self._entries.items() if e.expires <= now]:
+                del self._entries[stale_key]
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        QUERY_CACHE_ENTRIES.set(len(self._entries))
+
+    def invalidate(self, beams: Iterable[str], since: float) -> int:
+        """
+        Drop closed-window results that newly written points fall into
+
+        Open-window results are left alone: they are bounded by their time
+        bucket and would otherwise be invalidated by every write.
+
+        Args:
+            beams: Beam labels of the written points
+            since: Epoch time of the oldest written point
+
+        Returns:
+            Number of results dropped
+        """
+        beams = set(beams)
+        if not beams:
+            return 0
+        with self._lock:
+            stale = [key for key, entry in self._entries.items()
+                     if entry.window_end is not None and entry.beam in beams
+                     and entry.window_end >= since]
+            for key in stale:
+                del self._entries[key]
+            for flight in self._flights.values():
+                if flight.window_end is not None and flight.beam in beams \
+                        and flight.window_end >= since:
+                    flight.stale = True
+            QUERY_CACHE_ENTRIES.set(len(self._entries))
+        if stale:
+            self.invalidations += len(stale)
+            QUERY_CACHE_INVALIDATIONS.inc(len(stale))
+        return len(stale)
+
+    def clear(self):
+        """Drop all cached results"""
+        with self._lock:
+            self._entries.clear()
+            QUERY_CACHE_ENTRIES.set(0)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'in_flight': len(self._flights),
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'hit_rate': (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations
+        }
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Pipelined Redis writer for KPIMON xApp
+Coalesces the Redis writes of an indication (and optionally of a short time
+window across indications) into a single pipelined round trip
+
+Author: O-RAN RIC Platform Team
+Date: 2025-11-19
+"""
+
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from prometheus_client import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+# A queued write: (redis method name, positional args), e.g. ('setex', (key, 300, value))
+RedisCommand = Tuple[str, Tuple[Any, ...]]
+
+# Prometheus metrics
+REDIS_BATCH_SIZE = Histogram(
+    'kpimon_redis_batch_commands',
+    'Number of Redis commands per pipelined flush',
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+)
+REDIS_FLUSH_TIME = Histogram(
+    'kpimon_redis_flush_seconds',
+    'Time spent executing a pipelined Redis flush'
+)
+REDIS_WRITE_ERRORS = Counter(
+    'kpimon_redis_write_errors_total',
+    'Total number of failed pipelined Redis flushes'
+)
+
+
+class RedisBatchWriter:
+    """
+    Batches Redis write commands into pipelines
+
+    Features:
+    - One pipeline round trip per submitted command group
+    - Optional cross-indication coalescing bounded by size and latency budget
+    - Ordered flushes (commands are executed in submission order)
+    - Optional MULTI/EXEC transaction wrapping
+    """
+
+    def __init__(self, redis_client, max_batch_size: int = 1000,
+                 max_latency_ms: float = 0, transaction: bool = False):
+        """
+        Initialize Redis batch writer
+
+        Args:
+            redis_client: Redis client used to create pipelines
+            max_batch_size: Flush as soon as this many commands are queued
+            max_latency_ms: Latency budget for queued commands; 0 flushes every
+                submitted group immediately (one round trip per indication)
+            transaction: Wrap each flush in MULTI/EXEC
+        """
+        self.redis = redis_client
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_latency = max(0.0, float(max_latency_ms)) / 1000.0
+        self.transaction = transaction
+
+        self._pending: List[RedisCommand] = []
+        self._oldest = 0.0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+        # Counters for health/debug endpoints
+        self.total_commands = 0
+        self.total_flushes = 0
+        self.total_errors = 0
+
+    @classmethod
+    def from_config(cls, redis_client, config: Optional[Dict] = None) -> 'RedisBatchWriter':
+        """Create a writer from the `redis.batch` config section"""
+        config = config or {}
+        return cls(
+            redis_client,
+            max_batch_size=config.get('max_batch_size', 1000),
+            max_latency_ms=config.get('max_latency_ms', 0),
+            transaction=config.get('transaction', False)
+        )
+
+    @property
+    def coalescing(self) -> bool:
+        """True when commands are held back to be coalesced across submissions"""
+        return self.max_latency > 0 and self._flusher is not None
+
+    def submit(self, commands: Sequence[RedisCommand]):
+        """
+        Queue a group of commands for the next pipelined flush
+
+        Args:
+            commands: Commands belonging together (e.g. all writes of one indication)
+        """
+        if not commands:
+            return
+
+        with self._lock:
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending.extend(commands)
+            full = len(self._pending) >= self.max_batch_size
+
+        if full or not self.coalescing:
+            self.flush()
+
+    def pending(self) -> int:
+        """Number of queued commands not yet flushed"""
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """
+        Execute all queued commands in one pipeline
+
+        Returns:
+            Number of commands flushed
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+
+            if not batch:
+                return 0
+
+            try:
+                with REDIS_FLUSH_TIME.time():
+                    pipe = self.redis.pipeline(transaction=self.transaction)
+                    for method, args in batch:
+                        getattr(pipe, method)(*args)
+                    pipe.execute()
+
+                REDIS_BATCH_SIZE.observe(len(batch))
+                self.total_commands += len(batch)
+                self.total_flushes += 1
+
+            except Exception as e:
+                REDIS_WRITE_ERRORS.inc()
+                self.total_errors += 1
+                logger.error(f"Failed to flush {len(batch)} Redis commands: {e}")
+
+            return len(batch)
+
+    def _flush_loop(self):
+        """Flush queued commands once they exceed the latency budget"""
+        while not self._stop_event.is_set():
+            with self._lock:
+                age = time.monotonic() - self._oldest if self._pending else None
+
+            if age is not None and age >= self.max_latency:
+                self.flush()
+                continue
+
+            wait = self.max_latency - age if age is not None else self.max_latency
+            self._stop_event.wait(wait)
+
+    def start(self):
+        """Start the background flusher (only needed when coalescing)"""
+        if self.max_latency <= 0 or self._flusher is not None:
+            return
+
+        self._stop_event.clear()
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+        logger.info(
+            f"Redis batch writer started (max_batch_size={self.max_batch_size}, "
+            f"max_latency={self.max_latency * 1000:.0f}ms)"
+        )
+
+    def stop(self):
+        """Stop the background flusher and flush remaining commands"""
+        self._stop_event.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5)
+            self._flusher = None
+        self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get writer statistics"""
+        return {
+            'pending': self.pending(),
+            'total_commands': self.total_commands,
+            'total_flushes': self.total_flushes,
+            'total_errors': self.total_errors,
+            'max_batch_size': self.max_batch_size,
+            'max_latency_ms': self.max_latency * 1000
+        }
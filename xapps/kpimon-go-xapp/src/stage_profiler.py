@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Hot-path stage profiler for KPIMON xApp
+Opt-in, sampled per-stage timing of indication processing plus an on-demand
+stack sampler producing folded (flamegraph) stacks
+
+Author: O-RAN RIC Platform Team
+Date: 2025-11-19
+"""
+
+import sys
+import time
+import logging
+import threading
+from collections import Counter as StackCounter
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from prometheus_client import Histogram
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics (observed for sampled indications only)
+STAGE_TIME = Histogram(
+    'kpimon_stage_seconds',
+    'Time spent per indication processing stage (sampled)',
+    ['stage'],
+    buckets=(0.000001, 0.000005, 0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1)
+)
+
+# Power-of-two microsecond buckets: [0,1us), [1,2us), [2,4us) ... [~0.5s, inf)
+_BUCKETS = 21
+
+
+class StageStats:
+    """Cheap per-stage accumulator with log2 latency buckets"""
+
+    __slots__ = ('count', 'total_ns', 'max_ns', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets = [0] * _BUCKETS
+
+    def add(self, ns: int):
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+        self.buckets[min(_BUCKETS - 1, (ns // 1000).bit_length())] += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound (microseconds) of the bucket holding quantile q"""
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target and n:
+                return float(1 << i) if i < _BUCKETS - 1 else self.max_ns / 1000.0
+        return 0.0
+
+    def summary(self, total_ns: int) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'total_ms': round(self.total_ns / 1e6, 3),
+            'mean_us': round(self.total_ns / self.count / 1000.0, 2) if self.count else 0.0,
+            'p50_us': self.quantile(0.5),
+            'p90_us': self.quantile(0.9),
+            'p99_us': self.quantile(0.99),
+            'max_us': round(self.max_ns / 1000.0, 2),
+            'share': round(self.total_ns / total_ns, 4) if total_ns else 0.0
+        }
+
+
+class StageTrace:
+    """Timing of one sampled indication; time between marks goes to the marked stage"""
+
+    __slots__ = ('start', 'last', 'stages')
+
+    def __init__(self):
+        self.start = self.last = time.perf_counter_ns()
+        self.stages: Dict[str, int] = {}
+
+    def mark(self, stage: str):
+        now = time.perf_counter_ns()
+        self.stages[stage] = self.stages.get(stage, 0) + now - self.last
+        self.last = now
+
+
+class StageProfiler:
+    """
+    Sampled stage profiler
+
+    Features:
+    - Disabled by default; when disabled start() returns None and the hot
+      path only pays a None check per stage
+    - Every Nth indication is traced (sample_rate), stages accumulate in
+      log2 buckets and the kpimon_stage_seconds histogram
+    - Batch stages (e.g. anomaly detection) timed with time_stage()
+    - On-demand stack sampling of all threads in folded flamegraph format
+    """
+
+    def __init__(self, enabled: bool = False, sample_rate: float = 0.01,
+                 stack_interval_ms: float = 10, max_duration_s: float = 30):
+        """
+        Initialize stage profiler
+
+        Args:
+            enabled: Trace indications
+            sample_rate: Fraction of indications traced
+            stack_interval_ms: Stack sampling interval
+            max_duration_s: Upper bound of one stack sampling run
+        """
+        self.stack_interval = max(1.0, float(stack_interval_ms)) / 1000.0
+        self.max_duration = float(max_duration_s)
+        self._lock = threading.Lock()
+        self._sampling_lock = threading.Lock()
+        self._seen = 0
+        self.configure(enabled, sample_rate)
+        self.reset()
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict] = None) -> 'StageProfiler':
+        """Create a profiler from the `profiling` config section"""
+        config = config or {}
+        return cls(
+            enabled=config.get('enabled', False),
+            sample_rate=config.get('sample_rate', 0.01),
+            stack_interval_ms=config.get('stack_interval_ms', 10),
+            max_duration_s=config.get('max_duration_s', 30)
+        )
+
+    def configure(self, enabled: Optional[bool] = None, sample_rate: Optional[float] = None):
+        """Change profiling settings at runtime"""
+        if sample_rate is not None:
+            if not 0 < float(sample_rate) <= 1:
+                raise ValueError(f"sample_rate must be in (0, 1]: {sample_rate}")
+            self.sample_rate = float(sample_rate)
+            self._every = max(1, round(1 / self.sample_rate))
+        if enabled is not None:
+            self.enabled = bool(enabled)
+
+    def reset(self):
+        """Discard collected stage statistics"""
+        with self._lock:
+            self._stats: Dict[str, StageStats] = {}
+            self._since = time.time()
+
+    def start(self) -> Optional[StageTrace]:
+        """Begin tracing an indication if profiling is on and it is sampled"""
+        if not self.enabled:
+            return None
+        self._seen += 1
+        if self._seen % self._every:
+            return None
+        return StageTrace()
+
+    def finish(self, trace: Optional[StageTrace]):
+        """Record a finished trace"""
+        if trace is None:
+            return
+        stages = trace.stages
+        stages['total'] = time.perf_counter_ns() - trace.start
+        with self._lock:
+            for stage, ns in stages.items():
+                self._stage(stage).add(ns)
+        for stage, ns in stages.items():
+            STAGE_TIME.labels(stage=stage).observe(ns / 1e9)
+
+    def _stage(self, stage: str) -> StageStats:
+        stats = self._stats.get(stage)
+        if stats is None:
+            stats = self._stats[stage] = StageStats()
+        return stats
+
+    @contextmanager
+    def time_stage(self, stage: str):
+        """Time a batch-level stage (every call while profiling is enabled)"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            ns = time.perf_counter_ns() - start
+            with self._lock:
+                self._stage(stage).add(ns)
+            STAGE_TIME.labels(stage=stage).observe(ns / 1e9)
+
+    def breakdown(self) -> Dict[str, Any]:
+        """Per-stage statistics; shares are relative to the traced indication total"""
+        with self._lock:
+            total = self._stats.get('total')
+            total_ns = total.total_ns if total else 0
+            stages = {name: stats.summary(total_ns) for name, stats in self._stats.items()}
+        return {
+            'enabled': self.enabled,
+            'sample_rate': self.sample_rate,
+            'since': self._since,
+            'stages': stages
+        }
+
+    def sample_stacks(self, duration_s: float, top: int = 200) -> Dict[str, Any]:
+        """
+        Sample the stacks of all other threads for duration_s
+
+        Returns:
+            Folded stacks ("outer;inner" -> samples), most frequent first
+        """
+        duration = min(max(0.0, float(duration_s)), self.max_duration)
+        if not self._sampling_lock.acquire(blocking=False):
+            raise RuntimeError("A stack sampling run is already in progress")
+
+        try:
+            me = threading.get_ident()
+            names = {t.ident: t.name for t in threading.enumerate()}
+            folded: StackCounter = StackCounter()
+            samples = 0
+            deadline = time.monotonic() + duration
+            while True:
+                for ident, frame in sys._current_frames().items():
+                    if ident == me:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        code = frame.f_code
+                        stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})")
+                        frame = frame.f_back
+                    stack.append(names.get(ident, str(ident)))
+                    folded[';'.join(reversed(stack))] += 1
+                samples += 1
+                if time.monotonic() >= deadline:
+                    break
+                time.sleep(self.stack_interval)
+        finally:
+            self._sampling_lock.release()
+
+        return {
+            'duration_s': duration,
+            'interval_ms': self.stack_interval * 1000,
+            'samples': samples,
+            'stacks': [{'stack': stack, 'count': count} for stack, count in folded.most_common(top)]
+        }
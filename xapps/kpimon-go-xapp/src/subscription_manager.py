@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+E2 subscription state tracking for KPIMON xApp
+Keeps one E2SM-KPM subscription per (E2 node, RAN function), resubscribes
+only after failures or node changes and deletes stale subscriptions
+
+Author: O-RAN RIC Platform Team
+Date: 2025-11-19
+"""
+
+import time
+import logging
+import threading
+from enum import Enum
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import requests
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+# E2 subscription message types
+RIC_SUB_REQ = 12010
+RIC_SUB_DEL_REQ = 12012
+
+# Prometheus metrics
+SUBSCRIPTIONS = Gauge(
+    'kpimon_subscriptions',
+    'E2 subscriptions by state',
+    ['state']
+)
+SUBSCRIPTION_REQUESTS = Counter(
+    'kpimon_subscription_requests_total',
+    'E2 subscription and subscription delete requests sent',
+    ['type']
+)
+SUBSCRIPTION_FAILURES = Counter(
+    'kpimon_subscription_failures_total',
+    'E2 subscription attempts that failed',
+    ['reason']
+)
+
+# (message type, payload) to send
+Action = Tuple[int, Dict[str, Any]]
+
+
+class SubscriptionState(Enum):
+    """E2 subscription lifecycle states"""
+    PENDING = "pending"
+    ACTIVE = "active"
+    FAILED = "failed"
+    DELETING = "deleting"
+
+
+@dataclass
+class Subscription:
+    """One E2 subscription request and its current state"""
+    request_id: str
+    e2_node_id: Optional[str]
+    ran_function_id: int
+    state: SubscriptionState
+    since: float
+    attempts: int = 0
+    subscription_id: Optional[str] = None
+    reason: Optional[str] = None
+
+    @property
+    def key(self) -> Tuple[Optional[str], int]:
+        return (self.e2_node_id, self.ran_function_id)
+
+    def to_dict(self, now: float) -> Dict[str, Any]:
+        return {
+            'request_id': self.request_id,
+            'e2_node_id': self.e2_node_id,
+            'ran_function_id': self.ran_function_id,
+            'state': self.state.value,
+            'age_s': round(now - self.since, 3),
+            'attempts': self.attempts,
+            'subscription_id': self.subscription_id,
+            'reason': self.reason
+        }
+
+
+class SubscriptionManager:
+    """
+    E2 subscription state machine keyed by (E2 node, RAN function)
+
+    Features:
+    - pending -> active on a successful RIC_SUB_RESP, failed on a failure
+      response or response timeout; failed keys are retried with exponential
+      backoff, active ones are left alone
+    - RIC_SUB_DEL_REQ for subscriptions of removed nodes, timed-out requests
+      and unknown successful responses (e.g. from a previous pod instance)
+    - Delete requests are retried a bounded number of times
+    - Thread-safe; methods return the messages to send instead of sending
+      them, so no I/O happens under the lock
+    """
+
+    def __init__(self, request_template: Dict[str, Any], ran_function_id: int = 2,
+                 nodes: Optional[Iterable[Optional[str]]] = None,
+                 response_timeout_s: float = 10, retry_backoff_s: float = 5,
+                 max_backoff_s: float = 300, delete_timeout_s: float = 10,
+                 max_delete_attempts: int = 3, request_prefix: str = 'kpimon'):
+        """
+        Initialize subscription manager
+
+        Args:
+            request_template: Subscription request body (event_trigger, actions)
+            ran_function_id: RAN function to subscribe to (2 = E2SM-KPM)
+            nodes: E2 node ids to subscribe (None entry = RMR-routed node)
+            response_timeout_s: Time to wait for RIC_SUB_RESP before failing
+            retry_backoff_s: First retry delay after a failure
+            max_backoff_s: Maximum retry delay
+            delete_timeout_s: Time to wait for RIC_SUB_DEL_RESP before resending
+            max_delete_attempts: Delete requests sent before giving up
+            request_prefix: Prefix of generated request ids
+        """
+        self.request_template = dict(request_template)
+        self.ran_function_id = int(ran_function_id)
+        self.response_timeout = float(response_timeout_s)
+        self.retry_backoff = max(0.0, float(retry_backoff_s))
+        self.max_backoff = max(self.retry_backoff, float(max_backoff_s))
+        self.delete_timeout = float(delete_timeout_s)
+        self.max_delete_attempts = max(1, int(max_delete_attempts))
+        self.request_prefix = request_prefix
+
+        self._nodes: List[Optional[str]] = list(nodes) if nodes is not None else [None]
+        self._subs: Dict[str, Subscription] = {}
+        # Consecutive failures and earliest retry time per (node, RAN function)
+        self._failures: Dict[Tuple[Optional[str], int], int] = {}
+        self._retry_at: Dict[Tuple[Optional[str], int], float] = {}
+        # Request ids stay unique across restarts, so late responses to a
+        # previous instance's requests are recognised as unknown
+        self._instance = format(int(time.time() * 1000) & 0xFFFFFFFFFF, 'x')
+        self._seq = 0
+        self._lock = threading.Lock()
+
+        self.total_requests = 0
+        self.total_deletes = 0
+        self.total_failures = 0
+
+    @classmethod
+    def from_config(cls, request_template: Dict[str, Any],
+                    config: Optional[Dict] = None) -> 'SubscriptionManager':
+        """Create a manager from the `subscription` config section"""
+        config = config or {}
+        nodes = config.get('e2_nodes') or None
+        return cls(
+            request_template,
+            ran_function_id=config.get('ran_function_id', 2),
+            nodes=nodes,
+            response_timeout_s=config.get('response_timeout_s', 10),
+            retry_backoff_s=config.get('retry_backoff_s', 5),
+            max_backoff_s=config.get('max_backoff_s', 300),
+            delete_timeout_s=config.get('delete_timeout_s', 10),
+            max_delete_attempts=config.get('max_delete_attempts', 3)
+        )
+
+    @property
+    def nodes(self) -> List[Optional[str]]:
+        return list(self._nodes)
+
+    def set_nodes(self, nodes: Iterable[Optional[str]]) -> bool:
+        """
+        Replace the set of E2 nodes to subscribe (applied by the next reconcile)
+
+        Returns:
+            True if the node set changed
+        """
+        nodes = sorted(set(nodes), key=lambda n: (n is None, n))
+        with self._lock:
+            if nodes == sorted(set(self._nodes), key=lambda n: (n is None, n)):
+                return False
+            logger.info(f"E2 nodes changed: {self._nodes} -> {nodes}")
+            self._nodes = nodes
+            return True
+
+    def _next_request_id(self, node: Optional[str]) -> str:
+        self._seq += 1
+        return (f"{self.request_prefix}_{node or 'routed'}_{self.ran_function_id}"
+                f"_{self._instance}_{self._seq}")
+
+    def _subscribe(self, node: Optional[str], now: float) -> Action:
+        request_id = self._next_request_id(node)
+        self._subs[request_id] = Subscription(
+            request_id, node, self.ran_function_id, SubscriptionState.PENDING, now,
+            attempts=self._failures.get((node, self.ran_function_id), 0)
+        )
+        self.total_requests += 1
+        SUBSCRIPTION_REQUESTS.labels(type='subscribe').inc()
+
+        request = dict(self.request_template)
+        request.update({
+            'request_id': request_id,
+            'ran_function_id': self.ran_function_id
+        })
+        if node is not None:
+            request['e2_node_id'] = node
+        return (RIC_SUB_REQ, request)
+
+    def _delete(self, sub: Subscription, now: float, reason: str) -> Action:
+        if sub.state != SubscriptionState.DELETING:
+            sub.state = SubscriptionState.DELETING
+            sub.attempts = 0
+            sub.reason = reason
+        sub.since = now
+        sub.attempts += 1
+        self.total_deletes += 1
+        SUBSCRIPTION_REQUESTS.labels(type='delete').inc()
+
+        request = {
+            'request_id': sub.request_id,
+            'ran_function_id': sub.ran_function_id
+        }
+        if sub.subscription_id is not None:
+            request['subscription_id'] = sub.subscription_id
+        if sub.e2_node_id is not None:
+            request['e2_node_id'] = sub.e2_node_id
+        return (RIC_SUB_DEL_REQ, request)
+
+    def _record_failure(self, sub: Subscription, now: float, reason: str) -> int:
+        """Count a failure of the subscription's key and schedule its retry"""
+        failures = self._failures.get(sub.key, 0) + 1
+        self._failures[sub.key] = failures
+        delay = min(self.max_backoff, self.retry_backoff * 2 ** (failures - 1))
+        self._retry_at[sub.key] = now + delay
+        self.total_failures += 1
+        SUBSCRIPTION_FAILURES.labels(reason='timeout' if reason == 'timeout' else 'rejected').inc()
+        logger.warning(f"Subscription {sub.request_id} failed ({reason}), retry in {delay:.0f}s")
+        return failures
+
+    def reconcile(self, now: Optional[float] = None) -> List[Action]:
+        """
+        Advance timeouts and bring subscriptions in line with the node set
+
+        Returns:
+            Subscription and delete requests to send
+        """
+        now = time.monotonic() if now is None else now
+        actions: List[Action] = []
+
+        with self._lock:
+            desired = {(node, self.ran_function_id) for node in self._nodes}
+            covered = set()
+
+            for sub in list(self._subs.values()):
+                if sub.state == SubscriptionState.DELETING:
+                    if now - sub.since >= self.delete_timeout:
+                        if sub.attempts >= self.max_delete_attempts:
+                            logger.warning(f"Giving up deleting subscription {sub.request_id}")
+                            del self._subs[sub.request_id]
+                        else:
+                            actions.append(self._delete(sub, now, sub.reason))
+                    continue
+
+                if sub.key not in desired:
+                    if sub.state == SubscriptionState.FAILED:
+                        del self._subs[sub.request_id]
+                    else:
+                        actions.append(self._delete(sub, now, 'node_removed'))
+                    continue
+
+                if sub.state == SubscriptionState.PENDING and now - sub.since >= self.response_timeout:
+                    # The request may still reach the node: delete it, retry after backoff
+                    self._record_failure(sub, now, 'timeout')
+                    actions.append(self._delete(sub, now, 'timeout'))
+                    continue
+
+                if sub.state == SubscriptionState.FAILED and now >= self._retry_at.get(sub.key, 0):
+                    del self._subs[sub.request_id]
+                    continue
+
+                covered.add(sub.key)
+
+            for key in sorted(desired - covered, key=lambda k: (k[0] is None, k[0])):
+                if now >= self._retry_at.get(key, 0):
+                    actions.append(self._subscribe(key[0], now))
+
+            self._update_gauges()
+
+        return actions
+
+    def on_response(self, response: Dict[str, Any], now: Optional[float] = None) -> List[Action]:
+        """
+        Apply a RIC_SUB_RESP
+
+        Returns:
+            Delete requests for duplicate or unknown subscriptions
+        """
+        now = time.monotonic() if now is None else now
+        request_id = response.get('request_id')
+        success = response.get('status') == 'success'
+        actions: List[Action] = []
+
+        with self._lock:
+            sub = self._subs.get(request_id)
+            if sub is None or sub.state == SubscriptionState.DELETING:
+                if success and sub is None:
+                    # Unknown subscription (previous instance, late response): remove it
+                    logger.info(f"Deleting unknown subscription {request_id}")
+                    stale = Subscription(
+                        str(request_id), response.get('e2_node_id'),
+                        response.get('ran_function_id', self.ran_function_id),
+                        SubscriptionState.ACTIVE, now,
+                        subscription_id=response.get('subscription_id')
+                    )
+                    self._subs[stale.request_id] = stale
+                    actions.append(self._delete(stale, now, 'unknown'))
+                self._update_gauges()
+                return actions
+
+            if success:
+                for other in self._subs.values():
+                    if (other is not sub and other.key == sub.key
+                            and other.state == SubscriptionState.ACTIVE):
+                        actions.append(self._delete(other, now, 'duplicate'))
+                sub.state = SubscriptionState.ACTIVE
+                sub.since = now
+                sub.reason = None
+                sub.subscription_id = response.get('subscription_id')
+                self._failures.pop(sub.key, None)
+                self._retry_at.pop(sub.key, None)
+                logger.info(f"Subscription {request_id} active")
+            else:
+                reason = str(response.get('reason', 'rejected'))
+                sub.attempts = self._record_failure(sub, now, reason)
+                sub.state = SubscriptionState.FAILED
+                sub.since = now
+                sub.reason = reason
+
+            self._update_gauges()
+        return actions
+
+    def on_delete_response(self, response: Dict[str, Any]) -> bool:
+        """
+        Apply a RIC_SUB_DEL_RESP
+
+        Returns:
+            True if a tracked subscription was removed
+        """
+        request_id = response.get('request_id')
+        status = response.get('status', 'success')
+
+        with self._lock:
+            sub = self._subs.get(request_id)
+            if sub is None:
+                return False
+            if status not in ('success', 'not_found'):
+                logger.warning(f"Delete of subscription {request_id} failed: {response.get('reason')}")
+                return False
+            del self._subs[request_id]
+            logger.info(f"Subscription {request_id} deleted")
+            self._update_gauges()
+            return True
+
+    def delete_all(self, now: Optional[float] = None) -> List[Action]:
+        """Stop subscribing and delete every pending or active subscription"""
+        now = time.monotonic() if now is None else now
+        actions: List[Action] = []
+        with self._lock:
+            self._nodes = []
+            for sub in list(self._subs.values()):
+                if sub.state in (SubscriptionState.PENDING, SubscriptionState.ACTIVE):
+                    actions.append(self._delete(sub, now, 'shutdown'))
+                elif sub.state == SubscriptionState.FAILED:
+                    del self._subs[sub.request_id]
+            self._update_gauges()
+        return actions
+
+    def _update_gauges(self):
+        counts = {state: 0 for state in SubscriptionState}
+        for sub in self._subs.values():
+            counts[sub.state] += 1
+        for state, count in counts.items():
+            SUBSCRIPTIONS.labels(state=state.value).set(count)
+
+    def subscriptions(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Current subscriptions"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return [sub.to_dict(now) for sub in self._subs.values()]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get subscription statistics"""
+        with self._lock:
+            states = {state.value: 0 for state in SubscriptionState}
+            for sub in self._subs.values():
+                states[sub.state.value] += 1
+            return {
+                'nodes': [n if n is not None else 'routed' for n in self._nodes],
+                'states': states,
+                'total_requests': self.total_requests,
+                'total_deletes': self.total_deletes,
+                'total_failures': self.total_failures
+            }
+
+
+def fetch_connected_nodes(e2mgr_url: str, timeout: float = 5,
+                          session: Optional[requests.Session] = None) -> List[str]:
+    """
+    Connected E2 nodes reported by the E2 Manager (GET /v1/nodeb/states)
+
+    Raises:
+        requests.RequestException: E2 Manager unreachable or error status
+    """
+    http = session or requests
+    response = http.get(f"{e2mgr_url.rstrip('/')}/v1/nodeb/states", timeout=timeout)
+    response.raise_for_status()
+    return sorted(
+        node['inventoryName'] for node in response.json()
+        if node.get('connectionStatus') == 'CONNECTED' and node.get('inventoryName')
+    )
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Bounded KPI timeline storage for KPIMON xApp
+Per-KPI Redis ZSETs scored by sample time, trimmed to a retention window,
+with optional in-process rollups at coarser resolutions
+
+Key layout ({series} is "{cell_id}:{kpi}" or "{cell_id}:beam_{beam_id}:{kpi}"):
+    kpi:timeline:{series}        ZSET  "{epoch}:{ue_id}:{value}" scored by epoch seconds
+    kpi:rollup:{res}s:{series}   ZSET  "{bucket}:{count}:{sum}:{min}:{max}" scored by bucket start
+
+Author: O-RAN RIC Platform Team
+Date: 2025-11-19
+"""
+
+import math
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from prometheus_client import Counter
+
+from influx_writer import timestamp_ns
+
+logger = logging.getLogger(__name__)
+
+# Same shape as redis_writer.RedisCommand
+RedisCommand = Tuple[str, Tuple[Any, ...]]
+
+# Prometheus metrics
+TIMELINE_LATE_SAMPLES = Counter(
+    'kpimon_timeline_late_samples_total',
+    'Samples older than the retention window or an already written rollup bucket'
+)
+
+
+def timeline_key(series: str) -> str:
+    return f"kpi:timeline:{series}"
+
+
+def rollup_key(resolution: int, series: str) -> str:
+    return f"kpi:rollup:{resolution}s:{series}"
+
+
+class TimelineStore:
+    """
+    Builds timeline writes and reads timelines back
+
+    Features:
+    - score = sample time, so range queries and retention trimming use
+      ZRANGEBYSCORE/ZREMRANGEBYSCORE
+    - One key per KPI (no collisions between KPIs of a cell)
+    - Retention trimming and EXPIRE at most once per trim interval per key
+    - Optional count/sum/min/max rollups (e.g. 1s/10s/1m), aggregated in
+      memory and written once per closed bucket
+    """
+
+    def __init__(self, retention_s: float = 900,
+                 rollups: Optional[List[Dict[str, float]]] = None,
+                 trim_interval_s: float = 10,
+                 max_series: int = 100000):
+        """
+        Initialize timeline store
+
+        Args:
+            retention_s: Raw sample retention
+            rollups: [{"resolution_s", "retention_s"}, ...]
+            trim_interval_s: Minimum interval between trims of one key
+            max_series: Bound of the per-key trim/rollup state (reset when full)
+        """
+        self.retention = float(retention_s)
+        self.rollups = sorted(
+            (int(r['resolution_s']), float(r['retention_s'])) for r in (rollups or [])
+        )
+        self.trim_interval = float(trim_interval_s)
+        self.max_series = int(max_series)
+
+        self._last_trim: Dict[str, float] = {}
+        # (series, resolution) -> [bucket, count, sum, min, max]
+        self._buckets: Dict[Tuple[str, int], List[float]] = {}
+        # (series, resolution) -> start of the last written bucket
+        self._closed: Dict[Tuple[str, int], float] = {}
+        self._ts_cache: Tuple[Any, float] = (None, 0.0)
+        self._lock = threading.Lock()
+
+        self.total_samples = 0
+        self.total_buckets = 0
+        self.total_late = 0
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict] = None) -> 'TimelineStore':
+        """Create a store from the `timeline` config section"""
+        config = config or {}
+        return cls(
+            retention_s=config.get('retention_s', 900),
+            rollups=config.get('rollups'),
+            trim_interval_s=config.get('trim_interval_s', 10),
+            max_series=config.get('max_series', 100000)
+        )
+
+    def to_epoch(self, timestamp: Any) -> float:
+        """Epoch seconds of an indication timestamp (ISO string, naive = UTC, or number)"""
+        cached, epoch = self._ts_cache
+        if timestamp == cached and cached is not None:
+            return epoch
+
+        ns = timestamp_ns(timestamp)
+        epoch = time.time() if ns is None else ns / 1_000_000_000
+        self._ts_cache = (timestamp, epoch)
+        return epoch
+
+    def sample_commands(self, series: str, epoch: float, value: Any,
+                        ue_id: Optional[str] = None,
+                        now: Optional[float] = None) -> List[RedisCommand]:
+        """
+        Build the writes for one sample
+
+        Args:
+            series: Series id ("{cell_id}:{kpi}" or "{cell_id}:beam_{beam_id}:{kpi}")
+            epoch: Sample time in epoch seconds
+            value: Sample value (non-numeric values are not stored)
+            ue_id: Reporting UE, part of the member so concurrent UE samples don't collide
+            now: Current epoch seconds (defaults to time.time())
+
+        Returns:
+            Commands to submit together with the indication's other writes
+        """
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return []
+        if not math.isfinite(value):
+            return []
+
+        now = time.time() if now is None else now
+        commands: List[RedisCommand] = []
+
+        with self._lock:
+            self.total_samples += 1
+            if len(self._last_trim) >= self.max_series:
+                self._last_trim.clear()
+
+            # A sample already outside the retention window would be trimmed by
+            # the same pipeline that adds it
+            if epoch > now - self.retention:
+                key = timeline_key(series)
+                commands.append(('zadd', (key, {f"{epoch:.3f}:{ue_id or ''}:{value!r}": epoch})))
+                self._trim(commands, key, self.retention, now)
+            else:
+                self._late()
+
+            for resolution, retention in self.rollups:
+                self._rollup(commands, series, resolution, retention, epoch, value, now)
+
+        return commands
+
+    def _trim(self, commands: List[RedisCommand], key: str, retention: float, now: float):
+        """Append retention trimming of a key once per trim interval"""
+        last = self._last_trim.get(key)
+        if last is not None and now - last < self.trim_interval:
+            return
+        self._last_trim[key] = now
+        commands.append(('zremrangebyscore', (key, '-inf', now - retention)))
+        commands.append(('expire', (key, int(retention + self.trim_interval))))
+
+    def _rollup(self, commands: List[RedisCommand], series: str, resolution: int,
+                retention: float, epoch: float, value: float, now: float):
+        """Fold a sample into its bucket, writing the previous bucket once closed"""
+        state_key = (series, resolution)
+        bucket = epoch - epoch % resolution
+        state = self._buckets.get(state_key)
+
+        if bucket + resolution <= now - retention:
+            self._late()
+            return
+
+        if state is not None and state[0] == bucket:
+            state[1] += 1
+            state[2] += value
+            state[3] = min(state[3], value)
+            state[4] = max(state[4], value)
+            return
+
+        if (state is not None and bucket < state[0]) or bucket <= self._closed.get(state_key, -math.inf):
+            self._late()
+            return
+
+        if state is not None:
+            self._write_bucket(commands, state_key, state, retention, now)
+        elif len(self._buckets) >= self.max_series:
+            commands.extend(self._flush_locked(math.inf, now))
+            self._closed.clear()
+        self._buckets[state_key] = [bucket, 1, value, value, value]
+
+    def _late(self):
+        self.total_late += 1
+        TIMELINE_LATE_SAMPLES.inc()
+
+    def _write_bucket(self, commands: List[RedisCommand], state_key: Tuple[str, int],
+                      state: List[float], retention: float, now: float):
+        series, resolution = state_key
+        bucket, count, total, low, high = state
+        key = rollup_key(resolution, series)
+        commands.append(('zadd', (key, {f"{int(bucket)}:{count}:{total!r}:{low!r}:{high!r}": bucket})))
+        self._trim(commands, key, retention, now)
+        if len(self._closed) >= self.max_series:
+            self._closed.clear()
+        self._closed[state_key] = bucket
+        self.total_buckets += 1
+
+    def flush_rollups(self, now: Optional[float] = None, grace_s: float = 1.0) -> List[RedisCommand]:
+        """
+        Write rollup buckets that ended more than grace_s ago
+
+        Buckets are normally written when the next sample of the series
+        arrives; this closes buckets of series that stopped reporting.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            return self._flush_locked(now - grace_s, now)
+
+    def _flush_locked(self, cutoff: float, now: float) -> List[RedisCommand]:
+        commands: List[RedisCommand] = []
+        retention = dict(self.rollups)
+        for state_key in [k for k, s in self._buckets.items() if s[0] + k[1] <= cutoff]:
+            state = self._buckets.pop(state_key)
+            self._write_bucket(commands, state_key, state, retention[state_key[1]], now)
+        return commands
+
+    def read(self, redis_client, series: str, start: float, end: float,
+             resolution: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Read samples (or rollup buckets) of a series within [start, end]
+
+        Returns:
+            [{'timestamp', 'value', 'ue_id'}] for raw samples, or
+            [{'timestamp', 'count', 'mean', 'min', 'max'}] for rollups
+        """
+        if resolution is None:
+            points = []
+            for member in redis_client.zrangebyscore(timeline_key(series), start, end):
+                ts, rest = member.split(':', 1)
+                ue_id, value = rest.rsplit(':', 1)
+                points.append({'timestamp': float(ts), 'value': float(value), 'ue_id': ue_id or None})
+            return points
+
+        buckets = []
+        for member in redis_client.zrangebyscore(rollup_key(resolution, series), start, end):
+            bucket, count, total, low, high = member.split(':')
+            count = int(count)
+            buckets.append({
+                'timestamp': float(bucket),
+                'count': count,
+                'mean': float(total) / count,
+                'min': float(low),
+                'max': float(high)
+            })
+        return buckets
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get store statistics"""
+        with self._lock:
+            open_buckets = len(self._buckets)
+        return {
+            'retention_s': self.retention,
+            'rollups': [r for r, _ in self.rollups],
+            'open_buckets': open_buckets,
+            'total_samples': self.total_samples,
+            'total_buckets': self.total_buckets,
+            'total_late': self.total_late
+        }
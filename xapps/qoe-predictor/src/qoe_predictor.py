@@ -9,6 +9,8 @@ IMPORTANT: This xApp uses the COMPOSITION pattern for RMR API integration,
 NOT inheritance. This is the proven approach from Phase 3 Traffic Steering.
 """
 
+import os
+import sys
 import json
 import time
 import logging
@@ -29,6 +31,13 @@ import redis
 import joblib
 from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
 
+# Add common library path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../common'))
+from http_server import XappHTTPServer
+from indication_codec import decode_indication
+from admission_control import AdmissionController
+from indication_routes import indication_response, indication_batch_response
+
 # Configure logging
 logger = Logger(name="QOE_PREDICTOR")
 logger.set_level(logging.INFO)
@@ -64,6 +73,15 @@ class QoEPredictor:
         self.config = self._load_config(config_path)
         self.xapp = None
         self.running = False
+
+        # Bounded concurrency/queue for the HTTP fallback indication routes
+        self.admission = AdmissionController.from_config(self.config.get('admission'))
+
+        # Production WSGI server for the REST API
+        self.http_server = XappHTTPServer.from_config(
+            app, self.config.get('http_server'), port=self.config['http_port'], name='qoe-predictor',
+            busy_threads=self.admission.max_threads
+        )
         self.models = {}
         self.scalers = {}
         self.feature_buffer = {}
@@ -131,6 +149,18 @@ class QoEPredictor:
             "features": {
                 "window_size": 100,
                 "aggregation": ["mean", "std", "min", "max", "percentile_95"]
+            },
+            "http_server": {
+                "server": "waitress",
+                "threads": 32,  # admission slots + queue + control reserve, plus probe threads
+                "probe_threads": 2  # kept free for health/metrics probes at saturation
+            },
+            "admission": {
+                "max_concurrent": 8,  # indications processed at once
+                "max_queue": 16,  # waiting beyond this: 429
+                "queue_timeout_s": 0.5,  # no slot in time: 503
+                "retry_after_s": 1,
+                "control_reserve": 2  # extra slots for control-plane messages
             }
         }
     
@@ -309,12 +339,12 @@ class QoEPredictor:
     def _handle_indication(self, payload):
         """Handle RIC Indication with network metrics"""
         try:
-            indication = json.loads(payload)
+            indication = decode_indication(payload)
             
-            ue_id = indication.get('ue_id')
-            cell_id = indication.get('cell_id')
-            timestamp = indication.get('timestamp', datetime.now().isoformat())
-            measurements = indication.get('measurements', [])
+            ue_id = indication.ue_id
+            cell_id = indication.cell_id
+            timestamp = indication.timestamp or datetime.now().isoformat()
+            measurements = indication.measurements
             
             # Extract features for QoE prediction
             features = self._extract_features(measurements)
@@ -669,29 +699,20 @@ class QoEPredictor:
         @app.route('/e2/indication', methods=['POST'])
         def e2_indication():
             """Receive E2 indications from simulator (for testing)"""
-            try:
-                data = request.get_json()
-                if not data:
-                    return jsonify({"error": "No data provided"}), 400
-
-                # Process the indication using the existing handler
-                self._handle_indication(json.dumps(data))
+            return indication_response(self.admission, self._handle_indication)
 
-                return jsonify({
-                    "status": "success",
-                    "message": "Indication processed"
-                }), 200
-
-            except Exception as e:
-                logger.error(f"Error processing E2 indication: {e}")
-                return jsonify({"error": str(e)}), 500
+        @app.route('/e2/indication/batch', methods=['POST'])
+        def e2_indication_batch():
+            """Receive a batch of E2 indications (JSON array or NDJSON, optionally gzip)"""
+            return indication_batch_response(self.admission, self._handle_indication)
 
-        app.run(host='0.0.0.0', port=self.config['http_port'])
+        self.http_server.serve_forever()
     
     def stop(self):
         """Stop the xApp"""
         logger.info("Stopping QoE Predictor xApp...")
         self.running = False
+        self.http_server.stop()
         if self.xapp:
             self.xapp.stop()
         logger.info("QoE Predictor xApp stopped")
@@ -29,6 +29,10 @@ from prometheus_client import Counter, Gauge, generate_latest, CONTENT_TYPE_LATE
 
 # Import dual-path messenger
 from dual_path_messenger import DualPathMessenger, EndpointConfig, CommunicationPath
+from indication_codec import decode_indication
+from admission_control import AdmissionController
+from indication_routes import indication_response, indication_batch_response
+from http_server import XappHTTPServer
 
 # Configure logging
 logger = Logger(name="RAN_CONTROL")
@@ -113,6 +117,15 @@ class RANController:
         # Register HTTP fallback endpoints
         self._register_endpoints()
 
+        # Bounded concurrency/queue for the HTTP fallback indication route
+        self.admission = AdmissionController.from_config(self.config.get('admission'))
+
+        # Production WSGI server for the REST API
+        self.http_server = XappHTTPServer.from_config(
+            app, self.config.get('http_server'), port=self.config['http_port'], name='ran-control',
+            busy_threads=self.admission.max_threads
+        )
+
         # Initialize Redis connection
         self._init_redis()
 
@@ -291,10 +304,9 @@ class RANController:
         """Internal message handler for DualPathMessenger"""
         msg_type = summary.get(rmr.RMR_MS_MSG_TYPE, summary.get('message type', 0))
 
-        # Extract payload from buffer
+        # Extract payload from buffer (kept as bytes, decoders read them directly)
         if sbuf:
-            payload_bytes = rmr.get_payload(sbuf)
-            payload = payload_bytes.decode('utf-8') if payload_bytes else ""
+            payload = rmr.get_payload(sbuf) or b""
         else:
             payload = summary.get('payload', '{}')
 
@@ -389,11 +401,11 @@ class RANController:
     def _handle_indication(self, payload):
         """Handle RIC Indication with network state"""
         try:
-            indication = json.loads(payload)
+            indication = decode_indication(payload)
             
-            cell_id = indication.get('cell_id')
-            timestamp = indication.get('timestamp', datetime.now().isoformat())
-            measurements = indication.get('measurements', [])
+            cell_id = indication.cell_id
+            timestamp = indication.timestamp or datetime.now().isoformat()
+            measurements = indication.measurements
             
             # Update network state
             if cell_id not in self.network_state:
@@ -897,31 +909,21 @@ class RANController:
         @app.route('/e2/indication', methods=['POST'])
         def e2_indication():
             """Receive E2 indications from simulator (for testing)"""
-            try:
-                data = request.get_json()
-                if not data:
-                    return jsonify({"error": "No data provided"}), 400
+            return indication_response(self.admission, self._handle_indication)
 
-                # Process the indication using the existing handler
-                self._handle_indication(json.dumps(data))
-
-                return jsonify({
-                    "status": "success",
-                    "message": "Indication processed"
-                }), 200
-
-            except Exception as e:
-                logger.error(f"Error processing E2 indication: {e}")
-                return jsonify({"error": str(e)}), 500
+        @app.route('/e2/indication/batch', methods=['POST'])
+        def e2_indication_batch():
+            """Receive a batch of E2 indications (JSON array or NDJSON, optionally gzip)"""
+            return indication_batch_response(self.admission, self._handle_indication)
 
-        app.run(host='0.0.0.0', port=self.config['http_port'])
+        self.http_server.serve_forever()
     
     def stop(self):
         """Stop the xApp"""
         logger.info("Stopping RAN Control xApp...")
         self.running = False
-        if self.xapp:
-            self.xapp.stop()
+        self.http_server.stop()
+        self.messenger.stop()
         logger.info("RAN Control xApp stopped")
 
 
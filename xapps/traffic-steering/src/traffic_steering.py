@@ -24,6 +24,10 @@ from prometheus_client import Counter, Gauge, generate_latest, CONTENT_TYPE_LATE
 
 # Import dual-path messenger
 from dual_path_messenger import DualPathMessenger, EndpointConfig, CommunicationPath
+from indication_codec import E2Indication, decode_indication
+from admission_control import AdmissionController
+from indication_routes import indication_response, indication_batch_response
+from http_server import XappHTTPServer
 
 # Configure logging
 logger = Logger(name="traffic_steering_xapp")
@@ -128,10 +132,20 @@ class TrafficSteeringXapp:
             load_threshold=handover_config.get('load_threshold', 0.8)
         )
 
+        # Bounded concurrency/queue for the HTTP fallback indication route
+        self.admission = AdmissionController.from_config(self.config.get('admission'))
+
         # Initialize Flask app for health checks
         self.app = Flask(__name__)
         self._setup_routes()
 
+        # Production WSGI server for the Flask app
+        self.http_server = XappHTTPServer.from_config(
+            self.app, self.config.get('http_server'),
+            port=self.config.get('http_port', 8081), name='traffic-steering',
+            busy_threads=self.admission.max_threads
+        )
+
         logger.info("Traffic Steering xApp initialized with dual-path communication")
 
     def _register_endpoints(self):
@@ -212,22 +226,12 @@ class TrafficSteeringXapp:
         @self.app.route('/e2/indication', methods=['POST'])
         def e2_indication():
             """Receive E2 indications from simulator (for testing)"""
-            try:
-                data = request.get_json()
-                if not data:
-                    return jsonify({"error": "No data provided"}), 400
+            return indication_response(self.admission, self._handle_indication_http)
 
-                # Process the indication using the same handler
-                self._handle_indication_http(data)
-
-                return jsonify({
-                    "status": "success",
-                    "message": "Indication processed"
-                }), 200
-
-            except Exception as e:
-                logger.error(f"Error processing E2 indication: {e}")
-                return jsonify({"error": str(e)}), 500
+        @self.app.route('/e2/indication/batch', methods=['POST'])
+        def e2_indication_batch():
+            """Receive a batch of E2 indications (JSON array or NDJSON, optionally gzip)"""
+            return indication_batch_response(self.admission, self._handle_indication_http)
 
     def _handle_message_internal(self, xapp, summary: dict, sbuf):
         """Internal message handler for DualPathMessenger"""
@@ -253,20 +257,18 @@ class TrafficSteeringXapp:
         # Increment E2 indication counter
         ts_e2_indications_received_total.inc()
 
-        # Parse E2SM-KPM indication
+        # Parse E2SM-KPM indication directly from the RMR buffer bytes
         try:
-            # Extract payload from RMR buffer
             if sbuf:
-                payload_bytes = rmr.get_payload(sbuf)
-                payload = json.loads(payload_bytes.decode('utf-8'))
+                indication = decode_indication(rmr.get_payload(sbuf))
             else:
-                payload = json.loads(summary.get('payload', '{}'))
+                indication = decode_indication(summary.get('payload', '{}'))
         except Exception as e:
             logger.error(f"Failed to parse indication payload: {e}")
             return
 
         # Extract UE metrics
-        for ue_data in payload.get('ue_list', []):
+        for ue_data in indication.ue_list:
             ue_metrics = UEMetrics(
                 ue_id=ue_data['ue_id'],
                 serving_cell=ue_data['serving_cell'],
@@ -292,7 +294,7 @@ class TrafficSteeringXapp:
             # Evaluate handover decision
             self._evaluate_handover(ue_metrics)
 
-    def _handle_indication_http(self, data: dict):
+    def _handle_indication_http(self, indication: E2Indication):
         """Process E2 Indication from HTTP endpoint (for testing)"""
 
         # Increment E2 indication counter
@@ -301,9 +303,9 @@ class TrafficSteeringXapp:
         # Extract UE metrics from the data
         # Expected format: {'cell_id': 'cell_001', 'ue_id': 'ue_001', 'measurements': [...]}
         try:
-            cell_id = data.get('cell_id', 'unknown')
-            ue_id = data.get('ue_id', 'unknown')
-            measurements = data.get('measurements', [])
+            cell_id = indication.get('cell_id', 'unknown')
+            ue_id = indication.get('ue_id', 'unknown')
+            measurements = indication.measurements
 
             # Parse measurements into UE metrics
             rsrp = -100.0
@@ -575,13 +577,8 @@ class TrafficSteeringXapp:
         logger.info("Starting Traffic Steering xApp (Release J - Dual-Path)")
         self.running = True
 
-        # Start Flask health check server in background thread
-        http_port = self.config.get('http_port', 8081)
-        flask_thread = Thread(
-            target=lambda: self.app.run(host='0.0.0.0', port=http_port)
-        )
-        flask_thread.daemon = True
-        flask_thread.start()
+        # Start HTTP server (health checks, metrics, E2 fallback) in background thread
+        self.http_server.start()
 
         # Initialize RMR through DualPathMessenger
         rmr_initialized = self.messenger.initialize_rmr(use_fake_sdl=False)
@@ -619,6 +616,7 @@ class TrafficSteeringXapp:
         """Stop the xApp"""
         logger.info("Stopping Traffic Steering xApp...")
         self.running = False
+        self.http_server.stop()
         self.messenger.stop()
         logger.info("Traffic Steering xApp stopped")
 